@@ -1,9 +1,10 @@
 """
 Deduplication Service (Strategy 12).
 
-Implements a two-pass system to eliminate exact and semantic duplicates.
+Implements a three-pass system to eliminate exact, near and semantic duplicates.
 1. Exact Match: Hash-based (content_hash)
-2. Semantic Match: Vector-based (cosine similarity)
+2. Near Match: MinHash band lookup (content_minhash), no embedding needed
+3. Semantic Match: Vector-based (cosine similarity)
 """
 
 import hashlib
@@ -14,6 +15,7 @@ from dataclasses import dataclass
 from khala.domain.memory.entities import Memory
 from khala.domain.memory.value_objects import EmbeddingVector
 from khala.infrastructure.surrealdb.client import SurrealDBClient
+from khala.infrastructure.vector.minhash import TextSignature, text_signature
 
 logger = logging.getLogger(__name__)
 
@@ -22,14 +24,22 @@ class DuplicateResult:
     is_duplicate: bool
     duplicate_of_id: Optional[str] = None
     similarity_score: float = 0.0
-    duplicate_type: str = "none"  # "exact", "semantic", "none"
+    duplicate_type: str = "none"  # "exact", "near", "semantic", "none"
 
 class DeduplicationService:
     """Service for detecting and handling duplicate memories."""
 
-    def __init__(self, db_client: SurrealDBClient, semantic_threshold: float = 0.98):
+    def __init__(
+        self,
+        db_client: SurrealDBClient,
+        semantic_threshold: float = 0.98,
+        near_threshold: float = 0.8,
+        near_candidate_limit: int = 20
+    ):
         self.db_client = db_client
         self.semantic_threshold = semantic_threshold
+        self.near_threshold = near_threshold
+        self.near_candidate_limit = near_candidate_limit
 
     def compute_hash(self, content: str, user_id: str) -> str:
         """Compute SHA256 hash of content + user_id."""
@@ -57,13 +67,50 @@ class DeduplicationService:
 
             return None
 
+    async def check_near_duplicate(
+        self,
+        signature: TextSignature,
+        user_id: str,
+        exclude_id: Optional[str] = None
+    ) -> Tuple[Optional[str], float]:
+        """Check for a near-verbatim duplicate by MinHash band lookup.
+
+        One indexed query fetches memories sharing any band key; their
+        stored signatures estimate the Jaccard similarity of the content.
+        """
+        query = """
+        SELECT id, content_minhash FROM memory
+        WHERE content_minhash_bands CONTAINSANY $bands AND user_id = $user_id AND is_archived = false
+        LIMIT $limit;
+        """
+        params = {"bands": signature.bands, "user_id": user_id, "limit": self.near_candidate_limit}
+
+        async with self.db_client.get_connection() as conn:
+            response = await conn.query(query, params)
+
+        items = response or []
+        if isinstance(items, list) and len(items) > 0 and isinstance(items[0], dict) and 'result' in items[0]:
+            items = items[0]['result'] or []
+
+        best_id, best_score = None, 0.0
+        for item in items:
+            if not isinstance(item, dict) or not item.get('content_minhash') or 'id' not in item:
+                continue
+            candidate_id = self._clean_id(item['id'])
+            if candidate_id == exclude_id:
+                continue
+            score = signature.similarity(item['content_minhash'])
+            if score >= self.near_threshold and score > best_score:
+                best_id, best_score = candidate_id, score
+        return best_id, best_score
+
     async def check_semantic_duplicate(
         self,
         embedding: EmbeddingVector,
         user_id: str
     ) -> Tuple[Optional[str], float]:
         """Check for semantic duplicate using vector similarity."""
-        if not embedding or not embedding.values:
+        if not embedding or len(embedding.values) == 0:
             return None, 0.0
 
         # Use search_memories_by_vector with very high threshold
@@ -102,7 +149,21 @@ class DeduplicationService:
                 duplicate_type="exact"
             )
 
-        # 2. Semantic Match
+        # 2. Near Match (before any embedding or LLM call)
+        signature = text_signature(memory.content, scope=memory.user_id)
+        if signature:
+            near_match_id, score = await self.check_near_duplicate(signature, memory.user_id, exclude_id=memory.id)
+
+            if near_match_id:
+                logger.info(f"Near duplicate detected: {memory.id} -> {near_match_id} (score: {score})")
+                return DuplicateResult(
+                    is_duplicate=True,
+                    duplicate_of_id=near_match_id,
+                    similarity_score=score,
+                    duplicate_type="near"
+                )
+
+        # 3. Semantic Match
         if memory.embedding:
             semantic_match_id, score = await self.check_semantic_duplicate(
                 memory.embedding,
@@ -94,6 +94,16 @@ class EntityRelationship:
     extracted_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
 
 
+def match_entity_patterns(patterns: Dict["EntityType", List[str]], text: str) -> List[Tuple["EntityType", str, int, int]]:
+    """``(entity_type, text, start, end)`` for every regex match; module-level so it can run in an execution lane."""
+    return [
+        (entity_type, match.group(0), match.start(), match.end())
+        for entity_type, type_patterns in patterns.items()
+        for pattern in type_patterns
+        for match in re.finditer(pattern, text)
+    ]
+
+
 class EntityExtractionService:
     """Service for extracting entities using Gemini API."""
     
@@ -103,7 +113,8 @@ class EntityExtractionService:
         cache_ttl_seconds: int = 3600,
         batch_size: int = 10,
         max_concurrent: int = 4,
-        confidence_threshold: float = 0.5
+        confidence_threshold: float = 0.5,
+        compute: Optional[Any] = None
     ):
         """Initialize entity extraction service.
         
@@ -113,12 +124,14 @@ class EntityExtractionService:
             batch_size: Maximum batch size for processing
             max_concurrent: Maximum concurrent extractions
             confidence_threshold: Minimum confidence for entity acceptance
+            compute: Execution lane for the regex fallback (inline when None)
         """
         self.api_key = api_key
         self.cache_ttl_seconds = cache_ttl_seconds
         self.batch_size = batch_size
         self.max_concurrent = max_concurrent
         self.confidence_threshold = confidence_threshold
+        self.compute = compute
         
         # Initialize Gemini client
         self._initialize_gemini()
@@ -406,26 +419,27 @@ Return only the JSON object, no explanation.
         """Fallback extraction using regex patterns."""
         entities = []
         
-        for entity_type, patterns in self._entity_patterns.items():
-            for pattern in patterns:
-                for match in re.finditer(pattern, text):
-                    entity_text = match.group(0)
-                    
-                    # Calculate basic confidence based on pattern quality
-                    confidence = self._calculate_pattern_confidence(entity_text, entity_type)
-                    
-                    entity = ExtractedEntity(
-                        text=entity_text,
-                        entity_type=entity_type,
-                        confidence=confidence,
-                        start_pos=match.start(),
-                        end_pos=match.end(),
-                        metadata={
-                            "extraction_method": "regex_fallback"
-                        },
-                        extraction_method="regex_fallback"
-                    )
-                    entities.append(entity)
+        if self.compute is None:
+            matches = match_entity_patterns(self._entity_patterns, text)
+        else:
+            matches = await self.compute.run(match_entity_patterns, self._entity_patterns, text)
+        
+        for entity_type, entity_text, start, end in matches:
+            # Calculate basic confidence based on pattern quality
+            confidence = self._calculate_pattern_confidence(entity_text, entity_type)
+            
+            entity = ExtractedEntity(
+                text=entity_text,
+                entity_type=entity_type,
+                confidence=confidence,
+                start_pos=start,
+                end_pos=end,
+                metadata={
+                    "extraction_method": "regex_fallback"
+                },
+                extraction_method="regex_fallback"
+            )
+            entities.append(entity)
         
         # Remove duplicates and sort by confidence
         unique_entities = {}
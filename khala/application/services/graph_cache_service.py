@@ -23,27 +23,21 @@ class GraphCacheService:
         path: List[Dict[str, Any]],
         ttl_minutes: int = 60
     ) -> None:
-        """Cache a graph path."""
-        cache_id = self._generate_cache_key(start_node, end_node)
+        """Cache a graph path.
 
-        expires_at = datetime.now(timezone.utc) + timedelta(minutes=ttl_minutes)
+        ``create_cache_entry`` replaces an existing entry, so no read is needed first.
+        """
+        cache_id = self._generate_cache_key(start_node, end_node)
 
-        existing = await self.db_client.get_cache_entry(cache_id)
-        if existing:
-             await self.db_client.update_cache_entry(cache_id, {
-                 "value": {"path": path},
-                 "expires_at": expires_at.isoformat(),
-                 "created_at": datetime.now(timezone.utc).isoformat()
-             })
-        else:
-             await self.db_client.create_cache_entry(
-                 id=cache_id,
-                 value={"path": path},
-                 created_at=datetime.now(timezone.utc),
-                 expires_at=expires_at,
-                 access_count=0,
-                 metadata={"type": "graph_path", "start": start_node, "end": end_node}
-             )
+        now = datetime.now(timezone.utc)
+        await self.db_client.create_cache_entry(
+            id=cache_id,
+            value={"path": path},
+            created_at=now,
+            expires_at=now + timedelta(minutes=ttl_minutes),
+            access_count=0,
+            metadata={"type": "graph_path", "start": start_node, "end": end_node}
+        )
 
     async def get_cached_path(self, start_node: str, end_node: str) -> Optional[List[Dict[str, Any]]]:
         """Retrieve a cached path if valid."""
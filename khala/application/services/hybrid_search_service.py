@@ -1,14 +1,18 @@
 from typing import List, Dict, Any, Optional
 import logging
 import asyncio
-import re
-from khala.domain.memory.repository import MemoryRepository
+import time
+from khala.domain.memory.repository import MemoryProjection, MemoryRepository
 from khala.domain.ports.embedding_service import EmbeddingService
 from khala.domain.memory.entities import Memory, EmbeddingVector
 from khala.application.services.query_expansion_service import QueryExpansionService
 from khala.application.services.intent_classifier import IntentClassifier, QueryIntent
 from khala.application.services.translation_service import TranslationService
+from khala.application.services.rank_fusion import BoostSignal, ProximityScorer, RankFusion
+from khala.application.services.search_pipeline import StageBudgets, StageTimer
 from khala.infrastructure.surrealdb.client import SurrealDBClient
+from khala.infrastructure.cache.cache_manager import CacheManager
+from khala.infrastructure.cache.semantic_cache import SemanticResultCache
 
 logger = logging.getLogger(__name__)
 
@@ -23,7 +27,13 @@ class HybridSearchService:
         query_expansion_service: Optional[QueryExpansionService] = None,
         intent_classifier: Optional[IntentClassifier] = None,
         translation_service: Optional[TranslationService] = None,
-        db_client: Optional[SurrealDBClient] = None
+        db_client: Optional[SurrealDBClient] = None,
+        result_cache: Optional[SemanticResultCache] = None,
+        fusion: Optional[RankFusion] = None,
+        projection: MemoryProjection = MemoryProjection.SUMMARY,
+        speculative: bool = False,
+        stage_budgets: Optional[StageBudgets] = None,
+        cache_manager: Optional[CacheManager] = None
     ):
         self.memory_repo = memory_repository
         self.embedding_service = embedding_service
@@ -31,6 +41,27 @@ class HybridSearchService:
         self.intent_classifier = intent_classifier
         self.translation_service = translation_service
         self.db_client = db_client
+        # A CacheManager lends its semantic cache, whose stats it reports in get_metrics()
+        if result_cache is None and cache_manager is not None:
+            result_cache = cache_manager.semantic_cache
+        self.result_cache = result_cache
+        self.fusion = fusion or RankFusion()
+        # Ranking reads ids, content and timestamps; embeddings load on demand
+        self.projection = projection
+        # Speculative mode: retrieve for the raw query while LLM stages run under deadlines
+        self.speculative = speculative
+        self.stage_budgets = stage_budgets or StageBudgets()
+        self.stage_timer = StageTimer()
+
+        # Drop a user's cached rankings whenever their memories are written
+        if result_cache is not None:
+            client = db_client or getattr(memory_repository, 'client', None)
+            if isinstance(client, SurrealDBClient):
+                client.register_memory_write_hook(result_cache.on_memory_write)
+
+    def register_boost_signal(self, signal: BoostSignal) -> None:
+        """Add a reranking signal; it returns one boost per fused candidate."""
+        self.fusion.add_signal(signal)
 
     def get_search_params_for_intent(self, intent: str) -> Dict[str, Any]:
         """
@@ -68,62 +99,154 @@ class HybridSearchService:
 
         return params
 
+    def _apply_intent(self, intent_res: Optional[Dict[str, Any]], vector_weight: float, bm25_weight: float,
+                      enable_graph_reranking: bool) -> tuple:
+        """Fusion weights and graph flag adjusted for a classified intent."""
+        intent = (intent_res or {}).get("intent")
+        if intent:
+            params = self.get_search_params_for_intent(intent)
+            # Override defaults if they weren't explicitly customized
+            if vector_weight == 1.0 and bm25_weight == 1.0:
+                vector_weight = params.get("vector_weight", vector_weight)
+                bm25_weight = params.get("bm25_weight", bm25_weight)
+                if params.get("enable_graph_reranking"):
+                     enable_graph_reranking = True
+
+            logger.info(f"Auto-detected intent '{intent}'. Adjusted weights: V={vector_weight}, BM25={bm25_weight}")
+        return vector_weight, bm25_weight, enable_graph_reranking
+
+    def _uses_local_intent(self, auto_detect_intent: bool) -> bool:
+        """Whether intent detection runs on the query embedding."""
+        return auto_detect_intent and getattr(self.intent_classifier, "local_model", None) is not None
+
+    def _classify_intent(self, query: str, embedding: Optional[EmbeddingVector]):
+        """Intent classification awaitable; passes the embedding only to local-capable classifiers."""
+        if embedding is not None and getattr(self.intent_classifier, "local_model", None) is not None:
+            return self.intent_classifier.classify_intent(query, embedding=embedding)
+        return self.intent_classifier.classify_intent(query)
+
+    async def _fetch_vector(self, q_text: str, user_id: str, top_k: int, filters: Optional[Dict[str, Any]],
+                            embedding: Optional[EmbeddingVector] = None) -> List[Memory]:
+        try:
+            if embedding is None:
+                embedding = await self.embedding_service.get_embedding(q_text)
+            return await self.memory_repo.search_by_vector(
+                embedding=embedding,
+                user_id=user_id,
+                top_k=top_k,
+                filters=filters,
+                projection=self.projection
+            )
+        except Exception as e:
+            logger.error(f"Vector search failed for query '{q_text}': {e}")
+            return []
+
+    async def _fetch_bm25(self, q_text: str, user_id: str, top_k: int,
+                          filters: Optional[Dict[str, Any]]) -> List[Memory]:
+        try:
+            return await self.memory_repo.search_by_text(
+                query_text=q_text,
+                user_id=user_id,
+                top_k=top_k,
+                filters=filters,
+                projection=self.projection
+            )
+        except Exception as e:
+            logger.error(f"BM25 search failed for query '{q_text}': {e}")
+            return []
+
+    async def _fetch_both(self, q_text: str, user_id: str, top_k: int, filters: Optional[Dict[str, Any]],
+                          embedding: Optional[EmbeddingVector] = None) -> tuple:
+        """(vector, bm25) candidates for one query text."""
+        return tuple(await asyncio.gather(
+            self._fetch_vector(q_text, user_id, top_k, filters, embedding),
+            self._fetch_bm25(q_text, user_id, top_k, filters)
+        ))
+
+    async def _speculative_candidates(
+        self,
+        query: str,
+        user_id: str,
+        candidate_k: int,
+        filters: Optional[Dict[str, Any]],
+        query_embedding: Optional[EmbeddingVector],
+        expand_query: bool,
+        auto_detect_intent: bool
+    ) -> Dict[str, Any]:
+        """Raw-query retrieval plus whatever LLM stages finish within their budgets.
+
+        Intent, translation and expansion start together with retrieval for
+        the raw query. Expansion works on the raw query rather than on its
+        translation, so it does not wait for translation.
+        """
+        budgets = self.stage_budgets
+        timer = self.stage_timer
+        started = time.monotonic()
+
+        async def _intent() -> Optional[Dict[str, Any]]:
+            if not (auto_detect_intent and self.intent_classifier):
+                return None
+            result = await timer.run("intent", self._classify_intent(query, query_embedding),
+                                     started + budgets.intent)
+            if result is not None:
+                timer.used("intent")
+            return result
+
+        async def _translated() -> tuple:
+            if not self.translation_service:
+                return None, [], None
+            result = await timer.run("translation", self.translation_service.detect_and_translate(query),
+                                     started + budgets.translation)
+            if not result or not result.get("was_translated"):
+                if result is not None:
+                    timer.skipped("translation")
+                return None, [], result
+            text = result.get("translated_text")
+            logger.info(f"Translated query: '{query}' -> '{text}' ({result.get('detected_language')})")
+            lists = await timer.run("translation", self._fetch_both(text, user_id, candidate_k, filters),
+                                    time.monotonic() + budgets.retrieval)
+            if lists is None:
+                return None, [], result
+            timer.used("translation")
+            return text, [lists], result
+
+        async def _expanded() -> tuple:
+            if not (expand_query and self.query_expansion_service):
+                return [], []
+            variants = await timer.run("expansion", self.query_expansion_service.expand_query(query),
+                                       started + budgets.expansion)
+            variants = [v for v in (variants or []) if v != query]
+            if not variants:
+                return [], []
+            lists = await timer.run("expansion", asyncio.gather(
+                *(self._fetch_both(v, user_id, candidate_k, filters) for v in variants)
+            ), time.monotonic() + budgets.retrieval)
+            if lists is None:
+                return [], []
+            timer.used("expansion")
+            return variants, list(lists)
+
+        raw, intent_res, (translated, translated_lists, translation), (variants, variant_lists) = await asyncio.gather(
+            self._fetch_both(query, user_id, candidate_k, filters, query_embedding),
+            _intent(), _translated(), _expanded()
+        )
+
+        candidate_lists = [raw] + translated_lists + variant_lists
+        return {
+            "intent": intent_res,
+            "translation": translation,
+            "search_query": translated or query,
+            "queries": [query] + ([translated] if translated else []) + variants,
+            "vector": [m for vector, _ in candidate_lists for m in vector],
+            "bm25": [m for _, bm25 in candidate_lists for m in bm25],
+        }
+
     def _calculate_proximity_score(self, content: str, query_terms: List[str], window_size: int = 10) -> float:
         """
         Calculate a score based on how close query terms are in the content.
         Strategy 97: Contextual Search (Proximity).
         """
-        if not content or len(query_terms) < 2:
-            return 0.0
-
-        # Normalize
-        text = content.lower()
-        terms = [t.lower() for t in query_terms if len(t) > 2] # Ignore short words
-
-        if len(terms) < 2:
-            return 0.0
-
-        # Find positions of all terms
-        positions = []
-        for term in terms:
-            term_positions = [m.start() for m in re.finditer(re.escape(term), text)]
-            if not term_positions:
-                # If a significant term is missing, proximity doesn't apply for the full set
-                # But we can check for partial proximity if we have at least 2 other terms
-                continue
-            positions.append(term_positions)
-
-        if len(positions) < 2:
-            return 0.0
-
-        # Check minimum distance between any pair of different terms
-        min_dist = float('inf')
-        found_pair = False
-
-        for i in range(len(positions)):
-            for j in range(i + 1, len(positions)):
-                pos_list_a = positions[i]
-                pos_list_b = positions[j]
-
-                for p_a in pos_list_a:
-                    for p_b in pos_list_b:
-                        dist = abs(p_a - p_b)
-                        if dist < min_dist:
-                            min_dist = dist
-                            found_pair = True
-
-        if not found_pair:
-            return 0.0
-
-        # Convert char distance to approx word distance (avg 6 chars/word incl space)
-        word_dist = min_dist / 6.0
-
-        if word_dist <= window_size:
-            # Boost score: closer is better.
-            # Max boost 0.3 for very close, decaying to 0 at window_size
-            return 0.3 * (1.0 - (word_dist / window_size))
-
-        return 0.0
+        return ProximityScorer(query_terms, window_size=window_size).score(content)
 
     async def search(
         self,
@@ -137,7 +260,8 @@ class HybridSearchService:
         expand_query: bool = False,
         enable_graph_reranking: bool = False,
         auto_detect_intent: bool = True,
-        context: Optional[Dict[str, Any]] = None
+        context: Optional[Dict[str, Any]] = None,
+        speculative: Optional[bool] = None
     ) -> List[Memory]:
         """
         Perform hybrid search using Reciprocal Rank Fusion (RRF).
@@ -153,177 +277,122 @@ class HybridSearchService:
             enable_graph_reranking: Whether to apply graph distance reranking (Strategy 121).
             auto_detect_intent: Whether to use IntentClassifier to adjust weights dynamically.
             context: Contextual parameters for boosting (Strategy 97).
+            speculative: Retrieve for the raw query while intent, translation and expansion
+                run under ``stage_budgets``; defaults to the service's ``speculative`` setting.
 
         Returns:
             List of unique Memory objects sorted by RRF score.
         """
-        # 0. Intent Detection (Optional)
-        if auto_detect_intent and self.intent_classifier:
+        started = time.perf_counter()
+        if speculative is None:
+            speculative = self.speculative
+
+        # Semantic result cache: near-identical queries reuse the fused ranking
+        cache_scope: Optional[str] = None
+        cache_generation = 0
+        query_embedding: Optional[EmbeddingVector] = None
+        if self.result_cache is not None:
+            cache_scope = self.result_cache.make_scope(
+                filters, top_k=top_k, rrf_k=rrf_k, vector_weight=vector_weight,
+                bm25_weight=bm25_weight, expand_query=expand_query,
+                enable_graph_reranking=enable_graph_reranking,
+                auto_detect_intent=auto_detect_intent, context=context, speculative=speculative
+            )
+            cache_generation = self.result_cache.generation(user_id)
             try:
-                intent_res = await self.intent_classifier.classify_intent(query)
-                intent = intent_res.get("intent")
-                if intent:
-                    params = self.get_search_params_for_intent(intent)
-                    # Override defaults if they weren't explicitly customized
-                    if vector_weight == 1.0 and bm25_weight == 1.0:
-                        vector_weight = params.get("vector_weight", vector_weight)
-                        bm25_weight = params.get("bm25_weight", bm25_weight)
-                        if params.get("enable_graph_reranking"):
-                             enable_graph_reranking = True
-
-                    logger.info(f"Auto-detected intent '{intent}'. Adjusted weights: V={vector_weight}, BM25={bm25_weight}")
+                query_embedding = await self.embedding_service.get_embedding(query)
+                cached = self.result_cache.lookup(user_id, cache_scope, query_embedding)
+                if cached is not None:
+                    return cached
             except Exception as e:
-                logger.warning(f"Auto-intent detection failed: {e}")
-
-        # 0.5 Multilingual Support (Strategy 95)
-        search_query = query
-        if self.translation_service:
-            trans_result = await self.translation_service.detect_and_translate(query)
-            if trans_result.get("was_translated"):
-                search_query = trans_result.get("translated_text")
-                logger.info(f"Translated query: '{query}' -> '{search_query}' ({trans_result.get('detected_language')})")
-
-        # 0.1 Query Expansion
-        expanded_queries = [search_query]
-        if expand_query and self.query_expansion_service:
-            expanded_queries = await self.query_expansion_service.expand_query(search_query)
-
-        # 1. Fetch candidates in parallel for all queries
-        # We fetch top_k * 2 candidates from each source to ensure good fusion overlap
-        candidate_k = top_k * 2
+                logger.warning(f"Semantic cache lookup failed: {e}")
+                cache_scope = None
 
-        all_vector_results: List[Memory] = []
-        all_bm25_results: List[Memory] = []
-
-        async def _fetch_vector(q_text: str) -> List[Memory]:
+        # The local intent model reads the query embedding; vector search reuses it
+        if query_embedding is None and self._uses_local_intent(auto_detect_intent):
             try:
-                embedding = await self.embedding_service.get_embedding(q_text)
-                return await self.memory_repo.search_by_vector(
-                    embedding=embedding,
-                    user_id=user_id,
-                    top_k=candidate_k,
-                    filters=filters
-                )
+                query_embedding = await self.embedding_service.get_embedding(query)
             except Exception as e:
-                logger.error(f"Vector search failed for query '{q_text}': {e}")
-                return []
+                logger.warning(f"Query embedding failed: {e}")
 
-        async def _fetch_bm25(q_text: str) -> List[Memory]:
-            try:
-                return await self.memory_repo.search_by_text(
-                    query_text=q_text,
-                    user_id=user_id,
-                    top_k=candidate_k,
-                    filters=filters
-                )
-            except Exception as e:
-                logger.error(f"BM25 search failed for query '{q_text}': {e}")
-                return []
-
-        # Gather all tasks: 2 tasks per query (Vector + BM25)
-        # Strategy 123: Parallel Search Execution
-        tasks = []
-        for q in expanded_queries:
-            tasks.append(_fetch_vector(q))
-            tasks.append(_fetch_bm25(q))
-
-        results = await asyncio.gather(*tasks)
-
-        # Separate results back into vector and bm25 lists
-        # Order is [V1, B1, V2, B2, ...]
-        for i in range(0, len(results), 2):
-            all_vector_results.extend(results[i])
-            all_bm25_results.extend(results[i+1])
+        # We fetch top_k * 2 candidates from each source to ensure good fusion overlap
+        candidate_k = top_k * 2
+        intent_res: Optional[Dict[str, Any]] = None
+        trans_result: Optional[Dict[str, Any]] = None
+
+        if speculative:
+            candidates = await self._speculative_candidates(
+                query, user_id, candidate_k, filters, query_embedding, expand_query, auto_detect_intent
+            )
+            intent_res, trans_result = candidates["intent"], candidates["translation"]
+            vector_weight, bm25_weight, enable_graph_reranking = self._apply_intent(
+                intent_res, vector_weight, bm25_weight, enable_graph_reranking
+            )
+            search_query = candidates["search_query"]
+            expanded_queries = candidates["queries"]
+            all_vector_results: List[Memory] = candidates["vector"]
+            all_bm25_results: List[Memory] = candidates["bm25"]
+        else:
+            # 0. Intent Detection (Optional)
+            if auto_detect_intent and self.intent_classifier:
+                try:
+                    intent_res = await self._classify_intent(query, query_embedding)
+                    vector_weight, bm25_weight, enable_graph_reranking = self._apply_intent(
+                        intent_res, vector_weight, bm25_weight, enable_graph_reranking
+                    )
+                except Exception as e:
+                    logger.warning(f"Auto-intent detection failed: {e}")
+
+            # 0.5 Multilingual Support (Strategy 95)
+            search_query = query
+            if self.translation_service:
+                trans_result = await self.translation_service.detect_and_translate(query)
+                if trans_result.get("was_translated"):
+                    search_query = trans_result.get("translated_text")
+                    logger.info(f"Translated query: '{query}' -> '{search_query}' ({trans_result.get('detected_language')})")
+
+            # 0.1 Query Expansion
+            expanded_queries = [search_query]
+            if expand_query and self.query_expansion_service:
+                expanded_queries = await self.query_expansion_service.expand_query(search_query)
+
+            # 1. Fetch candidates in parallel for all queries
+            all_vector_results = []
+            all_bm25_results = []
+
+            # Gather all tasks: Vector + BM25 per query
+            # Strategy 123: Parallel Search Execution
+            results = await asyncio.gather(*(
+                self._fetch_both(q, user_id, candidate_k, filters, query_embedding if q == query else None)
+                for q in expanded_queries
+            ))
+            for vector_results, bm25_results in results:
+                all_vector_results.extend(vector_results)
+                all_bm25_results.extend(bm25_results)
 
         if not all_vector_results and not all_bm25_results:
             return []
 
-        # 2. Compute RRF Scores
-        scores: Dict[str, float] = {}
-        memories: Dict[str, Memory] = {}
-
-        # Process Vector Results
-        seen_vector_ids = set()
-        unique_vector_results = []
-        for m in all_vector_results:
-            if m.id not in seen_vector_ids:
-                seen_vector_ids.add(m.id)
-                unique_vector_results.append(m)
-
-        for rank, memory in enumerate(unique_vector_results):
-            memories[memory.id] = memory
-            scores[memory.id] = scores.get(memory.id, 0.0) + \
-                (vector_weight * (1.0 / (rrf_k + rank + 1)))
-
-        # Process BM25 Results
-        seen_bm25_ids = set()
-        unique_bm25_results = []
-        for m in all_bm25_results:
-            if m.id not in seen_bm25_ids:
-                seen_bm25_ids.add(m.id)
-                unique_bm25_results.append(m)
-
-        for rank, memory in enumerate(unique_bm25_results):
-            memories[memory.id] = memory
-            scores[memory.id] = scores.get(memory.id, 0.0) + \
-                (bm25_weight * (1.0 / (rrf_k + rank + 1)))
-
-        # 3. Sort by Score
-        sorted_ids = sorted(scores.keys(), key=lambda x: scores[x], reverse=True)
-
-        final_results = [memories[mid] for mid in sorted_ids]
+        # 2. Reciprocal Rank Fusion over all vector and BM25 candidates
+        fused = self.fusion.fuse(
+            [(all_vector_results, vector_weight), (all_bm25_results, bm25_weight)], rrf_k=rrf_k
+        )
+        final_results = fused.memories
 
         # Access client safely
         client_to_use = self.db_client
         if not client_to_use and hasattr(self.memory_repo, 'client'):
             client_to_use = self.memory_repo.client
 
-        # 4. Contextual Boosting (Strategy 97)
-        # Apply boosts based on context (time, location, etc.)
-        context_boost_scores = [0.0] * len(final_results)
+        # 3. Contextual Boosting (Strategy 97): temporal, episode, proximity and plugged-in signals
+        proximity = ProximityScorer(search_query.split())
+        context_boost_scores = self.fusion.context_boosts(fused, context, proximity)
 
-        # Pre-calculate query terms for proximity check
-        query_terms = search_query.split()
-
-        if context:
-            try:
-                from datetime import datetime
-                # Temporal Proximity
-                current_time = context.get('current_time')
-                if current_time:
-                    if isinstance(current_time, str):
-                        current_time = datetime.fromisoformat(current_time)
-
-                    for i, m in enumerate(final_results):
-                        if m.created_at:
-                            age_seconds = (current_time - m.created_at).total_seconds()
-                            if age_seconds < 3600: # 1 hour
-                                context_boost_scores[i] += 0.2
-                            elif age_seconds < 86400: # 1 day
-                                context_boost_scores[i] += 0.1
-
-                # Episode Proximity
-                active_episode_id = context.get('episode_id')
-                if active_episode_id:
-                     for i, m in enumerate(final_results):
-                         if m.episode_id == active_episode_id:
-                             context_boost_scores[i] += 0.15
-
-            except Exception as e:
-                logger.warning(f"Contextual boosting failed: {e}")
-
-        # Proximity Logic (Task 97: Contextual Search Proximity)
-        # We calculate proximity score for every result
-        for i, m in enumerate(final_results):
-            if m.content:
-                prox_score = self._calculate_proximity_score(m.content, query_terms)
-                if prox_score > 0:
-                    context_boost_scores[i] += prox_score
-
-        if (enable_graph_reranking and client_to_use and final_results) or any(s > 0 for s in context_boost_scores):
+        # 4. Graph reranking (Strategy 121)
+        if (enable_graph_reranking and client_to_use and final_results) or \
+                self.fusion.has_boost(fused, context_boost_scores):
             try:
                 anchor_id = final_results[0].id
-                anchor_episode = final_results[0].episode_id
                 connected_ids = set()
 
                 if enable_graph_reranking:
@@ -351,23 +420,8 @@ class HybridSearchService:
                                     if item.get('to_entity_id') != clean_anchor_id:
                                         connected_ids.add(item.get('to_entity_id'))
 
-                reranked_scores = []
-                for i, m in enumerate(final_results):
-                    boost_score = context_boost_scores[i]
-
-                    if anchor_episode and m.episode_id == anchor_episode:
-                        boost_score += 0.15
-
-                    clean_m_id = m.id.split(":")[1] if ":" in m.id else m.id
-                    if clean_m_id in connected_ids:
-                        boost_score += 0.10
-
-                    reranked_scores.append(boost_score)
-
-                zipped = list(zip(final_results, reranked_scores))
-                zipped.sort(key=lambda x: x[1], reverse=True)
-
-                final_results = [m for m, score in zipped]
+                reranked_scores = self.fusion.graph_boosts(fused, context_boost_scores, connected_ids)
+                final_results = self.fusion.rerank(fused, reranked_scores)
 
                 logger.debug(f"Graph/Context reranking applied. Anchor: {anchor_id}, Connected: {len(connected_ids)}")
 
@@ -377,6 +431,13 @@ class HybridSearchService:
         # 5. Return top_k results
         final_results = final_results[:top_k]
 
+        if cache_scope is not None and query_embedding is not None:
+            self.result_cache.store(
+                user_id, cache_scope, query_embedding, final_results,
+                compute_ms=(time.perf_counter() - started) * 1000,
+                generation=cache_generation
+            )
+
         # 6. Log search session
         if client_to_use:
             try:
@@ -388,7 +449,13 @@ class HybridSearchService:
                     "results_count": len(final_results),
                     "metadata": {
                         "rrf_k": rrf_k,
-                        "graph_reranking": enable_graph_reranking
+                        "graph_reranking": enable_graph_reranking,
+                        # Labels for training the local query classifier
+                        "intent": (intent_res or {}).get("intent"),
+                        "intent_source": (intent_res or {}).get("source"),
+                        "intent_confidence": (intent_res or {}).get("confidence"),
+                        "detected_language": (trans_result or {}).get("detected_language"),
+                        "language_source": (trans_result or {}).get("source")
                     }
                 })
             except Exception as e:
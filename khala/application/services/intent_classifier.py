@@ -3,6 +3,7 @@ import logging
 import json
 from enum import Enum
 from khala.infrastructure.gemini.client import GeminiClient
+from khala.application.services.local_query_classifier import IntentCentroidModel
 
 logger = logging.getLogger(__name__)
 
@@ -18,21 +19,54 @@ class IntentClassifier:
     """
     Service for classifying the intent of a user's query.
     Strategy 30: Query Intent Classification.
+
+    With a ``local_model`` the query embedding is classified locally, and the
+    LLM is only asked when the local confidence is below ``min_confidence``.
     """
-    def __init__(self, gemini_client: GeminiClient):
+    def __init__(
+        self,
+        gemini_client: GeminiClient,
+        local_model: Optional[IntentCentroidModel] = None,
+        min_confidence: float = 0.6
+    ):
         self.gemini_client = gemini_client
-
-    async def classify_intent(self, query: str, context_history: Optional[List[str]] = None) -> Dict[str, Any]:
+        self.local_model = local_model
+        self.min_confidence = min_confidence
+        self.stats = {"local": 0, "llm": 0}
+
+    async def classify_intent(
+        self,
+        query: str,
+        context_history: Optional[List[str]] = None,
+        embedding: Optional[Any] = None
+    ) -> Dict[str, Any]:
         """
         Classify the user's query into a predefined intent category.
 
         Args:
             query: The user's query string.
             context_history: Optional list of previous interactions for context.
+            embedding: The query embedding, used by the local model if one is set.
 
         Returns:
-            Dictionary containing 'intent' (str), 'confidence' (float), and 'reasoning' (str).
+            Dictionary containing 'intent' (str), 'confidence' (float), 'reasoning' (str)
+            and 'source' ("local" or "llm").
         """
+        if self.local_model is not None and embedding is not None and not context_history:
+            try:
+                intent, confidence = self.local_model.predict(embedding)
+                if confidence >= self.min_confidence:
+                    self.stats["local"] += 1
+                    return {
+                        "intent": intent,
+                        "confidence": confidence,
+                        "reasoning": "Local nearest-centroid classifier",
+                        "source": "local"
+                    }
+            except ValueError as e:
+                logger.warning(f"Local intent model unusable for this embedding: {e}")
+
+        self.stats["llm"] += 1
         try:
             history_text = ""
             if context_history:
@@ -77,6 +111,7 @@ class IntentClassifier:
                 intent_str = "unknown"
 
             result["intent"] = intent_str
+            result["source"] = "llm"
             return result
 
         except Exception as e:
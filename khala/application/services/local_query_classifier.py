@@ -0,0 +1,405 @@
+"""
+Local query intent and language classification for the search hot path.
+
+``IntentClassifier`` and ``TranslationService`` call Gemini on every search
+only to choose a weight preset or to learn that a query is already in
+English. The models here answer both questions locally:
+
+- ``IntentCentroidModel`` maps the query embedding to one of the five
+  ``QueryIntent`` classes by cosine similarity to per-intent centroids.
+  Search computes that embedding anyway. Confidence is a softmax over the
+  similarities whose temperature is fitted on the training data.
+- ``LanguageDetector`` is a character 1-3 gram naive Bayes model. It ships
+  with a small seed corpus and can be extended with logged queries. Its
+  posterior is computed from the mean per-n-gram log-likelihood, because
+  raw naive Bayes posteriors are near 1.0 even for wrong guesses.
+
+Both report a confidence; callers fall back to the LLM below a threshold.
+Training data comes from ``search_session`` records, whose metadata keeps
+the intent and language the LLM assigned (``session_examples``). See
+``scripts/train_query_classifier.py`` and
+``scripts/evaluate_query_classifier.py``.
+"""
+
+import json
+import logging
+import math
+import re
+import unicodedata
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+INTENT_LABELS = ("factual", "summary", "analysis", "creative", "instruction")
+TEMPERATURES = (5.0, 10.0, 20.0, 40.0, 80.0, 160.0)
+
+LANGUAGE_NAMES = {
+    "en": "English",
+    "fr": "French",
+    "es": "Spanish",
+    "de": "German",
+    "it": "Italian",
+    "pt": "Portuguese",
+    "nl": "Dutch",
+}
+
+# Query-like seed sentences; enough for short queries, extend with logged data
+SEED_CORPUS: Dict[str, List[str]] = {
+    "en": [
+        "what did we decide about the database migration",
+        "summarize the meeting notes from last week",
+        "how does the authentication service handle expired tokens",
+        "show me everything related to the quarterly budget review",
+        "why did the deployment fail yesterday afternoon",
+        "write a short poem about the ocean at night",
+        "list the steps to reset a user password",
+        "who is responsible for the billing project and when is it due",
+        "find my notes about the customer feedback survey",
+        "explain the relationship between caching and latency",
+        "which tasks are still open for this sprint",
+        "remind me what the doctor said about my diet",
+        "compare the two proposals and recommend one",
+        "the weather was nice so we walked through the park",
+        "please create a checklist for the product launch",
+        "where did I put the contract for the new office",
+        "kubernetes cluster upgrade plan and rollback notes",
+        "action items from the sprint retrospective",
+        "invoice and pricing details from the vendor",
+        "project deadlines and milestones for the next release",
+        "postgres index tuning and slow query logs",
+        "onboarding checklist for new engineers",
+        "latest updates on the marketing campaign",
+        "bug report about the login page crashing on mobile",
+    ],
+    "fr": [
+        "qu'avons-nous décidé pour la migration de la base de données",
+        "résume les notes de la réunion de la semaine dernière",
+        "comment le service d'authentification gère les jetons expirés",
+        "montre-moi tout ce qui concerne la revue du budget trimestriel",
+        "pourquoi le déploiement a-t-il échoué hier après-midi",
+        "écris un court poème sur l'océan la nuit",
+        "quelles sont les étapes pour réinitialiser le mot de passe",
+        "qui est responsable du projet de facturation et pour quand",
+        "trouve mes notes sur l'enquête de satisfaction des clients",
+        "explique le lien entre le cache et la latence",
+        "quelles tâches sont encore ouvertes pour ce sprint",
+        "rappelle-moi ce que le médecin a dit sur mon régime",
+        "la capitale de la france est paris",
+    ],
+    "es": [
+        "qué decidimos sobre la migración de la base de datos",
+        "resume las notas de la reunión de la semana pasada",
+        "cómo maneja el servicio de autenticación los tokens caducados",
+        "muéstrame todo lo relacionado con la revisión del presupuesto trimestral",
+        "por qué falló el despliegue ayer por la tarde",
+        "escribe un poema corto sobre el mar de noche",
+        "cuáles son los pasos para restablecer la contraseña de un usuario",
+        "quién es el responsable del proyecto de facturación y cuándo vence",
+        "encuentra mis notas sobre la encuesta de los clientes",
+        "explica la relación entre la caché y la latencia",
+        "qué tareas siguen abiertas en este sprint",
+        "recuérdame lo que dijo el médico sobre mi dieta",
+        "la capital de españa es madrid",
+    ],
+    "de": [
+        "was haben wir zur migration der datenbank beschlossen",
+        "fasse die notizen der besprechung von letzter woche zusammen",
+        "wie behandelt der authentifizierungsdienst abgelaufene tokens",
+        "zeig mir alles zur überprüfung des quartalsbudgets",
+        "warum ist die bereitstellung gestern nachmittag fehlgeschlagen",
+        "schreibe ein kurzes gedicht über das meer bei nacht",
+        "welche schritte sind nötig um das passwort zurückzusetzen",
+        "wer ist für das abrechnungsprojekt verantwortlich und wann ist es fällig",
+        "finde meine notizen zur kundenumfrage",
+        "erkläre den zusammenhang zwischen zwischenspeicher und latenz",
+        "welche aufgaben sind in diesem sprint noch offen",
+        "erinnere mich daran was der arzt über meine ernährung gesagt hat",
+        "die hauptstadt von deutschland ist berlin",
+    ],
+    "it": [
+        "cosa abbiamo deciso sulla migrazione del database",
+        "riassumi gli appunti della riunione della settimana scorsa",
+        "come gestisce il servizio di autenticazione i token scaduti",
+        "mostrami tutto ciò che riguarda la revisione del bilancio trimestrale",
+        "perché il rilascio è fallito ieri pomeriggio",
+        "scrivi una breve poesia sul mare di notte",
+        "quali sono i passaggi per reimpostare la password di un utente",
+        "chi è responsabile del progetto di fatturazione e quando scade",
+        "trova i miei appunti sul sondaggio dei clienti",
+        "spiega il rapporto tra la cache e la latenza",
+        "quali compiti sono ancora aperti in questo sprint",
+        "ricordami cosa ha detto il medico sulla mia dieta",
+        "la capitale dell'italia è roma",
+    ],
+    "pt": [
+        "o que decidimos sobre a migração do banco de dados",
+        "resuma as notas da reunião da semana passada",
+        "como o serviço de autenticação trata os tokens expirados",
+        "mostre tudo relacionado com a revisão do orçamento trimestral",
+        "por que a implantação falhou ontem à tarde",
+        "escreva um poema curto sobre o mar à noite",
+        "quais são os passos para redefinir a senha de um usuário",
+        "quem é o responsável pelo projeto de faturamento e quando vence",
+        "encontre minhas anotações sobre a pesquisa com os clientes",
+        "explique a relação entre o cache e a latência",
+        "quais tarefas ainda estão abertas neste sprint",
+        "lembre-me do que o médico disse sobre a minha dieta",
+        "a capital do brasil é brasília",
+    ],
+    "nl": [
+        "wat hebben we besloten over de migratie van de database",
+        "vat de notities van de vergadering van vorige week samen",
+        "hoe gaat de authenticatiedienst om met verlopen tokens",
+        "laat me alles zien over de beoordeling van het kwartaalbudget",
+        "waarom is de uitrol gisterenmiddag mislukt",
+        "schrijf een kort gedicht over de zee in de nacht",
+        "wat zijn de stappen om het wachtwoord van een gebruiker te herstellen",
+        "wie is verantwoordelijk voor het facturatieproject en wanneer moet het af",
+        "zoek mijn aantekeningen over de klantenenquête",
+        "leg het verband uit tussen de cache en de vertraging",
+        "welke taken staan nog open in deze sprint",
+        "herinner me aan wat de dokter zei over mijn dieet",
+        "de hoofdstad van nederland is amsterdam",
+    ],
+}
+
+_WORD = re.compile(r"[^\W\d_]+(?:'[^\W\d_]+)?")
+
+
+def _is_latin(char: str) -> bool:
+    return "LATIN" in unicodedata.name(char, "")
+
+
+def _vector(embedding: Any) -> np.ndarray:
+    values = getattr(embedding, "values", embedding)
+    return np.asarray(values, dtype=np.float32).reshape(-1)
+
+
+class LanguageDetector:
+    """Character n-gram naive Bayes language identification."""
+
+    def __init__(self, orders: Sequence[int] = (1, 2, 3), alpha: float = 0.5, sharpness: float = 8.0):
+        self.orders = tuple(orders)
+        self.alpha = alpha
+        self.sharpness = sharpness
+        self.counts: Dict[str, Counter] = {}
+        self._totals: Dict[str, int] = {}
+        self._vocabulary: set = set()
+
+    @classmethod
+    def default(cls) -> "LanguageDetector":
+        """Detector trained on the built-in seed corpus."""
+        detector = cls()
+        detector.train((text, language) for language, texts in SEED_CORPUS.items() for text in texts)
+        return detector
+
+    def ngrams(self, text: str) -> List[str]:
+        grams: List[str] = []
+        for word in _WORD.findall(text.lower()):
+            padded = f" {word} "
+            for n in self.orders:
+                grams.extend(padded[i:i + n] for i in range(len(padded) - n + 1) if padded[i:i + n].strip())
+        return grams
+
+    def train(self, samples: Iterable[Tuple[str, str]]) -> int:
+        """Add ``(text, language code)`` samples; returns how many were used."""
+        used = 0
+        for text, language in samples:
+            grams = self.ngrams(text)
+            if not grams or not language:
+                continue
+            self.counts.setdefault(language, Counter()).update(grams)
+            used += 1
+        self._totals = {language: sum(c.values()) for language, c in self.counts.items()}
+        self._vocabulary = set().union(*self.counts.values()) if self.counts else set()
+        return used
+
+    def scores(self, text: str) -> Dict[str, float]:
+        """Log-likelihood of ``text`` under each language."""
+        grams = self.ngrams(text)
+        if not grams or not self.counts:
+            return {}
+        vocabulary = len(self._vocabulary) + 1
+        result = {}
+        for language, counts in self.counts.items():
+            denominator = math.log(self._totals[language] + self.alpha * vocabulary)
+            result[language] = sum(math.log(counts.get(g, 0) + self.alpha) for g in grams) - len(grams) * denominator
+        return result
+
+    def detect(self, text: str) -> Tuple[Optional[str], float]:
+        """Most likely language code and its posterior probability.
+
+        Text without Latin-script letters is outside the trained languages and
+        returns ``(None, 0.0)``.
+        """
+        letters = [c for c in text if c.isalpha()]
+        if not letters or sum(_is_latin(c) for c in letters) < len(letters) / 2:
+            return None, 0.0
+        scores = self.scores(text)
+        if not scores:
+            return None, 0.0
+        # Mean log-likelihood per n-gram, scaled: calibrated enough to threshold on
+        grams = len(self.ngrams(text))
+        scores = {language: score / grams * self.sharpness for language, score in scores.items()}
+        best = max(scores, key=scores.get)
+        top = scores[best]
+        total = sum(math.exp(s - top) for s in scores.values())
+        return best, 1.0 / total
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"orders": list(self.orders), "alpha": self.alpha, "sharpness": self.sharpness,
+                "counts": {language: dict(c) for language, c in self.counts.items()}}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LanguageDetector":
+        detector = cls(orders=data.get("orders", (1, 2, 3)), alpha=data.get("alpha", 0.5),
+                       sharpness=data.get("sharpness", 8.0))
+        detector.counts = {language: Counter(c) for language, c in data.get("counts", {}).items()}
+        detector.train([])
+        return detector
+
+
+class IntentCentroidModel:
+    """Nearest-centroid intent classifier over normalized query embeddings."""
+
+    def __init__(self, labels: Sequence[str], centroids: np.ndarray, temperature: float = 20.0,
+                 embedding_model: Optional[str] = None):
+        centroids = np.asarray(centroids, dtype=np.float32)
+        if centroids.ndim != 2 or len(labels) != centroids.shape[0]:
+            raise ValueError("Need one centroid row per label")
+        self.labels = list(labels)
+        self.centroids = centroids
+        self.temperature = temperature
+        self.embedding_model = embedding_model
+
+    @property
+    def dimensions(self) -> int:
+        return self.centroids.shape[1]
+
+    @staticmethod
+    def _normalize(matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+        return matrix / np.where(norms == 0, 1.0, norms)
+
+    @classmethod
+    def fit(cls, embeddings: Sequence[Any], labels: Sequence[str],
+            embedding_model: Optional[str] = None) -> "IntentCentroidModel":
+        """Centroids of each label's normalized embeddings; the softmax temperature
+        is the one with the lowest leave-one-out log loss on the training data."""
+        matrix = cls._normalize(np.stack([_vector(e) for e in embeddings]))
+        classes = [label for label in INTENT_LABELS if label in set(labels)]
+        if len(classes) < 2:
+            raise ValueError("Need examples of at least two intents")
+        targets = np.array([classes.index(label) if label in classes else -1 for label in labels])
+        keep = targets >= 0
+        matrix, targets = matrix[keep], targets[keep]
+        sums = np.stack([matrix[targets == i].sum(axis=0) for i in range(len(classes))])
+        counts = np.bincount(targets, minlength=len(classes))
+        centroids = cls._normalize(sums / counts[:, None])
+
+        # Score each example against its own class centroid without it, so a
+        # separable training set does not drive the temperature to the maximum
+        similarities = matrix @ centroids.T
+        own = sums[targets] - matrix
+        own_norms = np.linalg.norm(own, axis=1)
+        rows = np.arange(len(targets))
+        similarities[rows, targets] = np.where(
+            own_norms > 0, (matrix * own).sum(axis=1) / np.where(own_norms > 0, own_norms, 1.0), 0.0
+        )
+        best_temperature, best_loss = TEMPERATURES[0], math.inf
+        for temperature in TEMPERATURES:
+            logits = similarities * temperature
+            logits -= logits.max(axis=1, keepdims=True)
+            log_probs = logits - np.log(np.exp(logits).sum(axis=1, keepdims=True))
+            loss = -float(log_probs[rows, targets].mean())
+            if loss < best_loss:
+                best_temperature, best_loss = temperature, loss
+        return cls(classes, centroids, temperature=best_temperature, embedding_model=embedding_model)
+
+    def predict_many(self, embeddings: Sequence[Any]) -> Tuple[List[str], np.ndarray]:
+        """Labels and confidences for a batch of embeddings."""
+        matrix = self._normalize(np.stack([_vector(e) for e in embeddings]))
+        if matrix.shape[1] != self.dimensions:
+            raise ValueError(f"Expected {self.dimensions}-dimensional embeddings, got {matrix.shape[1]}")
+        logits = (matrix @ self.centroids.T) * self.temperature
+        logits -= logits.max(axis=1, keepdims=True)
+        probs = np.exp(logits)
+        probs /= probs.sum(axis=1, keepdims=True)
+        best = probs.argmax(axis=1)
+        return [self.labels[i] for i in best], probs[np.arange(len(best)), best]
+
+    def predict(self, embedding: Any) -> Tuple[str, float]:
+        """Intent and confidence for one query embedding."""
+        model = getattr(embedding, "model", None)
+        if self.embedding_model and model and model != self.embedding_model:
+            raise ValueError(f"Model was trained on '{self.embedding_model}' embeddings, got '{model}'")
+        labels, confidences = self.predict_many([embedding])
+        return labels[0], float(confidences[0])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"labels": self.labels, "centroids": self.centroids.tolist(),
+                "temperature": self.temperature, "embedding_model": self.embedding_model}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "IntentCentroidModel":
+        return cls(data["labels"], np.asarray(data["centroids"], dtype=np.float32),
+                   temperature=data.get("temperature", 20.0), embedding_model=data.get("embedding_model"))
+
+
+def save_models(path: str, intent_model: Optional[IntentCentroidModel] = None,
+                language_detector: Optional[LanguageDetector] = None) -> None:
+    """Write both models to one JSON file."""
+    data = {
+        "intent": intent_model.to_dict() if intent_model else None,
+        "language": language_detector.to_dict() if language_detector else None,
+    }
+    with open(path, "w") as f:
+        json.dump(data, f)
+
+
+def load_models(path: str) -> Tuple[Optional[IntentCentroidModel], Optional[LanguageDetector]]:
+    """Read models written by ``save_models``."""
+    with open(path, "r") as f:
+        data = json.load(f)
+    intent = IntentCentroidModel.from_dict(data["intent"]) if data.get("intent") else None
+    language = LanguageDetector.from_dict(data["language"]) if data.get("language") else None
+    return intent, language
+
+
+def language_code(name: Optional[str]) -> Optional[str]:
+    """Code for a language name as returned by the LLM (``"French"`` -> ``"fr"``)."""
+    if not name:
+        return None
+    lowered = name.strip().lower()
+    for code, language in LANGUAGE_NAMES.items():
+        if lowered in (code, language.lower()):
+            return code
+    return None
+
+
+def session_examples(sessions: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Training examples from ``search_session`` rows labelled by the LLM.
+
+    Returns ``{"query", "intent", "language"}`` dicts. ``intent`` or
+    ``language`` is None when the session has no LLM label for it. Labels the
+    local models produced themselves are skipped so they do not train on
+    their own output.
+    """
+    examples = []
+    for session in sessions:
+        query = session.get("query")
+        metadata = session.get("metadata") or {}
+        if not query:
+            continue
+        intent = metadata.get("intent") if metadata.get("intent_source") == "llm" else None
+        if intent not in INTENT_LABELS:
+            intent = None
+        language = None
+        if metadata.get("language_source") == "llm":
+            language = language_code(metadata.get("detected_language"))
+        if intent or language:
+            examples.append({"query": query, "intent": intent, "language": language})
+    return examples
@@ -6,11 +6,16 @@ promotion, decay, consolidation, deduplication, and archival.
 
 import logging
 import asyncio
-from typing import List, Optional, Dict, Any
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime, timezone
 
+import numpy as np
+
 from khala.domain.memory.entities import Memory, MemoryTier, ImportanceScore
-from khala.domain.memory.repository import MemoryRepository
+from khala.domain.memory.lifecycle import LifecycleRules
+from khala.domain.memory.repository import BulkCreateResult, MemoryProjection, MemoryRepository
 from khala.domain.memory.services import (
     MemoryService,
     DecayService,
@@ -27,10 +32,32 @@ from khala.infrastructure.gemini.models import ModelRegistry
 # But for runtime, we need to import if we default it.
 # from khala.application.verification.verification_gate import VerificationGate
 from khala.infrastructure.persistence.job_repository import JobRepository
+from khala.infrastructure.vector.lsh import near_duplicate_pairs
 from khala.domain.jobs.entities import Job
 
 logger = logging.getLogger(__name__)
 
+# Page size for keyset-paginated scans of a user's memories
+STREAM_BATCH_SIZE = 500
+
+# Cosine similarity at which two memories count as semantic duplicates
+SEMANTIC_DEDUP_THRESHOLD = 0.95
+# Tiers whose memories may be archived as semantic duplicates; any other
+# non-scratchpad tier can still be the original they duplicate
+SEMANTIC_DEDUP_TIERS = (MemoryTier.WORKING, MemoryTier.SHORT_TERM)
+
+
+@dataclass
+class SemanticDedupReport:
+    """Outcome of one semantic deduplication pass over a user's corpus."""
+    scanned: int = 0
+    # Memories whose pairs were compared: all of them, or those created since the last run
+    checked: int = 0
+    candidate_pairs: int = 0
+    # (duplicate_id, original_id, similarity), in the order they were resolved
+    duplicates: List[Tuple[str, str, float]] = field(default_factory=list)
+    seconds: float = 0.0
+
 PROMPT_SUMMARIZE = """Summarize the following content in under 50 words:
 
 {content}"""
@@ -60,7 +87,8 @@ class MemoryLifecycleService:
         privacy_safety_service: Optional[PrivacySafetyService] = None,
         significance_scorer: Optional[SignificanceScorer] = None,
         verification_gate: Optional[Any] = None, # Type as Any to avoid circular import issues
-        job_repository: Optional[JobRepository] = None
+        job_repository: Optional[JobRepository] = None,
+        lifecycle_rules: Optional[LifecycleRules] = None
     ):
         self.repository = repository
         if not gemini_client:
@@ -69,6 +97,7 @@ class MemoryLifecycleService:
 
         self.memory_service = memory_service or MemoryService()
         self.decay_service = decay_service or DecayService()
+        self.lifecycle_rules = lifecycle_rules or LifecycleRules()
         self.deduplication_service = deduplication_service or DeduplicationService()
         self.consolidation_service = consolidation_service or ConsolidationService()
         self.conflict_resolution_service = conflict_resolution_service or ConflictResolutionService(repository)
@@ -94,6 +123,57 @@ class MemoryLifecycleService:
 
     async def ingest_memory(self, memory: Memory, check_privacy: bool = True, check_quality: bool = True) -> str:
         """Ingest a new memory, performing verification, auto-summarization and privacy checks."""
+        await self._prepare_for_ingest(memory, check_privacy, check_quality)
+        return await self.repository.create(memory)
+
+    async def ingest_memories_bulk(
+        self,
+        memories: List[Memory],
+        check_privacy: bool = True,
+        check_quality: bool = True,
+        batch_size: int = 500,
+        max_concurrency: int = 16
+    ) -> List[BulkCreateResult]:
+        """Ingest many memories (e.g. an imported agent transcript).
+
+        Each memory goes through the same checks as ``ingest_memory``, at
+        most ``max_concurrency`` at a time. The ones that pass are written
+        with ``repository.create_bulk`` in batches of ``batch_size``.
+
+        Returns:
+            One result per input memory, in input order. A memory whose
+            checks raised is reported as ``failed`` and is not written.
+        """
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+        async def prepare(memory: Memory) -> Optional[str]:
+            async with semaphore:
+                try:
+                    await self._prepare_for_ingest(memory, check_privacy, check_quality)
+                    return None
+                except Exception as e:
+                    logger.error(f"Bulk ingest checks failed for memory {memory.id}: {e}")
+                    return str(e)
+
+        errors = await asyncio.gather(*(prepare(m) for m in memories))
+
+        results: List[Optional[BulkCreateResult]] = [None] * len(memories)
+        ready = []
+        for i, (memory, error) in enumerate(zip(memories, errors)):
+            if error is None:
+                ready.append(i)
+            else:
+                results[i] = BulkCreateResult(index=i, memory_id=None, status="failed", error=error)
+
+        written = await self.repository.create_bulk([memories[i] for i in ready], batch_size=batch_size)
+        for i, result in zip(ready, written):
+            result.index = i
+            results[i] = result
+
+        return results
+
+    async def _prepare_for_ingest(self, memory: Memory, check_privacy: bool, check_quality: bool) -> None:
+        """Run verification, privacy, scoring, summarization and conflict checks on ``memory`` in place."""
 
         # Strategy 1.1: Self-Verification Gate
         if check_quality and self.verification_gate:
@@ -173,8 +253,6 @@ class MemoryLifecycleService:
             except Exception:
                 logger.exception("Failed to check conflicts.")
 
-        return await self.repository.create(memory)
-
     async def run_lifecycle_job(self, user_id: str) -> Dict[str, int]:
         """Run all lifecycle tasks for a user."""
         logger.info(f"Starting lifecycle job for user {user_id}")
@@ -212,50 +290,35 @@ class MemoryLifecycleService:
         return stats
 
     async def promote_memories(self, user_id: str) -> int:
-        """Check and promote memories to the next tier."""
+        """Promote memories to the next tier, one set-based update per rule."""
+        now = datetime.now(timezone.utc)
         promoted_count = 0
-        for tier in [MemoryTier.WORKING, MemoryTier.SHORT_TERM]:
-            memories = await self.repository.get_by_tier(user_id, tier.value, limit=1000)
-            for memory in memories:
-                if memory.should_promote_to_next_tier():
-                    try:
-                        old_tier = memory.tier
-                        memory.promote()
-                        await self.repository.update(memory)
-                        promoted_count += 1
-                        logger.debug(f"Promoted memory {memory.id} from {old_tier.value} to {memory.tier.value}")
-                    except ValueError as e:
-                        logger.warning(f"Failed to promote memory {memory.id}: {e}")
+        # Short-term rule before the working rule, so a memory advances at most one tier per run
+        for rule in self.lifecycle_rules.promotion_order():
+            promoted = await self.repository.promote_matching(user_id, rule, now)
+            promoted_count += len(promoted)
+            if promoted:
+                logger.debug(f"Promoted {len(promoted)} memories from {rule.from_tier.value} to {rule.to_tier.value}")
         return promoted_count
 
     async def decay_and_archive_memories(self, user_id: str) -> Dict[str, int]:
-        """Update decay scores and archive memories if needed."""
-        stats = {"decayed": 0, "archived": 0}
-        for tier in MemoryTier:
-            memories = await self.repository.get_by_tier(user_id, tier.value, limit=1000)
-            for memory in memories:
-                self.decay_service.update_decay_score(memory)
-                stats["decayed"] += 1
-
-                should_archive = (
-                    memory.should_archive() or
-                    self.decay_service.should_archive_based_on_decay(memory)
-                )
-
-                if should_archive and not memory.is_archived:
-                    try:
-                        memory.archive()
-                        await self.repository.update(memory)
-                        stats["archived"] += 1
-                        logger.debug(f"Archived memory {memory.id}")
-                    except ValueError as e:
-                        logger.warning(f"Failed to archive memory {memory.id}: {e}")
-                else:
-                    await self.repository.update(memory)
-        return stats
-
-    async def deduplicate_memories(self, user_id: str) -> int:
-        """Find and remove duplicate memories."""
+        """Refresh decay scores, then archive memories the lifecycle rules retire."""
+        now = datetime.now(timezone.utc)
+        decayed = await self.repository.refresh_decay_scores(user_id, self.lifecycle_rules, now)
+        archived = await self.repository.archive_matching(user_id, self.lifecycle_rules, now)
+        if archived:
+            logger.debug(f"Archived {len(archived)} memories for user {user_id}")
+        return {"decayed": decayed, "archived": len(archived)}
+
+    async def deduplicate_memories(self, user_id: str, since: Optional[datetime] = None) -> int:
+        """Find and remove duplicate memories.
+
+        Args:
+            user_id: Owner whose memories are deduplicated.
+            since: Incremental mode for the semantic pass: only memories
+                created at or after this time are checked (against the
+                whole corpus).
+        """
         duplicates_removed = 0
 
         # 1. Exact duplicates (Global)
@@ -277,34 +340,102 @@ class MemoryLifecycleService:
             logger.exception("Global exact deduplication failed.")
 
         # 2. Semantic duplicates (Strategy 90: Vector Deduplication)
-        processed_ids = set()
-        # Reduced limit to avoid O(N^2) explosion
-        BATCH_LIMIT = 50
-
-        for tier in [MemoryTier.WORKING, MemoryTier.SHORT_TERM]:
-            memories = await self.repository.get_by_tier(user_id, tier.value, limit=BATCH_LIMIT)
-
-            for i, memory in enumerate(memories):
-                if memory.id in processed_ids or not memory.embedding: continue
-                if memory.is_archived: continue
-
-                # Look ahead in the batch
-                candidates = memories[i+1:]
-                if not candidates: continue
+        try:
+            report = await self.find_semantic_duplicates(user_id, since=since)
+            logger.info(
+                f"Semantic dedup for {user_id}: {len(report.duplicates)} duplicates among {report.checked}/"
+                f"{report.scanned} memories, {report.candidate_pairs} candidate pairs, {report.seconds:.2f}s"
+            )
+            duplicates_removed += await self._archive_semantic_duplicates(report.duplicates)
+        except Exception:
+            logger.exception("Semantic deduplication failed.")
 
-                semantic_dupes = self.deduplication_service.find_semantic_duplicates(
-                    memory, candidates
-                )
+        return duplicates_removed
 
-                for dupe in semantic_dupes:
-                    if dupe.id not in processed_ids and not dupe.is_archived:
-                        dupe.archive(force=True)
-                        dupe.metadata["duplicate_of"] = memory.id
-                        dupe.metadata["deduplication_type"] = "semantic"
-                        await self.repository.update(dupe)
-                        duplicates_removed += 1
-                        processed_ids.add(dupe.id)
-                        logger.info(f"Archived semantic duplicate {dupe.id} of {memory.id}")
+    async def find_semantic_duplicates(
+        self,
+        user_id: str,
+        since: Optional[datetime] = None,
+        threshold: float = SEMANTIC_DEDUP_THRESHOLD
+    ) -> SemanticDedupReport:
+        """Find semantic duplicates across a user's whole corpus without pairwise scans.
+
+        Streams the embeddings of every non-archived memory, blocks candidate
+        pairs with random-hyperplane LSH (``near_duplicate_pairs``) and checks
+        only those exactly. Embeddings of different models or versions are
+        never compared.
+
+        The kept original of a pair is the long-term one if there is one,
+        else the older; a memory already resolved as a duplicate is not used
+        as an original. With ``since`` (incremental mode) only pairs that
+        involve a memory created at or after ``since`` are compared.
+        """
+        started = time.perf_counter()
+        report = SemanticDedupReport()
+        partitions: Dict[Tuple[Any, ...], Dict[str, list]] = {}
+        async for memory in self.repository.iter_memories(
+            user_id, batch_size=STREAM_BATCH_SIZE, projection=MemoryProjection.WITH_EMBEDDING
+        ):
+            if memory.tier == MemoryTier.SCRATCHPAD or memory.embedding is None:
+                continue
+            vector = memory.embedding.to_numpy()
+            if vector.size == 0:
+                continue
+            report.scanned += 1
+            key = (memory.embedding.model, memory.embedding.version, vector.size)
+            part = partitions.setdefault(key, {"ids": [], "vectors": [], "rank": [], "archivable": [], "new": []})
+            part["ids"].append(memory.id)
+            part["vectors"].append(vector)
+            # Long-term memories sort first, then by age: earlier rows are kept
+            part["rank"].append((memory.tier != MemoryTier.LONG_TERM, memory.created_at.timestamp()))
+            part["archivable"].append(memory.tier in SEMANTIC_DEDUP_TIERS)
+            part["new"].append(since is None or memory.created_at >= since)
+
+        for part in partitions.values():
+            new = np.array(part["new"], dtype=bool)
+            report.checked += int(new.sum())
+            if len(part["ids"]) < 2 or not new.any():
+                continue
+            pairs = near_duplicate_pairs(
+                np.vstack(part["vectors"]), threshold, active=None if since is None else new
+            )
+            report.candidate_pairs += pairs.candidates
+            if len(pairs.left) == 0:
+                continue
+
+            tier_late, created = zip(*part["rank"])
+            position = np.empty(len(created), dtype=np.int64)
+            position[np.lexsort((np.array(created), np.array(tier_late)))] = np.arange(len(created))
+            swap = position[pairs.left] > position[pairs.right]
+            originals = np.where(swap, pairs.right, pairs.left)
+            dupes = np.where(swap, pairs.left, pairs.right)
+            order = np.lexsort((position[dupes], position[originals]))
+
+            resolved = set()
+            for o, d, similarity in zip(originals[order].tolist(), dupes[order].tolist(),
+                                        pairs.similarity[order].tolist()):
+                if o in resolved or d in resolved or not part["archivable"][d]:
+                    continue
+                resolved.add(d)
+                report.duplicates.append((part["ids"][d], part["ids"][o], similarity))
+
+        report.seconds = time.perf_counter() - started
+        return report
+
+    async def _archive_semantic_duplicates(self, duplicates: List[Tuple[str, str, float]]) -> int:
+        """Archive resolved semantic duplicates, recording what they duplicate."""
+        duplicates_removed = 0
+        for dupe_id, original_id, similarity in duplicates:
+            dupe = await self.repository.get_by_id(dupe_id, projection=MemoryProjection.FULL)
+            if dupe is None or dupe.is_archived:
+                continue
+            dupe.archive(force=True)
+            dupe.metadata["duplicate_of"] = original_id
+            dupe.metadata["deduplication_type"] = "semantic"
+            dupe.metadata["duplicate_similarity"] = round(similarity, 4)
+            await self.repository.update(dupe)
+            duplicates_removed += 1
+            logger.info(f"Archived semantic duplicate {dupe_id} of {original_id}")
 
         return duplicates_removed
 
@@ -0,0 +1,363 @@
+"""
+Rank fusion and reranking for hybrid search.
+
+``HybridSearchService`` merges the vector and BM25 candidate lists of every
+expanded query with Reciprocal Rank Fusion, then reorders them by
+contextual boosts. These boosts are temporal, episode, term proximity and
+graph neighbourhood. With query expansion and a large ``top_k`` this
+reaches thousands of candidates per query. ``RankFusion`` keeps every stage
+linear in the number of candidates:
+
+- RRF runs on arrays of ranks and weights; the candidate order is one
+  stable argsort.
+- Each boost is a feature column. It is combined with array arithmetic, so
+  extra signals (``BoostSignal``) plug in as one more column.
+- Term proximity uses a minimal-window scan over the merged term positions
+  (``minimal_window``). The old approach compared every pair of positions.
+  ``ProximityScorer.score_many`` finds each term once in the joined
+  candidate texts. Only candidates with enough distinct terms get a window
+  scan.
+
+Below ``vectorize_min_candidates`` the same stages run on plain lists,
+because NumPy's per-call overhead outweighs its benefit on a few dozen
+candidates. Both paths produce the same ordering.
+"""
+
+import heapq
+import logging
+import re
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from itertools import accumulate, chain
+from operator import attrgetter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from khala.domain.memory.entities import Memory
+
+logger = logging.getLogger(__name__)
+
+# Boost amounts (Strategy 97 / 121); unchanged from the original loop-based reranker
+RECENT_HOUR_BOOST = 0.2
+RECENT_DAY_BOOST = 0.1
+ACTIVE_EPISODE_BOOST = 0.15
+ANCHOR_EPISODE_BOOST = 0.15
+GRAPH_NEIGHBOR_BOOST = 0.10
+MAX_PROXIMITY_BOOST = 0.3
+
+
+def minimal_window(position_lists: Sequence[Sequence[int]], need: int = 2) -> Optional[int]:
+    """Smallest span of positions that covers ``need`` different terms.
+
+    Args:
+        position_lists: One ascending list of match positions per term.
+        need: Number of distinct terms the window must contain.
+
+    Returns:
+        ``last - first`` position of the tightest window, or None if fewer
+        than ``need`` terms occur. It runs in O(N log k) time for N
+        positions over k terms; the sliding window is linear in N.
+    """
+    if need < 1 or sum(1 for p in position_lists if p) < need:
+        return None
+
+    merged = list(heapq.merge(*([(pos, term) for pos in positions]
+                                for term, positions in enumerate(position_lists))))
+    counts: Dict[int, int] = {}
+    distinct = 0
+    left = 0
+    best: Optional[int] = None
+
+    for pos, term in merged:
+        counts[term] = counts.get(term, 0) + 1
+        if counts[term] == 1:
+            distinct += 1
+        while distinct >= need:
+            first_pos, first_term = merged[left]
+            span = pos - first_pos
+            if best is None or span < best:
+                best = span
+            counts[first_term] -= 1
+            if counts[first_term] == 0:
+                distinct -= 1
+            left += 1
+
+    return best
+
+
+class ProximityScorer:
+    """Term-proximity boost for one query, reused across all candidates.
+
+    Terms shorter than three characters are ignored, and repeated terms
+    count once. A candidate scores when at least two distinct terms fall
+    within ``window_size`` words of each other. Word distance is
+    approximated as six characters per word.
+    """
+
+    SEPARATOR = "\0"
+
+    def __init__(self, query_terms: Iterable[str], window_size: int = 10, need: int = 2):
+        self.terms = list(dict.fromkeys(t.lower() for t in query_terms if len(t) > 2))
+        self.window_size = window_size
+        self.need = need
+        self._patterns = [re.compile(re.escape(t)) for t in self.terms]
+
+    @property
+    def active(self) -> bool:
+        return len(self.terms) >= self.need
+
+    def score(self, content: Optional[str]) -> float:
+        if not content or not self.active:
+            return 0.0
+
+        text = content.lower()
+        positions = [
+            [m.start() for m in pattern.finditer(text)]
+            for term, pattern in zip(self.terms, self._patterns)
+            if term in text
+        ]
+        return self._boost(minimal_window(positions, self.need))
+
+    def score_many(self, contents: Sequence[Optional[str]]) -> List[float]:
+        """``score`` for every candidate, scanning one joined text per term.
+
+        Matches are rare, so only candidates that contain ``need`` distinct
+        terms reach the window scan; the rest cost one ``str.find`` pass.
+        """
+        n = len(contents)
+        if not self.active or any(self.SEPARATOR in t for t in self.terms):
+            return [self.score(c) for c in contents]
+
+        raw = [c or "" for c in contents]
+        blob = self.SEPARATOR.join(raw).lower()
+        if len(blob) != sum(map(len, raw)) + n - 1:
+            # Lowercasing lengthened some text, so offsets must come from each lowered text
+            raw = [c.lower() for c in raw]
+            blob = self.SEPARATOR.join(raw)
+        # Offset of the separator after each candidate's text
+        ends = list(accumulate(len(c) + 1 for c in raw))
+
+        hits: Dict[int, Dict[int, List[int]]] = {}
+        for slot, term in enumerate(self.terms):
+            pos = blob.find(term)
+            while pos != -1:
+                hits.setdefault(bisect_right(ends, pos), {}).setdefault(slot, []).append(pos)
+                pos = blob.find(term, pos + len(term))
+
+        scores = [0.0] * n
+        for index, by_term in hits.items():
+            if len(by_term) >= self.need:
+                scores[index] = self._boost(minimal_window(list(by_term.values()), self.need))
+        return scores
+
+    def _boost(self, span: Optional[int]) -> float:
+        if span is None:
+            return 0.0
+
+        word_dist = span / 6.0
+        if word_dist <= self.window_size:
+            # Max boost for adjacent terms, decaying to 0 at window_size
+            return MAX_PROXIMITY_BOOST * (1.0 - (word_dist / self.window_size))
+        return 0.0
+
+
+@dataclass
+class FusedCandidates:
+    """Deduplicated candidates in RRF order, plus lazily extracted feature columns."""
+
+    memories: List[Memory]
+    ids: List[str]
+    scores: Sequence[float]
+    vectorized: bool
+    _columns: Dict[str, Any] = field(default_factory=dict, repr=False)
+
+    def __len__(self) -> int:
+        return len(self.memories)
+
+    @property
+    def anchor(self) -> Optional[Memory]:
+        return self.memories[0] if self.memories else None
+
+    def column(self, name: str) -> list:
+        """Per-candidate feature values, extracted once."""
+        if name not in self._columns:
+            if name == "clean_id":
+                values = [i.split(":")[1] if ":" in i else i for i in self.ids]
+            else:
+                values = list(map(attrgetter(name), self.memories))
+            self._columns[name] = values
+        return self._columns[name]
+
+    def array(self, name: str) -> np.ndarray:
+        """Feature column as an object array (vectorized path only)."""
+        key = f"{name}__array"
+        if key not in self._columns:
+            self._columns[key] = np.array(self.column(name), dtype=object)
+        return self._columns[key]
+
+
+BoostSignal = Callable[[FusedCandidates, Dict[str, Any]], Optional[Sequence[float]]]
+"""Extra boost: returns one value per candidate (or None to skip) for ``(candidates, context)``."""
+
+
+class RankFusion:
+    """Reciprocal Rank Fusion and boost reranking over candidate arrays.
+
+    Args:
+        rrf_k: RRF smoothing constant.
+        vectorize_min_candidates: Candidate count from which NumPy is used.
+        signals: Extra boost signals added to the contextual boosts.
+    """
+
+    def __init__(
+        self,
+        rrf_k: int = 60,
+        vectorize_min_candidates: int = 64,
+        signals: Optional[List[BoostSignal]] = None
+    ):
+        self.rrf_k = rrf_k
+        self.vectorize_min_candidates = vectorize_min_candidates
+        self.signals: List[BoostSignal] = list(signals or [])
+
+    def add_signal(self, signal: BoostSignal) -> None:
+        self.signals.append(signal)
+
+    def fuse(self, ranked_lists: Sequence[Tuple[Sequence[Memory], float]],
+             rrf_k: Optional[int] = None) -> FusedCandidates:
+        """Fuse ranked lists by weighted RRF.
+
+        Args:
+            ranked_lists: ``(results, weight)`` pairs. Within one list, only the
+                first occurrence of an id counts, and ranks are assigned after
+                that dedupe.
+            rrf_k: Overrides the instance constant.
+
+        Returns:
+            Candidates sorted by fused score. Ties keep their first-seen order.
+        """
+        k = self.rrf_k if rrf_k is None else rrf_k
+        by_id: Dict[str, Memory] = {}
+        unique_ids: List[List[str]] = []
+        for results, _ in ranked_lists:
+            ids = [m.id for m in results]
+            unique_ids.append(list(dict.fromkeys(ids)))
+            # Reversed so the first occurrence within a list wins; later lists replace earlier objects
+            by_id.update(zip(reversed(ids), reversed(results)))
+
+        order_ids = list(dict.fromkeys(chain.from_iterable(unique_ids)))
+        index = dict(zip(order_ids, range(len(order_ids))))
+        memories = list(map(by_id.__getitem__, order_ids))
+        weights = [weight for _, weight in ranked_lists]
+
+        n = len(memories)
+        if n >= self.vectorize_min_candidates:
+            scores = np.zeros(n, dtype=np.float64)
+            for ids, weight in zip(unique_ids, weights):
+                if ids:
+                    slots = np.fromiter(map(index.__getitem__, ids), dtype=np.intp, count=len(ids))
+                    ranks = np.arange(1, len(ids) + 1, dtype=np.float64)
+                    # Slots are unique within one list, so fancy-index += is exact
+                    scores[slots] += weight * (1.0 / (k + ranks))
+            order = np.argsort(-scores, kind="stable")
+            positions = order.tolist()
+            return FusedCandidates(
+                memories=[memories[i] for i in positions], ids=[order_ids[i] for i in positions],
+                scores=scores[order], vectorized=True
+            )
+
+        score_list = [0.0] * n
+        for ids, weight in zip(unique_ids, weights):
+            for rank, memory_id in enumerate(ids):
+                score_list[index[memory_id]] += weight * (1.0 / (k + rank + 1))
+        order = sorted(range(n), key=lambda i: score_list[i], reverse=True)
+        return FusedCandidates(
+            memories=[memories[i] for i in order], ids=[order_ids[i] for i in order],
+            scores=[score_list[i] for i in order], vectorized=False
+        )
+
+    def context_boosts(self, candidates: FusedCandidates, context: Optional[Dict[str, Any]],
+                       proximity: Optional[ProximityScorer] = None) -> Sequence[float]:
+        """Temporal, episode, proximity and plugged-in boosts per candidate."""
+        n = len(candidates)
+        boosts = np.zeros(n, dtype=np.float64) if candidates.vectorized else [0.0] * n
+
+        if context:
+            try:
+                boosts = self._add(candidates, boosts, self._temporal(candidates, context.get('current_time')))
+                boosts = self._add(candidates, boosts, self._match(candidates, "episode_id", context.get('episode_id'),
+                                                                   ACTIVE_EPISODE_BOOST))
+            except Exception as e:
+                logger.warning(f"Contextual boosting failed: {e}")
+
+        if proximity is not None and proximity.active:
+            boosts = self._add(candidates, boosts, proximity.score_many(candidates.column("content")))
+
+        for signal in self.signals:
+            try:
+                boosts = self._add(candidates, boosts, signal(candidates, context or {}))
+            except Exception as e:
+                logger.warning(f"Boost signal {getattr(signal, '__name__', signal)} failed: {e}")
+
+        return boosts
+
+    def graph_boosts(self, candidates: FusedCandidates, boosts: Sequence[float],
+                     connected_ids: Set[str]) -> Sequence[float]:
+        """Add anchor-episode and graph-neighbour boosts (Strategy 121)."""
+        anchor = candidates.anchor
+        if anchor is not None and anchor.episode_id:
+            boosts = self._add(candidates, boosts, self._match(candidates, "episode_id", anchor.episode_id,
+                                                               ANCHOR_EPISODE_BOOST))
+        if connected_ids:
+            hits = [cid in connected_ids for cid in candidates.column("clean_id")]
+            if candidates.vectorized:
+                boosts = boosts + GRAPH_NEIGHBOR_BOOST * np.asarray(hits, dtype=np.float64)
+            else:
+                boosts = [b + GRAPH_NEIGHBOR_BOOST if hit else b for b, hit in zip(boosts, hits)]
+        return boosts
+
+    @staticmethod
+    def has_boost(candidates: FusedCandidates, boosts: Sequence[float]) -> bool:
+        if candidates.vectorized:
+            return bool((np.asarray(boosts) > 0).any())
+        return any(b > 0 for b in boosts)
+
+    @staticmethod
+    def rerank(candidates: FusedCandidates, boosts: Sequence[float]) -> List[Memory]:
+        """Order by boost (descending). Equal boosts keep the RRF order."""
+        if candidates.vectorized:
+            order = np.argsort(-np.asarray(boosts, dtype=np.float64), kind="stable").tolist()
+        else:
+            order = sorted(range(len(candidates)), key=lambda i: boosts[i], reverse=True)
+        return [candidates.memories[i] for i in order]
+
+    def _temporal(self, candidates: FusedCandidates, current_time: Any) -> Optional[Sequence[float]]:
+        if not current_time:
+            return None
+        if isinstance(current_time, str):
+            current_time = datetime.fromisoformat(current_time)
+        # created_at > now - 1h  <=>  age < 1h; comparing datetimes avoids per-row timestamp() calls
+        hour_ago = current_time - timedelta(hours=1)
+        day_ago = current_time - timedelta(days=1)
+        return [
+            (RECENT_HOUR_BOOST if c > hour_ago else RECENT_DAY_BOOST if c > day_ago else 0.0) if c else 0.0
+            for c in candidates.column("created_at")
+        ]
+
+    @staticmethod
+    def _match(candidates: FusedCandidates, name: str, value: Any, amount: float) -> Optional[Sequence[float]]:
+        if not value:
+            return None
+        if candidates.vectorized:
+            return amount * (candidates.array(name) == value).astype(np.float64)
+        return [amount if v == value else 0.0 for v in candidates.column(name)]
+
+    @staticmethod
+    def _add(candidates: FusedCandidates, boosts: Sequence[float],
+             extra: Optional[Sequence[float]]) -> Sequence[float]:
+        if extra is None:
+            return boosts
+        if candidates.vectorized:
+            return boosts + np.asarray(extra, dtype=np.float64)
+        return [b + float(e) for b, e in zip(boosts, extra)]
@@ -0,0 +1,73 @@
+"""
+Latency budgets for the speculative hybrid search pipeline.
+
+In its sequential mode ``HybridSearchService.search`` waits for intent
+classification, translation and query expansion one after the other. That
+is up to three LLM round trips before any retrieval starts. In speculative
+mode retrieval for the raw query starts at once and the LLM stages run
+concurrently with it. Each stage has a deadline measured from the start of
+the search. A stage that misses its deadline is cancelled and dropped, and
+the search goes on without it.
+
+- ``intent``: the classified intent only re-weights fusion, so it is
+  applied when it arrives before the deadline.
+- ``translation`` / ``expansion``: a rewritten query adds candidate lists.
+  Its retrieval must finish within ``retrieval`` seconds of the rewrite
+  arriving.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("intent", "translation", "expansion")
+
+
+@dataclass(frozen=True)
+class StageBudgets:
+    """Deadlines in seconds; LLM stages count from the start of the search."""
+
+    intent: float = 0.4
+    translation: float = 0.6
+    expansion: float = 0.8
+    retrieval: float = 0.5
+
+    def __post_init__(self) -> None:
+        for name in STAGES + ("retrieval",):
+            if getattr(self, name) < 0:
+                raise ValueError(f"Budget for {name} cannot be negative")
+
+
+class StageTimer:
+    """Runs awaitables against deadlines and counts what each stage contributed."""
+
+    def __init__(self) -> None:
+        self.stats: Dict[str, Dict[str, int]] = {
+            stage: {"used": 0, "timed_out": 0, "failed": 0, "skipped": 0} for stage in STAGES
+        }
+
+    async def run(self, stage: str, awaitable: Awaitable[Any], deadline: float) -> Optional[Any]:
+        """Result of ``awaitable``, or None if it fails or is still running at ``deadline``.
+
+        ``deadline`` is a ``time.monotonic()`` timestamp.
+        """
+        try:
+            return await asyncio.wait_for(awaitable, timeout=max(0.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            self.stats[stage]["timed_out"] += 1
+            logger.debug(f"Search stage '{stage}' missed its deadline; dropped")
+        except Exception as e:
+            self.stats[stage]["failed"] += 1
+            logger.warning(f"Search stage '{stage}' failed: {e}")
+        return None
+
+    def used(self, stage: str) -> None:
+        self.stats[stage]["used"] += 1
+
+    def skipped(self, stage: str) -> None:
+        """The stage finished in time but did not change the search."""
+        self.stats[stage]["skipped"] += 1
@@ -5,27 +5,115 @@ and memory lifecycle management (promotion/archival).
 """
 
 import logging
+from dataclasses import dataclass
 from datetime import datetime, timezone, timedelta
 from typing import List, Dict, Any, Tuple, Optional
 import math
 import networkx as nx
+import numpy as np
 
 from ...domain.memory.entities import Memory, MemoryTier
+from ...domain.memory.lifecycle import TIER_CODES, TIERS, BatchScores, MemoryColumns
 from ...domain.memory.value_objects import ImportanceScore, DecayScore
 from ...infrastructure.surrealdb.client import SurrealDBClient
 
 logger = logging.getLogger(__name__)
 
+# Memories scored and written per round trip by the batch decay paths
+DECAY_BATCH_SIZE = 500
+
+
+@dataclass(frozen=True)
+class TemporalDecayPolicy:
+    """Tier-aware decay, promotion and archival thresholds of the temporal analyzer.
+
+    Read by the per-memory checks and by ``score_batch``, which evaluates
+    the same rules over a ``MemoryColumns`` batch with NumPy.
+    """
+    # Base half-life per tier; scratchpad memories use the long-term value
+    working_half_life_days: float = 0.5
+    short_term_half_life_days: float = 7.0
+    long_term_half_life_days: float = 90.0
+    # Half-life multiplier is 1 + access_boost * log(access_count + 1)
+    access_boost: float = 0.5
+
+    working_promote_importance: float = 0.7
+    working_promote_access_count: int = 5
+    working_promote_verification: float = 0.8
+    short_term_promote_importance: float = 0.85
+    short_term_promote_access_count: int = 20
+    short_term_promote_age_hours: float = 24.0
+
+    archive_protect_importance: float = 0.9
+    working_archive_age_days: float = 1.0
+    short_term_archive_age_days: float = 30.0
+    short_term_archive_access_count: int = 5
+    long_term_archive_age_days: float = 365.0
+    long_term_archive_importance: float = 0.2
+
+    def half_life_days(self, tier: MemoryTier, access_count: int) -> float:
+        if tier == MemoryTier.WORKING:
+            base = self.working_half_life_days
+        elif tier == MemoryTier.SHORT_TERM:
+            base = self.short_term_half_life_days
+        else:
+            base = self.long_term_half_life_days
+        return base * (1.0 + math.log(access_count + 1) * self.access_boost)
+
+    def score_batch(self, columns: MemoryColumns, now: datetime) -> BatchScores:
+        """Decay, promotion and archive eligibility for a whole batch."""
+        tier = columns.tier
+        working = tier == TIER_CODES[MemoryTier.WORKING]
+        short_term = tier == TIER_CODES[MemoryTier.SHORT_TERM]
+        long_term = tier == TIER_CODES[MemoryTier.LONG_TERM]
+        importance = columns.importance
+        access_count = columns.access_count
+        age_days = (now.timestamp() - columns.created_at) / 86400.0
+
+        base = np.where(working, self.working_half_life_days,
+                        np.where(short_term, self.short_term_half_life_days, self.long_term_half_life_days))
+        half_life = base * (1.0 + np.log1p(access_count) * self.access_boost)
+        decay = np.minimum(importance * np.exp(-age_days / half_life), 1.0)
+
+        promote = (
+            working & (
+                (importance > self.working_promote_importance)
+                | (access_count > self.working_promote_access_count)
+                | (columns.verification_score > self.working_promote_verification)
+            )
+        ) | (
+            short_term & (
+                (importance > self.short_term_promote_importance)
+                | ((access_count > self.short_term_promote_access_count)
+                   & (age_days * 24.0 > self.short_term_promote_age_hours))
+            )
+        )
+        next_tier = tier.copy()
+        next_tier[promote & working] = TIER_CODES[MemoryTier.SHORT_TERM]
+        next_tier[promote & short_term] = TIER_CODES[MemoryTier.LONG_TERM]
+
+        archive = ~columns.is_archived & ~(importance > self.archive_protect_importance) & (
+            (working & (age_days > self.working_archive_age_days))
+            | (short_term & (age_days > self.short_term_archive_age_days)
+               & (access_count < self.short_term_archive_access_count))
+            | (long_term & (age_days > self.long_term_archive_age_days)
+               & (importance < self.long_term_archive_importance))
+        )
+        return BatchScores(decay=decay, promote=promote, archive=archive, next_tier=next_tier)
+
+
 class TemporalAnalysisService:
     """Service for analyzing temporal aspects of memories."""
 
-    def __init__(self, db_client: Optional[SurrealDBClient] = None):
+    def __init__(self, db_client: Optional[SurrealDBClient] = None, policy: Optional[TemporalDecayPolicy] = None):
         """Initialize the service.
 
         Args:
             db_client: SurrealDB client instance (optional)
+            policy: Decay, promotion and archival thresholds (optional)
         """
         self.db_client = db_client or SurrealDBClient()
+        self.policy = policy or TemporalDecayPolicy()
 
     def calculate_decay_score(self, memory: Memory) -> DecayScore:
         """Calculate the current decay score for a memory.
@@ -36,18 +124,8 @@ class TemporalAnalysisService:
         now = datetime.now(timezone.utc)
         age_days = (now - memory.created_at).total_seconds() / 86400.0
 
-        # Base half-life depends on tier
-        if memory.tier == MemoryTier.WORKING:
-            half_life_days = 0.5  # Very short half-life for working memory
-        elif memory.tier == MemoryTier.SHORT_TERM:
-            half_life_days = 7.0  # 1 week half-life
-        else:  # LONG_TERM
-            half_life_days = 90.0 # 3 months half-life
-
-        # Access count boost: Frequently accessed memories decay slower
-        # Boost factor: log(access_count + 1)
-        access_boost = math.log(memory.access_count + 1) * 0.5
-        adjusted_half_life = half_life_days * (1.0 + access_boost)
+        # Half-life depends on tier; frequently accessed memories decay slower
+        adjusted_half_life = self.policy.half_life_days(memory.tier, memory.access_count)
 
         return DecayScore.calculate(
             original_importance=memory.importance,
@@ -57,39 +135,41 @@ class TemporalAnalysisService:
 
     def should_promote(self, memory: Memory) -> bool:
         """Determine if a memory should be promoted to the next tier."""
+        policy = self.policy
         if memory.tier == MemoryTier.LONG_TERM:
             return False
 
         # Working -> Short Term
         if memory.tier == MemoryTier.WORKING:
             # Criteria: High importance OR frequent access OR high verification score
-            if memory.importance.value > 0.7:
+            if memory.importance.value > policy.working_promote_importance:
                 return True
-            if memory.access_count > 5:
+            if memory.access_count > policy.working_promote_access_count:
                 return True
-            if memory.verification_score > 0.8:
+            if memory.verification_score > policy.working_promote_verification:
                 return True
 
         # Short Term -> Long Term
         if memory.tier == MemoryTier.SHORT_TERM:
             # Criteria: Very high importance OR sustained access over time
-            if memory.importance.value > 0.85:
+            if memory.importance.value > policy.short_term_promote_importance:
                 return True
-            if memory.access_count > 20:
+            if memory.access_count > policy.short_term_promote_access_count:
                 # Also check age to ensure it's not just a burst
                 age_hours = (datetime.now(timezone.utc) - memory.created_at).total_seconds() / 3600
-                if age_hours > 24: # Accessed frequently over at least a day
+                if age_hours > policy.short_term_promote_age_hours:  # Accessed frequently over at least a day
                     return True
 
         return False
 
     def should_archive(self, memory: Memory) -> bool:
         """Determine if a memory should be archived."""
+        policy = self.policy
         if memory.is_archived:
             return False
 
         # Don't archive high importance memories regardless of age
-        if memory.importance.value > 0.9:
+        if memory.importance.value > policy.archive_protect_importance:
             return False
 
         now = datetime.now(timezone.utc)
@@ -97,17 +177,17 @@ class TemporalAnalysisService:
 
         # Working Memory: Archive if old and not promoted
         if memory.tier == MemoryTier.WORKING:
-            if age_days > 1.0: # Older than 1 day
+            if age_days > policy.working_archive_age_days:
                 return True
 
         # Short Term: Archive if old and low importance/access
         if memory.tier == MemoryTier.SHORT_TERM:
-            if age_days > 30.0 and memory.access_count < 5:
+            if age_days > policy.short_term_archive_age_days and memory.access_count < policy.short_term_archive_access_count:
                 return True
 
         # Long Term: Rarely archive, only if explicitly low importance and very old
         if memory.tier == MemoryTier.LONG_TERM:
-            if age_days > 365.0 and memory.importance.value < 0.2:
+            if age_days > policy.long_term_archive_age_days and memory.importance.value < policy.long_term_archive_importance:
                 return True
 
         return False
@@ -177,7 +257,12 @@ class TemporalAnalysisService:
         return updated_memory
 
     async def batch_process_decay(self, memory_ids: List[str]) -> Dict[str, Any]:
-        """Process decay updates for a batch of memories."""
+        """Process decay updates for a batch of memories.
+
+        Reads the scoring columns of ``DECAY_BATCH_SIZE`` memories per query,
+        scores them with ``TemporalDecayPolicy.score_batch`` and writes each
+        chunk back in one round trip.
+        """
         results = {
             "processed": 0,
             "promoted": 0,
@@ -185,26 +270,81 @@ class TemporalAnalysisService:
             "errors": 0
         }
 
-        for mid in memory_ids:
+        for start in range(0, len(memory_ids), DECAY_BATCH_SIZE):
+            chunk = memory_ids[start:start + DECAY_BATCH_SIZE]
             try:
-                memory = await self.db_client.get_memory(mid)
-                if not memory:
-                    continue
-
-                updated_mem = await self.update_memory_decay(memory)
-                results["processed"] += 1
+                rows = await self._fetch_decay_rows(chunk)
+            except Exception as e:
+                logger.error(f"Error loading decay columns for {len(chunk)} memories: {e}")
+                results["errors"] += len(chunk)
+                continue
+            await self._score_and_apply(rows, results)
 
-                if updated_mem.tier != memory.tier:
-                    results["promoted"] += 1
-                if updated_mem.is_archived and not memory.is_archived:
-                    results["archived"] += 1
+        return results
 
-            except Exception as e:
-                logger.error(f"Error processing decay for memory {mid}: {e}")
-                results["errors"] += 1
+    async def process_decay_stream(
+        self,
+        user_id: Optional[str] = None,
+        batch_size: int = DECAY_BATCH_SIZE
+    ) -> Dict[str, Any]:
+        """Process decay updates for every non-archived memory (of ``user_id``, if given).
 
+        Streams the scoring columns with keyset pagination, so the scan has
+        no size cap and holds at most a couple of pages.
+        """
+        results = {"processed": 0, "promoted": 0, "archived": 0, "errors": 0}
+        rows: List[Dict[str, Any]] = []
+        async for row in self.db_client.iter_memories(user_id, fields=MemoryColumns.FIELDS, batch_size=batch_size):
+            rows.append(row)
+            if len(rows) >= batch_size:
+                await self._score_and_apply(rows, results)
+                rows = []
+        if rows:
+            await self._score_and_apply(rows, results)
         return results
 
+    async def _fetch_decay_rows(self, memory_ids: List[str]) -> List[Dict[str, Any]]:
+        params = {f"id_{i}": memory_id for i, memory_id in enumerate(memory_ids)}
+        targets = ", ".join(f"type::thing('memory', $id_{i})" for i in range(len(memory_ids)))
+        query = f"SELECT id, {', '.join(MemoryColumns.FIELDS)} FROM {targets} WHERE is_archived = false;"
+        async with self.db_client.get_connection() as conn:
+            response = await conn.query(query, params)
+        if response and isinstance(response, list):
+            if len(response) > 0 and isinstance(response[0], dict) and 'result' in response[0]:
+                return response[0]['result'] or []
+            return response
+        return []
+
+    async def _score_and_apply(self, rows: List[Dict[str, Any]], results: Dict[str, Any]) -> None:
+        """Score one chunk of rows and write decay, tier and archival in one round trip."""
+        if not rows:
+            return
+        try:
+            columns = MemoryColumns.from_rows(rows, parse_time=self.db_client._parse_dt)
+        except (KeyError, TypeError, ValueError) as e:
+            logger.error(f"Error reading decay columns for {len(rows)} memories: {e}")
+            results["errors"] += len(rows)
+            return
+        scores = self.policy.score_batch(columns, datetime.now(timezone.utc))
+
+        try:
+            await self.db_client.write_lifecycle_scores(
+                columns.ids,
+                columns.user_ids,
+                scores.decay.tolist(),
+                [TIERS[code].value for code in scores.next_tier.tolist()],
+                scores.archive.tolist(),
+                scores.promote.tolist(),
+            )
+        except Exception as e:
+            logger.error(f"Error writing decay updates for {len(rows)} memories: {e}")
+            results["errors"] += len(rows)
+            return
+
+        results["processed"] += len(columns)
+        results["promoted"] += int(scores.promote.sum())
+        results["archived"] += int(scores.archive.sum())
+
     async def track_graph_evolution(self, graph_service) -> str:
         """
         Strategy 75: Temporal Graph Evolution.
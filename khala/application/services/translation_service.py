@@ -6,14 +6,27 @@ This service handles language detection and translation using Gemini.
 import logging
 from typing import Dict, Any, Optional
 from khala.infrastructure.gemini.client import GeminiClient
+from khala.application.services.local_query_classifier import LANGUAGE_NAMES, LanguageDetector
 
 logger = logging.getLogger(__name__)
 
 class TranslationService:
-    """Service for translating queries and content."""
-
-    def __init__(self, gemini_client: GeminiClient):
+    """Service for translating queries and content.
+
+    With a ``language_detector``, text that is confidently already in the
+    target language is returned without an LLM call.
+    """
+
+    def __init__(
+        self,
+        gemini_client: GeminiClient,
+        language_detector: Optional[LanguageDetector] = None,
+        min_confidence: float = 0.7
+    ):
         self.gemini_client = gemini_client
+        self.language_detector = language_detector
+        self.min_confidence = min_confidence
+        self.stats = {"local": 0, "llm": 0}
 
     async def detect_and_translate(self, text: str, target_lang: str = "English") -> Dict[str, Any]:
         """
@@ -24,9 +37,23 @@ class TranslationService:
                 "original_text": str,
                 "detected_language": str,
                 "translated_text": str,
-                "was_translated": bool
+                "was_translated": bool,
+                "source": "local" | "llm"
             }
         """
+        if self.language_detector is not None:
+            language, confidence = self.language_detector.detect(text)
+            if confidence >= self.min_confidence and LANGUAGE_NAMES.get(language, "").lower() == target_lang.lower():
+                self.stats["local"] += 1
+                return {
+                    "original_text": text,
+                    "detected_language": LANGUAGE_NAMES[language],
+                    "translated_text": text,
+                    "was_translated": False,
+                    "source": "local"
+                }
+
+        self.stats["llm"] += 1
         prompt = f"""
         Analyze the following text:
         "{text}"
@@ -69,7 +96,8 @@ class TranslationService:
                     "original_text": text,
                     "detected_language": detected,
                     "translated_text": translated,
-                    "was_translated": was_translated
+                    "was_translated": was_translated,
+                    "source": "llm"
                 }
 
             return {
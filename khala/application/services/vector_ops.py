@@ -10,41 +10,80 @@ This service implements Strategies 79-84 from Module 11.C.2:
 """
 
 import logging
-from typing import List, Dict, Optional, Tuple, Any, Union
+import random
+from typing import AsyncIterator, List, Dict, Optional, Tuple, Any, Union
 import numpy as np
 import datetime
-from sklearn.cluster import KMeans
 from sklearn.metrics.pairwise import cosine_similarity
 
 from khala.infrastructure.surrealdb.client import SurrealDBClient
+from khala.infrastructure.vector.clustering import assign_to_centroids, embedding_moments, fit_centroids
+from khala.infrastructure.vector.quantization import Int8Codec
 
 logger = logging.getLogger(__name__)
 
 class AdvancedVectorService:
     """Service for advanced vector operations and analytics."""
 
-    def __init__(self, db_client: SurrealDBClient):
+    def __init__(self, db_client: SurrealDBClient, compute: Optional[Any] = None):
         """Initialize service with database client.
 
         Args:
             db_client: SurrealDBClient instance
+            compute: Execution lane (``ExecutionLane``) for the clustering and drift
+                kernels; without one they run inline on the event loop.
         """
         self.db_client = db_client
+        self.compute = compute
 
-    def quantize_vector(self, vector: List[float], method: str = "int8") -> List[int]:
-        """Implement Strategy 79: Vector Quantization."""
+    async def _run(self, kernel, *args):
+        if self.compute is None:
+            return kernel(*args)
+        return await self.compute.run(kernel, *args)
+
+    def calibrate_quantization(self, vectors: List[List[float]], percentile: float = 99.9) -> List[float]:
+        """Per-dimension int8 scales for a user's or model's vectors (Strategy 79).
+
+        Pass the result as ``scales`` to ``quantize_vector``/``dequantize_vector``
+        instead of relying on the fixed [-1, 1] clip.
+        """
+        matrix = np.asarray(vectors, dtype=np.float32)
+        return Int8Codec(matrix.shape[1], percentile=percentile).fit(matrix).scales.tolist()
+
+    def quantize_vector(
+        self,
+        vector: List[float],
+        method: str = "int8",
+        scales: Optional[List[float]] = None
+    ) -> List[int]:
+        """Implement Strategy 79: Vector Quantization.
+
+        Without ``scales`` values are clipped to [-1, 1] and mapped to
+        [-127, 127]; with calibrated ``scales`` each dimension uses its own range.
+        """
         if method == "int8":
             vec_np = np.array(vector, dtype=np.float32)
+            if scales is not None:
+                codec = Int8Codec(len(vec_np))
+                codec.scales = np.asarray(scales, dtype=np.float32)
+                return codec.encode(vec_np).tolist()
             vec_np = np.clip(vec_np, -1.0, 1.0)
             quantized = (vec_np * 127).astype(np.int8)
             return quantized.tolist()
         else:
             raise ValueError(f"Unsupported quantization method: {method}")
 
-    def dequantize_vector(self, quantized_vector: List[int], method: str = "int8") -> List[float]:
+    def dequantize_vector(
+        self,
+        quantized_vector: List[int],
+        method: str = "int8",
+        scales: Optional[List[float]] = None
+    ) -> List[float]:
         """Reconstruct float vector from quantized representation."""
         if method == "int8":
             vec_np = np.array(quantized_vector, dtype=np.float32)
+            if scales is not None:
+                return (vec_np * np.asarray(scales, dtype=np.float32)).tolist()
             return (vec_np / 127.0).tolist()
         else:
             raise ValueError(f"Unsupported quantization method: {method}")
@@ -77,40 +116,58 @@ class AdvancedVectorService:
 
         return interpolated.tolist()
 
-    async def compute_clusters(self, k: int = 10, sample_size: int = 1000) -> Dict[str, Any]:
-        """Implement Strategy 81: Vector Clustering (Optimized)."""
-        # 1. Fetch vectors
-        query = f"SELECT id, embedding FROM memory WHERE embedding IS NOT NONE LIMIT {sample_size};"
-        async with self.db_client.get_connection() as conn:
-            results = await conn.query(query)
-
-        memories = results if results else []
-        if isinstance(memories, list) and len(memories) > 0 and isinstance(memories[0], dict) and 'result' in memories[0]:
-             memories = memories[0]['result']
-
-        if not memories:
+    async def _embedding_pages(self, batch_size: int) -> AsyncIterator[Tuple[List[Any], np.ndarray]]:
+        """Stream ``(ids, embeddings)`` pages of every memory with an embedding."""
+        ids: List[Any] = []
+        vectors: List[List[float]] = []
+        async for row in self.db_client.iter_memories(
+            None, fields=["embedding"], batch_size=batch_size,
+            has_fields=["embedding"], include_archived=True
+        ):
+            if not isinstance(row, dict) or not row.get("embedding"):
+                continue
+            ids.append(row.get("id"))
+            vectors.append(row["embedding"])
+            if len(ids) >= batch_size:
+                yield ids, np.asarray(vectors, dtype=np.float64)
+                ids, vectors = [], []
+        if ids:
+            yield ids, np.asarray(vectors, dtype=np.float64)
+
+    async def compute_clusters(self, k: int = 10, sample_size: int = 1000, batch_size: int = 500) -> Dict[str, Any]:
+        """Implement Strategy 81: Vector Clustering (Optimized).
+
+        KMeans is fit on a reservoir sample of ``sample_size`` embeddings.
+        Every memory is then assigned to its nearest centroid in a second
+        streaming pass, so memory use is bounded by the sample plus one page.
+        """
+        # 1. Reservoir-sample vectors from the stream
+        rng = random.Random(42)
+        # Rows are copied so the sample does not pin whole pages in memory
+        sample: List[np.ndarray] = []
+        seen = 0
+        async for _, page in self._embedding_pages(batch_size):
+            for vector in page:
+                seen += 1
+                if len(sample) < sample_size:
+                    sample.append(vector.copy())
+                else:
+                    slot = rng.randrange(seen)
+                    if slot < sample_size:
+                        sample[slot] = vector.copy()
+
+        if not sample:
             logger.warning("No memories found for clustering")
             return {"status": "no_data"}
 
-        vectors = []
-        ids = []
-        for mem in memories:
-            if isinstance(mem, dict) and mem.get("embedding"):
-                vectors.append(mem["embedding"])
-                ids.append(mem["id"])
-
-        if len(vectors) < k:
-            logger.warning(f"Not enough vectors ({len(vectors)}) for {k} clusters")
+        if len(sample) < k:
+            logger.warning(f"Not enough vectors ({len(sample)}) for {k} clusters")
             return {"status": "insufficient_data"}
 
-        X = np.array(vectors)
+        X = np.array(sample)
 
         # 2. Perform KMeans
-        kmeans = KMeans(n_clusters=k, random_state=42, n_init=10)
-        kmeans.fit(X)
-
-        centroids = kmeans.cluster_centers_
-        labels = kmeans.labels_
+        centroids = await self._run(fit_centroids, X, k)
 
         # 3. Store Clusters
         timestamp = datetime.datetime.now(datetime.timezone.utc).isoformat()
@@ -120,13 +177,10 @@ class AdvancedVectorService:
             await conn.query("DELETE vector_cluster;")
 
             for i, centroid in enumerate(centroids):
-                cluster_points = X[labels == i]
-                radius = float(np.max(np.linalg.norm(cluster_points - centroid, axis=1))) if len(cluster_points) > 0 else 0.0
-
                 record = {
                     "centroid": centroid.tolist(),
-                    "radius": radius,
-                    "member_count": int(np.sum(labels == i)),
+                    "radius": 0.0,
+                    "member_count": 0,
                     "created_at": timestamp,
                     "updated_at": timestamp
                 }
@@ -137,31 +191,45 @@ class AdvancedVectorService:
                 elif isinstance(created, dict) and "id" in created:
                      cluster_map[i] = created["id"]
 
-            # 4. Update Memories with Cluster ID (Batch)
-            batch_size = 50
-            for i in range(0, len(ids), batch_size):
-                batch_ids = ids[i:i+batch_size]
-                batch_labels = labels[i:i+batch_size]
-
-                queries = []
-                params = {}
-
-                for j, mem_id in enumerate(batch_ids):
-                    cluster_idx = batch_labels[j]
-                    if cluster_idx in cluster_map:
-                        cluster_record_id = cluster_map[cluster_idx]
-                        # Use parameter binding for ID to prevent injection
-                        queries.append(f"UPDATE $id_{j} SET cluster_id = $cid_{j};")
-                        params[f"id_{j}"] = mem_id
-                        params[f"cid_{j}"] = cluster_record_id
-
-                if queries:
+        # 4. Assign every memory to its cluster, one page per round trip
+        member_counts = np.zeros(k, dtype=np.int64)
+        radii = np.zeros(k, dtype=np.float64)
+        updated = 0
+        async for ids, page in self._embedding_pages(batch_size):
+            labels, distances = await self._run(assign_to_centroids, page, centroids)
+            member_counts += np.bincount(labels, minlength=k)
+            np.maximum.at(radii, labels, distances)
+
+            queries = []
+            params = {}
+            for j, (mem_id, cluster_idx) in enumerate(zip(ids, labels.tolist())):
+                if cluster_idx in cluster_map:
+                    # Use parameter binding for ID to prevent injection
+                    queries.append(f"UPDATE $id_{j} SET cluster_id = $cid_{j};")
+                    params[f"id_{j}"] = mem_id
+                    params[f"cid_{j}"] = cluster_map[cluster_idx]
+
+            if queries:
+                async with self.db_client.get_connection() as conn:
                     await conn.query("\n".join(queries), params)
+                updated += len(queries)
+
+        # 5. Record full-population cluster statistics
+        queries = []
+        params = {}
+        for i, cluster_id in cluster_map.items():
+            queries.append(f"UPDATE $cid_{i} SET radius = $radius_{i}, member_count = $count_{i};")
+            params[f"cid_{i}"] = cluster_id
+            params[f"radius_{i}"] = float(radii[i])
+            params[f"count_{i}"] = int(member_counts[i])
+        if queries:
+            async with self.db_client.get_connection() as conn:
+                await conn.query("\n".join(queries), params)
 
         return {
             "status": "success",
             "clusters_created": len(cluster_map),
-            "memories_updated": len(ids)
+            "memories_updated": updated
         }
 
     async def detect_anomalies(self, threshold_std: float = 2.0) -> List[Dict[str, Any]]:
@@ -236,29 +304,26 @@ class AdvancedVectorService:
 
         return anomalies
 
-    async def detect_drift(self, model_version: str = "default") -> Dict[str, Any]:
+    async def detect_drift(self, model_version: str = "default", batch_size: int = 500) -> Dict[str, Any]:
         """Implement Strategy 80: Vector Drift Detection."""
         timestamp = datetime.datetime.now(datetime.timezone.utc).isoformat()
 
-        query = "SELECT embedding FROM memory WHERE embedding IS NOT NONE;"
-        async with self.db_client.get_connection() as conn:
-            results = await conn.query(query)
-
-        vectors = []
-        if isinstance(results, list):
-             if len(results) > 0 and isinstance(results[0], dict) and 'result' in results[0]:
-                 items = results[0]['result']
-             else:
-                 items = results
-             vectors = [r["embedding"] for r in items if isinstance(r, dict) and "embedding" in r]
-
-        if not vectors:
+        # Running sums keep memory flat: mean = S / n and the average squared
+        # distance from the mean (trace of covariance) = mean(|x|^2) - |mean|^2
+        count = 0
+        total: Optional[np.ndarray] = None
+        total_sq = 0.0
+        async for ids, page in self._embedding_pages(batch_size):
+            page_sum, page_sq = await self._run(embedding_moments, page)
+            total = page_sum if total is None else total + page_sum
+            total_sq += page_sq
+            count += len(ids)
+
+        if not count:
             return {"status": "no_data"}
 
-        X = np.array(vectors)
-        mean_embedding = np.mean(X, axis=0)
-        # Average squared Euclidean distance from the mean (trace of covariance matrix)
-        variance = float(np.mean(np.sum((X - mean_embedding)**2, axis=1)))
+        mean_embedding = total / count
+        variance = max(0.0, total_sq / count - float(mean_embedding @ mean_embedding))
 
         prev_query = "SELECT * FROM vector_stats ORDER BY window_start DESC LIMIT 1;"
         async with self.db_client.get_connection() as conn:
@@ -284,7 +349,7 @@ class AdvancedVectorService:
             "mean_embedding": mean_embedding.tolist(),
             "variance": variance,
             "drift_score": drift_score,
-            "sample_count": len(vectors),
+            "sample_count": count,
             "model_version": model_version
         }
 
@@ -294,6 +359,6 @@ class AdvancedVectorService:
         return {
             "drift_score": drift_score,
             "variance": variance,
-            "sample_count": len(vectors),
+            "sample_count": count,
             "status": "drift_detected" if drift_score > 0.1 else "stable"
         }
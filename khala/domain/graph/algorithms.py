@@ -0,0 +1,68 @@
+"""Graph analytics kernels over relationship rows.
+
+Module-level so ``GraphService`` can run them in a thread or process
+execution lane; they only need networkx and the fetched rows.
+"""
+import logging
+from typing import Any, Dict, List
+
+import networkx as nx
+
+logger = logging.getLogger(__name__)
+
+
+def _weighted_graph(rel_data: List[Dict[str, Any]]) -> nx.Graph:
+    graph = nx.Graph()
+    for r in rel_data:
+        if isinstance(r, dict):
+            graph.add_edge(r['from_entity_id'], r['to_entity_id'], weight=r.get('strength', 1.0))
+    return graph
+
+
+def centrality(rel_data: List[Dict[str, Any]], method: str) -> Dict[str, float]:
+    g = _weighted_graph(rel_data)
+    if method == "degree": return nx.degree_centrality(g)
+    elif method == "betweenness": return nx.betweenness_centrality(g)
+    elif method == "pagerank": return nx.pagerank(g)
+    else: raise ValueError(f"Unknown method: {method}")
+
+
+def subgraph_matches(rel_data: List[Dict[str, Any]], target_graph: nx.Graph, limit: int = 5) -> List[Dict[str, str]]:
+    host_graph = nx.DiGraph()
+    for r in rel_data:
+        if isinstance(r, dict):
+            host_graph.add_edge(
+                r['from_entity_id'],
+                r['to_entity_id'],
+                relation_type=r.get('relation_type')
+            )
+
+    gm = nx.algorithms.isomorphism.GraphMatcher(
+        host_graph,
+        target_graph,
+        edge_match=nx.algorithms.isomorphism.categorical_edge_match('relation_type', None)
+    )
+    matches = []
+    for i, subgraph in enumerate(gm.subgraph_isomorphisms_iter()):
+        if i >= limit: break
+        matches.append(subgraph)
+    return matches
+
+
+def communities(rel_data: List[Dict[str, Any]], method: str) -> Dict[str, List[str]]:
+    graph = _weighted_graph(rel_data)
+
+    found = []
+    try:
+        if method == "louvain":
+            found = nx.community.louvain_communities(graph, weight='weight')
+        elif method == "girvan_newman":
+            comp = nx.community.girvan_newman(graph)
+            found = next(comp)
+        else:
+            found = nx.community.greedy_modularity_communities(graph, weight='weight')
+    except (AttributeError, ImportError):
+        logger.warning("Advanced community detection not available, fallback to label propagation")
+        found = nx.community.label_propagation_communities(graph)
+
+    return {f"community_{i}": list(comm) for i, comm in enumerate(found)}
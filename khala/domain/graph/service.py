@@ -6,6 +6,7 @@ from typing import List, Optional, Dict, Any, Set
 from datetime import datetime, timezone
 import networkx as nx
 
+from khala.domain.graph import algorithms
 from khala.domain.memory.entities import Entity, Relationship, EntityType
 from khala.domain.memory.repository import MemoryRepository
 from khala.infrastructure.surrealdb.client import SurrealDBClient
@@ -15,8 +16,11 @@ logger = logging.getLogger(__name__)
 class GraphService:
     """Service for advanced graph operations like hyperedges and inheritance."""
 
-    def __init__(self, repository: MemoryRepository, db_client: Optional[SurrealDBClient] = None):
+    def __init__(self, repository: MemoryRepository, db_client: Optional[SurrealDBClient] = None,
+                 compute: Optional[Any] = None):
         self.repository = repository
+        # Execution lane for the networkx kernels; defaults to the asyncio thread pool
+        self.compute = compute
         # Dependency Injection or extraction
         self.client = db_client
         if not self.client and hasattr(repository, 'client'):
@@ -25,6 +29,11 @@ class GraphService:
         if not self.client:
             logger.warning("GraphService initialized without SurrealDBClient. Advanced operations will fail.")
 
+    async def _run(self, kernel, *args):
+        if self.compute is None:
+            return await asyncio.to_thread(kernel, *args)
+        return await self.compute.run(kernel, *args)
+
     def _require_client(self) -> SurrealDBClient:
         if not self.client:
             raise RuntimeError("SurrealDBClient is required for this operation.")
@@ -278,14 +287,6 @@ class GraphService:
         """
         params = {"limit": limit}
 
-        # Build graph in thread to avoid blocking loop
-        def _build_and_compute():
-            graph = nx.Graph()
-            # Fetching is async, this function is sync for computation.
-            # We need to fetch first.
-            return graph
-
-        # We fetch first
         async with client.get_connection() as conn:
             response = await conn.query(query, params)
             rels = []
@@ -298,19 +299,8 @@ class GraphService:
         if not rels:
             return {}
 
-        def _compute(rel_data):
-            g = nx.Graph()
-            for r in rel_data:
-                if isinstance(r, dict):
-                    g.add_edge(r['from_entity_id'], r['to_entity_id'], weight=r.get('strength', 1.0))
-
-            if method == "degree": return nx.degree_centrality(g)
-            elif method == "betweenness": return nx.betweenness_centrality(g)
-            elif method == "pagerank": return nx.pagerank(g)
-            else: raise ValueError(f"Unknown method: {method}")
-
         # Offload CPU intensive task
-        return await asyncio.to_thread(_compute, rels)
+        return await self._run(algorithms.centrality, rels, method)
 
     async def find_subgraph_isomorphism(self, target_graph: nx.Graph, limit: int = 100) -> List[Dict[str, str]]:
         """Finds occurrences of a query graph (pattern). WARNING: Expensive."""
@@ -332,28 +322,7 @@ class GraphService:
                   else:
                       rels = response
 
-        def _compute(rel_data):
-            host_graph = nx.DiGraph()
-            for r in rel_data:
-                if isinstance(r, dict):
-                    host_graph.add_edge(
-                        r['from_entity_id'],
-                        r['to_entity_id'],
-                        relation_type=r.get('relation_type')
-                    )
-
-            gm = nx.algorithms.isomorphism.GraphMatcher(
-                host_graph,
-                target_graph,
-                edge_match=nx.algorithms.isomorphism.categorical_edge_match('relation_type', None)
-            )
-            matches = []
-            for i, subgraph in enumerate(gm.subgraph_isomorphisms_iter()):
-                if i >= 5: break
-                matches.append(subgraph)
-            return matches
-
-        return await asyncio.to_thread(_compute, rels)
+        return await self._run(algorithms.subgraph_matches, rels, target_graph)
 
     async def detect_communities(self, method: str = "louvain") -> Dict[str, List[str]]:
         """Detects communities. WARNING: In-memory processing."""
@@ -376,31 +345,7 @@ class GraphService:
 
         if not rels: return {}
 
-        def _compute(rel_data):
-            graph = nx.Graph()
-            for r in rel_data:
-                if isinstance(r, dict):
-                    graph.add_edge(r['from_entity_id'], r['to_entity_id'], weight=r.get('strength', 1.0))
-
-            communities = []
-            try:
-                if method == "louvain":
-                    communities = nx.community.louvain_communities(graph, weight='weight')
-                elif method == "girvan_newman":
-                     comp = nx.community.girvan_newman(graph)
-                     communities = next(comp)
-                else:
-                     communities = nx.community.greedy_modularity_communities(graph, weight='weight')
-            except (AttributeError, ImportError):
-                logger.warning("Advanced community detection not available, fallback to label propagation")
-                communities = nx.community.label_propagation_communities(graph)
-
-            result = {}
-            for i, comm in enumerate(communities):
-                result[f"community_{i}"] = list(comm)
-            return result
-
-        return await asyncio.to_thread(_compute, rels)
+        return await self._run(algorithms.communities, rels, method)
 
     def _deserialize_relationship(self, data: Dict[str, Any]) -> Relationship:
         """Helper to deserialize relationship data."""
@@ -5,6 +5,7 @@ the KHALA memory system, following Domain-Driven Design principles.
 """
 
 from .entities import Memory, MemoryTier, Entity, Relationship
+from .lifecycle import LifecycleRules, PromotionRule
 from .services import MemoryService, EntityService
 from .value_objects import EmbeddingVector, ImportanceScore, DecayScore
 
@@ -13,6 +14,8 @@ __all__ = [
     "MemoryTier", 
     "Entity",
     "Relationship",
+    "LifecycleRules",
+    "PromotionRule",
     "MemoryService",
     "EntityService",
     "EmbeddingVector",
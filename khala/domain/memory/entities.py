@@ -6,7 +6,7 @@ business logic for memory management, following DDD principles.
 
 from dataclasses import dataclass, field
 from datetime import datetime, timezone, timedelta
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Awaitable, Callable, FrozenSet, Optional
 import uuid
 from enum import Enum
 import logging
@@ -35,6 +35,8 @@ class Memory:
     PROMOTION_SHORT_TERM_IMPORTANCE = 0.9
     ARCHIVE_AGE_DAYS = 90
     ARCHIVE_IMPORTANCE = 0.3
+    DECAY_HALF_LIFE_DAYS = 30
+    DECAY_ARCHIVE_SCORE = 0.1
 
     # Core attributes
     user_id: str
@@ -92,6 +94,26 @@ class Memory:
     surprise_momentum: float = 0.0
     retention_weight: float = 1.0
 
+    # Read state set by repositories for projected reads (see MemoryProjection).
+    # ``_loaded_fields`` lists the persisted columns a partial read loaded
+    # (None means all of them); ``_embedding_loader`` fetches a deferred embedding.
+    _loaded_fields: Optional[FrozenSet[str]] = field(default=None, init=False, repr=False, compare=False)
+    _embedding_loader: Optional[Callable[["Memory"], Awaitable[None]]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    @property
+    def embedding_pending(self) -> bool:
+        """True while the embedding was left out of the read and not loaded yet."""
+        return self.embedding is None and self._embedding_loader is not None
+
+    async def load_embedding(self) -> Optional[EmbeddingVector]:
+        """Return the embedding, fetching it first if the read deferred it."""
+        if self.embedding_pending:
+            await self._embedding_loader(self)
+            self._embedding_loader = None
+        return self.embedding
+
     @property
     def importance_score(self) -> ImportanceScore:
         """Alias for importance to support legacy code."""
@@ -181,7 +203,7 @@ class Memory:
         self.access_count += 1
         self.accessed_at = datetime.now(timezone.utc)
     
-    def calculate_decay_score(self, half_life_days: int = 30) -> DecayScore:
+    def calculate_decay_score(self, half_life_days: int = DECAY_HALF_LIFE_DAYS) -> DecayScore:
         """Calculate decay score based on age and importance."""
         age_days: float = self.get_age_hours() / 24.0
         self.decay_score = DecayScore.calculate(
@@ -0,0 +1,231 @@
+"""Lifecycle rules for memory promotion, decay and archival.
+
+The thresholds come from the ``Memory`` constants. They are held here as
+data so the same rules can be run per entity, as set-based UPDATE
+statements in the store, or over columnar batches, without restating
+the numbers anywhere else.
+"""
+
+import math
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, ClassVar, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .entities import Memory
+from .value_objects import MemoryTier
+
+# Tier codes used by columnar batches: ``MemoryColumns.tier`` holds indexes into TIERS
+TIERS: Tuple[MemoryTier, ...] = tuple(MemoryTier)
+TIER_CODES: Dict[MemoryTier, int] = {tier: code for code, tier in enumerate(TIERS)}
+
+
+def _to_datetime(value: Any) -> datetime:
+    """Stored timestamp (datetime or ISO string) as an aware UTC datetime."""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _record_key(record_id: Any) -> str:
+    key = str(record_id)
+    return key[len("memory:"):] if key.startswith("memory:") else key
+
+
+@dataclass
+class MemoryColumns:
+    """A batch of memories as parallel arrays, the input of the batch scorers.
+
+    Timestamps are UTC epoch seconds and ``tier`` holds codes into ``TIERS``.
+    Build one per streamed chunk with ``from_memories`` or ``from_rows``.
+    """
+    ids: List[str]
+    user_ids: List[str]
+    tier: np.ndarray
+    importance: np.ndarray
+    created_at: np.ndarray
+    accessed_at: np.ndarray
+    access_count: np.ndarray
+    verification_score: np.ndarray
+    is_archived: np.ndarray
+
+    # Stored columns ``from_rows`` reads, besides ``id``
+    FIELDS: ClassVar[Tuple[str, ...]] = (
+        "user_id", "tier", "importance", "created_at", "accessed_at", "access_count", "verification_score", "is_archived",
+    )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def from_memories(cls, memories: Sequence[Memory]) -> "MemoryColumns":
+        n = len(memories)
+        return cls(
+            ids=[m.id for m in memories],
+            user_ids=[m.user_id for m in memories],
+            tier=np.fromiter((TIER_CODES[m.tier] for m in memories), dtype=np.int8, count=n),
+            importance=np.fromiter((m.importance.value for m in memories), dtype=np.float64, count=n),
+            created_at=np.fromiter((m.created_at.timestamp() for m in memories), dtype=np.float64, count=n),
+            accessed_at=np.fromiter((m.accessed_at.timestamp() for m in memories), dtype=np.float64, count=n),
+            access_count=np.fromiter((m.access_count for m in memories), dtype=np.int64, count=n),
+            verification_score=np.fromiter((m.verification_score for m in memories), dtype=np.float64, count=n),
+            is_archived=np.fromiter((m.is_archived for m in memories), dtype=bool, count=n),
+        )
+
+    @classmethod
+    def from_rows(
+        cls,
+        rows: Sequence[Dict[str, Any]],
+        parse_time: Callable[[Any], datetime] = _to_datetime
+    ) -> "MemoryColumns":
+        """Build from stored rows holding ``id`` and ``FIELDS``.
+
+        ``parse_time`` turns a stored timestamp into an aware datetime; pass
+        the store's cached parser when rows carry ISO strings.
+        """
+        n = len(rows)
+        codes = {tier.value: code for tier, code in TIER_CODES.items()}
+
+        def epochs(name: str) -> np.ndarray:
+            return np.fromiter((parse_time(row[name]).timestamp() for row in rows), dtype=np.float64, count=n)
+
+        return cls(
+            ids=[_record_key(row["id"]) for row in rows],
+            user_ids=[row["user_id"] for row in rows],
+            tier=np.fromiter((codes[row["tier"]] for row in rows), dtype=np.int8, count=n),
+            importance=np.fromiter((row["importance"] for row in rows), dtype=np.float64, count=n),
+            created_at=epochs("created_at"),
+            accessed_at=epochs("accessed_at"),
+            access_count=np.fromiter((row.get("access_count") or 0 for row in rows), dtype=np.int64, count=n),
+            verification_score=np.fromiter(
+                (row.get("verification_score") or 0.0 for row in rows), dtype=np.float64, count=n
+            ),
+            is_archived=np.fromiter((bool(row.get("is_archived")) for row in rows), dtype=bool, count=n),
+        )
+
+
+@dataclass
+class BatchScores:
+    """Per-row results of a batch scorer, aligned with the scored ``MemoryColumns``."""
+    decay: np.ndarray
+    promote: np.ndarray
+    archive: np.ndarray
+    # Tier code after promotion; equal to the input tier where ``promote`` is False
+    next_tier: np.ndarray
+
+
+@dataclass(frozen=True)
+class PromotionRule:
+    """Promote ``from_tier`` memories to ``to_tier``; every bound is strict (``>``)."""
+    from_tier: MemoryTier
+    to_tier: MemoryTier
+    min_importance: float
+    min_age_hours: Optional[float] = None
+    min_access_count: Optional[int] = None
+
+    def created_before(self, now: datetime) -> Optional[datetime]:
+        """Latest ``created_at`` that satisfies the age bound."""
+        if self.min_age_hours is None:
+            return None
+        return now - timedelta(hours=self.min_age_hours)
+
+    def matches(self, memory: Memory, now: datetime) -> bool:
+        cutoff = self.created_before(now)
+        return (
+            memory.tier == self.from_tier
+            and memory.importance.value > self.min_importance
+            and (cutoff is None or memory.created_at < cutoff)
+            and (self.min_access_count is None or memory.access_count > self.min_access_count)
+        )
+
+
+@dataclass(frozen=True)
+class LifecycleRules:
+    """Promotion, decay and archive thresholds, defaulting to the ``Memory`` constants.
+
+    A non-archived memory is archived when it has never been accessed, its
+    importance is below ``archive_importance``, and either it is older than
+    ``archive_age_days`` or its decay score has fallen below
+    ``decay_archive_score``.
+    """
+    promotions: Tuple[PromotionRule, ...] = field(default_factory=lambda: (
+        PromotionRule(
+            MemoryTier.WORKING, MemoryTier.SHORT_TERM,
+            min_importance=Memory.PROMOTION_WORKING_IMPORTANCE,
+            min_age_hours=Memory.PROMOTION_WORKING_AGE_HOURS,
+            min_access_count=Memory.PROMOTION_WORKING_ACCESS_COUNT,
+        ),
+        PromotionRule(
+            MemoryTier.SHORT_TERM, MemoryTier.LONG_TERM,
+            min_importance=Memory.PROMOTION_SHORT_TERM_IMPORTANCE,
+        ),
+    ))
+    archive_age_days: float = Memory.ARCHIVE_AGE_DAYS
+    archive_importance: float = Memory.ARCHIVE_IMPORTANCE
+    decay_half_life_days: float = Memory.DECAY_HALF_LIFE_DAYS
+    decay_archive_score: float = Memory.DECAY_ARCHIVE_SCORE
+
+    def promotion_order(self) -> List[PromotionRule]:
+        """Promotions in the order sequential set-based updates must run.
+
+        A rule runs before any rule that feeds its ``from_tier``, so a memory
+        promoted in one run is not picked up again by the next tier's rule.
+        """
+        pending = list(self.promotions)
+        ordered = []
+        while pending:
+            ready = [r for r in pending if not any(o is not r and o.from_tier == r.to_tier for o in pending)]
+            # A cycle of tiers has no safe order; keep the declared one
+            rule = ready[0] if ready else pending[0]
+            ordered.append(rule)
+            pending.remove(rule)
+        return ordered
+
+    def archive_created_before(self, now: datetime) -> datetime:
+        return now - timedelta(days=self.archive_age_days)
+
+    def decay_score(self, importance: float, created_at: datetime, now: datetime) -> float:
+        """``importance * exp(-age_days / half_life)``, as ``DecayScore.calculate``."""
+        age_days = (now - created_at).total_seconds() / 86400.0
+        return min(importance * math.exp(-age_days / self.decay_half_life_days), 1.0)
+
+    def score_batch(self, columns: MemoryColumns, now: datetime) -> BatchScores:
+        """Decay, promotion and archive eligibility for a whole batch.
+
+        Row-for-row the same answers as ``decay_score``,
+        ``PromotionRule.matches`` and ``should_archive``; archived rows are
+        never promoted or archived.
+        """
+        now_ts = now.timestamp()
+        age_days = (now_ts - columns.created_at) / 86400.0
+        decay = np.minimum(columns.importance * np.exp(-age_days / self.decay_half_life_days), 1.0)
+
+        live = ~columns.is_archived
+        promote = np.zeros(len(columns), dtype=bool)
+        next_tier = columns.tier.copy()
+        for rule in self.promotions:
+            mask = live & (columns.tier == TIER_CODES[rule.from_tier]) & (columns.importance > rule.min_importance)
+            cutoff = rule.created_before(now)
+            if cutoff is not None:
+                mask &= columns.created_at < cutoff.timestamp()
+            if rule.min_access_count is not None:
+                mask &= columns.access_count > rule.min_access_count
+            # Rules are applied to the input tier, so a row advances at most one tier
+            promote |= mask
+            next_tier[mask] = TIER_CODES[rule.to_tier]
+
+        archive = (
+            live
+            & (columns.access_count == 0)
+            & (columns.importance < self.archive_importance)
+            & ((columns.created_at < self.archive_created_before(now).timestamp()) | (decay < self.decay_archive_score))
+        )
+        return BatchScores(decay=decay, promote=promote, archive=archive, next_tier=next_tier)
+
+    def should_archive(self, memory: Memory, decay_score: float, now: datetime) -> bool:
+        if memory.is_archived or memory.access_count != 0:
+            return False
+        if memory.importance.value >= self.archive_importance:
+            return False
+        return memory.created_at < self.archive_created_before(now) or decay_score < self.decay_archive_score
@@ -1,7 +1,47 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional, Dict, Any
+from dataclasses import dataclass
+from datetime import datetime
+from enum import Enum
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Union
 from .entities import Memory
-from .value_objects import EmbeddingVector
+from .lifecycle import LifecycleRules, MemoryColumns, PromotionRule
+from .value_objects import DecayScore, EmbeddingVector
+
+# Memories scored per batch by the streaming lifecycle defaults
+LIFECYCLE_CHUNK_SIZE = 500
+
+
+@dataclass
+class BulkCreateResult:
+    """Outcome of one memory in a bulk create."""
+    index: int
+    memory_id: Optional[str]
+    status: str  # "created" | "merged" | "duplicate" | "failed"
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status != "failed"
+
+
+class MemoryProjection(str, Enum):
+    """Which columns a memory read transfers.
+
+    - ``ID_ONLY``: record ids (and scores); row-level reads only.
+    - ``SUMMARY``: the fields used for ranking and display; no embeddings,
+      derived content columns, versions or events.
+    - ``FULL``: every column except the embedding vectors.
+    - ``WITH_EMBEDDING``: every column.
+
+    Memories read without their embedding load it on demand with
+    ``await memory.load_embedding()``. One fetch covers every memory from
+    the same read.
+    """
+    ID_ONLY = "id_only"
+    SUMMARY = "summary"
+    FULL = "full"
+    WITH_EMBEDDING = "with_embedding"
+
 
 class MemoryRepository(ABC):
     """
@@ -14,8 +54,28 @@ class MemoryRepository(ABC):
         """Save a new memory."""
         pass
         
+    async def create_bulk(self, memories: List[Memory], batch_size: int = 500) -> List[BulkCreateResult]:
+        """Save many memories; one result per input, in order.
+
+        The default saves them one at a time; implementations override it
+        with batched writes.
+        """
+        results = []
+        for i, memory in enumerate(memories):
+            try:
+                memory_id = await self.create(memory)
+                status = "created" if memory_id == memory.id else "merged"
+                results.append(BulkCreateResult(index=i, memory_id=memory_id, status=status))
+            except Exception as e:
+                results.append(BulkCreateResult(index=i, memory_id=None, status="failed", error=str(e)))
+        return results
+
     @abstractmethod
-    async def get_by_id(self, memory_id: str) -> Optional[Memory]:
+    async def get_by_id(
+        self,
+        memory_id: str,
+        projection: MemoryProjection = MemoryProjection.WITH_EMBEDDING
+    ) -> Optional[Memory]:
         """Retrieve a memory by its ID."""
         pass
         
@@ -36,7 +96,8 @@ class MemoryRepository(ABC):
         user_id: str, 
         top_k: int = 10, 
         min_similarity: float = 0.6,
-        filters: Optional[Dict[str, Any]] = None
+        filters: Optional[Dict[str, Any]] = None,
+        projection: MemoryProjection = MemoryProjection.WITH_EMBEDDING
     ) -> List[Memory]:
         """Search memories by vector similarity."""
         pass
@@ -47,7 +108,8 @@ class MemoryRepository(ABC):
         query_text: str, 
         user_id: str, 
         top_k: int = 10,
-        filters: Optional[Dict[str, Any]] = None
+        filters: Optional[Dict[str, Any]] = None,
+        projection: MemoryProjection = MemoryProjection.WITH_EMBEDDING
     ) -> List[Memory]:
         """Search memories by text (BM25/Full-text)."""
         pass
@@ -57,11 +119,80 @@ class MemoryRepository(ABC):
         self, 
         user_id: str, 
         tier: str, 
-        limit: int = 100
+        limit: int = 100,
+        projection: MemoryProjection = MemoryProjection.WITH_EMBEDDING
     ) -> List[Memory]:
         """Retrieve memories by tier."""
         pass
 
+    @abstractmethod
+    def iter_memories(
+        self,
+        user_id: Optional[str],
+        tier: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None,
+        batch_size: int = 500,
+        projection: MemoryProjection = MemoryProjection.WITH_EMBEDDING
+    ) -> AsyncIterator[Union[Memory, Dict[str, Any]]]:
+        """Stream all non-archived memories of a user (optionally one tier) in bounded memory.
+
+        Yields ``Memory`` objects, or row dicts restricted to ``fields`` when given.
+        The lifecycle defaults below read through it. Implement it as an async
+        generator.
+        """
+        pass
+
+    async def _lifecycle_chunks(self, user_id: str, tier: Optional[str] = None) -> AsyncIterator[List[Memory]]:
+        chunk: List[Memory] = []
+        async for memory in self.iter_memories(user_id, tier=tier, projection=MemoryProjection.FULL):
+            chunk.append(memory)
+            if len(chunk) >= LIFECYCLE_CHUNK_SIZE:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    async def promote_matching(self, user_id: str, rule: PromotionRule, now: datetime) -> List[str]:
+        """Move every memory of ``user_id`` matching ``rule`` to its next tier; returns their ids.
+
+        The default scores streamed chunks with ``LifecycleRules.score_batch``
+        and updates matches one at a time; implementations override it with
+        a set-based update.
+        """
+        rules = LifecycleRules(promotions=(rule,))
+        promoted = []
+        async for chunk in self._lifecycle_chunks(user_id, tier=rule.from_tier.value):
+            scores = rules.score_batch(MemoryColumns.from_memories(chunk), now)
+            for memory in (m for m, hit in zip(chunk, scores.promote) if hit):
+                memory.tier = rule.to_tier
+                memory.updated_at = now
+                await self.update(memory)
+                promoted.append(memory.id)
+        return promoted
+
+    async def refresh_decay_scores(self, user_id: str, rules: LifecycleRules, now: datetime) -> int:
+        """Recompute the decay score of every non-archived memory of ``user_id``; returns the count."""
+        refreshed = 0
+        async for chunk in self._lifecycle_chunks(user_id):
+            scores = rules.score_batch(MemoryColumns.from_memories(chunk), now)
+            for memory, score in zip(chunk, scores.decay.tolist()):
+                memory.decay_score = DecayScore(value=max(score, 0.0), half_life_days=rules.decay_half_life_days)
+                await self.update(memory)
+            refreshed += len(chunk)
+        return refreshed
+
+    async def archive_matching(self, user_id: str, rules: LifecycleRules, now: datetime) -> List[str]:
+        """Archive every memory of ``user_id`` that ``rules`` retire; returns their ids."""
+        archived = []
+        async for chunk in self._lifecycle_chunks(user_id):
+            scores = rules.score_batch(MemoryColumns.from_memories(chunk), now)
+            for memory in (m for m, hit in zip(chunk, scores.archive) if hit):
+                memory.is_archived = True
+                memory.updated_at = now
+                await self.update(memory)
+                archived.append(memory.id)
+        return archived
+
     @abstractmethod
     async def find_duplicate_groups(self, user_id: str) -> List[List[Memory]]:
         """Find groups of duplicate memories (exact match)."""
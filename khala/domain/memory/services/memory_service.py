@@ -70,7 +70,7 @@ class DecayService:
 
         memory.calculate_decay_score()
 
-    def should_archive_based_on_decay(self, memory: Memory, threshold: float = 0.1) -> bool:
+    def should_archive_based_on_decay(self, memory: Memory, threshold: float = Memory.DECAY_ARCHIVE_SCORE) -> bool:
         """Check if memory should be archived based on decay score."""
         if not memory.decay_score:
             self.update_decay_score(memory)
@@ -78,7 +78,7 @@ class DecayService:
         # Ensure decay_score is set
         if memory.decay_score and memory.decay_score.value < threshold:
              # Also consider access count and explicit importance
-             if memory.access_count == 0 and memory.importance.value < 0.3:
+             if memory.access_count == 0 and memory.importance.value < Memory.ARCHIVE_IMPORTANCE:
                  return True
 
         return False
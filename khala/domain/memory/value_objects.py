@@ -6,7 +6,7 @@ defined by their values.
 """
 
 from dataclasses import dataclass, field
-from typing import List, Final, Optional, Dict, Any
+from typing import List, Final, Optional, Dict, Any, Union
 from datetime import datetime
 from enum import Enum
 import numpy as np
@@ -16,7 +16,9 @@ import numpy as np
 class EmbeddingVector:
     """Immutable embedding vector for semantic search."""
     
-    values: List[float]
+    # A list, or the read-only float32 array of a trusted vector: use ``to_list``
+    # for database parameters and ``to_numpy`` for vector math
+    values: Union[List[float], np.ndarray]
     # dimensions is optional to support different embedding models (e.g. 768 vs 1536)
     # If provided, validation ensures the values list matches this size.
     dimensions: Optional[int] = None
@@ -25,6 +27,9 @@ class EmbeddingVector:
     model: Optional[str] = None
     version: Optional[str] = None
 
+    # Read-only float32 buffer of a trusted vector (see ``trusted``); ``values`` is the same array
+    _buffer: Optional[np.ndarray] = field(default=None, init=False, repr=False, compare=False)
+
     def __post_init__(self) -> None:
         """Validate the embedding vector."""
         if self.dimensions is not None and len(self.values) != self.dimensions:
@@ -42,8 +47,57 @@ class EmbeddingVector:
                     f"Embedding values must be floats in [-1, 1], got {value}"
                 )
     
+    @classmethod
+    def trusted(
+        cls,
+        values: Any,
+        model: Optional[str] = None,
+        version: Optional[str] = None
+    ) -> "EmbeddingVector":
+        """Wrap a vector read back from our own store, skipping validation.
+
+        Vectors are validated once, at ingest. Re-checking every element on
+        each read costs more than the rest of deserialization, so trusted
+        vectors skip ``__post_init__``. They hold their values as a
+        read-only float32 array, which ``to_numpy`` returns without copying.
+        """
+        if isinstance(values, list):
+            # Sized fromiter skips the dtype discovery pass of asarray on lists
+            buffer = np.fromiter(values, dtype=np.float32, count=len(values))
+        else:
+            buffer = np.array(values, dtype=np.float32)
+        buffer.flags.writeable = False
+        vector = object.__new__(cls)
+        object.__setattr__(vector, "values", buffer)
+        object.__setattr__(vector, "dimensions", None)
+        object.__setattr__(vector, "model", model)
+        object.__setattr__(vector, "version", version)
+        object.__setattr__(vector, "_buffer", buffer)
+        return vector
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, EmbeddingVector):
+            return NotImplemented
+        return (
+            self.dimensions == other.dimensions
+            and self.model == other.model
+            and self.version == other.version
+            and self.to_list() == other.to_list()
+        )
+
+    def to_list(self) -> List[float]:
+        """Values as a list of Python floats (e.g. for persistence)."""
+        if self._buffer is not None:
+            return self._buffer.tolist()
+        return self.values
+
     def to_numpy(self) -> np.ndarray:
-        """Convert to numpy array for computations."""
+        """Convert to numpy array for computations.
+
+        Trusted vectors return their read-only buffer instead of a copy.
+        """
+        if self._buffer is not None:
+            return self._buffer
         return np.array(self.values, dtype=np.float32)
     
     @classmethod
@@ -3,9 +3,21 @@ Asynchronous job processor for KHALA background operations.
 
 Implements priority-queued job processing with Redis backend,
 worker thread management, and comprehensive error handling.
+
+Idle workers block on the queue instead of polling it: BZPOPMIN on Redis
+and an asyncio.Condition on the in-memory fallback, so a submitted job
+starts as soon as a worker is free. When the Redis server supports
+scripting, jobs are popped and read in one atomic Lua call. Workers can
+claim several jobs per round trip (``claim_batch_size``).
+
+Each job type runs in an execution lane (see ``executors.execution_lanes``).
+By default the clustering, drift and graph analytics jobs run their CPU
+kernels in a process pool, so they cannot stall the event loop.
 """
 
 import asyncio
+import heapq
+import itertools
 import json
 import logging
 import time
@@ -13,7 +25,7 @@ from datetime import datetime, timezone, timedelta
 from enum import Enum
 from typing import Dict, List, Optional, Any, Callable
 from dataclasses import dataclass, asdict
-from asyncio import Queue, Task
+from asyncio import Task
 import uuid
 
 try:
@@ -27,9 +39,23 @@ from ....domain.memory.services import MemoryService
 from ....application.services.temporal_analyzer import TemporalAnalysisService
 from ...surrealdb.client import SurrealDBClient, SurrealConfig
 from khala.application.utils import json_serializer
+from ...executors.execution_lanes import ExecutionLanes, LaneConfig
 
 logger = logging.getLogger(__name__)
 
+QUEUE_KEY = "job:queue"
+
+# Pops up to ARGV[1] job keys and returns each job hash in the same call, so a
+# job is never out of the queue without its definition having been read.
+CLAIM_SCRIPT = """
+local popped = redis.call('ZPOPMIN', KEYS[1], ARGV[1])
+local jobs = {}
+for i = 1, #popped, 2 do
+    jobs[#jobs + 1] = redis.call('HGETALL', popped[i])
+end
+return jobs
+"""
+
 
 class JobPriority(Enum):
     """Job priority levels."""
@@ -69,6 +95,11 @@ class JobDefinition:
     worker_id: Optional[str] = None
 
 
+def queue_score(job: "JobDefinition") -> float:
+    """Sorted-set score: higher priority first, then oldest first (ZPOPMIN pops the lowest)."""
+    return (JobPriority.CRITICAL.value - job.priority.value) * 1e10 + job.created_at.timestamp()
+
+
 @dataclass
 class JobResult:
     """Result from job execution."""
@@ -85,6 +116,48 @@ class JobResult:
             self.completed_at = datetime.now(timezone.utc)
 
 
+class MemoryJobQueue:
+    """In-process priority queue whose consumers wait on an asyncio.Condition."""
+
+    def __init__(self):
+        self._heap: List[tuple] = []
+        self._sequence = itertools.count()
+        self._condition = asyncio.Condition()
+
+    def _push(self, job: "JobDefinition") -> None:
+        heapq.heappush(self._heap, (-job.priority.value, next(self._sequence), job))
+
+    async def put(self, job: "JobDefinition") -> None:
+        async with self._condition:
+            self._push(job)
+            self._condition.notify()
+
+    def get_nowait(self) -> "JobDefinition":
+        if not self._heap:
+            raise asyncio.QueueEmpty()
+        return heapq.heappop(self._heap)[2]
+
+    async def claim(self, max_jobs: int = 1, timeout: Optional[float] = None) -> List["JobDefinition"]:
+        """Up to ``max_jobs`` jobs, waiting up to ``timeout`` seconds for the first one."""
+        async with self._condition:
+            if not self._heap:
+                try:
+                    await asyncio.wait_for(self._condition.wait_for(lambda: bool(self._heap)), timeout)
+                except asyncio.TimeoutError:
+                    return []
+            jobs = [heapq.heappop(self._heap)[2] for _ in range(min(max_jobs, len(self._heap)))]
+            if self._heap:
+                # Leftover jobs: let another waiter take them
+                self._condition.notify()
+            return jobs
+
+    def empty(self) -> bool:
+        return not self._heap
+
+    def qsize(self) -> int:
+        return len(self._heap)
+
+
 class JobProcessor:
     """Main job processor for KHALA background operations."""
     
@@ -93,16 +166,39 @@ class JobProcessor:
         redis_url: str = "redis://localhost:6379/1",
         max_workers: int = 4,
         redis_ttl_seconds: int = 86400,  # 24 hours
-        enable_metrics: bool = True
+        enable_metrics: bool = True,
+        claim_batch_size: int = 1,
+        block_timeout_seconds: float = 5.0,
+        dispatch: str = "auto",
+        lanes: Optional[Dict[str, LaneConfig]] = None,
+        job_lanes: Optional[Dict[str, str]] = None
     ):
-        """Initialize job processor."""
+        """Initialize job processor.
+
+        Args:
+            claim_batch_size: Jobs a worker claims per round trip once the queue is non-empty.
+            block_timeout_seconds: How long an idle worker blocks on the queue before re-checking.
+            dispatch: "lua" pops and reads jobs in one atomic script, "blocking" uses
+                BZPOPMIN/ZPOPMIN plus a pipelined HGETALL, "auto" picks "lua" when the
+                server supports scripting.
+            lanes: Execution lanes by name, merged over the default asyncio lane
+                (sized ``max_workers``) and the two-process "analytics" lane.
+            job_lanes: Job type -> lane name; defaults to ``DEFAULT_JOB_LANES``.
+        """
+        if dispatch not in ("auto", "lua", "blocking"):
+            raise ValueError(f"Unknown dispatch mode: {dispatch}")
         self.redis_url = redis_url
         self.max_workers = max_workers
         self.redis_ttl = redis_ttl_seconds
         self.enable_metrics = enable_metrics
+        self.claim_batch_size = max(1, claim_batch_size)
+        self.block_timeout = block_timeout_seconds
+        self.dispatch = dispatch
         
         self.redis_client: Optional[redis.Redis] = None
-        self._memory_queue: Queue[JobDefinition] = Queue()
+        self._claim_script = None
+        self._memory_queue = MemoryJobQueue()
+        self.lanes = ExecutionLanes(lanes, job_lanes, default_size=max_workers)
         self._memory_jobs: Dict[str, JobDefinition] = {}
         self._memory_results: Dict[str, JobResult] = {}
         
@@ -136,18 +232,21 @@ class JobProcessor:
             return
         
         try:
-            if redis is not None:
+            if self.redis_client is None and redis is not None and self.redis_url:
                 self.redis_client = redis.Redis.from_url(self.redis_url, decode_responses=True)
+            if self.redis_client is not None:
                 await self.redis_client.ping()
-                logger.info(f"Connected to Redis at {self.redis_url}")
+                await self._load_claim_script()
+                logger.info(f"Connected to Redis at {self.redis_url} ({self.dispatch} dispatch)")
             else:
                 logger.warning("Redis not available, using in-memory queue only")
-                self.redis_client = None
             
             # Initialize SurrealDB with strict config
-            self.db_client = SurrealDBClient()
+            if self.db_client is None:
+                self.db_client = SurrealDBClient()
 
             self.memory_service = MemoryService()
+            await self.lanes.start()
             
             try:
                 from ...gemini.client import GeminiClient
@@ -185,8 +284,24 @@ class JobProcessor:
         if self.db_client:
             await self.db_client.close()
 
+        await asyncio.to_thread(self.lanes.shutdown)
+
         logger.info("Job processor stopped")
     
+    async def _load_claim_script(self) -> None:
+        if self.dispatch == "blocking":
+            return
+        try:
+            await self.redis_client.script_load(CLAIM_SCRIPT)
+        except Exception as e:
+            if self.dispatch == "lua":
+                raise
+            logger.info(f"Redis scripting unavailable ({e}), dispatching with BZPOPMIN/ZPOPMIN")
+            self.dispatch = "blocking"
+            return
+        self.dispatch = "lua"
+        self._claim_script = self.redis_client.register_script(CLAIM_SCRIPT)
+
     def _register_default_jobs(self) -> None:
         self._job_classes = {
             "decay_scoring": "DecayScoringJob",
@@ -194,7 +309,11 @@ class JobProcessor:
             "deduplication": "DeduplicationJob",
             "consistency_check": "ConsistencyJob",
             "index_repair": "IndexRepairJob",
-            "pattern_recognition": "PatternRecognitionJob"
+            "pattern_recognition": "PatternRecognitionJob",
+            "text_signature_backfill": "TextSignatureBackfillJob",
+            "vector_clustering": "VectorClusteringJob",
+            "drift_detection": "DriftDetectionJob",
+            "graph_analytics": "GraphAnalyticsJob"
         }
     
     async def submit_job(self, job_type: str, payload: Dict[str, Any], priority: JobPriority = JobPriority.MEDIUM, **kwargs) -> str:
@@ -216,7 +335,7 @@ class JobProcessor:
         if self.redis_client:
             await self._store_job_redis(job)
         else:
-            self._memory_queue.put_nowait(job)
+            await self._memory_queue.put(job)
         
         self.metrics["total_jobs"] += 1
         self.metrics["jobs_by_priority"][priority.value] += 1
@@ -243,40 +362,64 @@ class JobProcessor:
             self._memory_jobs[job.job_id] = job
             return
         
-        serialized = self._serialize_job(job)
-        await self.redis_client.hset(f"job:{job.job_id}", mapping=serialized)
-        
-        score = int(job.priority.value * 1000 - job.created_at.timestamp())
-        await self.redis_client.zadd("job:queue", {f"job:{job.job_id}": score})
-        
-        await self.redis_client.expire(f"job:{job.job_id}", self.redis_ttl)
-        await self.redis_client.expire("job:queue", self.redis_ttl)
-    
-    async def _get_next_job(self) -> Optional[JobDefinition]:
-        if self.redis_client:
-            result = await self.redis_client.zpopmin("job:queue")
-            if result:
-                job_key, _ = result[0]
-                job_data = await self.redis_client.hgetall(job_key)
-                if job_data: return self._deserialize_job(job_data)
-        
-        if not self._memory_queue.empty():
-            return self._memory_queue.get_nowait()
-        return None
+        # The hash is written before the queue entry, so a popped key always has its job
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            pipe.hset(f"job:{job.job_id}", mapping=self._serialize_job(job))
+            pipe.expire(f"job:{job.job_id}", self.redis_ttl)
+            pipe.zadd(QUEUE_KEY, {f"job:{job.job_id}": queue_score(job)})
+            pipe.expire(QUEUE_KEY, self.redis_ttl)
+            await pipe.execute()
     
+    async def _claim_jobs(self) -> List[JobDefinition]:
+        """Jobs for one worker, blocking up to ``block_timeout`` seconds while the queue is empty."""
+        if not self.redis_client:
+            return await self._memory_queue.claim(self.claim_batch_size, timeout=self.block_timeout)
+
+        if self._claim_script is not None:
+            rows = await self._claim_script(keys=[QUEUE_KEY], args=[self.claim_batch_size])
+            if rows:
+                return self._claimed_jobs([dict(zip(row[::2], row[1::2])) for row in rows])
+
+        popped = await self.redis_client.bzpopmin(QUEUE_KEY, timeout=self.block_timeout)
+        if not popped:
+            return []
+        keys = [popped[1]]
+        if self.claim_batch_size > 1:
+            keys.extend(key for key, _ in await self.redis_client.zpopmin(QUEUE_KEY, self.claim_batch_size - 1))
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.hgetall(key)
+            rows = await pipe.execute()
+        return self._claimed_jobs(rows)
+
+    def _claimed_jobs(self, rows: List[Dict[str, str]]) -> List[JobDefinition]:
+        jobs = [self._deserialize_job(row) for row in rows if row]
+        if len(jobs) < len(rows):
+            logger.warning(f"{len(rows) - len(jobs)} queued job(s) expired before dispatch")
+        return jobs
+
+    async def _release_jobs(self, jobs: List[JobDefinition]) -> None:
+        """Put claimed-but-unstarted jobs back on the queue."""
+        for job in jobs:
+            if self.redis_client:
+                await self.redis_client.zadd(QUEUE_KEY, {f"job:{job.job_id}": queue_score(job)})
+            else:
+                await self._memory_queue.put(job)
+
     async def _worker_loop(self, worker_id: str) -> None:
-        """Main worker loop with reduced latency."""
+        """Main worker loop: block for jobs, then run the claimed batch in order."""
         logger.info(f"Worker {worker_id} started")
         
         while self.is_running:
             try:
-                job = await self._get_next_job()
-                
-                if job:
-                    await self._process_job(job, worker_id)
-                else:
-                    # Optimized sleep: 0.1s for responsiveness
-                    await asyncio.sleep(0.1)
+                jobs = await self._claim_jobs()
+                for i, job in enumerate(jobs):
+                    try:
+                        await self._process_job(job, worker_id)
+                    except BaseException:
+                        # Stopped or failed mid-batch: the rest of the batch goes back on the queue
+                        await self._release_jobs(jobs[i + 1:])
+                        raise
                     
             except Exception as e:
                 logger.error(f"Worker {worker_id} error: {e}")
@@ -297,7 +440,8 @@ class JobProcessor:
             else:
                 self._memory_jobs[job.job_id] = job
             
-            result = await self._execute_job(job)
+            async with self.lanes.for_job(job.job_type).slot():
+                result = await self._execute_job(job)
             
             execution_time = (time.time() - start_time) * 1000
             if result.success:
@@ -320,6 +464,10 @@ class JobProcessor:
             elif job.job_type == "consistency_check": return await self._execute_consistency_check(job)
             elif job.job_type == "index_repair": return await self._execute_index_repair(job)
             elif job.job_type == "pattern_recognition": return await self._execute_pattern_recognition(job)
+            elif job.job_type == "text_signature_backfill": return await self._execute_text_signature_backfill(job)
+            elif job.job_type == "vector_clustering": return await self._execute_vector_clustering(job)
+            elif job.job_type == "drift_detection": return await self._execute_drift_detection(job)
+            elif job.job_type == "graph_analytics": return await self._execute_graph_analytics(job)
             else: raise ValueError(f"Unsupported job type: {job.job_type}")
         except Exception as e:
             return JobResult(job.job_id, False, None, (time.time() - start_time) * 1000, str(e), worker_id=job.worker_id)
@@ -327,20 +475,16 @@ class JobProcessor:
     async def _execute_decay_scoring(self, job: JobDefinition) -> JobResult:
         start_time = time.time()
         memory_ids = job.payload.get("memory_ids", [])
-        
+        temporal_service = TemporalAnalysisService(self.db_client)
+
         if not memory_ids and job.payload.get("scan_all", False):
-            # OOM Protection: Limit scan to 5000 items
-            query = "SELECT id FROM memory WHERE is_archived = false LIMIT 5000;"
-            async with self.db_client.get_connection() as conn:
-                response = await conn.query(query)
-                if response and isinstance(response, list):
-                    items = response[0].get('result', response) if len(response) > 0 and isinstance(response[0], dict) else response
-                    memory_ids = [str(item['id']).split(':')[1] if ':' in str(item['id']) else str(item['id']) for item in items]
+            # Streams scoring columns page by page and scores each page as a batch, so no scan cap is needed
+            results = await temporal_service.process_decay_stream(user_id=job.payload.get("user_id"))
+            return JobResult(job.job_id, results["errors"] == 0, results, (time.time() - start_time) * 1000)
 
         if not memory_ids:
              return JobResult(job.job_id, True, {"processed": 0}, (time.time() - start_time) * 1000)
         
-        temporal_service = TemporalAnalysisService(self.db_client)
         results = await temporal_service.batch_process_decay(memory_ids)
         return JobResult(job.job_id, results["processed"] > 0, results, (time.time() - start_time) * 1000)
     
@@ -373,7 +517,109 @@ class JobProcessor:
         
         return JobResult(job.job_id, True, {"processed": processed_count}, (time.time() - start_time) * 1000)
 
-    async def _execute_deduplication(self, job): return JobResult(job.job_id, True, {"status": "not_implemented"}, 0)
+    async def _execute_deduplication(self, job: JobDefinition) -> JobResult:
+        start_time = time.time()
+        user_id = job.payload.get("user_id")
+        # Incremental runs only check memories created since the user's previous run
+        incremental = job.payload.get("incremental", False)
+        duplicates_removed = 0
+
+        from khala.application.services.memory_lifecycle import MemoryLifecycleService
+        from khala.infrastructure.persistence.surrealdb_repository import SurrealDBMemoryRepository
+
+        repo = SurrealDBMemoryRepository(self.db_client)
+        lifecycle_service = MemoryLifecycleService(repository=repo, gemini_client=self.gemini_client)
+
+        users = [user_id] if user_id else []
+        if not users and job.payload.get("scan_all"):
+             query = "SELECT user_id FROM memory GROUP BY user_id;"
+             async with self.db_client.get_connection() as conn:
+                response = await conn.query(query)
+                if response and isinstance(response, list):
+                    items = response[0].get('result', response) if len(response) > 0 and isinstance(response[0], dict) else response
+                    users = [item['user_id'] for item in items if 'user_id' in item]
+
+        for uid in users:
+            try:
+                if incremental:
+                    run_started = datetime.now(timezone.utc)
+                    since = await self._get_dedup_watermark(uid)
+                    duplicates_removed += await lifecycle_service.deduplicate_memories(uid, since=since)
+                    await self._set_dedup_watermark(uid, run_started)
+                else:
+                    duplicates_removed += await lifecycle_service.deduplicate_memories(uid)
+            except Exception as e:
+                logger.error(f"Deduplication failed for {uid}: {e}")
+
+        return JobResult(
+            job.job_id, True, {"duplicates_removed": duplicates_removed, "users_processed": len(users)},
+            (time.time() - start_time) * 1000
+        )
+
+    async def _get_dedup_watermark(self, user_id: str) -> Optional[datetime]:
+        """Start time of the user's last incremental deduplication run, if any."""
+        query = "SELECT last_run FROM type::thing('dedup_state', $user_id);"
+        async with self.db_client.get_connection() as conn:
+            response = await conn.query(query, {"user_id": user_id})
+        items = response or []
+        if len(items) > 0 and isinstance(items[0], dict) and 'result' in items[0]:
+            items = items[0]['result'] or []
+        if items and isinstance(items[0], dict) and items[0].get("last_run"):
+            return self.db_client._parse_dt(items[0]["last_run"])
+        return None
+
+    async def _set_dedup_watermark(self, user_id: str, run_started: datetime) -> None:
+        query = "UPDATE type::thing('dedup_state', $user_id) SET last_run = type::datetime($last_run);"
+        async with self.db_client.get_connection() as conn:
+            await conn.query(query, {"user_id": user_id, "last_run": run_started.isoformat()})
+
+    async def _execute_text_signature_backfill(self, job: JobDefinition) -> JobResult:
+        start_time = time.time()
+        results = await self.db_client.backfill_text_signatures(batch_size=job.payload.get("batch_size", 500))
+        return JobResult(job.job_id, True, results, (time.time() - start_time) * 1000)
+
+    async def _execute_vector_clustering(self, job: JobDefinition) -> JobResult:
+        start_time = time.time()
+        from khala.application.services.vector_ops import AdvancedVectorService
+
+        service = AdvancedVectorService(self.db_client, compute=self.lanes.for_job(job.job_type))
+        results = await service.compute_clusters(
+            k=job.payload.get("k", 10),
+            sample_size=job.payload.get("sample_size", 1000),
+            batch_size=job.payload.get("batch_size", 500)
+        )
+        return JobResult(job.job_id, results.get("status") != "error", results, (time.time() - start_time) * 1000)
+
+    async def _execute_drift_detection(self, job: JobDefinition) -> JobResult:
+        start_time = time.time()
+        from khala.application.services.vector_ops import AdvancedVectorService
+
+        service = AdvancedVectorService(self.db_client, compute=self.lanes.for_job(job.job_type))
+        results = await service.detect_drift(
+            model_version=job.payload.get("model_version", "default"),
+            batch_size=job.payload.get("batch_size", 500)
+        )
+        return JobResult(job.job_id, True, results, (time.time() - start_time) * 1000)
+
+    async def _execute_graph_analytics(self, job: JobDefinition) -> JobResult:
+        start_time = time.time()
+        from khala.domain.graph.service import GraphService
+        from khala.infrastructure.persistence.surrealdb_repository import SurrealDBMemoryRepository
+
+        service = GraphService(
+            SurrealDBMemoryRepository(self.db_client), self.db_client, compute=self.lanes.for_job(job.job_type)
+        )
+        analysis = job.payload.get("analysis", "communities")
+        if analysis == "communities":
+            results = await service.detect_communities(method=job.payload.get("method", "louvain"))
+        elif analysis == "centrality":
+            results = await service.calculate_centrality(
+                method=job.payload.get("method", "degree"), limit=job.payload.get("limit", 1000)
+            )
+        else:
+            raise ValueError(f"Unknown graph analysis: {analysis}")
+        return JobResult(job.job_id, True, results, (time.time() - start_time) * 1000)
+
     async def _execute_consistency_check(self, job): return JobResult(job.job_id, True, {"status": "not_implemented"}, 0)
     async def _execute_index_repair(self, job): return JobResult(job.job_id, True, {"status": "not_implemented"}, 0)
     async def _execute_pattern_recognition(self, job): return JobResult(job.job_id, True, {"status": "not_implemented"}, 0)
@@ -381,8 +627,12 @@ class JobProcessor:
     async def _store_result(self, result: JobResult) -> None:
         if self.redis_client:
             serialized = self._serialize_result(result)
-            await self.redis_client.hset(f"result:{result.job_id}", mapping=serialized)
-            await self.redis_client.expire(f"result:{result.job_id}", self.redis_ttl)
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                pipe.hset(f"result:{result.job_id}", mapping=serialized)
+                pipe.expire(f"result:{result.job_id}", self.redis_ttl)
+                await pipe.execute()
+        else:
+            self._memory_results[result.job_id] = result
     
     async def _handle_job_failure(self, job: JobDefinition, error: Exception, worker_id: str) -> None:
         job.retry_count += 1
@@ -405,7 +655,7 @@ class JobProcessor:
 
     async def _requeue_delayed(self, job, delay):
         await asyncio.sleep(delay)
-        self._memory_queue.put_nowait(job)
+        await self._memory_queue.put(job)
 
     def _serialize_job(self, job: JobDefinition) -> Dict[str, str]:
         return {
@@ -445,7 +695,10 @@ class JobProcessor:
         return self.metrics.copy() if self.enable_metrics else {}
 
     async def get_queue_stats(self) -> Dict[str, Any]:
-        return {"pending_jobs": self._memory_queue.qsize()} # Simplified for memory queue
+        lanes = self.lanes.get_stats()
+        if self.redis_client:
+            return {"pending_jobs": await self.redis_client.zcard(QUEUE_KEY), "dispatch": self.dispatch, "lanes": lanes}
+        return {"pending_jobs": self._memory_queue.qsize(), "dispatch": "memory", "lanes": lanes}
 
 def create_job_processor(redis_url: str = "redis://localhost:6379/1", max_workers: int = 4) -> JobProcessor:
     return JobProcessor(redis_url=redis_url, max_workers=max_workers)
@@ -185,4 +185,13 @@ def create_scheduler(job_processor: JobProcessor) -> BackgroundScheduler:
         priority=JobPriority.LOW
     )
 
+    # 5. Daily MinHash backfill for memories stored without a text signature
+    scheduler.add_task(
+        name="daily_text_signature_backfill",
+        job_type="text_signature_backfill",
+        interval_seconds=86400, # 24 hours
+        payload={"batch_size": 500},
+        priority=JobPriority.LOW
+    )
+
     return scheduler
@@ -7,13 +7,15 @@ and performance optimization.
 """
 
 import asyncio
+import heapq
 import json
 import logging
+import sys
 import threading
 import time
 from datetime import datetime, timezone, timedelta
 from enum import Enum
-from typing import Any, Dict, List, Optional, Union, TypeVar, TypeVar
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple, Union, TypeVar
 from dataclasses import dataclass, field
 from collections import OrderedDict, defaultdict
 import uuid
@@ -27,6 +29,9 @@ except ImportError:
     logging.warning("Redis not available, L2 cache disabled")
 
 from ..surrealdb.client import SurrealDBClient
+from .semantic_cache import SemanticResultCache
+from .single_flight import SingleFlight
+from .sizing import Sizer, default_size_estimator
 
 logger = logging.getLogger(__name__)
 
@@ -42,20 +47,23 @@ class CacheLevel(Enum):
 class CacheableItem:
     """Interface for cacheable items."""
     
-    def __init__(self, key: str, value: Any, **kwargs):
+    def __init__(self, key: str, value: Any, sizer: Optional[Sizer] = None, **kwargs):
         self.key = key
         self.value = value
         self.created_at = datetime.now(timezone.utc)
         self.access_count = 0
         self.last_accessed = self.created_at
-        self.size_bytes = self._calculate_size()
+        self.size_bytes = self._calculate_size(sizer or default_size_estimator)
+        self.expires_at: Optional[float] = None  # monotonic deadline, set by the owning tier
+        self.fresh_until: Optional[float] = None  # after this, served only as stale
         self.metadata = kwargs
     
-    def _calculate_size(self) -> int:
-        """Calculate approximate size in bytes."""
+    def _calculate_size(self, sizer: Sizer) -> int:
+        """Calculate approximate size in bytes without serializing the value."""
         try:
-            return len(str(self.key).encode('utf-8')) + len(str(self.value).encode('utf-8'))
-        except:
+            return sys.getsizeof(self.key) + sizer(self.value)
+        except Exception as e:
+            logger.debug(f"Size estimation failed for {self.key}: {e}")
             return 1024  # Default fallback size
     
     def touch(self):
@@ -65,20 +73,32 @@ class CacheableItem:
 
 
 class L1MemoryCache:
-    """L1 in-memory cache with LRU eviction."""
+    """L1 in-memory cache with O(1) LRU eviction and heap-based TTL expiry.
+
+    Recency is tracked by an ``OrderedDict`` (least recently used first), so
+    hits, inserts and evictions are constant time. Expiry deadlines live in a
+    min-heap keyed on ``time.monotonic()``; entries made stale by overwrites
+    or removals are skipped lazily when they reach the top of the heap.
+    """
     
-    def __init__(self, max_memory_mb: int = 100, ttl_seconds: int = 300):
+    # Rebuild the expiry heap once stale entries outnumber live ones by this factor
+    HEAP_COMPACTION_FACTOR = 2
+    
+    def __init__(self, max_memory_mb: int = 100, ttl_seconds: int = 300, sizer: Optional[Sizer] = None):
         self.max_memory_bytes = max_memory_mb * 1024 * 1024
         self.ttl_seconds = ttl_seconds
-        self.cache: Dict[str, CacheableItem] = {}
-        self.access_order: List[str] = []
+        self.sizer = sizer or default_size_estimator
+        self.cache: "OrderedDict[str, CacheableItem]" = OrderedDict()
+        self._expiry_heap: List[Tuple[float, str]] = []
         self.lock = threading.RLock()
         self.total_size_bytes = 0
         self.evictions = 0
+        self.expirations = 0
         
         # Cleanup task for TTL
         self._cleanup_task = None
         self._cleanup_running = False
+        self.cleanup_interval_seconds = 30
     
     def start_cleanup(self):
         """Start TTL cleanup task."""
@@ -93,85 +113,103 @@ class L1MemoryCache:
             self._cleanup_task.cancel()
     
     async def get(self, key: str) -> Optional[Any]:
-        """Get value from cache."""
+        """Get value from cache. Stale entries are treated as misses."""
+        value, stale = await self.get_entry(key)
+        return None if stale else value
+    
+    async def get_entry(self, key: str) -> Tuple[Optional[Any], bool]:
+        """Get ``(value, is_stale)``; stale values are past TTL but inside their grace window."""
         with self.lock:
             item = self.cache.get(key)
             
             if item is None:
-                return None
+                return None, False
             
             # Check TTL
-            if self._is_expired(item):
-                await self._remove(key)
-                return None
+            now = time.monotonic()
+            if self._is_expired(item, now):
+                self._remove(key)
+                self.expirations += 1
+                return None, False
             
             # Touch and return
             self._record_access(key)
-            return item.value
+            stale = item.fresh_until is not None and now >= item.fresh_until
+            return item.value, stale
     
-    async def put(self, key: str, value: Any, ttl_seconds: Optional[int] = None) -> bool:
-        """Put value into cache."""
+    async def put(
+        self,
+        key: str,
+        value: Any,
+        ttl_seconds: Optional[int] = None,
+        stale_ttl_seconds: int = 0
+    ) -> bool:
+        """Put value into cache.
+        
+        Args:
+            stale_ttl_seconds: Grace period after the TTL during which the
+                value is still returned by ``get_entry`` flagged as stale.
+        """
         ttl = ttl_seconds if ttl_seconds is not None else self.ttl_seconds
         
         with self.lock:
             # Remove existing if present
-            existing = self.cache.get(key)
-            if existing:
-                self._remove_existing(key)
+            self._remove(key)
             
             # Create new item
-            item = CacheableItem(key, value)
+            item = CacheableItem(key, value, sizer=self.sizer)
             if ttl != self.ttl_seconds:
                 item.metadata['ttl_seconds'] = ttl
+            item.fresh_until = time.monotonic() + ttl
+            item.expires_at = item.fresh_until + max(0, stale_ttl_seconds)
+            
+            if item.size_bytes > self.max_memory_bytes:
+                logger.debug(f"L1 item {key} larger than cache budget, not cached")
+                return False
             
             # Check if item fits
             if not self._fits_in_memory(item):
                 self._evict_to_fit(item)
             
-            # Add to cache
+            # Add to cache (most recently used end)
             self.cache[key] = item
-            self._record_access(key)
+            self._increment_size(item.size_bytes)
+            heapq.heappush(self._expiry_heap, (item.expires_at, key))
+            self._maybe_compact_heap()
+            item.touch()
             
         return True
     
-    def _remove_existing(self, key: str) -> None:
-        """Remove existing item before adding new one."""
-        if key in self.cache:
-            item = self.cache[key]
-            self._decrement_size(item.size_bytes)
-            if key in self.access_order:
-                self.access_order.remove(key)
-            del self.cache[key]
+    async def delete(self, key: str) -> bool:
+        """Remove a key from the cache. Returns True if it was present."""
+        with self.lock:
+            return self._remove(key)
+    
+    def clear(self) -> None:
+        """Drop every entry and reset size accounting."""
+        with self.lock:
+            self.cache.clear()
+            self._expiry_heap.clear()
+            self.total_size_bytes = 0
     
     def _record_access(self, key: str) -> None:
         """Record cache access for LRU tracking."""
-        item = self.cache[key]
-        item.touch()
-        
-        # Update access order (LRU)
-        if key in self.access_order:
-            self.access_order.remove(key)
-        self.access_order.append(key)
+        self.cache.move_to_end(key)
+        self.cache[key].touch()
     
-    def _is_expired(self, item: CacheableItem) -> bool:
+    def _is_expired(self, item: CacheableItem, now: Optional[float] = None) -> bool:
         """Check if item is expired."""
-        now = datetime.now(timezone.utc)
-        
-        # Check custom TTL
-        if 'ttl_seconds' in item.metadata:
-            return (now - item.created_at).total_seconds() > item.metadata['ttl_seconds']
-        
-        # Check default TTL
-        return (now - item.created_at).total_seconds() > self.ttl_seconds
+        if item.expires_at is None:
+            return False
+        return (now if now is not None else time.monotonic()) >= item.expires_at
     
-    async def _remove(self, key: str) -> None:
-        """Remove item from cache."""
-        if key in self.cache:
-            item = self.cache[key]
-            self._decrement_size(item.size_bytes)
-            if key in self.access_order:
-                self.access_order.remove(key)
-            del self.cache[key]
+    def _remove(self, key: str) -> bool:
+        """Remove item from cache; its heap entry is discarded lazily."""
+        item = self.cache.pop(key, None)
+        if item is None:
+            return False
+        self._decrement_size(item.size_bytes)
+        return True
     
     def _decrement_size(self, size_bytes: int) -> None:
         """Decrement total size and update metrics."""
@@ -186,48 +224,52 @@ class L1MemoryCache:
         return (self.total_size_bytes + item.size_bytes) <= self.max_memory_bytes
     
     def _evict_to_fit(self, new_item: CacheableItem) -> None:
-        """Evict LRU items until new item fits."""
-        items_to_remove = []
-        current_size = self.total_size_bytes
-        
-        for key in reversed(self.access_order):  # Remove oldest first
-            items_to_remove.append(key)
-            if key in self.cache:
-                current_size -= self.cache[key].size_bytes
-                if current_size + new_item.size_bytes <= self.max_memory_bytes:
-                    break
-        
-        # Actually remove items
-        for key in items_to_remove:
-            if key in self.cache:
-                del self.cache[key]
-                self._decrement_size(self.cache[key].size_bytes)
-            if key in self.access_order:
-                self.access_order.remove(key)
+        """Drop expired items, then evict LRU items until new item fits."""
+        self._purge_expired()
+        
+        while self.cache and not self._fits_in_memory(new_item):
+            _, evicted = self.cache.popitem(last=False)
+            self._decrement_size(evicted.size_bytes)
             self.evictions += 1
     
+    def _purge_expired(self, now: Optional[float] = None) -> int:
+        """Pop every due deadline off the expiry heap. Returns items removed."""
+        now = now if now is not None else time.monotonic()
+        heap = self._expiry_heap
+        removed = 0
+        
+        while heap and heap[0][0] <= now:
+            deadline, key = heapq.heappop(heap)
+            item = self.cache.get(key)
+            # Skip stale heap entries left behind by overwrites/removals
+            if item is not None and item.expires_at == deadline:
+                self._remove(key)
+                removed += 1
+        
+        self.expirations += removed
+        return removed
+    
+    def _maybe_compact_heap(self) -> None:
+        """Rebuild the heap when lazily-deleted entries dominate it."""
+        live = len(self.cache)
+        if len(self._expiry_heap) > self.HEAP_COMPACTION_FACTOR * live + 64:
+            self._expiry_heap = [(item.expires_at, key) for key, item in self.cache.items()]
+            heapq.heapify(self._expiry_heap)
+    
     async def _periodic_cleanup(self):
         """Periodic cleanup of expired items."""
         while self._cleanup_running:
             try:
-                expired_keys = []
-                
                 with self.lock:
-                    for key, item in self.cache.items():
-                        if self._is_expired(item):
-                            expired_keys.append(key)
-                
-                for key in expired_keys:
-                    await self._remove(key)
+                    removed = self._purge_expired()
                 
-                if expired_keys:
-                    logger.debug(f"L1 cleanup removed {len(expired_keys)} expired items")
+                if removed:
+                    logger.debug(f"L1 cleanup removed {removed} expired items")
                 
             except Exception as e:
                 logger.error(f"L1 cleanup error: {e}")
             
-            # Run cleanup every 30 seconds
-            await asyncio.sleep(30)
+            await asyncio.sleep(self.cleanup_interval_seconds)
     
     def get_stats(self) -> Dict[str, Any]:
         """Get cache statistics."""
@@ -237,6 +279,8 @@ class L1MemoryCache:
                 "total_size_bytes": self.total_size_bytes,
                 "max_memory_bytes": self.max_memory_bytes,
                 "evictions": self.evictions,
+                "expirations": self.expirations,
+                "expiry_queue_size": len(self._expiry_heap),
                 "hit_rate": getattr(self, '_hit_rate', 0.0),
                 "ttl_seconds": self.ttl_seconds
             }
@@ -435,6 +479,9 @@ class CacheMetrics:
     l3_requests: int = 0
     total_responses: int = 0
     avg_response_time_ms: float = 0.0
+    loader_calls: int = 0
+    stale_served: int = 0
+    background_refreshes: int = 0
     
     @property
     def l1_hit_rate(self) -> float:
@@ -466,14 +513,23 @@ class CacheManager:
         l2_ttl_seconds: int = 3600,
         l2_max_items: int = 10000,
         l3_ttl_seconds: int = 86400,
-        l3_max_entries: int = 100000
+        l3_max_entries: int = 100000,
+        sizer: Optional[Sizer] = None
     ):
-        """Initialize cache manager."""
-        self.l1_cache = L1MemoryCache(l1_max_mb, l1_ttl_seconds)
+        """Initialize cache manager.
+        
+        Args:
+            sizer: Callable estimating a value's in-memory bytes for L1
+                budget accounting. Defaults to the structural ``SizeEstimator``.
+        """
+        self.l1_cache = L1MemoryCache(l1_max_mb, l1_ttl_seconds, sizer=sizer)
         self.l2_cache = L2RedisCache(l2_redis_url, l2_ttl_seconds, l2_max_items)
         self.l3_cache = L3PersistentCache(l3_ttl_seconds, l3_max_entries)
         
         self.metrics = CacheMetrics()
+        self.single_flight = SingleFlight()
+        self.semantic_cache = SemanticResultCache()
+        self._refresh_tasks: Set[asyncio.Task] = set()
         self.cache_warming = True
         self.write_strategy = "write_through"  # or "write_behind"
         
@@ -571,12 +627,103 @@ class CacheManager:
         self.metrics.total_responses += 1
         return None
     
+    async def get_or_compute(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[T]],
+        ttl_seconds: Optional[int] = None,
+        stale_ttl_seconds: int = 0,
+        levels: Optional[List[CacheLevel]] = None
+    ) -> Optional[T]:
+        """Get a cached value, running ``loader`` at most once per key on a miss.
+        
+        Concurrent callers missing the same key share one in-flight load
+        instead of each hitting the backing store. With
+        ``stale_ttl_seconds`` > 0, a value past its TTL but inside the grace
+        window is returned immediately while a single background refresh
+        replaces it (stale-while-revalidate).
+        
+        Args:
+            key: Cache key.
+            loader: Zero-argument coroutine function producing the value.
+                ``None`` results are returned but not cached.
+            ttl_seconds: Freshness TTL for the stored value.
+            stale_ttl_seconds: Extra L1 lifetime during which stale values are served.
+            levels: Cache levels to write the loaded value to.
+        """
+        value, stale = await self.l1_cache.get_entry(key)
+        if value is not None:
+            self.metrics.l1_requests += 1
+            self.metrics.l1_hit_count += 1
+            if stale:
+                self.metrics.stale_served += 1
+                self._refresh_in_background(key, loader, ttl_seconds, stale_ttl_seconds, levels)
+            return value
+        
+        async def load() -> Optional[T]:
+            cached = await self.get(key)
+            if cached is not None:
+                return cached
+            return await self._load_and_store(key, loader, ttl_seconds, stale_ttl_seconds, levels)
+        
+        return await self.single_flight.do(key, load)
+    
+    async def _load_and_store(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[T]],
+        ttl_seconds: Optional[int],
+        stale_ttl_seconds: int,
+        levels: Optional[List[CacheLevel]]
+    ) -> Optional[T]:
+        """Run the loader and write its result through the requested levels."""
+        value = await loader()
+        self.metrics.loader_calls += 1
+        if value is not None:
+            await self.put(key, value, levels=levels, ttl_seconds=ttl_seconds,
+                           stale_ttl_seconds=stale_ttl_seconds)
+        return value
+    
+    def _refresh_in_background(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[T]],
+        ttl_seconds: Optional[int],
+        stale_ttl_seconds: int,
+        levels: Optional[List[CacheLevel]]
+    ) -> None:
+        """Start one background reload for a stale key unless one is already running."""
+        if self.single_flight.in_flight(key):
+            return
+        
+        task = self.single_flight.start(
+            key, lambda: self._load_and_store(key, loader, ttl_seconds, stale_ttl_seconds, levels)
+        )
+        self.metrics.background_refreshes += 1
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+    
+    async def invalidate(self, key: str) -> None:
+        """Remove a key from every cache level."""
+        await self.l1_cache.delete(key)
+        if self.l2_cache.redis_client:
+            try:
+                await self.l2_cache.redis_client.delete(self.l2_cache._make_key(key))
+            except Exception as e:
+                logger.warning(f"L2 invalidate failed for {key}: {e}")
+        if self.l3_cache.db_client:
+            try:
+                await self.l3_cache.db_client.delete_cache_entry(key)
+            except Exception as e:
+                logger.warning(f"L3 invalidate failed for {key}: {e}")
+    
     async def put(
         self, 
         key: str, 
         value: T, 
         levels: Optional[List[CacheLevel]] = None,
-        ttl_seconds: Optional[int] = None
+        ttl_seconds: Optional[int] = None,
+        stale_ttl_seconds: int = 0
     ) -> bool:
         """Put value into specified cache levels."""
         levels_to_use = levels or [CacheLevel.L1, CacheLevel.L2, CacheLevel.L3]
@@ -586,7 +733,7 @@ class CacheManager:
         for level in levels_to_use:
             try:
                 if level == CacheLevel.L1:
-                    success = await self._put_l1(key, value, ttl_seconds)
+                    success = await self.l1_cache.put(key, value, ttl_seconds, stale_ttl_seconds)
                 elif level == CacheLevel.L2:
                     success = await self._put_l2(key, value, ttl_seconds)
                 elif level == CacheLevel.L3:
@@ -650,16 +797,22 @@ class CacheManager:
             "performance": {
                 "total_responses": self.metrics.total_responses,
                 "avg_response_time_ms": self.metrics.avg_response_time_ms
-            }
+            },
+            "single_flight": {
+                **self.single_flight.get_stats(),
+                "loader_calls": self.metrics.loader_calls,
+                "stale_served": self.metrics.stale_served,
+                "background_refreshes": self.metrics.background_refreshes
+            },
+            "semantic": self.semantic_cache.get_stats()
         }
     
     async def clear_all(self) -> bool:
         """Clear all cache levels."""
         try:
             # Clear L1 (in-memory)
-            self.l1_cache.cache.clear()
-            self.l1_cache.access_order.clear()
-            self.l1_cache.total_size_bytes = 0
+            self.l1_cache.clear()
+            self.semantic_cache.clear()
             
             # Clear L2 (Redis)
             if self.l2_cache.redis_client:
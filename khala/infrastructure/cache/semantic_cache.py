@@ -0,0 +1,226 @@
+"""
+Embedding-keyed semantic cache for search results.
+
+Agents often send near-identical queries within seconds. Instead of keying
+results on the exact query string, entries are keyed on the query embedding:
+a lookup first tries an exact match on the quantized embedding, then scans
+the (small, bounded) set of cached embeddings for the same user and search
+parameters and reuses the result whose cosine similarity clears the
+configured radius.
+
+Entries are scoped per ``(user_id, scope)`` where the scope hashes filters
+and ranking parameters, so a hit can only return a ranking computed under
+identical settings. Writes to a user's memories bump that user's
+generation, which drops their entries and prevents searches that started
+before the write from storing stale rankings afterwards.
+"""
+
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from khala.domain.memory.value_objects import EmbeddingVector
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SemanticCacheEntry:
+    """Cached ranking plus the unit query vector it was computed for."""
+    vector: np.ndarray
+    results: List[Any]
+    created_at: float
+    compute_ms: float
+    hits: int = 0
+
+
+class _ScopeEntries:
+    """Bounded LRU of entries for one (user, scope) with a lazily stacked matrix."""
+
+    def __init__(self):
+        self.entries: "OrderedDict[bytes, SemanticCacheEntry]" = OrderedDict()
+        self._keys: List[bytes] = []
+        self._matrix: Optional[np.ndarray] = None
+
+    def changed(self) -> None:
+        self._matrix = None
+
+    def matrix(self) -> Tuple[List[bytes], np.ndarray]:
+        if self._matrix is None:
+            self._keys = list(self.entries.keys())
+            self._matrix = np.stack([e.vector for e in self.entries.values()])
+        return self._keys, self._matrix
+
+
+class SemanticResultCache:
+    """Semantic (embedding-radius) cache for fused search rankings.
+
+    Args:
+        similarity_threshold: Minimum cosine similarity for a near hit.
+        ttl_seconds: Lifetime of an entry.
+        max_entries_per_scope: LRU bound per (user, scope); keeps the radius scan cheap.
+        quantization_levels: Levels per sign used to build the exact-match key.
+    """
+
+    def __init__(
+        self,
+        similarity_threshold: float = 0.97,
+        ttl_seconds: int = 120,
+        max_entries_per_scope: int = 128,
+        quantization_levels: int = 127
+    ):
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries_per_scope = max_entries_per_scope
+        self.quantization_levels = quantization_levels
+
+        self._scopes: Dict[Tuple[str, str], _ScopeEntries] = {}
+        self._user_scopes: Dict[str, Set[str]] = {}
+        self._generations: Dict[str, int] = {}
+
+        self.exact_hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.stale_stores_skipped = 0
+        self.invalidations = 0
+        self.saved_latency_ms = 0.0
+
+    @staticmethod
+    def make_scope(filters: Optional[Dict[str, Any]] = None, **params: Any) -> str:
+        """Hash filters and ranking parameters into a scope id."""
+        payload = json.dumps({"filters": filters or {}, **params}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()[:24]
+
+    def generation(self, user_id: str) -> int:
+        """Current write generation for ``user_id``; pass it back to ``store``."""
+        return self._generations.get(user_id, 0)
+
+    def lookup(self, user_id: str, scope: str, embedding: EmbeddingVector) -> Optional[List[Any]]:
+        """Return a cached ranking for a query embedding within the radius, if any."""
+        bucket = self._scopes.get((user_id, scope))
+        vector = self._normalize(embedding)
+        if bucket is None or vector is None:
+            self.misses += 1
+            return None
+
+        self._expire(bucket, time.monotonic())
+        if not bucket.entries:
+            self.misses += 1
+            return None
+
+        key = self._quantize(vector)
+        entry = bucket.entries.get(key)
+        if entry is not None:
+            self.exact_hits += 1
+        else:
+            keys, matrix = bucket.matrix()
+            similarities = matrix @ vector
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.similarity_threshold:
+                self.misses += 1
+                return None
+            key = keys[best]
+            entry = bucket.entries[key]
+            self.near_hits += 1
+
+        bucket.entries.move_to_end(key)
+        entry.hits += 1
+        self.saved_latency_ms += entry.compute_ms
+        return list(entry.results)
+
+    def store(
+        self,
+        user_id: str,
+        scope: str,
+        embedding: EmbeddingVector,
+        results: List[Any],
+        compute_ms: float,
+        generation: int
+    ) -> bool:
+        """Cache a ranking unless the user's memories changed since ``generation``."""
+        if generation != self.generation(user_id):
+            self.stale_stores_skipped += 1
+            return False
+
+        vector = self._normalize(embedding)
+        if vector is None:
+            return False
+
+        bucket = self._scopes.setdefault((user_id, scope), _ScopeEntries())
+        self._user_scopes.setdefault(user_id, set()).add(scope)
+
+        bucket.entries[self._quantize(vector)] = SemanticCacheEntry(
+            vector=vector,
+            results=list(results),
+            created_at=time.monotonic(),
+            compute_ms=compute_ms
+        )
+        while len(bucket.entries) > self.max_entries_per_scope:
+            bucket.entries.popitem(last=False)
+        bucket.changed()
+        self.stores += 1
+        return True
+
+    def invalidate_user(self, user_id: Optional[str]) -> None:
+        """Drop cached rankings for ``user_id`` (all users when ``None``)."""
+        self.invalidations += 1
+        if user_id is None:
+            for uid in list(self._generations) + list(self._user_scopes):
+                self._generations[uid] = self._generations.get(uid, 0) + 1
+            self._scopes.clear()
+            self._user_scopes.clear()
+            return
+
+        self._generations[user_id] = self._generations.get(user_id, 0) + 1
+        for scope in self._user_scopes.pop(user_id, set()):
+            self._scopes.pop((user_id, scope), None)
+
+    def on_memory_write(self, event: Any) -> None:
+        """``SurrealDBClient`` write hook: invalidate the written memory's owner."""
+        self.invalidate_user(event.user_id)
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        self.invalidate_user(None)
+
+    def _expire(self, bucket: _ScopeEntries, now: float) -> None:
+        expired = [k for k, e in bucket.entries.items() if now - e.created_at > self.ttl_seconds]
+        for key in expired:
+            del bucket.entries[key]
+        if expired:
+            bucket.changed()
+
+    def _normalize(self, embedding: EmbeddingVector) -> Optional[np.ndarray]:
+        vector = embedding.to_numpy()
+        norm = float(np.linalg.norm(vector))
+        if vector.ndim != 1 or norm == 0.0:
+            return None
+        return vector / norm
+
+    def _quantize(self, vector: np.ndarray) -> bytes:
+        levels = self.quantization_levels
+        return np.clip(np.rint(vector * levels), -levels, levels).astype(np.int8).tobytes()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss and saved-latency statistics."""
+        hits = self.exact_hits + self.near_hits
+        lookups = hits + self.misses
+        return {
+            "entries": sum(len(b.entries) for b in self._scopes.values()),
+            "scopes": len(self._scopes),
+            "exact_hits": self.exact_hits,
+            "near_hits": self.near_hits,
+            "misses": self.misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "stores": self.stores,
+            "stale_stores_skipped": self.stale_stores_skipped,
+            "invalidations": self.invalidations,
+            "saved_latency_ms": self.saved_latency_ms,
+        }
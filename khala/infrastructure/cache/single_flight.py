@@ -0,0 +1,64 @@
+"""
+Single-flight request coalescing.
+
+When many coroutines ask for the same missing key at once, only the first
+starts the loader; the rest await the same task and share its result (or
+exception). The load runs as its own task, so cancelling any one caller
+never aborts the work the others are waiting on.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+
+class SingleFlight:
+    """Coalesce concurrent loads per key into one in-flight task."""
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.loads = 0
+        self.coalesced = 0
+        self.failures = 0
+
+    def in_flight(self, key: str) -> bool:
+        """Whether a load for ``key`` is currently running."""
+        return key in self._inflight
+
+    def start(self, key: str, loader: Callable[[], Awaitable[T]]) -> "asyncio.Task[T]":
+        """Return the running load for ``key``, starting ``loader`` if there is none."""
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return task
+
+        task = asyncio.ensure_future(loader())
+        self._inflight[key] = task
+        self.loads += 1
+        task.add_done_callback(lambda t, k=key: self._finish(k, t))
+        return task
+
+    async def do(self, key: str, loader: Callable[[], Awaitable[T]]) -> T:
+        """Run ``loader`` once for all concurrent callers of ``key`` and return its result."""
+        return await asyncio.shield(self.start(key, loader))
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Retrieve the exception so abandoned loads do not log "never retrieved"
+        if not task.cancelled() and task.exception() is not None:
+            self.failures += 1
+            logger.debug(f"Single-flight load for {key} failed: {task.exception()}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get coalescing statistics."""
+        return {
+            "in_flight": len(self._inflight),
+            "loads": self.loads,
+            "coalesced": self.coalesced,
+            "failures": self.failures,
+        }
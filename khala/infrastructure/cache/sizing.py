@@ -0,0 +1,154 @@
+"""
+Approximate in-memory size estimation for cached values.
+
+Cache tiers need a byte figure per entry to honour ``max_memory_mb``, but
+stringifying or serializing large ``Memory`` lists on every put costs nearly
+as much as the query being cached. ``SizeEstimator`` walks values
+structurally instead: known types (``Memory``, ``EmbeddingVector``, NumPy
+arrays, strings, containers) use cheap closed-form estimates, and large
+containers are sampled and extrapolated rather than walked in full.
+"""
+
+import sys
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from khala.domain.memory.entities import Memory
+from khala.domain.memory.value_objects import EmbeddingVector
+
+# CPython object sizes used by the closed-form estimators
+FLOAT_OBJECT_BYTES = sys.getsizeof(0.5)
+DATETIME_BYTES = 48
+SMALL_OBJECT_BYTES = 64  # frozen value objects (ImportanceScore, DecayScore, ...)
+NDARRAY_HEADER_BYTES = sys.getsizeof(np.empty(0))
+
+Sizer = Callable[[Any], int]
+
+
+class SizeEstimator:
+    """Structural size estimator with per-type plug-ins and sampling.
+
+    Args:
+        sample_size: Max elements inspected per container; the rest are
+            extrapolated from the sampled mean.
+        max_depth: Nesting depth after which values are sized shallowly.
+    """
+
+    def __init__(self, sample_size: int = 16, max_depth: int = 4):
+        self.sample_size = sample_size
+        self.max_depth = max_depth
+        self._estimators: Dict[type, Callable[[Any, int], int]] = {}
+        self._resolved: Dict[type, Optional[Callable[[Any, int], int]]] = {}
+
+        for scalar in (str, bytes, bytearray, float):
+            self.register(scalar, lambda value, depth: sys.getsizeof(value))
+        # Interpreter-wide singletons and cached small ints are not retained per value
+        self.register(bool, lambda value, depth: 0)
+        self.register(type(None), lambda value, depth: 0)
+        self.register(int, lambda value, depth: 0 if -5 <= value <= 256 else sys.getsizeof(value))
+        self.register(list, self._estimate_sequence)
+        self.register(tuple, self._estimate_sequence)
+        self.register(set, self._estimate_sequence)
+        self.register(frozenset, self._estimate_sequence)
+        self.register(dict, self._estimate_dict)
+        self.register(np.ndarray, self._estimate_ndarray)
+        self.register(EmbeddingVector, self._estimate_embedding)
+        self.register(Memory, self._estimate_memory)
+
+    def register(self, type_: type, estimator: Callable[[Any, int], int]) -> None:
+        """Register an estimator ``(value, depth) -> bytes`` for ``type_`` and subclasses."""
+        self._estimators[type_] = estimator
+        self._resolved.clear()
+
+    def __call__(self, value: Any) -> int:
+        return self.estimate(value)
+
+    def estimate(self, value: Any, depth: int = 0) -> int:
+        """Estimate the retained size of ``value`` in bytes."""
+        if depth > self.max_depth:
+            return sys.getsizeof(value)
+
+        estimator = self._lookup(type(value))
+        if estimator is not None:
+            return estimator(value, depth)
+        return self._estimate_object(value, depth)
+
+    def _lookup(self, cls: type) -> Optional[Callable[[Any, int], int]]:
+        """Resolve the estimator for ``cls`` via its MRO, memoized per type."""
+        try:
+            return self._resolved[cls]
+        except KeyError:
+            pass
+
+        found = None
+        for base in cls.__mro__:
+            if base in self._estimators:
+                found = self._estimators[base]
+                break
+        self._resolved[cls] = found
+        return found
+
+    def _sample(self, items: List[Any]) -> List[Any]:
+        """Evenly strided, deterministic sample of ``items``."""
+        if len(items) <= self.sample_size:
+            return items
+        step = len(items) / self.sample_size
+        return [items[int(i * step)] for i in range(self.sample_size)]
+
+    def _estimate_sequence(self, value: Any, depth: int) -> int:
+        items = value if isinstance(value, list) else list(value)
+        if not items:
+            return sys.getsizeof(value)
+        sample = self._sample(items)
+        sampled = sum(self.estimate(item, depth + 1) for item in sample)
+        return sys.getsizeof(value) + int(sampled * len(items) / len(sample))
+
+    def _estimate_dict(self, value: Dict[Any, Any], depth: int) -> int:
+        if not value:
+            return sys.getsizeof(value)
+        pairs = self._sample(list(value.items()))
+        sampled = sum(self.estimate(k, depth + 1) + self.estimate(v, depth + 1) for k, v in pairs)
+        return sys.getsizeof(value) + int(sampled * len(value) / len(pairs))
+
+    def _estimate_ndarray(self, value: np.ndarray, depth: int) -> int:
+        # Views do not own their buffer; count only the header
+        owned = value.nbytes if value.base is None else 0
+        return NDARRAY_HEADER_BYTES + owned
+
+    def _estimate_embedding(self, value: EmbeddingVector, depth: int) -> int:
+        values = value.values
+        size = sys.getsizeof(value) + SMALL_OBJECT_BYTES
+        if isinstance(values, np.ndarray):
+            return size + self._estimate_ndarray(values, depth)
+        # A list of Python floats: one pointer slot plus one float object each
+        return size + sys.getsizeof(values) + len(values) * FLOAT_OBJECT_BYTES
+
+    def _estimate_memory(self, value: Memory, depth: int) -> int:
+        size = sys.getsizeof(value) + sys.getsizeof(value.__dict__)
+        size += sys.getsizeof(value.id) + sys.getsizeof(value.user_id) + sys.getsizeof(value.content)
+        size += 3 * DATETIME_BYTES + 2 * SMALL_OBJECT_BYTES  # timestamps, importance/decay
+
+        for text in (value.summary, value.category, value.scope, value.episode_id):
+            if text:
+                size += sys.getsizeof(text)
+        for embedding in (value.embedding, value.embedding_visual, value.embedding_code):
+            if embedding is not None:
+                size += self._estimate_embedding(embedding, depth + 1)
+        for container in (value.tags, value.metadata, value.versions, value.events, value.verification_issues):
+            size += self.estimate(container, depth + 1)
+        return size
+
+    def _estimate_object(self, value: Any, depth: int) -> int:
+        """Fallback for unknown types: shallow size plus sampled attributes."""
+        size = sys.getsizeof(value)
+        attrs = getattr(value, "__dict__", None)
+        if attrs is not None:
+            size += self._estimate_dict(attrs, depth)
+        else:
+            for slot in getattr(type(value), "__slots__", ()):
+                size += self.estimate(getattr(value, slot, None), depth + 1)
+        return size
+
+
+default_size_estimator = SizeEstimator()
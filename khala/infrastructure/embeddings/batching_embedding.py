@@ -0,0 +1,132 @@
+"""
+Micro-batching decorator for embedding services.
+
+Callers such as ``HybridSearchService._fetch_vector`` and the index repair
+job ask for one embedding at a time, so the model or API never sees a real
+batch. ``BatchingEmbeddingService`` wraps any ``EmbeddingService`` and
+collects concurrent ``get_embedding`` calls for up to ``max_wait_ms`` (or
+until ``max_batch_size`` distinct texts are waiting). It then sends them as
+a single ``get_embeddings`` call. Identical texts in a window share one slot,
+and every caller gets its own result (or the batch's exception).
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+from khala.domain.memory.value_objects import EmbeddingVector
+from khala.domain.ports.embedding_service import EmbeddingService
+
+logger = logging.getLogger(__name__)
+
+
+class BatchingEmbeddingService(EmbeddingService):
+    """``EmbeddingService`` decorator that coalesces single-text requests into batches.
+
+    Args:
+        inner: Service that performs the actual (batched) embedding.
+        max_batch_size: Distinct texts that trigger an immediate dispatch.
+        max_wait_ms: Longest time the first request of a window waits for company.
+    """
+
+    def __init__(self, inner: EmbeddingService, max_batch_size: int = 64, max_wait_ms: float = 5.0):
+        self.inner = inner
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._dispatches: "set[asyncio.Task]" = set()
+
+        self.requests = 0
+        self.deduplicated = 0
+        self.batches = 0
+        self.batched_texts = 0
+        self.failures = 0
+
+    @property
+    def model_name(self) -> Optional[str]:
+        """Model of the wrapped service, so wrappers such as the embedding cache see through the batcher."""
+        for attr in ("model_name", "model"):
+            value = getattr(self.inner, attr, None)
+            if isinstance(value, str):
+                return value
+        return None
+
+    async def get_embedding(self, text: str) -> EmbeddingVector:
+        """Embed ``text`` as part of the current micro-batch."""
+        self.requests += 1
+        future = self._pending.get(text)
+        if future is not None:
+            self.deduplicated += 1
+        else:
+            future = asyncio.get_running_loop().create_future()
+            self._pending[text] = future
+            if len(self._pending) >= self.max_batch_size:
+                self._flush()
+            elif self._timer is None:
+                self._timer = asyncio.get_running_loop().call_later(self.max_wait_ms / 1000.0, self._flush)
+        # Shield so one cancelled caller does not cancel a result shared with others
+        return await asyncio.shield(future)
+
+    async def get_embeddings(self, texts: List[str]) -> List[EmbeddingVector]:
+        """Embed an explicit batch directly, sending each distinct text once."""
+        unique = list(dict.fromkeys(texts))
+        self.requests += len(texts)
+        self.deduplicated += len(texts) - len(unique)
+        if not unique:
+            return []
+        self.batches += 1
+        self.batched_texts += len(unique)
+        vectors = await self.inner.get_embeddings(unique)
+        by_text = dict(zip(unique, vectors))
+        return [by_text[text] for text in texts]
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+        task = asyncio.ensure_future(self._dispatch(batch))
+        self._dispatches.add(task)
+        task.add_done_callback(self._dispatches.discard)
+
+    async def _dispatch(self, batch: Dict[str, asyncio.Future]) -> None:
+        texts = list(batch)
+        self.batches += 1
+        self.batched_texts += len(texts)
+        try:
+            vectors = await self.inner.get_embeddings(texts)
+            if len(vectors) != len(texts):
+                raise ValueError(f"Embedding service returned {len(vectors)} vectors for {len(texts)} texts")
+        except Exception as e:
+            self.failures += 1
+            logger.error(f"Embedding batch of {len(texts)} failed: {e}")
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for text, vector in zip(texts, vectors):
+            future = batch[text]
+            if not future.done():
+                future.set_result(vector)
+
+    async def close(self) -> None:
+        """Dispatch anything still waiting and wait for in-flight batches."""
+        self._flush()
+        if self._dispatches:
+            await asyncio.gather(*self._dispatches, return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get batching statistics."""
+        return {
+            "requests": self.requests,
+            "deduplicated": self.deduplicated,
+            "batches": self.batches,
+            "avg_batch_size": self.batched_texts / self.batches if self.batches else 0.0,
+            "pending": len(self._pending),
+            "failures": self.failures,
+        }
@@ -0,0 +1,256 @@
+"""
+Content-addressed embedding cache.
+
+The same memory content and query strings are embedded again and again
+during ingest, search and index repair. ``CachedEmbeddingService`` wraps
+any ``EmbeddingService`` and keys results on
+``(model, version, sha256(text))``. Lookups go through two levels:
+
+- an in-process LRU of ``EmbeddingVector`` objects, and
+- an optional ``SQLiteEmbeddingStore``. It keeps each vector as raw
+  float32 bytes (4 bytes per dimension, instead of a JSON float list) and
+  survives restarts.
+
+Because the model and version are part of the key, switching models never
+returns stale vectors. Unless pinned by the caller, they follow the
+provenance of the vectors the inner service returns. The store also keeps
+each vector's own model and version and restores them on a hit.
+``invalidate_model`` drops one model's entries and leaves the others in
+place.
+"""
+
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from khala.domain.memory.value_objects import EmbeddingVector
+from khala.domain.ports.embedding_service import EmbeddingService
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[str, str, str]  # (model, version, sha256 hex)
+
+
+def text_digest(text: str) -> str:
+    """Content address of ``text``."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class SQLiteEmbeddingStore:
+    """On-disk embedding store holding float32 blobs keyed by (model, version, digest).
+
+    Each row also records the provenance of the stored vector, which can
+    differ from the key when the caller pins the key's model.
+
+    Calls are synchronous and short; ``CachedEmbeddingService`` runs them in
+    a worker thread.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embedding_cache (
+                model TEXT NOT NULL,
+                version TEXT NOT NULL,
+                digest TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                vector_model TEXT,
+                vector_version TEXT,
+                PRIMARY KEY (model, version, digest)
+            ) WITHOUT ROWID
+            """
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(embedding_cache)")}
+        for column in ("vector_model", "vector_version"):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE embedding_cache ADD COLUMN {column} TEXT")
+        self._conn.commit()
+
+    def get_many(self, keys: Iterable[CacheKey]) -> Dict[CacheKey, EmbeddingVector]:
+        """Stored vectors with their own provenance (the key's, for rows written without one)."""
+        found: Dict[CacheKey, EmbeddingVector] = {}
+        with self._lock:
+            for model, version, digest in keys:
+                row = self._conn.execute(
+                    "SELECT vector, vector_model, vector_version FROM embedding_cache "
+                    "WHERE model = ? AND version = ? AND digest = ?",
+                    (model, version, digest)
+                ).fetchone()
+                if row is not None:
+                    found[(model, version, digest)] = EmbeddingVector(
+                        values=np.frombuffer(row[0], dtype=np.float32).tolist(),
+                        model=row[1] or model,
+                        version=row[2] or version
+                    )
+        return found
+
+    def put_many(self, items: Dict[CacheKey, EmbeddingVector]) -> None:
+        if not items:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embedding_cache "
+                "(model, version, digest, vector, vector_model, vector_version) VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (m, v, d, vec.to_numpy().tobytes(), vec.model, vec.version)
+                    for (m, v, d), vec in items.items()
+                ]
+            )
+            self._conn.commit()
+
+    def invalidate(self, model: str, version: Optional[str] = None) -> int:
+        with self._lock:
+            if version is None:
+                cursor = self._conn.execute("DELETE FROM embedding_cache WHERE model = ?", (model,))
+            else:
+                cursor = self._conn.execute(
+                    "DELETE FROM embedding_cache WHERE model = ? AND version = ?", (model, version)
+                )
+            self._conn.commit()
+            return cursor.rowcount
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embedding_cache").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class CachedEmbeddingService(EmbeddingService):
+    """``EmbeddingService`` decorator with an LRU front and optional persistent back store.
+
+    Args:
+        inner: Service that computes embeddings on a miss.
+        model: Model name used in cache keys. Defaults to the inner service's
+            model, then follows the provenance of the vectors it returns.
+        version: Model version used in cache keys. Passing ``model`` or
+            ``version`` pins both.
+        max_entries: Capacity of the in-process LRU.
+        store: Optional persistent back store.
+    """
+
+    def __init__(
+        self,
+        inner: EmbeddingService,
+        model: Optional[str] = None,
+        version: Optional[str] = None,
+        max_entries: int = 10000,
+        store: Optional[SQLiteEmbeddingStore] = None
+    ):
+        self.inner = inner
+        self.model = model or self._inner_model_name(inner)
+        self.version = version or "v1"
+        self._pinned = model is not None or version is not None
+        self.max_entries = max_entries
+        self.store = store
+        self._lru: "OrderedDict[CacheKey, EmbeddingVector]" = OrderedDict()
+
+        self.front_hits = 0
+        self.back_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _inner_model_name(inner: EmbeddingService) -> str:
+        for attr in ("model_name", "model"):
+            value = getattr(inner, attr, None)
+            if isinstance(value, str):
+                return value
+        return type(inner).__name__
+
+    def key_for(self, text: str) -> CacheKey:
+        return (self.model, self.version, text_digest(text))
+
+    async def get_embedding(self, text: str) -> EmbeddingVector:
+        return (await self.get_embeddings([text]))[0]
+
+    async def get_embeddings(self, texts: List[str]) -> List[EmbeddingVector]:
+        keys = [self.key_for(text) for text in texts]
+        found: Dict[CacheKey, EmbeddingVector] = {}
+
+        for key in keys:
+            vector = self._lru.get(key)
+            if vector is not None and key not in found:
+                self._lru.move_to_end(key)
+                found[key] = vector
+                self.front_hits += 1
+
+        missing = list(dict.fromkeys(k for k in keys if k not in found))
+        if missing and self.store is not None:
+            stored = await asyncio.to_thread(self.store.get_many, missing)
+            for key, vector in stored.items():
+                found[key] = vector
+                self._remember(key, vector)
+                self.back_hits += 1
+
+        pending = [k for k in missing if k not in found]
+        if pending:
+            texts_by_key = {key: text for key, text in zip(keys, texts)}
+            computed = await self.inner.get_embeddings([texts_by_key[k] for k in pending])
+            self.misses += len(pending)
+            to_store: Dict[CacheKey, EmbeddingVector] = {}
+            for key, vector in zip(pending, computed):
+                found[key] = vector
+                key = self._provenance_key(key, vector)
+                self._remember(key, vector)
+                to_store[key] = vector
+            if self.store is not None:
+                try:
+                    await asyncio.to_thread(self.store.put_many, to_store)
+                except Exception as e:
+                    logger.warning(f"Embedding cache write failed: {e}")
+
+        return [found[key] for key in keys]
+
+    def _provenance_key(self, key: CacheKey, vector: EmbeddingVector) -> CacheKey:
+        """Key for a computed vector; unpinned services adopt the vector's model and version."""
+        if self._pinned or not vector.model:
+            return key
+        self.model, self.version = vector.model, vector.version or self.version
+        return (self.model, self.version, key[2])
+
+    def _remember(self, key: CacheKey, vector: EmbeddingVector) -> None:
+        self._lru[key] = vector
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+    async def invalidate_model(self, model: Optional[str] = None, version: Optional[str] = None) -> int:
+        """Drop cached vectors of ``model`` (this service's model by default), optionally one version."""
+        model = model or self.model
+        stale = [k for k in self._lru if k[0] == model and (version is None or k[1] == version)]
+        for key in stale:
+            del self._lru[key]
+        removed = len(stale)
+        if self.store is not None:
+            removed = max(removed, await asyncio.to_thread(self.store.invalidate, model, version))
+        self.invalidations += 1
+        return removed
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit-rate statistics."""
+        lookups = self.front_hits + self.back_hits + self.misses
+        return {
+            "model": self.model,
+            "version": self.version,
+            "entries": len(self._lru),
+            "front_hits": self.front_hits,
+            "back_hits": self.back_hits,
+            "misses": self.misses,
+            "hit_rate": (self.front_hits + self.back_hits) / lookups if lookups else 0.0,
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,260 @@
+"""
+Execution lanes for background job types.
+
+A lane decides where a job type's CPU-bound kernels run: inline on the
+event loop ("asyncio"), in a thread pool ("thread") or in a process pool
+("process"). Each lane also caps how many jobs of its types run at once.
+KMeans, graph centrality or drift statistics run in a process lane, so
+they do not hold the GIL or the event loop that serves searches. A
+thread lane is only useful for kernels that release the GIL.
+
+Process lanes pass NumPy arrays through shared memory instead of pickling
+them. Arrays in the arguments are copied once into a shared segment, and
+the worker maps it without a copy. Arrays in the result travel back the
+same way. Small arrays (below ``min_shared_bytes``) and other values are
+pickled as usual. Kernels must be module-level functions so a spawned
+worker can import them.
+"""
+
+import asyncio
+import functools
+import logging
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from enum import Enum
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MIN_SHARED_BYTES = 64 * 1024
+
+
+class LaneKind(Enum):
+    """Where a lane runs its kernels."""
+    ASYNCIO = "asyncio"
+    THREAD = "thread"
+    PROCESS = "process"
+
+
+@dataclass(frozen=True)
+class LaneConfig:
+    """Lane kind and size (pool workers, and concurrent jobs of the lane's types)."""
+    kind: LaneKind
+    size: int = 1
+
+
+@dataclass(frozen=True)
+class SharedArray:
+    """Picklable handle to an array stored in a shared memory segment."""
+    name: str
+    shape: Tuple[int, ...]
+    dtype: str
+
+
+def _share(array: np.ndarray, segments: List[SharedMemory]) -> SharedArray:
+    array = np.ascontiguousarray(array)
+    shm = SharedMemory(create=True, size=max(1, array.nbytes))
+    segments.append(shm)
+    np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+    return SharedArray(shm.name, array.shape, array.dtype.str)
+
+
+def _attach(handle: SharedArray, segments: List[SharedMemory]) -> np.ndarray:
+    shm = SharedMemory(name=handle.name)
+    segments.append(shm)
+    return np.ndarray(handle.shape, dtype=np.dtype(handle.dtype), buffer=shm.buf)
+
+
+def _release(segments: List[SharedMemory], unlink: bool) -> None:
+    for shm in segments:
+        try:
+            shm.close()
+        except BufferError:
+            # A view is still referenced; the mapping goes away with it
+            pass
+        if unlink:
+            try:
+                shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def _pack(value: Any, segments: List[SharedMemory], min_bytes: int) -> Any:
+    """Replace large arrays in ``value`` (and nested tuples/lists/dicts) with shared handles."""
+    if isinstance(value, np.ndarray) and value.nbytes >= min_bytes and value.dtype != object:
+        return _share(value, segments)
+    if isinstance(value, (tuple, list)):
+        return type(value)(_pack(item, segments, min_bytes) for item in value)
+    if isinstance(value, dict):
+        return {key: _pack(item, segments, min_bytes) for key, item in value.items()}
+    return value
+
+
+def _unpack(value: Any, segments: List[SharedMemory], copy: bool) -> Any:
+    """Inverse of ``_pack``: shared handles become arrays (views unless ``copy``)."""
+    if isinstance(value, SharedArray):
+        view = _attach(value, segments)
+        return view.copy() if copy else view
+    if isinstance(value, (tuple, list)):
+        return type(value)(_unpack(item, segments, copy) for item in value)
+    if isinstance(value, dict):
+        return {key: _unpack(item, segments, copy) for key, item in value.items()}
+    return value
+
+
+def _call_in_process(fn: Callable, args: tuple, kwargs: Dict[str, Any], min_bytes: int) -> Any:
+    """Worker side of a process lane call: map inputs, run ``fn``, share large outputs."""
+    inputs: List[SharedMemory] = []
+    outputs: List[SharedMemory] = []
+    try:
+        result = fn(*_unpack(args, inputs, copy=False), **_unpack(kwargs, inputs, copy=False))
+        packed = _pack(result, outputs, min_bytes)
+        del result
+        # The caller owns (and unlinks) the output segments
+        _release(outputs, unlink=False)
+        return packed
+    finally:
+        _release(inputs, unlink=False)
+
+
+def _ready() -> bool:
+    return True
+
+
+class ExecutionLane:
+    """Runs kernels for the job types assigned to it; see the module docstring."""
+
+    def __init__(self, name: str, config: LaneConfig, mp_context: str = "spawn",
+                 min_shared_bytes: int = MIN_SHARED_BYTES):
+        if config.size < 1:
+            raise ValueError(f"Lane '{name}' needs a size of at least 1")
+        self.name = name
+        self.kind = config.kind
+        self.size = config.size
+        self.mp_context = mp_context
+        self.min_shared_bytes = min_shared_bytes
+        self._executor: Optional[Executor] = None
+        self._slots = asyncio.Semaphore(config.size)
+        self.stats = {"jobs": 0, "calls": 0, "busy_seconds": 0.0, "shared_bytes": 0}
+
+    def _get_executor(self) -> Optional[Executor]:
+        if self._executor is None:
+            if self.kind == LaneKind.THREAD:
+                self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix=f"lane-{self.name}")
+            elif self.kind == LaneKind.PROCESS:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.size, mp_context=multiprocessing.get_context(self.mp_context)
+                )
+        return self._executor
+
+    async def start(self) -> None:
+        """Start the pool's workers now rather than on the first job."""
+        executor = self._get_executor()
+        if executor is not None:
+            loop = asyncio.get_running_loop()
+            await asyncio.gather(*(loop.run_in_executor(executor, _ready) for _ in range(self.size)))
+
+    def slot(self) -> asyncio.Semaphore:
+        """Held for the duration of a job running in this lane."""
+        self.stats["jobs"] += 1
+        return self._slots
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run the kernel ``fn(*args, **kwargs)`` in this lane and return its result."""
+        self.stats["calls"] += 1
+        start = time.perf_counter()
+        try:
+            if self.kind == LaneKind.ASYNCIO:
+                return fn(*args, **kwargs)
+            loop = asyncio.get_running_loop()
+            if self.kind == LaneKind.THREAD:
+                return await loop.run_in_executor(self._get_executor(), functools.partial(fn, *args, **kwargs))
+            return await self._run_in_process(loop, fn, args, kwargs)
+        finally:
+            self.stats["busy_seconds"] += time.perf_counter() - start
+
+    async def _run_in_process(self, loop, fn: Callable, args: tuple, kwargs: Dict[str, Any]) -> Any:
+        inputs: List[SharedMemory] = []
+        outputs: List[SharedMemory] = []
+        try:
+            packed_args = _pack(args, inputs, self.min_shared_bytes)
+            packed_kwargs = _pack(kwargs, inputs, self.min_shared_bytes)
+            self.stats["shared_bytes"] += sum(shm.size for shm in inputs)
+            packed = await loop.run_in_executor(
+                self._get_executor(), _call_in_process, fn, packed_args, packed_kwargs, self.min_shared_bytes
+            )
+            result = _unpack(packed, outputs, copy=True)
+            self.stats["shared_bytes"] += sum(shm.size for shm in outputs)
+            return result
+        finally:
+            _release(inputs, unlink=True)
+            _release(outputs, unlink=True)
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+
+
+DEFAULT_LANE = "default"
+
+DEFAULT_JOB_LANES = {
+    "vector_clustering": "analytics",
+    "drift_detection": "analytics",
+    "graph_analytics": "analytics",
+}
+
+
+class ExecutionLanes:
+    """Named lanes plus the job type -> lane assignment used by ``JobProcessor``."""
+
+    def __init__(
+        self,
+        lanes: Optional[Dict[str, LaneConfig]] = None,
+        job_lanes: Optional[Dict[str, str]] = None,
+        default_size: int = 4,
+        mp_context: str = "spawn",
+        min_shared_bytes: int = MIN_SHARED_BYTES
+    ):
+        """
+        Args:
+            lanes: Lane name -> config. A "default" asyncio lane of ``default_size``
+                and a two-process "analytics" lane are added unless given.
+            job_lanes: Job type -> lane name; unlisted job types use "default".
+        """
+        configs = {
+            DEFAULT_LANE: LaneConfig(LaneKind.ASYNCIO, default_size),
+            "analytics": LaneConfig(LaneKind.PROCESS, 2),
+        }
+        configs.update(lanes or {})
+        self.job_lanes = dict(DEFAULT_JOB_LANES if job_lanes is None else job_lanes)
+        unknown = set(self.job_lanes.values()) - set(configs)
+        if unknown:
+            raise ValueError(f"Job types assigned to unknown lanes: {sorted(unknown)}")
+        self.lanes = {
+            name: ExecutionLane(name, config, mp_context=mp_context, min_shared_bytes=min_shared_bytes)
+            for name, config in configs.items()
+        }
+
+    def for_job(self, job_type: str) -> ExecutionLane:
+        return self.lanes[self.job_lanes.get(job_type, DEFAULT_LANE)]
+
+    async def start(self) -> None:
+        """Prewarm the pools of lanes that have job types assigned."""
+        used = set(self.job_lanes.values()) | {DEFAULT_LANE}
+        await asyncio.gather(*(lane.start() for name, lane in self.lanes.items() if name in used))
+
+    def shutdown(self, wait: bool = True) -> None:
+        for lane in self.lanes.values():
+            lane.shutdown(wait=wait)
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            name: {"kind": lane.kind.value, "size": lane.size, **lane.stats}
+            for name, lane in self.lanes.items()
+        }
@@ -31,6 +31,7 @@ from .models import (
     GEMINI_REASONING
 )
 from .cost_tracker import CostTracker
+from khala.infrastructure.cache.single_flight import SingleFlight
 from khala.application.utils import parse_json_safely
 
 logger = logging.getLogger(__name__)
@@ -63,6 +64,7 @@ class GeminiClient:
         self._cache_lock = asyncio.Lock()
         self._cache_hits = 0
         self._cache_misses = 0
+        self._inflight = SingleFlight()
         
         # Model configuration
         self._models: Dict[str, genai.GenerativeModel] = {}
@@ -203,7 +205,31 @@ class GeminiClient:
                 self._cache_hits += 1
                 return cached_response
             self._cache_misses += 1
+            
+            # Identical prompts already in flight share one API call
+            flight_key = f"{cache_key}:{temperature}:{max_tokens}:{task_type}"
+            return await self._inflight.do(
+                flight_key,
+                lambda: self._generate_uncached(
+                    model, prompt, images, temperature, max_tokens, task_type, start_time
+                )
+            )
         
+        return await self._generate_uncached(
+            model, prompt, images, temperature, max_tokens, task_type, start_time
+        )
+    
+    async def _generate_uncached(
+        self,
+        model: GeminiModel,
+        prompt: str,
+        images: Optional[List[Any]],
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+        task_type: str,
+        start_time: float
+    ) -> Dict[str, Any]:
+        """Call the model, record cost and populate the response cache."""
         # Configure generation parameters
         config = {
             "temperature": temperature or model.temperature,
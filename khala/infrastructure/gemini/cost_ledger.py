@@ -0,0 +1,434 @@
+"""Append-only cost ledger with incremental per-day/per-model rollups.
+
+Every LLM call produces one cost row. Rewriting the full history on each
+call makes the cost of recording grow with the history and blocks the
+event loop, so the ledger instead:
+
+- appends rows as JSON lines to numbered segment files
+  (``segment-000001.jsonl``), rotating once a segment reaches
+  ``segment_max_bytes``;
+- buffers rows in memory and hands them to a single writer thread in
+  batches: after ``flush_interval`` seconds when called from an event loop,
+  or once ``max_batch`` rows are pending;
+- keeps per-day, per-model rollups (calls, tokens, cost) updated as rows
+  arrive, and writes them atomically to ``rollups.json`` after every batch
+  together with a watermark (segment, byte offset) of the rows they cover.
+
+Startup reads ``rollups.json`` and only replays segment rows written after
+the watermark (e.g. when the process died between appending a batch and
+writing its rollups), so loading does not depend on the size of the history.
+"""
+
+import atexit
+import asyncio
+import json
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+ROLLUPS_FILE = "rollups.json"
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".jsonl"
+ROLLUPS_VERSION = 1
+
+
+@dataclass
+class RollupBucket:
+    """Aggregated cost rows of one model on one day."""
+
+    model_tier: str
+    calls: int = 0
+    successful_calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    total_tokens: int = 0
+    cost_usd: Decimal = Decimal("0")
+    response_time_ms: float = 0.0
+
+    @property
+    def failed_calls(self) -> int:
+        return self.calls - self.successful_calls
+
+    def add_row(self, row: Dict[str, Any]) -> None:
+        self.calls += 1
+        self.successful_calls += 1 if row.get("success", True) else 0
+        self.input_tokens += row["input_tokens"]
+        self.output_tokens += row["output_tokens"]
+        self.total_tokens += row["total_tokens"]
+        self.cost_usd += Decimal(row["cost_usd"])
+        self.response_time_ms += row.get("response_time_ms", 0.0)
+
+    def merge(self, other: "RollupBucket") -> None:
+        self.calls += other.calls
+        self.successful_calls += other.successful_calls
+        self.input_tokens += other.input_tokens
+        self.output_tokens += other.output_tokens
+        self.total_tokens += other.total_tokens
+        self.cost_usd += other.cost_usd
+        self.response_time_ms += other.response_time_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "model_tier": self.model_tier,
+            "calls": self.calls,
+            "successful_calls": self.successful_calls,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "total_tokens": self.total_tokens,
+            "cost_usd": str(self.cost_usd),
+            "response_time_ms": self.response_time_ms,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RollupBucket":
+        return cls(
+            model_tier=data["model_tier"],
+            calls=data["calls"],
+            successful_calls=data["successful_calls"],
+            input_tokens=data["input_tokens"],
+            output_tokens=data["output_tokens"],
+            total_tokens=data["total_tokens"],
+            cost_usd=Decimal(data["cost_usd"]),
+            response_time_ms=data.get("response_time_ms", 0.0),
+        )
+
+
+def row_day(row: Dict[str, Any]) -> str:
+    """UTC calendar day (``YYYY-MM-DD``) of a cost row."""
+    timestamp = datetime.fromisoformat(row["timestamp"])
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.astimezone(timezone.utc).date().isoformat()
+
+
+class CostLedger:
+    """Append-only cost rows on disk plus in-memory day/model rollups."""
+
+    def __init__(
+        self,
+        directory: str,
+        flush_interval: float = 1.0,
+        max_batch: int = 256,
+        segment_max_bytes: int = 16 * 1024 * 1024,
+    ):
+        if max_batch < 1:
+            raise ValueError("max_batch must be at least 1")
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.segment_max_bytes = segment_max_bytes
+
+        # Rollups: "YYYY-MM-DD" -> model_id -> bucket, and "YYYY-MM" -> model_id -> bucket
+        self.days: Dict[str, Dict[str, RollupBucket]] = {}
+        self.months: Dict[str, Dict[str, RollupBucket]] = {}
+        self.total_calls = 0
+
+        self._pending: List[Dict[str, Any]] = []
+        self._pending_last_day: Optional[str] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._timer_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._day_json: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._dirty_days: set = set()
+        self._rollups_dirty = False
+        self._last_write: Optional[Future] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._closed = False
+        self.stats = {"rows": 0, "batches": 0, "replayed": 0, "write_errors": 0}
+
+        # Writer-thread state
+        self._io_lock = threading.Lock()
+        self._segment_index = 1
+        self._segment_bytes = 0
+        self._segment_last_day: Dict[str, str] = {}
+
+        atexit.register(self.close)
+
+    # --- Recording ---
+
+    def append(self, row: Dict[str, Any]) -> None:
+        """Add a cost row to the rollups and queue it for the next batch."""
+        if self._closed:
+            raise RuntimeError("Cost ledger is closed")
+        day = self._add_to_rollups(row)
+        self._pending.append(row)
+        if self._pending_last_day is None or day > self._pending_last_day:
+            self._pending_last_day = day
+
+        if len(self._pending) >= self.max_batch:
+            self.flush(wait=False)
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop to time the flush: rows wait for a full batch, flush() or close()
+            return
+        if self._timer is None or self._timer_loop is not loop:
+            # A timer left on a loop that has since closed would never fire
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = loop.call_later(self.flush_interval, self.flush, False)
+            self._timer_loop = loop
+
+    def flush(self, wait: bool = True) -> None:
+        """Hand pending rows and changed rollups to the writer thread.
+
+        With ``wait`` the call blocks until every batch handed over so far is on disk.
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._pending or self._rollups_dirty or self._dirty_days:
+            batch, self._pending = self._pending, []
+            last_day, self._pending_last_day = self._pending_last_day, None
+            snapshot = self._rollup_snapshot()
+            self._submit(batch, last_day, snapshot, None)
+        if wait:
+            self._wait()
+
+    def prune_before(self, day: str) -> int:
+        """Drop rollups of days before ``day`` and delete segments that only hold such days.
+
+        Returns the number of calls removed from the rollups. Segment files are
+        deleted by the writer thread; the segment being appended to is kept.
+        """
+        old_days = [d for d in self.days if d < day]
+        removed = 0
+        for d in old_days:
+            removed += sum(bucket.calls for bucket in self.days.pop(d).values())
+            self._dirty_days.add(d)
+        if old_days:
+            self.total_calls -= removed
+            self._rebuild_months()
+        batch, self._pending = self._pending, []
+        last_day, self._pending_last_day = self._pending_last_day, None
+        self._submit(batch, last_day, self._rollup_snapshot(), day)
+        return removed
+
+    def close(self) -> None:
+        """Write everything still pending and stop the writer thread."""
+        if self._closed:
+            return
+        try:
+            self.flush(wait=True)
+        finally:
+            self._closed = True
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+            atexit.unregister(self.close)
+
+    # --- Rollups ---
+
+    def _add_to_rollups(self, row: Dict[str, Any]) -> str:
+        day = row_day(row)
+        model_id = row["model_id"]
+        for table, key in ((self.days, day), (self.months, day[:7])):
+            buckets = table.setdefault(key, {})
+            bucket = buckets.get(model_id)
+            if bucket is None:
+                bucket = buckets[model_id] = RollupBucket(model_tier=row["model_tier"])
+            bucket.add_row(row)
+        self.total_calls += 1
+        self._dirty_days.add(day)
+        return day
+
+    def _rebuild_months(self) -> None:
+        self.months = {}
+        for day, buckets in self.days.items():
+            month = self.months.setdefault(day[:7], {})
+            for model_id, bucket in buckets.items():
+                if model_id not in month:
+                    month[model_id] = RollupBucket(model_tier=bucket.model_tier)
+                month[model_id].merge(bucket)
+
+    def _rollup_snapshot(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """JSON-ready rollups; only days changed since the last snapshot are re-serialized."""
+        for day in self._dirty_days:
+            if day in self.days:
+                self._day_json[day] = {m: b.to_dict() for m, b in self.days[day].items()}
+            else:
+                self._day_json.pop(day, None)
+        self._dirty_days.clear()
+        self._rollups_dirty = False
+        return dict(self._day_json)
+
+    # --- Writer ---
+
+    def _submit(
+        self,
+        batch: List[Dict[str, Any]],
+        last_day: Optional[str],
+        snapshot: Dict[str, Any],
+        prune_before: Optional[str],
+    ) -> None:
+        if self._executor is None:
+            # One worker: batches reach the disk in the order they were handed over
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cost-ledger")
+        try:
+            future = self._executor.submit(self._write, batch, last_day, snapshot, prune_before)
+        except RuntimeError:
+            # Interpreter shutdown: the worker has been joined, write inline
+            future = Future()
+            try:
+                self._write(batch, last_day, snapshot, prune_before)
+                future.set_result(None)
+            except Exception as e:
+                future.set_exception(e)
+        future.add_done_callback(self._on_written)
+        self._last_write = future
+
+    def _on_written(self, future: Future) -> None:
+        error = future.exception()
+        if error is not None:
+            self.stats["write_errors"] += 1
+            logger.error(f"Failed to write cost ledger batch to {self.directory}: {error}")
+
+    def _wait(self) -> None:
+        if self._last_write is not None:
+            try:
+                self._last_write.result()
+            except Exception:
+                pass  # Already logged by _on_written
+
+    def _segment_name(self, index: int) -> str:
+        return f"{SEGMENT_PREFIX}{index:06d}{SEGMENT_SUFFIX}"
+
+    def _write(
+        self,
+        batch: List[Dict[str, Any]],
+        last_day: Optional[str],
+        snapshot: Dict[str, Any],
+        prune_before: Optional[str],
+    ) -> None:
+        with self._io_lock:
+            os.makedirs(self.directory, exist_ok=True)
+            if batch:
+                name = self._segment_name(self._segment_index)
+                data = "".join(json.dumps(row, separators=(",", ":")) + "\n" for row in batch).encode("utf-8")
+                with open(os.path.join(self.directory, name), "ab") as f:
+                    f.write(data)
+                self._segment_bytes += len(data)
+                if last_day and last_day > self._segment_last_day.get(name, ""):
+                    self._segment_last_day[name] = last_day
+                self.stats["rows"] += len(batch)
+                self.stats["batches"] += 1
+                if self._segment_bytes >= self.segment_max_bytes:
+                    self._segment_index += 1
+                    self._segment_bytes = 0
+
+            if prune_before:
+                active = self._segment_name(self._segment_index)
+                for name, day in list(self._segment_last_day.items()):
+                    if name != active and day < prune_before:
+                        try:
+                            os.remove(os.path.join(self.directory, name))
+                        except FileNotFoundError:
+                            pass
+                        del self._segment_last_day[name]
+
+            state = {
+                "version": ROLLUPS_VERSION,
+                "segment": self._segment_name(self._segment_index),
+                "offset": self._segment_bytes,
+                "segments": self._segment_last_day,
+                "days": snapshot,
+            }
+            path = os.path.join(self.directory, ROLLUPS_FILE)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(state, f, separators=(",", ":"))
+            os.replace(tmp_path, path)
+
+    # --- Loading ---
+
+    def load(self) -> int:
+        """Read persisted rollups and replay rows written after their watermark.
+
+        Returns the number of replayed rows. Must be called before anything is appended.
+        """
+        state: Dict[str, Any] = {}
+        path = os.path.join(self.directory, ROLLUPS_FILE)
+        if os.path.exists(path):
+            try:
+                with open(path, "r") as f:
+                    state = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.error(f"Failed to read cost rollups from {path}, replaying segments: {e}")
+                state = {}
+
+        self.days = {}
+        self.total_calls = 0
+        for day, buckets in (state.get("days") or {}).items():
+            self.days[day] = {m: RollupBucket.from_dict(b) for m, b in buckets.items()}
+            self.total_calls += sum(b.calls for b in self.days[day].values())
+        self._day_json = dict(state.get("days") or {})
+        self._rebuild_months()
+        self._segment_last_day = dict(state.get("segments") or {})
+
+        watermark = state.get("segment") or ""
+        offset = state.get("offset", 0) if watermark else 0
+        segments = self._segment_names()
+        replayed = 0
+        for name in segments:
+            if name < watermark:
+                continue
+            start = offset if name == watermark else 0
+            for row in self._read_rows(os.path.join(self.directory, name), start, truncate=name == segments[-1]):
+                day = self._add_to_rollups(row)
+                if day > self._segment_last_day.get(name, ""):
+                    self._segment_last_day[name] = day
+                replayed += 1
+        if replayed:
+            self._rollups_dirty = True
+            logger.info(f"Replayed {replayed} cost rows written after the last rollup of {self.directory}")
+
+        active = max(segments + [watermark, self._segment_name(1)])
+        self._segment_index = int(active[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)])
+        active_path = os.path.join(self.directory, active)
+        self._segment_bytes = os.path.getsize(active_path) if os.path.exists(active_path) else 0
+        self.stats["replayed"] = replayed
+        return replayed
+
+    def import_rows(self, rows: Iterable[Dict[str, Any]]) -> int:
+        """Append existing rows (e.g. from the legacy JSON file) and write them out."""
+        count = 0
+        for row in rows:
+            self.append(row)
+            count += 1
+        self.flush(wait=True)
+        return count
+
+    def _segment_names(self) -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(
+            name for name in os.listdir(self.directory)
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX)
+        )
+
+    @staticmethod
+    def _read_rows(path: str, start: int, truncate: bool) -> List[Dict[str, Any]]:
+        rows = []
+        with open(path, "rb") as f:
+            f.seek(start)
+            data = f.read()
+        end = start
+        for line in data.splitlines(keepends=True):
+            if not line.endswith(b"\n"):
+                break  # Torn final write
+            try:
+                rows.append(json.loads(line))
+            except ValueError:
+                logger.warning(f"Skipping unreadable cost row in {path} at byte {end}")
+            end += len(line)
+        if truncate and end < start + len(data):
+            # Drop the torn tail so the next append starts on a line boundary
+            with open(path, "r+b") as f:
+                f.truncate(end)
+        return rows
@@ -4,15 +4,15 @@ This module provides comprehensive cost tracking, optimization recommendations,
 and budget management for LLM operations.
 """
 
-import time
 from dataclasses import dataclass, field
 from datetime import datetime, timezone, timedelta, date
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, List, Optional, Any
 import logging
 from decimal import Decimal, ROUND_HALF_UP
 import json
 import os
 
+from .cost_ledger import CostLedger, RollupBucket
 from .models import GeminiModel, ModelTier
 
 logger = logging.getLogger(__name__)
@@ -67,26 +67,47 @@ class CostSummary:
 
 
 class CostTracker:
-    """Cost tracking and optimization system for LLM operations."""
+    """Cost tracking and optimization system for LLM operations.
+
+    Calls are persisted to an append-only :class:`CostLedger` that keeps
+    per-day/per-model rollups, so recording a call never rewrites history and
+    summaries do not scan records. ``cost_records`` only holds the most recent
+    calls recorded by this process.
+    """
     
-    def __init__(self, budget_usd_per_month: Decimal = Decimal("500.00")):
+    def __init__(
+        self,
+        budget_usd_per_month: Decimal = Decimal("500.00"),
+        persistence_path: Optional[str] = None,
+        flush_interval: float = 1.0,
+        max_batch: int = 256,
+        max_recent_records: int = 1000,
+    ):
         """Initialize cost tracker.
         
         Args:
             budget_usd_per_month: Monthly budget limit
+            persistence_path: Ledger directory (defaults to ``cost_ledger`` next to this module)
+            flush_interval: Seconds between batched ledger writes inside an event loop
+            max_batch: Pending calls that trigger a ledger write
+            max_recent_records: Recent calls kept in ``cost_records``
         """
         self.budget_usd_per_month = budget_usd_per_month
         self.cost_records: List[CostRecord] = []
+        self.max_recent_records = max_recent_records
         self.daily_budget_rolling = Decimal("0")  # Daily spending limit
         self.alert_threshold_percent = Decimal("75.0")  # Alert at 75% of budget
-
-        # Cache for frequent calculations
-        self._daily_summary_cache: Optional[Tuple[str, CostSummary]] = None
-        self._monthly_summary_cache: Optional[Tuple[str, CostSummary]] = None
         
         # Persistence path
-        self.persistence_path = os.path.join(os.path.dirname(__file__), "costs.json")
+        module_dir = os.path.dirname(__file__)
+        self.persistence_path = persistence_path or os.path.join(module_dir, "cost_ledger")
+        self.ledger = CostLedger(self.persistence_path, flush_interval=flush_interval, max_batch=max_batch)
         self.load_from_file()
+        
+        # One-time import of the full-rewrite JSON file used before the ledger
+        legacy_path = os.path.join(module_dir, "costs.json")
+        if persistence_path is None and self.ledger.total_calls == 0 and os.path.exists(legacy_path):
+            self.load_from_file(legacy_path)
     
     def record_call(
         self,
@@ -134,82 +155,54 @@ class CostTracker:
             error_message=error_message
         )
         
-        self.cost_records.append(record)
-        
-        # Clear cache entries
-        self._daily_summary_cache = None
-        self._monthly_summary_cache = None
-        
+        self.add_record(record)
         logger.debug(f"Recorded {task_type} call: {record}")
-        
-        # Auto-save
-        self.save_to_file()
-        
         return record
     
+    def add_record(self, record: CostRecord) -> None:
+        """Add a cost record to the rollups and queue it for the ledger's next batch write."""
+        self.ledger.append(_record_to_row(record))
+        self.cost_records.append(record)
+        if len(self.cost_records) > 2 * self.max_recent_records:
+            del self.cost_records[:-self.max_recent_records]
+    
+    def _summarize(self, start_time: datetime, end_time: datetime, buckets: Dict[str, RollupBucket]) -> CostSummary:
+        """Build a summary from per-model rollups."""
+        total_cost = sum((b.cost_usd for b in buckets.values()), Decimal("0"))
+        total_calls = sum(b.calls for b in buckets.values())
+        successful_calls = sum(b.successful_calls for b in buckets.values())
+        total_tokens = sum(b.total_tokens for b in buckets.values())
+        
+        summary = CostSummary(
+            start_time=start_time,
+            end_time=end_time,
+            total_cost=total_cost,
+            total_calls=total_calls,
+            successful_calls=successful_calls,
+            failed_calls=total_calls - successful_calls,
+            avg_cost_per_call=total_cost / total_calls if total_calls > 0 else Decimal("0"),
+            avg_tokens_per_call=total_tokens // total_calls if total_calls > 0 else 0
+        )
+        
+        for model_id, bucket in buckets.items():
+            if bucket.calls == 0:
+                continue
+            summary.cost_by_model[model_id] = summary.cost_by_model.get(model_id, Decimal("0")) + bucket.cost_usd
+            try:
+                tier = ModelTier(bucket.model_tier)
+            except ValueError:
+                continue
+            summary.cost_by_tier[tier] = summary.cost_by_tier.get(tier, Decimal("0")) + bucket.cost_usd
+        return summary
+    
     def get_daily_summary(self, day: Optional[date] = None) -> CostSummary:
         """Get cost summary for a specific day."""
         if day is None:
             day = datetime.now(timezone.utc).date()
         
-        cache_key = day.isoformat()
-        if self._daily_summary_cache and self._daily_summary_cache[0] == cache_key:
-            return self._daily_summary_cache[1]
-        
-        # Filter records for the specified date
         day_start = datetime.combine(day, datetime.min.time(), tzinfo=timezone.utc)
         day_end = day_start + timedelta(days=1)
-        
-        daily_records = [
-            record for record in self.cost_records
-            if day_start <= record.timestamp < day_end
-        ]
-        
-        if not daily_records:
-            summary = CostSummary(
-                start_time=day_start,
-                end_time=day_end,
-                total_cost=Decimal("0"),
-                total_calls=0,
-                successful_calls=0,
-                failed_calls=0,
-                avg_cost_per_call=Decimal("0"),
-                avg_tokens_per_call=0
-            )
-        else:
-            total_cost = sum(record.cost_usd for record in daily_records)
-            total_calls = len(daily_records)
-            successful_calls = sum(1 for record in daily_records if record.success)
-            failed_calls = total_calls - successful_calls
-            total_tokens = sum(record.total_tokens for record in daily_records)
-            
-            summary = CostSummary(
-                start_time=day_start,
-                end_time=day_end,
-                total_cost=total_cost,
-                total_calls=total_calls,
-                successful_calls=successful_calls,
-                failed_calls=failed_calls,
-                avg_cost_per_call=total_cost / total_calls if total_calls > 0 else Decimal("0"),
-                avg_tokens_per_call=total_tokens // total_calls if total_calls > 0 else 0
-            )
-            
-            # Calculate cost by tier
-            for record in daily_records:
-                tier = record.model_tier
-                if tier not in summary.cost_by_tier:
-                    summary.cost_by_tier[tier] = Decimal("0")
-                summary.cost_by_tier[tier] += record.cost_usd
-            
-            # Calculate cost by model
-            for record in daily_records:
-                if record.model_id not in summary.cost_by_model:
-                    summary.cost_by_model[record.model_id] = Decimal("0")
-                summary.cost_by_model[record.model_id] += record.cost_usd
-        
-        # Cache result
-        self._daily_summary_cache = (cache_key, summary)
-        return summary
+        return self._summarize(day_start, day_end, self.ledger.days.get(day.isoformat(), {}))
     
     def get_monthly_summary(self, year: Optional[int] = None, month: Optional[int] = None) -> CostSummary:
         """Get cost summary for a specific month."""
@@ -219,53 +212,13 @@ class CostTracker:
         if month is None:
             month = now.month
         
-        cache_key = f"{year}-{month}"
-        if self._monthly_summary_cache and self._monthly_summary_cache[0] == cache_key:
-            return self._monthly_summary_cache[1]
-        
-        # Filter records for the specified month
         month_start = datetime(year, month, 1, tzinfo=timezone.utc)
         month_end = month_start.replace(day=28) + timedelta(days=4)  # Get to end of month
         while month_end.month != month:
             month_end -= timedelta(days=1)
         month_end = month_end.replace(hour=23, minute=59, second=59, microsecond=999999)
         
-        monthly_records = [
-            record for record in self.cost_records
-            if month_start <= record.timestamp <= month_end
-        ]
-        
-        if not monthly_records:
-            summary = CostSummary(
-                start_time=month_start,
-                end_time=month_end,
-                total_cost=Decimal("0"),
-                total_calls=0,
-                successful_calls=0,
-                failed_calls=0,
-                avg_cost_per_call=Decimal("0"),
-                avg_tokens_per_call=0
-            )
-        else:
-            total_cost = sum(record.cost_usd for record in monthly_records)
-            total_calls = len(monthly_records)
-            successful_calls = sum(1 for record in monthly_records if record.success)
-            failed_calls = total_calls - successful_calls
-            total_tokens = sum(record.total_tokens for record in monthly_records)
-            
-            summary = CostSummary(
-                start_time=month_start,
-                end_time=month_end,
-                total_cost=total_cost,
-                total_calls=total_calls,
-                successful_calls=successful_calls,
-                failed_calls=failed_calls,
-                avg_cost_per_call=total_cost / total_calls if total_calls > 0 else Decimal("0"),
-                avg_tokens_per_call=total_tokens // total_calls if total_calls > 0 else 0
-            )
-        
-        self._monthly_summary_cache = (cache_key, summary)
-        return summary
+        return self._summarize(month_start, month_end, self.ledger.months.get(f"{year:04d}-{month:02d}", {}))
     
     def is_over_budget(self) -> bool:
         """Check if monthly spending has exceeded budget."""
@@ -394,6 +347,9 @@ class CostTracker:
     def clear_old_records(self, days_to_keep: int = 90) -> int:
         """Clear records older than specified days.
         
+        Rollups are kept per day, so the day containing the cutoff is kept whole.
+        Ledger segments holding only older days are deleted.
+        
         Args:
             days_to_keep: Number of days of records to keep
             
@@ -401,82 +357,98 @@ class CostTracker:
             Number of records removed
         """
         cutoff_date = datetime.now(timezone.utc) - timedelta(days=days_to_keep)
-        original_count = len(self.cost_records)
+        records_removed = self.ledger.prune_before(cutoff_date.date().isoformat())
         
         self.cost_records = [
             record for record in self.cost_records
             if record.timestamp >= cutoff_date
         ]
         
-        records_removed = original_count - len(self.cost_records)
-        
-        # Clear cache
-        self._daily_summary_cache = None
-        self._monthly_summary_cache = None
-        
         logger.info(f"Removed {records_removed} old cost records (kept last {days_to_keep} days)")
-        self.save_to_file()
         return records_removed
 
     def save_to_file(self, path: Optional[str] = None) -> None:
-        """Save cost records to JSON file."""
-        file_path = path or self.persistence_path
+        """Write pending cost records and rollups to the ledger, blocking until they are on disk.
         
-        try:
-            data = []
-            for record in self.cost_records:
-                data.append({
-                    "timestamp": record.timestamp.isoformat(),
-                    "model_id": record.model_id,
-                    "model_tier": record.model_tier.value,
-                    "input_tokens": record.input_tokens,
-                    "output_tokens": record.output_tokens,
-                    "total_tokens": record.total_tokens,
-                    "cost_usd": str(record.cost_usd),
-                    "response_time_ms": record.response_time_ms,
-                    "task_type": record.task_type,
-                    "success": record.success,
-                    "error_message": record.error_message
-                })
-            
-            with open(file_path, 'w') as f:
-                json.dump(data, f, indent=2)
-                
-        except Exception as e:
-            logger.error(f"Failed to save cost records to {file_path}: {e}")
+        Recording already persists in the background; this is for callers that
+        need the ledger to be current, e.g. before exiting or reading it elsewhere.
+        """
+        if path is not None and path != self.persistence_path:
+            raise ValueError(f"Cost ledger is bound to {self.persistence_path}")
+        self.ledger.flush(wait=True)
 
     def load_from_file(self, path: Optional[str] = None) -> None:
-        """Load cost records from JSON file."""
+        """Load cost rollups from the ledger, or import a legacy JSON list of cost records.
+        
+        Loading the ledger reads its rollups (plus any records written after
+        them), not the record history.
+        """
         file_path = path or self.persistence_path
         
         if not os.path.exists(file_path):
             return
+        
+        if os.path.isdir(file_path):
+            if file_path != self.persistence_path:
+                raise ValueError(f"Cost ledger is bound to {self.persistence_path}")
+            try:
+                self.ledger.load()
+                logger.info(f"Loaded cost rollups for {self.ledger.total_calls} calls from {file_path}")
+            except Exception as e:
+                logger.error(f"Failed to load cost ledger from {file_path}: {e}")
+            return
             
         try:
             with open(file_path, 'r') as f:
                 data = json.load(f)
-                
-            self.cost_records = []
+            
+            rows = []
             for item in data:
                 try:
-                    record = CostRecord(
-                        timestamp=datetime.fromisoformat(item["timestamp"]),
-                        model_id=item["model_id"],
-                        model_tier=ModelTier(item["model_tier"]),
-                        input_tokens=item["input_tokens"],
-                        output_tokens=item["output_tokens"],
-                        total_tokens=item["total_tokens"],
-                        cost_usd=Decimal(item["cost_usd"]),
-                        response_time_ms=item["response_time_ms"],
-                        task_type=item.get("task_type", "unknown"),
-                        success=item.get("success", True),
-                        error_message=item.get("error_message")
-                    )
-                    self.cost_records.append(record)
+                    rows.append(_record_to_row(_record_from_row(item)))
                 except Exception as e:
                     logger.warning(f"Skipping invalid cost record: {e}")
-                    
-            logger.info(f"Loaded {len(self.cost_records)} cost records from {file_path}")
+            
+            imported = self.ledger.import_rows(rows)
+            logger.info(f"Imported {imported} cost records from {file_path} into {self.persistence_path}")
             
         except Exception as e:
             logger.error(f"Failed to load cost records from {file_path}: {e}")
+
+    def close(self) -> None:
+        """Flush the ledger and stop its writer thread."""
+        self.ledger.close()
+
+
+def _record_to_row(record: CostRecord) -> Dict[str, Any]:
+    """Ledger row of a cost record."""
+    return {
+        "timestamp": record.timestamp.isoformat(),
+        "model_id": record.model_id,
+        "model_tier": record.model_tier.value,
+        "input_tokens": record.input_tokens,
+        "output_tokens": record.output_tokens,
+        "total_tokens": record.total_tokens,
+        "cost_usd": str(record.cost_usd),
+        "response_time_ms": record.response_time_ms,
+        "task_type": record.task_type,
+        "success": record.success,
+        "error_message": record.error_message
+    }
+
+
+def _record_from_row(item: Dict[str, Any]) -> CostRecord:
+    """Cost record of a ledger row (or an entry of the legacy JSON file)."""
+    return CostRecord(
+        timestamp=datetime.fromisoformat(item["timestamp"]),
+        model_id=item["model_id"],
+        model_tier=ModelTier(item["model_tier"]),
+        input_tokens=item["input_tokens"],
+        output_tokens=item["output_tokens"],
+        total_tokens=item["total_tokens"],
+        cost_usd=Decimal(item["cost_usd"]),
+        response_time_ms=item["response_time_ms"],
+        task_type=item.get("task_type", "unknown"),
+        success=item.get("success", True),
+        error_message=item.get("error_message")
+    )
@@ -37,9 +37,11 @@ class HealthMonitor:
             # Simple query to check connection
             async with self.db_client.get_connection() as conn:
                 await conn.query("RETURN true;")
-            status["components"]["database"] = {"status": "up"}
+            status["components"]["database"] = {"status": "up", "pool": self.db_client.pool_stats()}
         except Exception as e:
-            status["components"]["database"] = {"status": "down", "error": str(e)}
+            status["components"]["database"] = {
+                "status": "down", "error": str(e), "pool": self.db_client.pool_stats()
+            }
             status["status"] = "degraded"
             
         # Check Gemini
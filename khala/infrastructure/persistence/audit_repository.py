@@ -1,6 +1,6 @@
 """Audit repository implementation."""
 import logging
-from typing import Optional, Any
+from typing import List, Optional, Any
 try:
     from surrealdb import AsyncSurreal
 except ImportError:
@@ -52,9 +52,33 @@ class AuditRepository:
             if connection:
                 await connection.query(query, params)
             else:
-                async with self.client.get_connection() as conn:
-                    await conn.query(query, params)
+                # Packed with concurrent point queries when the client pipelines them
+                await self.client.point_query(query, params)
             return entry.id
         except Exception as e:
             logger.critical(f"AUDIT FAILURE: Could not record audit log: {e}")
             raise RuntimeError(f"Audit Failure: {e}") from e
+
+    async def log_many(self, entries: List[AuditLog], connection: Optional["AsyncSurreal"] = None) -> List[str]:
+        """
+        Record many audit log entries with a single INSERT.
+
+        Raises:
+            RuntimeError: If audit logging fails. We fail closed for security.
+        """
+        if not entries:
+            return []
+
+        query = "INSERT INTO audit_log $rows;"
+        params = {"rows": [entry.to_dict() for entry in entries]}
+
+        try:
+            if connection:
+                await connection.query(query, params)
+            else:
+                async with self.client.get_connection() as conn:
+                    await conn.query(query, params)
+            return [entry.id for entry in entries]
+        except Exception as e:
+            logger.critical(f"AUDIT FAILURE: Could not record {len(entries)} audit logs: {e}")
+            raise RuntimeError(f"Audit Failure: {e}") from e
@@ -1,9 +1,11 @@
-from typing import List, Optional, Dict, Any
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Union
 import logging
 import hashlib
 
-from khala.domain.memory.repository import MemoryRepository
+from khala.domain.memory.repository import BulkCreateResult, MemoryProjection, MemoryRepository
 from khala.domain.memory.entities import Memory
+from khala.domain.memory.lifecycle import LifecycleRules, PromotionRule
 from khala.domain.memory.value_objects import EmbeddingVector
 from khala.infrastructure.surrealdb.client import SurrealDBClient
 from khala.infrastructure.persistence.audit_repository import AuditRepository
@@ -35,9 +37,38 @@ class SurrealDBMemoryRepository(MemoryRepository):
 
             return memory_id
         
-    async def get_by_id(self, memory_id: str) -> Optional[Memory]:
+    async def create_bulk(self, memories: List[Memory], batch_size: int = 500) -> List[BulkCreateResult]:
+        """Save many memories with batched writes and one audit INSERT per batch."""
+        results: List[BulkCreateResult] = []
+        for start in range(0, len(memories), max(1, batch_size)):
+            chunk = memories[start:start + batch_size]
+            async with self.client.transaction() as conn:
+                chunk_results = await self.client.create_memories_bulk(chunk, batch_size=batch_size, connection=conn)
+
+                await self.audit_repo.log_many([
+                    AuditLog(
+                        user_id=memory.user_id,
+                        action="create" if result.status == "created" else "update",
+                        target_id=result.memory_id,
+                        target_type="memory",
+                        details={"tier": memory.tier.value, "bulk": True}
+                    )
+                    for memory, result in zip(chunk, chunk_results)
+                    if result.status in ("created", "merged")
+                ], connection=conn)
+
+            for result in chunk_results:
+                result.index += start
+            results.extend(chunk_results)
+        return results
+
+    async def get_by_id(
+        self,
+        memory_id: str,
+        projection: MemoryProjection = MemoryProjection.WITH_EMBEDDING
+    ) -> Optional[Memory]:
         """Retrieve a memory by its ID."""
-        return await self.client.get_memory(memory_id)
+        return await self.client.get_memory(memory_id, projection=projection)
         
     async def update(self, memory: Memory) -> None:
         """Update an existing memory with transactional audit logging."""
@@ -77,7 +108,8 @@ class SurrealDBMemoryRepository(MemoryRepository):
         user_id: str, 
         top_k: int = 10, 
         min_similarity: float = 0.6,
-        filters: Optional[Dict[str, Any]] = None
+        filters: Optional[Dict[str, Any]] = None,
+        projection: MemoryProjection = MemoryProjection.WITH_EMBEDDING
     ) -> List[Memory]:
         """Search memories by vector similarity."""
         results = await self.client.search_memories_by_vector(
@@ -85,39 +117,96 @@ class SurrealDBMemoryRepository(MemoryRepository):
             user_id=user_id,
             top_k=top_k,
             min_similarity=min_similarity,
-            filters=filters
+            filters=filters,
+            projection=projection
         )
-        return [self.client._deserialize_memory(data) for data in results]
+        return self.client._deserialize_memories(results, projection)
         
     async def search_by_text(
         self, 
         query_text: str, 
         user_id: str, 
         top_k: int = 10,
-        filters: Optional[Dict[str, Any]] = None
+        filters: Optional[Dict[str, Any]] = None,
+        projection: MemoryProjection = MemoryProjection.WITH_EMBEDDING
     ) -> List[Memory]:
         """Search memories by text (BM25/Full-text)."""
         results = await self.client.search_memories_by_bm25(
             query_text=query_text,
             user_id=user_id,
             top_k=top_k,
-            filters=filters
+            filters=filters,
+            projection=projection
         )
-        return [self.client._deserialize_memory(data) for data in results]
+        return self.client._deserialize_memories(results, projection)
         
     async def get_by_tier(
         self, 
         user_id: str, 
         tier: str, 
-        limit: int = 100
+        limit: int = 100,
+        projection: MemoryProjection = MemoryProjection.WITH_EMBEDDING
     ) -> List[Memory]:
         """Retrieve memories by tier."""
         return await self.client.get_memories_by_tier(
             user_id=user_id,
             tier=tier,
-            limit=limit
+            limit=limit,
+            projection=projection
         )
 
+    async def iter_memories(
+        self,
+        user_id: Optional[str],
+        tier: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None,
+        batch_size: int = 500,
+        projection: MemoryProjection = MemoryProjection.WITH_EMBEDDING
+    ) -> AsyncIterator[Union[Memory, Dict[str, Any]]]:
+        """Stream memories with keyset pagination."""
+        async for item in self.client.iter_memories(
+            user_id, tier=tier, fields=fields, batch_size=batch_size, projection=projection
+        ):
+            yield item
+
+    async def promote_matching(self, user_id: str, rule: PromotionRule, now: datetime) -> List[str]:
+        """Promote matching memories with one UPDATE and one audit INSERT."""
+        async with self.client.transaction() as conn:
+            promoted = await self.client.promote_matching(user_id, rule, now, connection=conn)
+
+            await self.audit_repo.log_many([
+                AuditLog(
+                    user_id=user_id,
+                    action="update",
+                    target_id=memory_id,
+                    target_type="memory",
+                    details={"tier": rule.to_tier.value, "promoted_from": rule.from_tier.value}
+                )
+                for memory_id in promoted
+            ], connection=conn)
+        return promoted
+
+    async def refresh_decay_scores(self, user_id: str, rules: LifecycleRules, now: datetime) -> int:
+        """Recompute decay scores with one UPDATE (derived column, not audited)."""
+        return await self.client.refresh_decay_scores(user_id, rules, now)
+
+    async def archive_matching(self, user_id: str, rules: LifecycleRules, now: datetime) -> List[str]:
+        """Archive retired memories with one UPDATE and one audit INSERT."""
+        async with self.client.transaction() as conn:
+            archived = await self.client.archive_matching(user_id, rules, now, connection=conn)
+
+            await self.audit_repo.log_many([
+                AuditLog(
+                    user_id=user_id,
+                    action="update",
+                    target_id=memory_id,
+                    target_type="memory",
+                    details={"archived": True}
+                )
+                for memory_id in archived
+            ], connection=conn)
+        return archived
+
     async def find_duplicate_groups(self, user_id: str) -> List[List[Memory]]:
         """Find groups of duplicate memories (exact match)."""
         # 1. Find hashes with duplicates
@@ -154,8 +243,9 @@ class SurrealDBMemoryRepository(MemoryRepository):
             batch_size = 50
             for i in range(0, len(hashes), batch_size):
                 batch_hashes = hashes[i:i+batch_size]
-                batch_query = """
-                SELECT * FROM memory
+                # Exact duplicates are compared by content; embeddings are not needed
+                batch_query = f"""
+                SELECT {self.client._projection_clause(MemoryProjection.FULL)} FROM memory
                 WHERE user_id = $user_id
                 AND is_archived = false
                 AND content_hash IN $hashes
@@ -170,7 +260,7 @@ class SurrealDBMemoryRepository(MemoryRepository):
                      if len(resp) > 0 and isinstance(resp[0], dict) and 'result' in resp[0]:
                          data = resp[0]['result']
 
-                     memories = [self.client._deserialize_memory(m) for m in data]
+                     memories = self.client._deserialize_memories(data, MemoryProjection.FULL)
 
                 # Group by hash locally
                 groups = {}
@@ -9,11 +9,14 @@ import hashlib
 import os
 import re
 import logging
+import weakref
 from contextlib import asynccontextmanager
-from dataclasses import asdict
+from dataclasses import asdict, dataclass
 from datetime import datetime, timezone
-from typing import Dict, List, Optional, Any, TYPE_CHECKING
+from functools import lru_cache
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, TYPE_CHECKING, Union
 
+import numpy as np
 from pydantic import BaseModel, Field, SecretStr
 
 try:
@@ -26,13 +29,47 @@ except ImportError as e:
 
 # Move imports to top level (Architecture Rule)
 from khala.domain.memory.entities import Memory, Entity, Relationship
+from khala.domain.memory.lifecycle import LifecycleRules, PromotionRule
+from khala.domain.memory.repository import BulkCreateResult, MemoryProjection
 from khala.domain.memory.value_objects import (
     EmbeddingVector, MemoryTier, ImportanceScore
 )
+from khala.infrastructure.vector.minhash import text_signature
+from khala.infrastructure.vector.quantization import quantize_row_int8
+from .pipeline import QueryPipeline
+from .pool import ConnectionPool
 from .schema import DatabaseSchema
 
 logger = logging.getLogger(__name__)
 
+# Vector columns left out of FULL reads and fetched on demand
+EMBEDDING_VECTOR_COLUMNS = (
+    "embedding", "embedding_quantized", "embedding_quant_scale", "embedding_visual", "embedding_code"
+)
+# Columns of a SUMMARY read: what ranking and display need
+SUMMARY_COLUMNS = (
+    "id", "user_id", "content", "tier", "importance", "tags", "category", "scope", "summary",
+    "metadata", "created_at", "updated_at", "accessed_at", "access_count", "is_archived",
+    "episode_id", "confidence", "source_reliability", "verification_status",
+    "embedding_model", "embedding_version",
+)
+# Columns an update of a SUMMARY-read memory may write; derived content columns follow content
+SUMMARY_WRITABLE_COLUMNS = frozenset(SUMMARY_COLUMNS) | {
+    "content_tiny", "content_small", "content_full", "content_hash", "content_minhash", "content_minhash_bands"
+}
+
+
+@lru_cache(maxsize=65536)
+def parse_iso_utc(value: str) -> datetime:
+    """Parse a stored ISO-8601 timestamp as UTC.
+
+    Rows repeat many timestamps (batch ingests, backfills), and datetimes
+    are immutable, so parses are cached.
+    """
+    if value.endswith('Z'):
+        value = value[:-1]
+    return datetime.fromisoformat(value).replace(tzinfo=timezone.utc)
+
 
 class SurrealConfig(BaseModel):
     """Immutable configuration for SurrealDB.
@@ -46,6 +83,39 @@ class SurrealConfig(BaseModel):
     password: Optional[SecretStr] = Field(None, description="Auth Password")
     token: Optional[SecretStr] = Field(None, description="Auth Token")
     max_connections: int = Field(default=10, ge=1, le=100)
+    min_connections: int = Field(default=1, ge=0, le=100, description="Connections opened at startup and kept open")
+    pool_idle_timeout_seconds: float = Field(
+        default=300.0, gt=0, description="Idle connections above min_connections are closed after this long"
+    )
+    pool_ping_interval_seconds: float = Field(
+        default=30.0, ge=0, description="Seconds between liveness pings of idle connections; 0 disables them"
+    )
+    pool_acquire_timeout_seconds: float = Field(
+        default=30.0, gt=0, description="Longest wait for a free connection before PoolTimeoutError"
+    )
+    pipeline_point_queries: bool = Field(
+        default=False,
+        description=(
+            "Pack point reads and small writes (get_memory, cache entries, audit logs) issued in the "
+            "same event-loop tick into one multi-statement request"
+        )
+    )
+    pipeline_max_batch: int = Field(default=64, ge=1, le=1000, description="Statements per pipelined request")
+    embedding_storage: str = Field(
+        default="float",
+        pattern="^(float|float\\+int8|int8)$",
+        description=(
+            "How memory embeddings are persisted: float only, float plus int8 codes, "
+            "or int8 codes only (vector scans then score the codes)"
+        )
+    )
+    trusted_reads: bool = Field(
+        default=True,
+        description=(
+            "Deserialize rows read back from this store without re-validating embeddings; "
+            "they are held as read-only float32 arrays"
+        )
+    )
 
     @classmethod
     def from_env(cls) -> "SurrealConfig":
@@ -69,15 +139,62 @@ class SurrealConfig(BaseModel):
         if missing:
             raise ValueError(f"CRITICAL: Missing required environment variables: {', '.join(missing)}")
 
+        # Optional pool sizing
+        pool = {}
+        if os.getenv("SURREAL_POOL_MIN"):
+            pool["min_connections"] = int(os.getenv("SURREAL_POOL_MIN"))
+        if os.getenv("SURREAL_POOL_MAX"):
+            pool["max_connections"] = int(os.getenv("SURREAL_POOL_MAX"))
+
         return cls(
             url=url,
             namespace=ns,
             database=db,
             username=user,
             password=SecretStr(password) if password else None,
-            token=SecretStr(token) if token else None
+            token=SecretStr(token) if token else None,
+            **pool
         )
 
+@dataclass(frozen=True)
+class MemoryWriteEvent:
+    """Notification passed to memory write hooks.
+
+    ``memory`` is the written entity for create/update and ``None`` for
+    delete and for the set-based promote/archive updates; ``user_id`` is
+    ``None`` when the owner is not known.
+    """
+    action: str  # "create" | "update" | "delete" | "promote" | "archive"
+    memory_id: str
+    user_id: Optional[str] = None
+    memory: Optional[Memory] = None
+
+
+class _DeferredEmbeddings:
+    """Loads the embeddings left out of one projected read, in a single query.
+
+    Memories are held weakly, so a pending loader does not keep the rest of
+    its result set alive.
+    """
+
+    def __init__(self, client: "SurrealDBClient", memories: List[Memory]):
+        self.client = client
+        self.pending = {m.id: weakref.ref(m) for m in memories}
+        self.lock = asyncio.Lock()
+
+    async def __call__(self, memory: Memory) -> None:
+        async with self.lock:
+            if not self.pending:
+                return
+            waiting = {mid: ref() for mid, ref in self.pending.items()}
+            waiting = {mid: m for mid, m in waiting.items() if m is not None and m.embedding_pending}
+            self.pending = {}
+            embeddings = await self.client.get_memory_embeddings(list(waiting))
+            for memory_id, pending_memory in waiting.items():
+                pending_memory.embedding = embeddings.get(memory_id)
+                pending_memory._embedding_loader = None
+
+
 class SurrealDBClient:
     """Async SurrealDB client with connection pooling and optimization."""
     
@@ -89,10 +206,51 @@ class SurrealDBClient:
         """
         self.config = config or SurrealConfig.from_env()
         
-        self._connection_pool: List[AsyncSurreal] = []
+        self.pool = ConnectionPool(
+            self._create_connection,
+            min_size=min(self.config.min_connections, self.config.max_connections),
+            max_size=self.config.max_connections,
+            idle_timeout=self.config.pool_idle_timeout_seconds,
+            ping_interval=self.config.pool_ping_interval_seconds,
+            acquire_timeout=self.config.pool_acquire_timeout_seconds,
+        )
+        # Looked up per request so a replaced get_connection is honoured
+        self.pipeline = QueryPipeline(lambda: self.get_connection(), max_batch=self.config.pipeline_max_batch)
         self._pool_lock = asyncio.Lock()
-        self._semaphore = asyncio.Semaphore(self.config.max_connections)
         self._initialized = False
+        self._memory_write_hooks: List[Callable[[MemoryWriteEvent], None]] = []
+        # Optional in-process ANN mirror (see khala.infrastructure.vector.memory_index)
+        self.vector_index: Optional[Any] = None
+
+    def register_memory_write_hook(self, hook: Callable[[MemoryWriteEvent], None]) -> None:
+        """Register a callback invoked with a ``MemoryWriteEvent`` after a memory write.
+
+        Used by caches and index mirrors that must follow memory changes.
+        """
+        if hook not in self._memory_write_hooks:
+            self._memory_write_hooks.append(hook)
+
+    def _notify_memory_write(
+        self,
+        action: str,
+        memory_id: str,
+        memory: Optional[Memory] = None,
+        user_id: Optional[str] = None
+    ) -> None:
+        """Invoke write hooks; hook failures never fail the write."""
+        if not self._memory_write_hooks:
+            return
+        event = MemoryWriteEvent(
+            action=action,
+            memory_id=memory_id,
+            user_id=memory.user_id if memory else user_id,
+            memory=memory
+        )
+        for hook in self._memory_write_hooks:
+            try:
+                hook(event)
+            except Exception as e:
+                logger.warning(f"Memory write hook failed: {e}")
 
     async def initialize(self) -> None:
         """Initialize connection pool and setup namespace/database."""
@@ -106,9 +264,10 @@ class SurrealDBClient:
             logger.info(f"Connecting to SurrealDB at {self.config.url}...")
             
             try:
-                # Create initial connection to verify connectivity
-                connection = await self._create_connection()
-                self._connection_pool.append(connection)
+                # Prewarm the pool; opening the first connection also verifies connectivity
+                await self.pool.start()
+                if self.pool.size == 0:
+                    self.pool.adopt(await self._create_connection())
                 self._initialized = True
 
             except Exception as e:
@@ -145,13 +304,7 @@ class SurrealDBClient:
     async def close(self) -> None:
         """Close all connections in the pool."""
         async with self._pool_lock:
-            logger.info(f"Closing {len(self._connection_pool)} connections...")
-            for conn in self._connection_pool:
-                try:
-                    await conn.close()
-                except Exception as e:
-                    logger.warning(f"Error closing connection: {e}")
-            self._connection_pool.clear()
+            await self.pool.close()
             self._initialized = False
         logger.info("SurrealDB client closed.")
 
@@ -160,35 +313,29 @@ class SurrealDBClient:
         """Get a connection from the pool."""
         if not self._initialized:
             await self.initialize()
-        
-        # Enforce max connections
-        async with self._semaphore:
-            connection = None
-            try:
-                # Thread-safe pool access
-                async with self._pool_lock:
-                    if self._connection_pool:
-                        connection = self._connection_pool.pop()
-
-                if not connection:
-                    connection = await self._create_connection()
-
-                yield connection
-            finally:
-                if connection:
-                    should_close = False
-                    # Return to pool if space permits
-                    async with self._pool_lock:
-                        if len(self._connection_pool) < self.config.max_connections:
-                            self._connection_pool.append(connection)
-                        else:
-                            should_close = True
-
-                    if should_close:
-                        try:
-                            await connection.close()
-                        except Exception as e:
-                            logger.error(f"Error closing overflow connection: {e}")
+
+        async with self.pool.connection() as connection:
+            yield connection
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Connection pool size, counters and wait/checkout latency histograms."""
+        return self.pool.stats()
+
+    async def point_query(self, query: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """Run one small statement on a pooled connection.
+
+        With ``pipeline_point_queries`` the statement is packed with the
+        others issued in the same tick (see ``QueryPipeline``) and the result
+        comes back as ``[{"status": "OK", "result": ...}]``.
+
+        Raises ``RuntimeError`` if the statement reports an error.
+        """
+        if self.config.pipeline_point_queries:
+            return await self.pipeline.execute(query, params)
+        async with self.get_connection() as conn:
+            response = await conn.query(query, params)
+        self._raise_on_statement_error(response)
+        return response
     
     @asynccontextmanager
     async def _borrow_connection(self, connection: Optional[AsyncSurreal] = None):
@@ -231,8 +378,7 @@ class SurrealDBClient:
 
         try:
             if isinstance(dt_val, str):
-                if dt_val.endswith('Z'): dt_val = dt_val[:-1]
-                return datetime.fromisoformat(dt_val).replace(tzinfo=timezone.utc)
+                return parse_iso_utc(dt_val)
         except ValueError as e:
             raise ValueError(f"Data Corruption: Invalid timestamp format '{dt_val}'") from e
 
@@ -242,6 +388,8 @@ class SurrealDBClient:
         """Serialize memory entity to database format."""
         # Calculate content hash for deduplication
         content_hash = hashlib.sha256(f"{memory.content}{memory.user_id}".encode()).hexdigest()
+        # MinHash signature for near-duplicate lookups; empty bands mark content without words
+        signature = text_signature(memory.content, scope=memory.user_id)
 
         # Prepare content fields
         content_str = memory.content or ""
@@ -275,6 +423,8 @@ class SurrealDBClient:
             "content_small": content_small,
             "content_full": content_full,
             "content_hash": content_hash,
+            "content_minhash": signature.slots if signature else None,
+            "content_minhash_bands": signature.bands if signature else [],
             "tier": memory.tier.value,
             "importance": memory.importance.value,
             "tags": memory.tags,
@@ -305,18 +455,28 @@ class SurrealDBClient:
             "events": memory.events
         }
 
+        if memory._loaded_fields is not None:
+            # Partial read: leave the columns it did not load untouched
+            content_dict = {k: v for k, v in content_dict.items() if k in memory._loaded_fields}
+
         if memory.embedding:
-            content_dict["embedding"] = memory.embedding.values
+            storage = self.config.embedding_storage
+            if storage != "int8":
+                content_dict["embedding"] = memory.embedding.to_list()
+            if storage != "float":
+                codes, scale = quantize_row_int8(memory.embedding.to_numpy())
+                content_dict["embedding_quantized"] = codes.tolist()
+                content_dict["embedding_quant_scale"] = scale
             content_dict["embedding_model"] = memory.embedding.model
             content_dict["embedding_version"] = memory.embedding.version
         
         if memory.embedding_visual:
-            content_dict["embedding_visual"] = memory.embedding_visual.values
+            content_dict["embedding_visual"] = memory.embedding_visual.to_list()
             content_dict["embedding_visual_model"] = memory.embedding_visual.model
             content_dict["embedding_visual_version"] = memory.embedding_visual.version
 
         if memory.embedding_code:
-            content_dict["embedding_code"] = memory.embedding_code.values
+            content_dict["embedding_code"] = memory.embedding_code.to_list()
             content_dict["embedding_code_model"] = memory.embedding_code.model
             content_dict["embedding_code_version"] = memory.embedding_code.version
 
@@ -350,6 +510,7 @@ class SurrealDBClient:
                              raise ValueError("DUPLICATE_HASH")
                          raise RuntimeError(f"DB Error: {response}")
 
+                self._notify_memory_write("create", memory.id, memory)
                 return memory.id
 
             except (ValueError, Exception) as e:
@@ -376,33 +537,161 @@ class SurrealDBClient:
 
                         update_query = "UPDATE type::thing('memory', $id) MERGE $content_data;"
                         await conn.query(update_query, {"id": existing_id, "content_data": content_dict})
+                        self._notify_memory_write("update", existing_id, memory)
                         return existing_id
 
                 # If not duplicate or recovery failed, re-raise
                 logger.error(f"Create memory failed: {e}")
                 raise
 
-    async def get_memory(self, memory_id: str) -> Optional[Memory]:
+    async def create_memories_bulk(
+        self,
+        memories: List[Memory],
+        batch_size: int = 500,
+        connection: Optional[AsyncSurreal] = None
+    ) -> List[BulkCreateResult]:
+        """Create many memories with a few round trips per batch.
+
+        Memories are serialized up front. A content hash repeated within the
+        call is written once; later copies report the first copy's id as a
+        ``duplicate``. For each batch of ``batch_size`` distinct hashes, one
+        query finds hashes already stored (those rows are ``merged`` as in
+        ``create_memory``), one ``INSERT`` writes the new rows, and one
+        multi-statement query applies the merges. If a batch statement
+        fails, that batch falls back to ``create_memory`` per item, so
+        errors are reported per item.
+
+        Returns:
+            One result per input memory, in input order.
+        """
+        results: List[Optional[BulkCreateResult]] = [None] * len(memories)
+        first_index: Dict[str, int] = {}
+        duplicates: Dict[int, int] = {}
+        pending = []
+
+        for i, memory in enumerate(memories):
+            try:
+                content_dict = self._serialize_memory(memory)
+            except Exception as e:
+                results[i] = BulkCreateResult(index=i, memory_id=None, status="failed", error=str(e))
+                continue
+            content_hash = content_dict["content_hash"]
+            if content_hash in first_index:
+                duplicates[i] = first_index[content_hash]
+                continue
+            first_index[content_hash] = i
+            pending.append((i, memory, content_dict))
+
+        async with self._borrow_connection(connection) as conn:
+            for start in range(0, len(pending), max(1, batch_size)):
+                await self._create_memory_batch(conn, pending[start:start + batch_size], results)
+
+        for i, first in duplicates.items():
+            origin = results[first]
+            results[i] = BulkCreateResult(
+                index=i,
+                memory_id=origin.memory_id,
+                status="duplicate" if origin.ok else "failed",
+                error=origin.error
+            )
+
+        return results
+
+    async def _create_memory_batch(self, conn: AsyncSurreal, batch: List[Any],
+                                   results: List[Optional[BulkCreateResult]]) -> None:
+        """Write one bulk batch of ``(index, memory, content_dict)``; fills ``results``."""
+        try:
+            existing = await self._find_ids_by_hash(conn, [data["content_hash"] for _, _, data in batch])
+
+            inserts = [(i, m, data) for i, m, data in batch if data["content_hash"] not in existing]
+            merges = [(i, m, data) for i, m, data in batch if data["content_hash"] in existing]
+
+            if inserts:
+                rows = [dict(data, id=memory.id) for _, memory, data in inserts]
+                response = await conn.query("INSERT INTO memory $rows;", {"rows": rows})
+                self._raise_on_statement_error(response)
+                for i, memory, _ in inserts:
+                    results[i] = BulkCreateResult(index=i, memory_id=memory.id, status="created")
+                    self._notify_memory_write("create", memory.id, memory)
+
+            if merges:
+                params: Dict[str, Any] = {}
+                statements = []
+                for n, (_, _, data) in enumerate(merges):
+                    params[f"id_{n}"] = existing[data["content_hash"]]
+                    params[f"data_{n}"] = data
+                    statements.append(f"UPDATE type::thing('memory', $id_{n}) MERGE $data_{n};")
+                response = await conn.query("\n".join(statements), params)
+                self._raise_on_statement_error(response)
+                for i, memory, data in merges:
+                    existing_id = existing[data["content_hash"]]
+                    results[i] = BulkCreateResult(index=i, memory_id=existing_id, status="merged")
+                    self._notify_memory_write("update", existing_id, memory)
+            return
+
+        except Exception as e:
+            logger.warning(f"Bulk batch of {len(batch)} failed ({e}); retrying items individually.")
+
+        for i, memory, _ in batch:
+            if results[i] is not None:
+                continue
+            try:
+                memory_id = await self.create_memory(memory, connection=conn)
+                status = "created" if memory_id == memory.id else "merged"
+                results[i] = BulkCreateResult(index=i, memory_id=memory_id, status=status)
+            except Exception as e:
+                results[i] = BulkCreateResult(index=i, memory_id=None, status="failed", error=str(e))
+
+    async def _find_ids_by_hash(self, conn: AsyncSurreal, hashes: List[str]) -> Dict[str, str]:
+        """Map content hashes that already exist to their raw memory ids."""
+        response = await conn.query(
+            "SELECT id, content_hash FROM memory WHERE content_hash INSIDE $hashes;", {"hashes": hashes}
+        )
+        self._raise_on_statement_error(response)
+        items = response or []
+        if isinstance(items, list) and len(items) > 0 and isinstance(items[0], dict) and 'result' in items[0]:
+            items = items[0]['result'] or []
+
+        found: Dict[str, str] = {}
+        for item in items:
+            if isinstance(item, dict) and item.get('content_hash') and item.get('id') is not None:
+                found.setdefault(item['content_hash'], self._record_key(item['id']))
+        return found
+
+    @staticmethod
+    def _raise_on_statement_error(response: Any) -> None:
+        """Raise if any statement in a query response reports an error."""
+        if isinstance(response, dict) and response.get('status') == 'ERR':
+            raise RuntimeError(f"DB Error: {response}")
+        if isinstance(response, list):
+            for item in response:
+                if isinstance(item, dict) and item.get('status') == 'ERR':
+                    raise RuntimeError(f"DB Error: {item.get('detail', item)}")
+
+    async def get_memory(
+        self,
+        memory_id: str,
+        projection: MemoryProjection = MemoryProjection.WITH_EMBEDDING
+    ) -> Optional[Memory]:
         """Get a memory by ID."""
-        query = "SELECT * FROM type::thing('memory', $id);"
+        query = f"SELECT {self._projection_clause(projection)} FROM type::thing('memory', $id);"
         params = {"id": memory_id}
         
-        async with self.get_connection() as conn:
-            response = await conn.query(query, params)
-            
-            if not response:
-                return None
-            
-            if isinstance(response, list) and len(response) > 0:
-                item = response[0]
-                if isinstance(item, dict):
-                    if 'status' in item and 'result' in item:
-                        if item['status'] == 'OK' and item['result']:
-                            return self._deserialize_memory(item['result'][0])
-                    else:
-                        return self._deserialize_memory(item)
+        response = await self.point_query(query, params)
             
+        if not response:
             return None
+        
+        if isinstance(response, list) and len(response) > 0:
+            item = response[0]
+            if isinstance(item, dict):
+                if 'status' in item and 'result' in item:
+                    if item['status'] == 'OK' and item['result']:
+                        return self._deserialize_memories(item['result'][:1], projection)[0]
+                else:
+                    return self._deserialize_memories([item], projection)[0]
+        
+        return None
     
     async def update_memory(self, memory: Memory, connection: Optional[AsyncSurreal] = None) -> None:
         """Update an existing memory."""
@@ -414,6 +703,7 @@ class SurrealDBClient:
         
         async with self._borrow_connection(connection) as conn:
             await conn.query(query, {"id": memory.id, "updates": content_dict})
+        self._notify_memory_write("update", memory.id, memory)
     
     async def delete_memory(self, memory_id: str, connection: Optional[AsyncSurreal] = None) -> None:
         """Delete a memory by ID."""
@@ -422,6 +712,290 @@ class SurrealDBClient:
         
         async with self._borrow_connection(connection) as conn:
             await conn.query(query, params)
+        self._notify_memory_write("delete", memory_id)
+
+    @staticmethod
+    def _first_result(response: Any) -> Any:
+        """Result of the first statement in a query response."""
+        SurrealDBClient._raise_on_statement_error(response)
+        if isinstance(response, list):
+            if len(response) > 0 and isinstance(response[0], dict) and 'result' in response[0]:
+                return response[0]['result']
+        return response
+
+    async def promote_matching(
+        self, user_id: str, rule: PromotionRule, now: datetime,
+        connection: Optional[AsyncSurreal] = None
+    ) -> List[str]:
+        """Move every memory matching ``rule`` to ``rule.to_tier`` in one UPDATE; returns their ids."""
+        conditions = [
+            "user_id = $user_id", "tier = $from_tier", "is_archived = false", "importance > $min_importance"
+        ]
+        params: Dict[str, Any] = {
+            "user_id": user_id,
+            "from_tier": rule.from_tier.value,
+            "to_tier": rule.to_tier.value,
+            "min_importance": rule.min_importance,
+            "now": now.isoformat(),
+        }
+        created_before = rule.created_before(now)
+        if created_before is not None:
+            conditions.append("created_at < type::datetime($created_before)")
+            params["created_before"] = created_before.isoformat()
+        if rule.min_access_count is not None:
+            conditions.append("access_count > $min_access_count")
+            params["min_access_count"] = rule.min_access_count
+
+        query = (
+            "UPDATE memory SET tier = $to_tier, updated_at = type::datetime($now) "
+            f"WHERE {' AND '.join(conditions)} RETURN VALUE id;"
+        )
+        async with self._borrow_connection(connection) as conn:
+            result = self._first_result(await conn.query(query, params))
+        ids = [self._record_key(record_id) for record_id in result or []]
+        for memory_id in ids:
+            self._notify_memory_write("promote", memory_id, user_id=user_id)
+        return ids
+
+    async def refresh_decay_scores(
+        self, user_id: str, rules: LifecycleRules, now: datetime,
+        connection: Optional[AsyncSurreal] = None
+    ) -> int:
+        """Recompute ``decay_score`` for all non-archived memories in one UPDATE; returns the count."""
+        query = """
+        RETURN array::len((
+            UPDATE memory SET decay_score = math::min([
+                fn::decay_score(
+                    (time::unix(type::datetime($now)) - time::unix(created_at)) / 86400.0,
+                    importance,
+                    $half_life_days
+                ),
+                1.0
+            ])
+            WHERE user_id = $user_id AND is_archived = false
+            RETURN VALUE id
+        ));
+        """
+        params = {"user_id": user_id, "now": now.isoformat(), "half_life_days": float(rules.decay_half_life_days)}
+        async with self._borrow_connection(connection) as conn:
+            result = self._first_result(await conn.query(query, params))
+        # Decay scores feed no cache or index, so no write hooks fire
+        if isinstance(result, list):
+            return int(result[0]) if result else 0
+        return int(result or 0)
+
+    async def archive_matching(
+        self, user_id: str, rules: LifecycleRules, now: datetime,
+        connection: Optional[AsyncSurreal] = None
+    ) -> List[str]:
+        """Archive every memory ``rules`` retire in one UPDATE; returns their ids.
+
+        Reads the stored ``decay_score``, so run ``refresh_decay_scores`` first.
+        """
+        query = """
+        UPDATE memory SET is_archived = true, updated_at = type::datetime($now)
+        WHERE user_id = $user_id AND is_archived = false
+            AND access_count = 0 AND importance < $archive_importance
+            AND (created_at < type::datetime($archive_before) OR decay_score < $decay_archive_score)
+        RETURN VALUE id;
+        """
+        params = {
+            "user_id": user_id,
+            "now": now.isoformat(),
+            "archive_importance": rules.archive_importance,
+            "archive_before": rules.archive_created_before(now).isoformat(),
+            "decay_archive_score": rules.decay_archive_score,
+        }
+        async with self._borrow_connection(connection) as conn:
+            result = self._first_result(await conn.query(query, params))
+        ids = [self._record_key(record_id) for record_id in result or []]
+        for memory_id in ids:
+            self._notify_memory_write("archive", memory_id, user_id=user_id)
+        return ids
+
+    async def write_lifecycle_scores(
+        self,
+        memory_ids: Sequence[str],
+        user_ids: Sequence[str],
+        decay_scores: Sequence[float],
+        tiers: Sequence[str],
+        archived: Sequence[bool],
+        promoted: Sequence[bool],
+        connection: Optional[AsyncSurreal] = None
+    ) -> None:
+        """Write per-memory decay score, tier and archive state in one multi-statement UPDATE.
+
+        The sequences are parallel, one entry per memory. Fires an ``archive``
+        hook for each archived memory and a ``promote`` hook for each other
+        promoted one.
+        """
+        if not memory_ids:
+            return
+        params: Dict[str, Any] = {}
+        statements = []
+        for i, memory_id in enumerate(memory_ids):
+            params[f"id_{i}"] = memory_id
+            params[f"decay_{i}"] = decay_scores[i]
+            params[f"tier_{i}"] = tiers[i]
+            params[f"archived_{i}"] = archived[i]
+            statements.append(
+                f"UPDATE type::thing('memory', $id_{i}) SET decay_score = $decay_{i}, "
+                f"tier = $tier_{i}, is_archived = $archived_{i};"
+            )
+        async with self._borrow_connection(connection) as conn:
+            response = await conn.query("\n".join(statements), params)
+        self._raise_on_statement_error(response)
+
+        for i, memory_id in enumerate(memory_ids):
+            if archived[i]:
+                self._notify_memory_write("archive", memory_id, user_id=user_ids[i])
+            elif promoted[i]:
+                self._notify_memory_write("promote", memory_id, user_id=user_ids[i])
+
+    async def backfill_text_signatures(self, batch_size: int = 500) -> Dict[str, int]:
+        """Compute ``content_minhash`` for memories written before it existed.
+
+        Pages through rows without band keys in id order and writes each
+        page's signatures in one multi-statement UPDATE. Rows whose content
+        has no words get empty band keys so they are not revisited.
+        """
+        select = (
+            "SELECT id, user_id, content FROM memory WHERE content_minhash_bands = NONE{after} "
+            "ORDER BY id LIMIT $limit;"
+        )
+        scanned = updated = 0
+        after: Optional[str] = None
+        while True:
+            params: Dict[str, Any] = {"limit": batch_size}
+            if after is not None:
+                params["after"] = after
+            query = select.format(after=" AND id > type::thing('memory', $after)" if after is not None else "")
+            async with self.get_connection() as conn:
+                rows = self._first_result(await conn.query(query, params)) or []
+            if not rows:
+                break
+
+            statements = []
+            update_params: Dict[str, Any] = {}
+            for i, row in enumerate(rows):
+                signature = text_signature(row.get("content") or "", scope=row.get("user_id") or "")
+                statements.append(
+                    f"UPDATE type::thing('memory', $id_{i}) "
+                    f"SET content_minhash = $slots_{i}, content_minhash_bands = $bands_{i};"
+                )
+                update_params[f"id_{i}"] = self._record_key(row["id"])
+                update_params[f"slots_{i}"] = signature.slots if signature else None
+                update_params[f"bands_{i}"] = signature.bands if signature else []
+                updated += signature is not None
+            async with self.get_connection() as conn:
+                self._raise_on_statement_error(await conn.query("\n".join(statements), update_params))
+
+            scanned += len(rows)
+            after = self._record_key(rows[-1]["id"])
+            if len(rows) < batch_size:
+                break
+        logger.info(f"Backfilled text signatures: {updated} of {scanned} memories")
+        return {"scanned": scanned, "updated": updated}
+
+    # Cache entries (cache_storage: L3 cache, graph path cache)
+
+    async def get_cache_entry(self, key: str) -> Optional[Dict[str, Any]]:
+        """Read a cache entry; timestamps are returned as datetimes."""
+        response = await self.point_query("SELECT * FROM type::thing('cache_storage', $id);", {"id": key})
+        rows = self._first_result(response) or []
+        if isinstance(rows, dict):
+            rows = [rows]
+        if not rows or not isinstance(rows[0], dict):
+            return None
+        entry = dict(rows[0])
+        for name in ("created_at", "expires_at"):
+            if entry.get(name) is not None:
+                entry[name] = self._parse_dt(entry[name])
+        return entry
+
+    async def create_cache_entry(
+        self,
+        id: str,
+        value: Any,
+        created_at: datetime,
+        expires_at: datetime,
+        access_count: int = 0,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """Write a cache entry, replacing any entry with the same key."""
+        query = """
+        UPDATE type::thing('cache_storage', $id) CONTENT {
+            value: $value,
+            created_at: type::datetime($created_at),
+            expires_at: type::datetime($expires_at),
+            access_count: $access_count,
+            metadata: $metadata
+        };
+        """
+        params = {
+            "id": id,
+            "value": value,
+            "created_at": created_at.isoformat(),
+            "expires_at": expires_at.isoformat(),
+            "access_count": access_count,
+            "metadata": metadata or {},
+        }
+        await self.point_query(query, params)
+
+    async def update_cache_entry(self, key: str, updates: Dict[str, Any]) -> None:
+        """Merge ``updates`` into a cache entry."""
+        await self.point_query(
+            "UPDATE type::thing('cache_storage', $id) MERGE $updates;", {"id": key, "updates": updates}
+        )
+
+    async def delete_cache_entry(self, key: str) -> None:
+        """Delete a cache entry."""
+        await self.point_query("DELETE type::thing('cache_storage', $id);", {"id": key})
+
+    # Search sessions (search_session: logged queries, training data for the local query classifier)
+
+    async def create_search_session(self, session: Dict[str, Any]) -> None:
+        """Log one search: the query, its rewrites, filters and ranking metadata."""
+        query = """
+        CREATE search_session CONTENT {
+            user_id: $user_id,
+            query: $query,
+            expanded_queries: $expanded_queries,
+            filters: $filters,
+            results_count: $results_count,
+            metadata: $metadata
+        };
+        """
+        params = {
+            "user_id": session["user_id"],
+            "query": session["query"],
+            "expanded_queries": list(session.get("expanded_queries") or []),
+            "filters": session.get("filters") or {},
+            "results_count": session.get("results_count", 0),
+            "metadata": session.get("metadata") or {},
+        }
+        await self.point_query(query, params)
+
+    async def get_search_sessions(
+        self,
+        since: Optional[datetime] = None,
+        limit: int = 10000
+    ) -> List[Dict[str, Any]]:
+        """Logged search sessions, newest first."""
+        where = "WHERE timestamp >= type::datetime($since)" if since else ""
+        query = f"""
+        SELECT query, metadata, timestamp FROM search_session
+        {where}
+        ORDER BY timestamp DESC
+        LIMIT $limit;
+        """
+        params: Dict[str, Any] = {"limit": limit}
+        if since:
+            params["since"] = since.isoformat()
+        async with self.get_connection() as conn:
+            response = await conn.query(query, params)
+        rows = self._first_result(response) or []
+        return [row for row in rows if isinstance(row, dict)]
 
     async def create_entity(self, entity: Entity) -> str:
         """Create a new entity."""
@@ -441,7 +1015,7 @@ class SurrealDBClient:
             "text": entity.text,
             "entity_type": entity.entity_type.value,
             "confidence": entity.confidence,
-            "embedding": entity.embedding.values if entity.embedding else None,
+            "embedding": entity.embedding.to_list() if entity.embedding else None,
             "metadata": entity.metadata,
             "created_at": entity.created_at.isoformat(),
         }
@@ -531,12 +1105,25 @@ class SurrealDBClient:
         user_id: str,
         top_k: int = 10,
         min_similarity: float = 0.6,
-        filters: Optional[Dict[str, Any]] = None
+        filters: Optional[Dict[str, Any]] = None,
+        projection: MemoryProjection = MemoryProjection.WITH_EMBEDDING
     ) -> List[Dict[str, Any]]:
-        """Search memories using vector similarity."""
+        """Search memories using vector similarity.
+
+        When an ANN mirror is attached and covers ``user_id``, candidates come
+        from the in-process index and are hydrated in one batched fetch;
+        otherwise SurrealDB scores every row of the user. Rows stored as int8
+        codes only are scored on the codes: cosine similarity ignores the
+        per-row scale, so this equals scoring the dequantized vector.
+        """
+        if self.vector_index is not None and self.vector_index.covers(user_id):
+            rows = await self._search_memories_by_ann(embedding, user_id, top_k, min_similarity, filters, projection)
+            if rows is not None:
+                return rows
+
         params = {
             "user_id": user_id,
-            "embedding": embedding.values,
+            "embedding": embedding.to_list(),
             "min_similarity": min_similarity,
             "top_k": top_k,
         }
@@ -552,12 +1139,12 @@ class SurrealDBClient:
             params["embedding_version"] = embedding.version
 
         query = f"""
-        SELECT *, vector::similarity::cosine(embedding, $embedding) AS similarity
+        SELECT {self._projection_clause(projection, "vector::similarity::cosine(embedding ?? embedding_quantized, $embedding) AS similarity")}
         FROM memory 
         WHERE user_id = $user_id 
         AND is_archived = false
-        AND embedding != NONE
-        AND vector::similarity::cosine(embedding, $embedding) > $min_similarity
+        AND (embedding != NONE OR embedding_quantized != NONE)
+        AND vector::similarity::cosine(embedding ?? embedding_quantized, $embedding) > $min_similarity
         {provenance_filter}
         {filter_clause}
         ORDER BY similarity DESC
@@ -571,12 +1158,186 @@ class SurrealDBClient:
                 return response
             return []
 
-    async def search_memories_by_bm25(self, query_text: str, user_id: str, top_k: int = 10, filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    async def _search_memories_by_ann(
+        self,
+        embedding: EmbeddingVector,
+        user_id: str,
+        top_k: int,
+        min_similarity: float,
+        filters: Optional[Dict[str, Any]],
+        projection: MemoryProjection = MemoryProjection.WITH_EMBEDDING
+    ) -> Optional[List[Dict[str, Any]]]:
+        """ANN candidate ids + one hydration query. Returns None to fall back to a scan.
+
+        The scan also runs when the index has no partition for the query's
+        model and version.
+
+        With a quantized index the candidate scores are approximate, so a
+        larger shortlist is fetched and re-ranked on the hydrated float
+        embeddings.
+        """
+        index = self.vector_index
+        # Queries without provenance (the scan matches every model) or for an
+        # unindexed model or version have no partition to answer them
+        if not index.has_partition(user_id, embedding.model, embedding.version):
+            return None
+        quantized = index.is_quantized
+        # Over-fetch when filters may discard candidates or scores need re-ranking
+        fetch_k = top_k * (index.filter_overfetch if filters else 1) * (index.rerank_factor if quantized else 1)
+        hits = index.search(
+            user_id, embedding.to_numpy(), fetch_k,
+            model=embedding.model, version=embedding.version
+        )
+        floor = min_similarity - index.rerank_margin if quantized else min_similarity
+        scores = {mid: score for mid, score in hits if score > floor}
+        if not scores:
+            return []
+
+        if quantized:
+            # Exact re-ranking needs the stored vectors whatever the projection
+            rows = await self.get_memories_by_ids(list(scores), filters=filters)
+            rows = self._project_rows(self._rerank_exact(rows, embedding.to_numpy(), min_similarity), projection)
+        else:
+            rows = await self.get_memories_by_ids(list(scores), filters=filters, projection=projection)
+            for row in rows:
+                row["similarity"] = scores.get(self._record_key(row.get("id")), 0.0)
+        rows.sort(key=lambda r: r["similarity"], reverse=True)
+
+        # Filters rejected too many candidates from a full ANN page: scan instead
+        if filters and len(rows) < top_k and len(hits) >= fetch_k:
+            return None
+        return rows[:top_k]
+
+    def _rerank_exact(
+        self,
+        rows: List[Dict[str, Any]],
+        query: np.ndarray,
+        min_similarity: float
+    ) -> List[Dict[str, Any]]:
+        """Replace approximate scores with exact cosine similarity, scoring the shortlist as one matrix."""
+        candidates = []
+        vectors = []
+        for row in rows:
+            values = self.row_embedding(row)
+            if values is not None and len(values) == len(query):
+                candidates.append(row)
+                vectors.append(values)
+        if not candidates:
+            return []
+
+        matrix = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1)
+        norms[norms == 0] = 1.0
+        query = np.asarray(query, dtype=np.float32)
+        similarities = (matrix @ query) / (norms * (float(np.linalg.norm(query)) or 1.0))
+
+        kept = []
+        for row, similarity in zip(candidates, similarities.tolist()):
+            row["similarity"] = similarity
+            if similarity > min_similarity:
+                kept.append(row)
+        return kept
+
+    @staticmethod
+    def _project_rows(rows: List[Dict[str, Any]], projection: MemoryProjection) -> List[Dict[str, Any]]:
+        """Drop the columns a projection leaves out from rows read in full; scores are kept."""
+        projection = MemoryProjection(projection)
+        if projection == MemoryProjection.WITH_EMBEDDING:
+            return rows
+        if projection == MemoryProjection.FULL:
+            return [{k: v for k, v in row.items() if k not in EMBEDDING_VECTOR_COLUMNS} for row in rows]
+        keep = {"id", "similarity"} if projection == MemoryProjection.ID_ONLY else {*SUMMARY_COLUMNS, "similarity"}
+        return [{k: v for k, v in row.items() if k in keep} for row in rows]
+
+    @staticmethod
+    def _projection_clause(projection: MemoryProjection, *extra: str) -> str:
+        """SELECT list for a memory read projection, plus extra expressions."""
+        projection = MemoryProjection(projection)
+        if projection == MemoryProjection.ID_ONLY:
+            return ", ".join(("id", *extra))
+        if projection == MemoryProjection.SUMMARY:
+            return ", ".join((*SUMMARY_COLUMNS, *extra))
+        head = ", ".join(("*", *extra))
+        if projection == MemoryProjection.FULL:
+            return f"{head} OMIT {', '.join(EMBEDDING_VECTOR_COLUMNS)}"
+        return head
+
+    @staticmethod
+    def _record_key(record_id: Any) -> str:
+        """Strip the table prefix from a record id."""
+        key = str(record_id)
+        return key.split(":", 1)[1] if key.startswith("memory:") else key
+
+    async def get_memories_by_ids(
+        self,
+        memory_ids: List[str],
+        filters: Optional[Dict[str, Any]] = None,
+        projection: MemoryProjection = MemoryProjection.WITH_EMBEDDING
+    ) -> List[Dict[str, Any]]:
+        """Fetch non-archived memory rows for many ids in a single query."""
+        if not memory_ids:
+            return []
+
+        params: Dict[str, Any] = {}
+        targets = []
+        for i, memory_id in enumerate(memory_ids):
+            params[f"id_{i}"] = memory_id
+            targets.append(f"type::thing('memory', $id_{i})")
+        filter_clause = self._build_filter_query(filters, params)
+
+        query = f"""
+        SELECT {self._projection_clause(projection)} FROM {", ".join(targets)}
+        WHERE is_archived = false
+        {filter_clause};
+        """
+        async with self.get_connection() as conn:
+            response = await conn.query(query, params)
+            if response and isinstance(response, list):
+                if len(response) > 0 and isinstance(response[0], dict) and 'result' in response[0]:
+                    return response[0]['result'] or []
+                return response
+            return []
+
+    async def get_memory_embeddings(self, memory_ids: List[str]) -> Dict[str, EmbeddingVector]:
+        """Fetch the embeddings of many memories in one query, keyed by id."""
+        if not memory_ids:
+            return {}
+
+        params = {f"id_{i}": memory_id for i, memory_id in enumerate(memory_ids)}
+        targets = ", ".join(f"type::thing('memory', $id_{i})" for i in range(len(memory_ids)))
+        query = (
+            "SELECT id, embedding, embedding_quantized, embedding_quant_scale, "
+            f"embedding_model, embedding_version FROM {targets};"
+        )
+        async with self.get_connection() as conn:
+            response = await conn.query(query, params)
+
+        rows = response or []
+        if len(rows) > 0 and isinstance(rows[0], dict) and 'result' in rows[0]:
+            rows = rows[0]['result'] or []
+
+        embeddings = {}
+        for row in rows:
+            values = self.row_embedding(row)
+            if values is not None:
+                embeddings[self._record_key(row.get("id"))] = self._read_embedding(
+                    values, row.get("embedding_model"), row.get("embedding_version")
+                )
+        return embeddings
+
+    async def search_memories_by_bm25(
+        self,
+        query_text: str,
+        user_id: str,
+        top_k: int = 10,
+        filters: Optional[Dict[str, Any]] = None,
+        projection: MemoryProjection = MemoryProjection.WITH_EMBEDDING
+    ) -> List[Dict[str, Any]]:
         """Search memories using BM25."""
         params = {"user_id": user_id, "query_text": query_text, "top_k": top_k}
         filter_clause = self._build_filter_query(filters, params)
         query = f"""
-        SELECT * FROM memory
+        SELECT {self._projection_clause(projection)} FROM memory
         WHERE user_id = $user_id
         AND content @@ $query_text
         AND is_archived = false
@@ -591,9 +1352,18 @@ class SurrealDBClient:
                 return response
             return []
 
-    async def get_memories_by_tier(self, user_id: str, tier: str, limit: int = 100) -> List[Memory]:
+    async def get_memories_by_tier(
+        self,
+        user_id: str,
+        tier: str,
+        limit: int = 100,
+        projection: MemoryProjection = MemoryProjection.WITH_EMBEDDING
+    ) -> List[Memory]:
         """Get memories by tier."""
-        query = "SELECT * FROM memory WHERE user_id = $user_id AND tier = $tier AND is_archived = false ORDER BY accessed_at DESC LIMIT $limit;"
+        query = (
+            f"SELECT {self._projection_clause(projection)} FROM memory "
+            "WHERE user_id = $user_id AND tier = $tier AND is_archived = false ORDER BY accessed_at DESC LIMIT $limit;"
+        )
         params = {"user_id": user_id, "tier": tier, "limit": limit}
         async with self.get_connection() as conn:
             response = await conn.query(query, params)
@@ -601,11 +1371,142 @@ class SurrealDBClient:
                 items = response
                 if len(response) > 0 and isinstance(response[0], dict) and 'result' in response[0]:
                     items = response[0]['result']
-                return [self._deserialize_memory(data) for data in items]
+                return self._deserialize_memories(items, projection)
             return []
 
-    def _deserialize_memory(self, data: Dict[str, Any]) -> Memory:
+    async def iter_memories(
+        self,
+        user_id: Optional[str],
+        tier: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None,
+        batch_size: int = 500,
+        filters: Optional[Dict[str, Any]] = None,
+        has_fields: Sequence[str] = (),
+        include_archived: bool = False,
+        projection: MemoryProjection = MemoryProjection.WITH_EMBEDDING
+    ) -> AsyncIterator[Union[Memory, Dict[str, Any]]]:
+        """Stream memories in id order with keyset pagination.
+
+        Each page is ``id > <last id> ORDER BY id LIMIT batch_size``. Pages
+        do not shift when rows are updated or archived during iteration,
+        and the next page is fetched while the current one is consumed. At
+        most two pages are held in memory.
+
+        Args:
+            user_id: Owner to stream; ``None`` streams every user.
+            tier: Optional tier filter.
+            fields: Columns to select. ``None`` yields ``Memory`` objects;
+                otherwise raw row dicts holding ``id`` plus these fields.
+            batch_size: Rows per round trip.
+            filters: Extra equality/operator filters (see ``_build_filter_query``).
+            has_fields: Fields that must be set (``!= NONE``).
+            include_archived: Also stream archived memories.
+            projection: Columns read when yielding ``Memory`` objects.
+        """
+        field_pattern = re.compile(r"^[a-zA-Z0-9_.]+$")
+        for name in list(fields or []) + list(has_fields):
+            if not field_pattern.match(name):
+                raise ValueError(f"Invalid field name: {name!r}")
+
+        select = self._projection_clause(projection) if fields is None else ", ".join(dict.fromkeys(["id", *fields]))
+        params: Dict[str, Any] = {"limit": batch_size}
+        conditions = []
+        if user_id is not None:
+            conditions.append("user_id = $user_id")
+            params["user_id"] = user_id
+        if tier is not None:
+            conditions.append("tier = $tier")
+            params["tier"] = tier
+        if not include_archived:
+            conditions.append("is_archived = false")
+        conditions.extend(f"{name} != NONE" for name in has_fields)
+        where = " AND ".join(conditions) or "true"
+        where += self._build_filter_query(filters, params)
+
+        async def fetch(after: Optional[str]) -> List[Dict[str, Any]]:
+            page_params = dict(params)
+            page_where = where
+            if after is not None:
+                page_where += " AND id > type::thing('memory', $after)"
+                page_params["after"] = after
+            query = f"SELECT {select} FROM memory WHERE {page_where} ORDER BY id LIMIT $limit;"
+            async with self.get_connection() as conn:
+                response = await conn.query(query, page_params)
+            if response and isinstance(response, list):
+                if len(response) > 0 and isinstance(response[0], dict) and 'result' in response[0]:
+                    return response[0]['result'] or []
+                return response
+            return []
+
+        prefetch: Optional[asyncio.Future] = None
+        try:
+            page = await fetch(None)
+            while page:
+                if len(page) >= batch_size:
+                    prefetch = asyncio.ensure_future(fetch(self._record_key(page[-1].get("id"))))
+                if fields is not None:
+                    for row in page:
+                        yield row
+                else:
+                    for memory in self._deserialize_memories(page, projection, skip_unreadable=True):
+                        yield memory
+                if prefetch is None:
+                    break
+                page, prefetch = await prefetch, None
+        finally:
+            if prefetch is not None and not prefetch.done():
+                prefetch.cancel()
+
+    @staticmethod
+    def row_embedding(data: Dict[str, Any]) -> Optional[Union[List[float], np.ndarray]]:
+        """Float embedding of a row, dequantizing int8 codes to float32 when only those are stored."""
+        if data.get("embedding"):
+            return data["embedding"]
+        codes = data.get("embedding_quantized")
+        if codes:
+            scale = np.float32(data.get("embedding_quant_scale") or 1.0)
+            return np.asarray(codes, dtype=np.float32) * scale
+        return None
+
+    def _read_embedding(self, values: Any, model: Optional[str], version: Optional[str]) -> EmbeddingVector:
+        """Embedding of a stored row; trusted reads skip the per-element validation done at ingest."""
+        if self.config.trusted_reads:
+            return EmbeddingVector.trusted(values, model=model, version=version)
+        if isinstance(values, np.ndarray):
+            values = values.tolist()
+        return EmbeddingVector(values=values, model=model, version=version)
+
+    def _deserialize_memories(
+        self,
+        rows: List[Dict[str, Any]],
+        projection: MemoryProjection = MemoryProjection.WITH_EMBEDDING,
+        skip_unreadable: bool = False
+    ) -> List[Memory]:
+        """Deserialize one read's rows; projected reads share one deferred embedding loader."""
+        memories = []
+        for row in rows:
+            try:
+                memories.append(self._deserialize_memory(row, projection))
+            except ValueError as e:
+                if not skip_unreadable:
+                    raise
+                logger.error(f"Skipping unreadable memory {row.get('id')}: {e}")
+
+        if memories and projection in (MemoryProjection.SUMMARY, MemoryProjection.FULL):
+            loader = _DeferredEmbeddings(self, memories)
+            for memory in memories:
+                if memory.embedding is None:
+                    memory._embedding_loader = loader
+        return memories
+
+    def _deserialize_memory(
+        self,
+        data: Dict[str, Any],
+        projection: MemoryProjection = MemoryProjection.WITH_EMBEDDING
+    ) -> Memory:
         """Deserialize database record to Memory object with Robustness."""
+        if projection == MemoryProjection.ID_ONLY:
+            raise ValueError("ID_ONLY rows hold no memory fields; read them as rows")
         
         # Deserialize Enums safely
         try:
@@ -625,14 +1526,11 @@ class SurrealDBClient:
 
         # Embeddings
         embedding = None
-        if data.get("embedding"):
-            embedding = EmbeddingVector(
-                values=data["embedding"],
-                model=data.get("embedding_model"),
-                version=data.get("embedding_version")
-            )
+        values = self.row_embedding(data)
+        if values is not None:
+            embedding = self._read_embedding(values, data.get("embedding_model"), data.get("embedding_version"))
         
-        return Memory(
+        memory = Memory(
             id=memory_id,
             user_id=data.get("user_id", "unknown"),
             content=data.get("content", ""),
@@ -666,3 +1564,6 @@ class SurrealDBClient:
             versions=data.get("versions", []),
             events=data.get("events", [])
         )
+        if projection == MemoryProjection.SUMMARY:
+            memory._loaded_fields = SUMMARY_WRITABLE_COLUMNS
+        return memory
@@ -0,0 +1,153 @@
+"""Pipelined execution of small SurrealDB statements.
+
+A point read holds a pooled connection for a whole round trip, so point-read
+throughput is capped at ``max_connections / round-trip time``.
+``QueryPipeline`` queues single statements from many coroutines and, once
+per event-loop tick, packs the queued statements into one multi-statement
+request. Each statement's parameters are renamed (``$id`` becomes
+``$s3_id``) so statements cannot see each other's values, and the
+per-statement results of the response are handed back to their awaiters.
+
+Statements must be single statements that reference their parameters as
+``$name`` and do not use ``LET``. If the server rejects a packed request
+before running it (one statement does not parse), its statements are
+retried one per request so a bad statement only fails its own caller. Any
+other failure may come after the statements ran, so it fails every caller
+of the request and nothing is re-sent: a retry could repeat writes.
+"""
+
+import asyncio
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Any, AsyncContextManager, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_PARAM = re.compile(r"\$([A-Za-z_][A-Za-z0-9_]*)")
+_PARSE_ERROR = re.compile(r"parse error", re.IGNORECASE)
+
+
+class RequestRejectedError(RuntimeError):
+    """The server refused a request without running any of its statements."""
+
+
+@dataclass
+class _Queued:
+    query: str
+    params: Dict[str, Any]
+    future: asyncio.Future = field(repr=False)
+
+
+class QueryPipeline:
+    """Packs statements queued in the same tick into one request per connection checkout."""
+
+    def __init__(self, get_connection: Callable[[], AsyncContextManager[Any]], max_batch: int = 64):
+        if max_batch < 1:
+            raise ValueError("max_batch must be at least 1")
+        self.get_connection = get_connection
+        self.max_batch = max_batch
+        self._queue: List[_Queued] = []
+        self._flush_scheduled = False
+        self._in_flight: set = set()
+        self.stats = {"statements": 0, "requests": 0, "fallbacks": 0}
+
+    async def execute(self, query: str, params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Run one statement; returns its result as ``[{"status": "OK", "result": ...}]``.
+
+        Raises ``RuntimeError`` if the statement reports an error.
+        """
+        loop = asyncio.get_running_loop()
+        queued = _Queued(query, dict(params or {}), loop.create_future())
+        self._queue.append(queued)
+        if len(self._queue) >= self.max_batch:
+            self._flush()
+        elif not self._flush_scheduled:
+            self._flush_scheduled = True
+            loop.call_soon(self._flush)
+        return await queued.future
+
+    def _flush(self) -> None:
+        self._flush_scheduled = False
+        while self._queue:
+            batch, self._queue = self._queue[:self.max_batch], self._queue[self.max_batch:]
+            task = asyncio.ensure_future(self._send(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    @staticmethod
+    def pack(batch: List[Any]) -> tuple:
+        """One multi-statement query and its merged parameters for ``(query, params)`` pairs."""
+        statements, merged = [], {}
+        for i, (query, params) in enumerate(batch):
+            prefix = f"s{i}_"
+            statements.append(_PARAM.sub(
+                lambda m: f"${prefix}{m.group(1)}" if m.group(1) in params else m.group(0),
+                query.strip().rstrip(";")
+            ) + ";")
+            merged.update({f"{prefix}{name}": value for name, value in params.items()})
+        return "\n".join(statements), merged
+
+    async def _send(self, batch: List[_Queued]) -> None:
+        live = [q for q in batch if not q.future.done()]
+        if not live:
+            return
+        query, params = self.pack([(q.query, q.params) for q in live])
+        try:
+            async with self.get_connection() as conn:
+                results = await self._run(conn, query, params)
+        except RequestRejectedError as e:
+            if len(live) == 1:
+                self._fail(live, e)
+                return
+            # Nothing ran, so each statement can safely be sent again on its own
+            logger.warning(f"Pipelined request of {len(live)} statements rejected ({e}); retrying one by one")
+            self.stats["fallbacks"] += 1
+            await asyncio.gather(*(self._send([q]) for q in live))
+            return
+        except Exception as e:
+            self._fail(live, e)
+            return
+        self.stats["requests"] += 1
+        if len(results) != len(live):
+            # The statements ran but their results cannot be matched to callers
+            self._fail(live, RuntimeError(f"Expected {len(live)} statement results, got {len(results)}"))
+            return
+
+        self.stats["statements"] += len(live)
+        for queued, item in zip(live, results):
+            if queued.future.done():
+                continue
+            if isinstance(item, dict) and item.get("status") == "ERR":
+                queued.future.set_exception(RuntimeError(f"DB Error: {item.get('detail', item.get('result'))}"))
+            else:
+                queued.future.set_result([item])
+
+    @staticmethod
+    def _fail(batch: List[_Queued], error: BaseException) -> None:
+        for queued in batch:
+            if not queued.future.done():
+                queued.future.set_exception(error)
+
+    @staticmethod
+    async def _run(conn: Any, query: str, params: Dict[str, Any]) -> List[Any]:
+        """Per-statement ``{"status", "result"}`` items of a multi-statement request.
+
+        Raises ``RequestRejectedError`` when the server refused the whole
+        request: an RPC-level error, which SurrealDB returns for queries it
+        could not parse, or a parse error raised by the SDK.
+        """
+        if hasattr(conn, "query_raw"):
+            # The SDK's query() returns only the first statement's result
+            raw = await conn.query_raw(query, params)
+            if isinstance(raw, dict):
+                if raw.get("error"):
+                    raise RequestRejectedError(f"DB Error: {raw['error']}")
+                return list(raw.get("result") or [])
+        try:
+            response = await conn.query(query, params)
+        except Exception as e:
+            if _PARSE_ERROR.search(str(e)):
+                raise RequestRejectedError(f"DB Error: {e}") from e
+            raise
+        return list(response) if isinstance(response, list) else [response]
@@ -0,0 +1,294 @@
+"""Connection pool for the SurrealDB client.
+
+Keeps between ``min_size`` and ``max_size`` authenticated connections:
+
+- ``start()`` opens ``min_size`` connections up front, so a request burst
+  does not pay connect and signin latency on user-facing calls.
+- Checkouts reuse the most recently returned connection; connections idle
+  longer than ``idle_timeout`` are closed down to ``min_size``.
+- A background task pings idle connections every ``ping_interval`` seconds
+  and replaces the ones that fail, and a connection whose checkout ended in
+  a connection error is discarded rather than returned.
+- Time spent waiting for a connection (including opening one when none is
+  idle) and time a connection stays checked out are recorded in latency
+  histograms, reported by ``stats()``.
+"""
+
+import asyncio
+import bisect
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds; the last bucket is unbounded
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+# Errors after which a connection is assumed dead and not returned to the pool
+CONNECTION_ERRORS = (ConnectionError, OSError, asyncio.TimeoutError)
+
+
+class PoolTimeoutError(TimeoutError):
+    """No connection became available within the acquire timeout."""
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram with approximate quantiles."""
+
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q: float) -> float:
+        """Quantile estimate, interpolated linearly inside its bucket."""
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / n, self.max)
+            seen += n
+        return self.max
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Counts per bucket (cumulative, Prometheus style) and summary values in milliseconds."""
+        cumulative, running = {}, 0
+        for bound, n in zip(list(self.buckets) + ["+Inf"], self.counts):
+            running += n
+            cumulative[str(bound)] = running
+        return {
+            "count": self.count,
+            "mean_ms": (self.total / self.count * 1000) if self.count else 0.0,
+            "p50_ms": self.quantile(0.5) * 1000,
+            "p95_ms": self.quantile(0.95) * 1000,
+            "p99_ms": self.quantile(0.99) * 1000,
+            "max_ms": self.max * 1000,
+            "buckets": cumulative,
+        }
+
+
+@dataclass
+class _PooledConnection:
+    connection: Any
+    created_at: float
+    last_used: float
+
+
+class ConnectionPool:
+    """Bounded pool of connections opened by ``factory``."""
+
+    def __init__(
+        self,
+        factory: Callable[[], Awaitable[Any]],
+        min_size: int = 1,
+        max_size: int = 10,
+        idle_timeout: float = 300.0,
+        ping_interval: float = 30.0,
+        acquire_timeout: Optional[float] = 30.0,
+        ping_timeout: float = 5.0
+    ):
+        if not 0 <= min_size <= max_size:
+            raise ValueError("Pool sizes must satisfy 0 <= min_size <= max_size")
+        self.factory = factory
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.ping_interval = ping_interval
+        self.acquire_timeout = acquire_timeout
+        self.ping_timeout = ping_timeout
+
+        # Idle connections; checkouts take the most recently returned one (right end)
+        self._idle: Deque[_PooledConnection] = deque()
+        # One permit per connection that may be open and checked out
+        self._permits = asyncio.Semaphore(max_size)
+        self._in_use = 0
+        self._maintenance: Optional[asyncio.Task] = None
+        self._closed = False
+
+        self.wait_time = LatencyHistogram()
+        self.checkout_duration = LatencyHistogram()
+        self.counters = {
+            "opened": 0, "closed": 0, "idle_evicted": 0, "ping_failures": 0,
+            "discarded": 0, "acquire_timeouts": 0,
+        }
+
+    @property
+    def size(self) -> int:
+        """Open connections, idle or checked out."""
+        return len(self._idle) + self._in_use
+
+    async def start(self) -> None:
+        """Open ``min_size`` connections and start the maintenance task."""
+        self._closed = False
+        await self._fill_to_min()
+        if self.ping_interval and self._maintenance is None:
+            self._maintenance = asyncio.create_task(self._maintain())
+
+    def adopt(self, connection: Any) -> None:
+        """Add an already-open connection to the idle set."""
+        now = time.monotonic()
+        self._idle.append(_PooledConnection(connection, now, now))
+
+    async def close(self) -> None:
+        """Stop maintenance and close every idle connection."""
+        self._closed = True
+        if self._maintenance is not None:
+            self._maintenance.cancel()
+            try:
+                await self._maintenance
+            except asyncio.CancelledError:
+                pass
+            self._maintenance = None
+        logger.info(f"Closing {len(self._idle)} connections...")
+        while self._idle:
+            await self._close(self._idle.pop().connection)
+
+    @asynccontextmanager
+    async def connection(self):
+        """Check out a connection for the duration of the block."""
+        waited_from = time.perf_counter()
+        try:
+            if self.acquire_timeout is None:
+                await self._permits.acquire()
+            else:
+                await asyncio.wait_for(self._permits.acquire(), self.acquire_timeout)
+        except asyncio.TimeoutError:
+            self.counters["acquire_timeouts"] += 1
+            raise PoolTimeoutError(
+                f"No database connection available within {self.acquire_timeout}s "
+                f"({self._in_use} of {self.max_size} in use)"
+            ) from None
+
+        self._in_use += 1
+        pooled: Optional[_PooledConnection] = None
+        healthy = True
+        try:
+            pooled = self._idle.pop() if self._idle else await self._open()
+            checked_out = time.perf_counter()
+            self.wait_time.observe(checked_out - waited_from)
+            try:
+                yield pooled.connection
+            except CONNECTION_ERRORS:
+                healthy = False
+                raise
+            finally:
+                self.checkout_duration.observe(time.perf_counter() - checked_out)
+        finally:
+            self._in_use -= 1
+            if pooled is not None:
+                if healthy and not self._closed:
+                    pooled.last_used = time.monotonic()
+                    self._idle.append(pooled)
+                else:
+                    self.counters["discarded"] += not healthy
+                    await self._close(pooled.connection)
+            self._permits.release()
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool size, counters and latency histograms."""
+        return {
+            "size": self.size,
+            "idle": len(self._idle),
+            "in_use": self._in_use,
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+            **self.counters,
+            "wait_time": self.wait_time.snapshot(),
+            "checkout_duration": self.checkout_duration.snapshot(),
+        }
+
+    async def _open(self) -> _PooledConnection:
+        connection = await self.factory()
+        self.counters["opened"] += 1
+        now = time.monotonic()
+        return _PooledConnection(connection, now, now)
+
+    async def _close(self, connection: Any) -> None:
+        self.counters["closed"] += 1
+        try:
+            await connection.close()
+        except Exception as e:
+            logger.warning(f"Error closing connection: {e}")
+
+    async def _fill_to_min(self) -> None:
+        missing = self.min_size - self.size
+        if missing <= 0:
+            return
+        opened = await asyncio.gather(*(self._open() for _ in range(missing)), return_exceptions=True)
+        errors = [result for result in opened if isinstance(result, BaseException)]
+        for pooled in opened:
+            if isinstance(pooled, BaseException):
+                continue
+            # Checkouts may have opened connections of their own meanwhile
+            if self.size < self.max_size and not self._closed:
+                self._idle.append(pooled)
+            else:
+                await self._close(pooled.connection)
+        if errors:
+            raise errors[0]
+
+    async def _maintain(self) -> None:
+        while not self._closed:
+            await asyncio.sleep(self.ping_interval)
+            try:
+                await self.run_maintenance()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Connection pool maintenance failed: {e}")
+
+    async def run_maintenance(self) -> None:
+        """Evict long-idle connections, ping the rest and top up to ``min_size``."""
+        now = time.monotonic()
+        expired = sorted((p for p in self._idle if now - p.last_used > self.idle_timeout), key=lambda p: p.last_used)
+        for pooled in expired[:max(0, self.size - self.min_size)]:
+            self._idle.remove(pooled)
+            self.counters["idle_evicted"] += 1
+            await self._close(pooled.connection)
+
+        # Pinged connections are checked out, so no request can take them mid-ping;
+        # when every permit is taken the pool is busy and its connections are in use anyway
+        checking: List[_PooledConnection] = []
+        for pooled in list(self._idle):
+            if self._permits.locked():
+                break
+            await self._permits.acquire()
+            self._idle.remove(pooled)
+            self._in_use += 1
+            checking.append(pooled)
+        results = await asyncio.gather(*(self._ping(p.connection) for p in checking))
+        for pooled, alive in zip(checking, results):
+            self._in_use -= 1
+            if alive and not self._closed:
+                self._idle.append(pooled)
+            else:
+                self.counters["ping_failures"] += not alive
+                await self._close(pooled.connection)
+            self._permits.release()
+        if not self._closed:
+            await self._fill_to_min()
+
+    async def _ping(self, connection: Any) -> bool:
+        try:
+            await asyncio.wait_for(connection.query("RETURN true;"), self.ping_timeout)
+            return True
+        except Exception as e:
+            logger.warning(f"Pooled connection failed liveness ping: {e}")
+            return False
@@ -39,6 +39,8 @@ class DatabaseSchema:
         DEFINE FIELD content_full ON memory TYPE option<string>;
 
         DEFINE FIELD content_hash ON memory TYPE string;
+        DEFINE FIELD content_minhash ON memory TYPE option<array<int>>;
+        DEFINE FIELD content_minhash_bands ON memory TYPE option<array<string>>;
         DEFINE FIELD embedding ON memory TYPE option<array<float>>;
         -- Task 85: Vector Provenance
         DEFINE FIELD embedding_model ON memory TYPE option<string>;
@@ -95,6 +97,7 @@ class DatabaseSchema:
 
         -- Module 11.C.2: Advanced Vector Ops (Strategies 79-84)
         DEFINE FIELD embedding_quantized ON memory TYPE option<array<int>>;
+        DEFINE FIELD embedding_quant_scale ON memory TYPE option<float>;
         DEFINE FIELD cluster_id ON memory TYPE option<record<vector_cluster>>;
         DEFINE FIELD anomaly_score ON memory TYPE float DEFAULT 0.0;
         """,
@@ -106,6 +109,8 @@ class DatabaseSchema:
         
         -- Deduplication index (Enforce Uniqueness)
         DEFINE INDEX content_hash_index ON memory FIELDS content_hash UNIQUE;
+        -- Near-duplicate lookup: one entry per MinHash band key (keys are scoped per user)
+        DEFINE INDEX content_minhash_band_index ON memory FIELDS content_minhash_bands;
 
         -- Search indexes
         DEFINE INDEX vector_search ON memory FIELDS embedding HNSW DIMENSION 768 DIST COSINE M 16;
@@ -0,0 +1,424 @@
+"""
+In-process approximate nearest-neighbour index for memory embeddings.
+
+``SurrealDBClient.search_memories_by_vector`` scores every row of a user in
+the WHERE clause, so latency grows linearly with the memory count. This
+module keeps an inverted-file (IVF) index over unit-normalized float32
+vectors instead, partitioned per ``(user_id, embedding model, version)``.
+
+A partition starts as an exact flat matrix. Once it crosses
+``train_threshold`` vectors it trains spherical k-means centroids and splits
+into inverted lists; a query then scores only the ``nprobe`` lists whose
+centroids are closest. Inserts, updates and removals are O(1) amortized
+(capacity-doubling buffers, swap-with-last deletes), and a partition
+retrains itself when it has grown well past its training size.
+
+With ``codec="int8"`` or ``"pq"`` a trained partition keeps compressed codes
+(see ``quantization``) of each vector's residual from its list centroid,
+calibrated on the partition's own vectors. Scores are then approximate and
+callers should re-rank a shortlist with exact vectors.
+"""
+
+import logging
+import math
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from khala.infrastructure.vector.quantization import FloatCodec, make_codec
+
+logger = logging.getLogger(__name__)
+
+PartitionKey = Tuple[str, Optional[str], Optional[str]]
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """Return float32 copies of ``vectors`` scaled to unit L2 norm (zero rows stay zero)."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def spherical_kmeans(
+    data: np.ndarray,
+    k: int,
+    iterations: int = 12,
+    sample_per_centroid: int = 64,
+    seed: int = 0
+) -> np.ndarray:
+    """Train ``k`` unit-norm centroids on a sample of unit-norm ``data``."""
+    rng = np.random.default_rng(seed)
+    n = data.shape[0]
+    sample = data[rng.choice(n, size=min(n, k * sample_per_centroid), replace=False)]
+    centroids = sample[rng.choice(sample.shape[0], size=k, replace=False)].copy()
+
+    for _ in range(iterations):
+        assign = np.argmax(sample @ centroids.T, axis=1)
+        counts = np.bincount(assign, minlength=k)
+        order = np.argsort(assign, kind="stable")
+        nonempty = counts > 0
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[nonempty]
+
+        sums = np.zeros_like(centroids)
+        sums[nonempty] = np.add.reduceat(sample[order], starts, axis=0)
+        # Empty clusters keep their previous centroid
+        sums[~nonempty] = centroids[~nonempty]
+        centroids = normalize_rows(sums)
+
+    return centroids
+
+
+class _InvertedList:
+    """Growable code matrix (float32 or compressed) plus parallel id list."""
+
+    __slots__ = ("ids", "vectors", "size")
+
+    def __init__(self, width: int, dtype: Any = np.float32, capacity: int = 16):
+        self.ids: List[str] = []
+        self.vectors = np.empty((capacity, width), dtype=dtype)
+        self.size = 0
+
+    def append(self, memory_id: str, vector: np.ndarray) -> int:
+        if self.size == self.vectors.shape[0]:
+            grown = np.empty((self.size * 2, self.vectors.shape[1]), dtype=self.vectors.dtype)
+            grown[:self.size] = self.vectors[:self.size]
+            self.vectors = grown
+        slot = self.size
+        self.vectors[slot] = vector
+        self.ids.append(memory_id)
+        self.size += 1
+        return slot
+
+    def pop_slot(self, slot: int) -> Optional[str]:
+        """Remove ``slot`` by moving the last entry into it; returns the moved id."""
+        last = self.size - 1
+        moved = None
+        if slot != last:
+            self.vectors[slot] = self.vectors[last]
+            self.ids[slot] = self.ids[last]
+            moved = self.ids[slot]
+        self.ids.pop()
+        self.size -= 1
+        return moved
+
+    def view(self) -> np.ndarray:
+        return self.vectors[:self.size]
+
+
+class VectorPartition:
+    """Vectors for one (user, model, version): exact flat search, then IVF once large."""
+
+    # Vectors used to calibrate a quantization codec at training time
+    CODEC_SAMPLE = 16384
+
+    def __init__(
+        self,
+        dims: int,
+        train_threshold: int = 4096,
+        nprobe: int = 8,
+        retrain_factor: float = 4.0,
+        seed: int = 0,
+        codec: str = "float32",
+        codec_options: Optional[Dict[str, Any]] = None
+    ):
+        self.dims = dims
+        self.train_threshold = train_threshold
+        self.nprobe = nprobe
+        self.retrain_factor = retrain_factor
+        self.seed = seed
+        self.codec_name = codec
+        self.codec_options = codec_options or {}
+        # Untrained partitions stay exact; the configured codec is fitted at training time
+        self.codec = FloatCodec(dims)
+
+        self.centroids: Optional[np.ndarray] = None
+        self.lists: List[_InvertedList] = [_InvertedList(dims)]
+        self.locations: Dict[str, Tuple[int, int]] = {}
+        self.trained_size = 0
+
+    def __len__(self) -> int:
+        return len(self.locations)
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+
+    def upsert(self, memory_id: str, vector: np.ndarray) -> None:
+        """Insert or replace the (already normalized) vector for ``memory_id``."""
+        if memory_id in self.locations:
+            self.remove(memory_id)
+
+        list_no = 0
+        if self.centroids is not None:
+            list_no = int(np.argmax(self.centroids @ vector))
+        slot = self.lists[list_no].append(memory_id, self._encode(vector, list_no))
+        self.locations[memory_id] = (list_no, slot)
+
+        size = len(self.locations)
+        if (not self.is_trained and size >= self.train_threshold) or \
+                (self.is_trained and size >= self.retrain_factor * self.trained_size):
+            self.train()
+
+    def extend(self, ids: List[str], vectors: np.ndarray) -> None:
+        """Bulk insert normalized rows, training at most once afterwards."""
+        for memory_id in ids:
+            if memory_id in self.locations:
+                self.remove(memory_id)
+        if self.centroids is None:
+            assign = np.zeros(len(ids), dtype=np.int64)
+        else:
+            assign = np.argmax(vectors @ self.centroids.T, axis=1)
+        codes = self._encode(vectors, assign)
+        for memory_id, list_no, vector in zip(ids, assign.tolist(), codes):
+            self.locations[memory_id] = (list_no, self.lists[list_no].append(memory_id, vector))
+
+        size = len(self.locations)
+        if (not self.is_trained and size >= self.train_threshold) or \
+                (self.is_trained and size >= self.retrain_factor * self.trained_size):
+            self.train()
+
+    @property
+    def is_residual(self) -> bool:
+        """Quantized partitions store residuals from their list centroid."""
+        return self.centroids is not None and self.codec_name != "float32"
+
+    def _encode(self, vectors: np.ndarray, list_nos: Any) -> np.ndarray:
+        if self.is_residual:
+            vectors = vectors - self.centroids[list_nos]
+        return self.codec.encode(vectors)
+
+    def remove(self, memory_id: str) -> bool:
+        location = self.locations.pop(memory_id, None)
+        if location is None:
+            return False
+        list_no, slot = location
+        moved = self.lists[list_no].pop_slot(slot)
+        if moved is not None:
+            self.locations[moved] = (list_no, slot)
+        return True
+
+    def train(self) -> None:
+        """(Re)build centroids and redistribute every vector into inverted lists."""
+        ids, matrix = self.export()
+        n = len(ids)
+        if n < 2:
+            return
+
+        nlist = max(1, min(int(4 * math.sqrt(n)), n // 8))
+        centroids = spherical_kmeans(matrix, nlist, seed=self.seed)
+        chunk = 65536
+        assign = np.concatenate([
+            np.argmax(matrix[start:start + chunk] @ centroids.T, axis=1) for start in range(0, n, chunk)
+        ])
+        self.centroids = centroids
+        self.codec = FloatCodec(self.dims)
+        if self.codec_name != "float32":
+            options = dict(self.codec_options)
+            if self.codec_name == "pq":
+                options.setdefault("seed", self.seed)
+            sample = np.random.default_rng(self.seed).choice(n, size=min(n, self.CODEC_SAMPLE), replace=False)
+            residuals = matrix[sample] - centroids[assign[sample]]
+            self.codec = make_codec(self.codec_name, self.dims, **options).fit(residuals)
+        self.lists = [_InvertedList(self.codec.code_width, self.codec.dtype) for _ in range(nlist)]
+        self.locations = {}
+
+        for start in range(0, n, chunk):
+            block = matrix[start:start + chunk]
+            block_assign = assign[start:start + chunk]
+            codes = self._encode(block, block_assign)
+            for offset, list_no in enumerate(block_assign.tolist()):
+                memory_id = ids[start + offset]
+                slot = self.lists[list_no].append(memory_id, codes[offset])
+                self.locations[memory_id] = (list_no, slot)
+
+        self.trained_size = n
+        logger.debug(f"Trained IVF partition: {n} vectors, {nlist} lists, codec={self.codec.name}")
+
+    def export(self) -> Tuple[List[str], np.ndarray]:
+        """All ids and their (decoded) vectors as one float32 matrix."""
+        ids: List[str] = []
+        for inverted in self.lists:
+            ids.extend(inverted.ids)
+        if not ids:
+            return ids, np.empty((0, self.dims), dtype=np.float32)
+        blocks = []
+        for list_no, inverted in enumerate(self.lists):
+            if not inverted.size:
+                continue
+            block = self.codec.decode(inverted.view())
+            if self.is_residual:
+                block = block + self.centroids[list_no]
+            blocks.append(block)
+        return ids, np.concatenate(blocks, axis=0)
+
+    @property
+    def code_bytes(self) -> int:
+        """Bytes held by stored vectors or codes."""
+        return sum(inv.view().nbytes for inv in self.lists)
+
+    def search(self, query: np.ndarray, top_k: int, nprobe: Optional[int] = None) -> List[Tuple[str, float]]:
+        """Top-k ``(memory_id, cosine)`` for a normalized query, best first."""
+        if not self.locations or top_k <= 0:
+            return []
+
+        if self.centroids is None:
+            probed_nos = [0]
+        else:
+            probe = min(nprobe or self.nprobe, len(self.lists))
+            centroid_scores = self.centroids @ query
+            nearest = np.argpartition(-centroid_scores, probe - 1)[:probe]
+            probed_nos = [int(i) for i in nearest if self.lists[i].size]
+
+        if not probed_nos:
+            return []
+        probed = [self.lists[i] for i in probed_nos]
+        if self.is_residual:
+            # q.x = q.c + q.(x - c)
+            scores = np.concatenate([
+                centroid_scores[i] + self.codec.score(self.lists[i].view(), query) for i in probed_nos
+            ])
+        else:
+            scores = np.concatenate([self.codec.score(inv.view(), query) for inv in probed])
+        offsets = np.cumsum([inv.size for inv in probed])
+
+        k = min(top_k, scores.shape[0])
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+
+        results = []
+        for idx in best.tolist():
+            list_pos = int(np.searchsorted(offsets, idx, side="right"))
+            slot = idx - (offsets[list_pos - 1] if list_pos else 0)
+            results.append((probed[list_pos].ids[slot], float(scores[idx])))
+        return results
+
+
+class ANNIndex:
+    """Per-user, per-model collection of ``VectorPartition``s."""
+
+    def __init__(
+        self,
+        train_threshold: int = 4096,
+        nprobe: int = 8,
+        seed: int = 0,
+        codec: str = "float32",
+        codec_options: Optional[Dict[str, Any]] = None
+    ):
+        self.train_threshold = train_threshold
+        self.nprobe = nprobe
+        self.seed = seed
+        self.codec = codec
+        self.codec_options = codec_options
+        self.partitions: Dict[PartitionKey, VectorPartition] = {}
+        self._owners: Dict[str, PartitionKey] = {}
+
+    def __len__(self) -> int:
+        return len(self._owners)
+
+    def __contains__(self, memory_id: str) -> bool:
+        return memory_id in self._owners
+
+    @property
+    def is_quantized(self) -> bool:
+        return self.codec != "float32"
+
+    @staticmethod
+    def partition_key(user_id: str, model: Optional[str] = None, version: Optional[str] = None) -> PartitionKey:
+        return (user_id, model, version)
+
+    def _partition_for(self, key: PartitionKey, dims: int) -> VectorPartition:
+        partition = self.partitions.get(key)
+        if partition is None:
+            partition = VectorPartition(
+                dims=dims, train_threshold=self.train_threshold,
+                nprobe=self.nprobe, seed=self.seed,
+                codec=self.codec, codec_options=self.codec_options
+            )
+            self.partitions[key] = partition
+        elif partition.dims != dims:
+            raise ValueError(f"Vector has {dims} dims, partition expects {partition.dims}")
+        return partition
+
+    def upsert(
+        self,
+        memory_id: str,
+        user_id: str,
+        vector: Iterable[float],
+        model: Optional[str] = None,
+        version: Optional[str] = None
+    ) -> None:
+        """Insert or move ``memory_id`` into the partition for its user and model."""
+        unit = normalize_rows(np.asarray(vector, dtype=np.float32))
+        key = self.partition_key(user_id, model, version)
+
+        previous = self._owners.get(memory_id)
+        if previous is not None and previous != key:
+            self.remove(memory_id)
+
+        self._partition_for(key, unit.shape[0]).upsert(memory_id, unit)
+        self._owners[memory_id] = key
+
+    def bulk_upsert(
+        self,
+        ids: List[str],
+        user_ids: List[str],
+        vectors: np.ndarray,
+        model: Optional[str] = None,
+        version: Optional[str] = None
+    ) -> None:
+        """Load many rows at once; each affected partition trains at most once."""
+        units = normalize_rows(vectors)
+        by_user: Dict[str, List[int]] = {}
+        for row, user_id in enumerate(user_ids):
+            by_user.setdefault(user_id, []).append(row)
+
+        for user_id, rows in by_user.items():
+            key = self.partition_key(user_id, model, version)
+            member_ids = [ids[r] for r in rows]
+            for memory_id in member_ids:
+                previous = self._owners.get(memory_id)
+                if previous is not None and previous != key:
+                    self.remove(memory_id)
+            self._partition_for(key, units.shape[1]).extend(member_ids, units[rows])
+            for memory_id in member_ids:
+                self._owners[memory_id] = key
+
+    def remove(self, memory_id: str) -> bool:
+        key = self._owners.pop(memory_id, None)
+        if key is None:
+            return False
+        partition = self.partitions.get(key)
+        if partition is not None:
+            partition.remove(memory_id)
+            if not len(partition):
+                del self.partitions[key]
+        return True
+
+    def has_partition(self, user_id: str, model: Optional[str] = None, version: Optional[str] = None) -> bool:
+        """Whether any vectors are indexed for the user under this model and version."""
+        return self.partition_key(user_id, model, version) in self.partitions
+
+    def search(
+        self,
+        user_id: str,
+        query: Iterable[float],
+        top_k: int = 10,
+        model: Optional[str] = None,
+        version: Optional[str] = None,
+        nprobe: Optional[int] = None
+    ) -> List[Tuple[str, float]]:
+        """Top-k ``(memory_id, cosine)`` within the user's partition for this model."""
+        partition = self.partitions.get(self.partition_key(user_id, model, version))
+        if partition is None:
+            return []
+        unit = normalize_rows(np.asarray(query, dtype=np.float32))
+        return partition.search(unit, top_k, nprobe=nprobe)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "vectors": len(self._owners),
+            "partitions": len(self.partitions),
+            "trained_partitions": sum(1 for p in self.partitions.values() if p.is_trained),
+            "codec": self.codec,
+            "code_bytes": sum(p.code_bytes for p in self.partitions.values()),
+        }
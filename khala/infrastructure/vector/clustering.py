@@ -0,0 +1,38 @@
+"""
+CPU kernels for embedding analytics.
+
+Clustering and drift statistics are split out of ``AdvancedVectorService``
+as module-level functions over NumPy arrays. This lets a process lane (see
+``executors.execution_lanes``) run them without the service's
+database client. The module only imports NumPy and scikit-learn, so
+spawned workers start quickly.
+"""
+
+from typing import Tuple
+
+import numpy as np
+
+
+def fit_centroids(sample: np.ndarray, k: int, seed: int = 42, n_init: int = 10) -> np.ndarray:
+    """KMeans centroids (``k x dims``) of a sample of embeddings."""
+    from sklearn.cluster import KMeans
+
+    return KMeans(n_clusters=k, random_state=seed, n_init=n_init).fit(sample).cluster_centers_
+
+
+def assign_to_centroids(page: np.ndarray, centroids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Nearest centroid of each row (as ``KMeans.predict``) and the distance to it."""
+    # |x - c|^2 = |x|^2 - 2 x.c + |c|^2, without materializing page - centroid differences
+    squared = (
+        np.einsum("ij,ij->i", page, page)[:, None]
+        - 2.0 * page @ centroids.T
+        + np.einsum("ij,ij->i", centroids, centroids)[None, :]
+    )
+    labels = squared.argmin(axis=1)
+    distances = np.sqrt(np.maximum(squared[np.arange(len(labels)), labels], 0.0))
+    return labels, distances
+
+
+def embedding_moments(page: np.ndarray) -> Tuple[np.ndarray, float]:
+    """Column sums and the total squared norm of a page, for running mean/variance."""
+    return page.sum(axis=0), float(np.einsum("ij,ij->", page, page))
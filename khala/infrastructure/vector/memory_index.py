@@ -0,0 +1,229 @@
+"""
+ANN mirror of the SurrealDB ``memory`` table.
+
+``MemoryVectorIndex`` loads the embeddings of non-archived memories into an
+``ANNIndex`` and then follows the client's memory write hooks, so creates,
+updates, archives and deletes are reflected without a rebuild. Once
+attached, ``SurrealDBClient.search_memories_by_vector`` asks the index for
+candidate ids and hydrates them with a single batched query.
+
+A user is only served from the index after a build has covered them (or a
+full build has run); until then searches fall back to the database scan.
+With a ``VectorSegmentStore`` attached, builds and writes are also persisted
+to memory-mapped segments, and ``load_from_store`` restores a restarted
+worker without querying the database.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from khala.infrastructure.vector.ann_index import ANNIndex
+from khala.infrastructure.vector.segment_store import VectorSegmentStore
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryVectorIndex:
+    """Per-user ANN index kept in sync with the memory table.
+
+    Args:
+        train_threshold: Vectors per partition before switching from exact to IVF search.
+        nprobe: Inverted lists scanned per query.
+        filter_overfetch: Candidate multiplier used when the search has extra filters.
+        store: Optional on-disk segment store that mirrors the index.
+        codec: ``"float32"``, ``"int8"`` or ``"pq"`` storage for trained partitions.
+        rerank_factor: Shortlist multiplier re-ranked on exact floats when quantized.
+        rerank_margin: Similarity slack applied to approximate scores before re-ranking.
+    """
+
+    def __init__(
+        self,
+        train_threshold: int = 4096,
+        nprobe: int = 8,
+        filter_overfetch: int = 4,
+        store: Optional[VectorSegmentStore] = None,
+        codec: str = "float32",
+        rerank_factor: int = 4,
+        rerank_margin: float = 0.05
+    ):
+        self.index = ANNIndex(train_threshold=train_threshold, nprobe=nprobe, codec=codec)
+        self.filter_overfetch = filter_overfetch
+        self.rerank_factor = rerank_factor
+        self.rerank_margin = rerank_margin
+        self.store = store
+        self._covered_users: Set[str] = set()
+        self._covers_all = False
+
+    def attach(self, client: Any) -> None:
+        """Register as the client's vector index and follow its memory writes."""
+        client.register_memory_write_hook(self.on_memory_write)
+        client.vector_index = self
+
+    @property
+    def is_quantized(self) -> bool:
+        """Whether search scores are approximate and need an exact re-rank."""
+        return self.index.is_quantized
+
+    def covers(self, user_id: str) -> bool:
+        """Whether searches for ``user_id`` can be answered from the index."""
+        return self._covers_all or user_id in self._covered_users
+
+    async def build(
+        self,
+        client: Any,
+        user_id: Optional[str] = None,
+        batch_size: int = 1000,
+        quantized_source: bool = False
+    ) -> int:
+        """Load embeddings from the database (one user, or everyone when ``None``).
+
+        Pages through the table ordered by id so memory stays bounded. With
+        ``quantized_source`` only the int8 ``embedding_quantized`` codes are
+        transferred (about 4x less data); rows must have been written with
+        ``embedding_storage`` set to ``float+int8`` or ``int8``.
+        Returns the number of vectors loaded.
+        """
+        loaded = 0
+        after: Optional[str] = None
+        while True:
+            rows = await self._fetch_page(client, user_id, after, batch_size, quantized_source)
+            for row in rows:
+                memory_id = self._record_key(row.get("id"))
+                values = client.row_embedding(row)
+                if values is not None:
+                    self.index.upsert(
+                        memory_id, row["user_id"], values,
+                        model=row.get("embedding_model"), version=row.get("embedding_version")
+                    )
+                    if self.store is not None:
+                        self.store.stage(
+                            memory_id, row["user_id"], values,
+                            model=row.get("embedding_model"), version=row.get("embedding_version")
+                        )
+                    loaded += 1
+                after = memory_id
+            if len(rows) < batch_size:
+                break
+
+        if user_id is None:
+            self._covers_all = True
+        else:
+            self._covered_users.add(user_id)
+        if self.store is not None:
+            self.store.flush()
+            if user_id is None:
+                self.store.mark_complete()
+        logger.info(f"Vector index built for {user_id or 'all users'}: {loaded} vectors")
+        return loaded
+
+    def load_from_store(self, store: Optional[VectorSegmentStore] = None) -> int:
+        """Cold-start the index from memory-mapped segments; returns vectors loaded.
+
+        Coverage is only claimed for all users when the store was written by
+        a full build; otherwise call ``build`` for the users you need.
+        """
+        store = store or self.store
+        if store is None:
+            return 0
+        loaded = 0
+        for info, ids, user_ids, matrix in store.iter_live():
+            self.index.bulk_upsert(ids, user_ids, matrix, model=info.model, version=info.version)
+            loaded += len(ids)
+        if store.complete:
+            self._covers_all = True
+        logger.info(f"Vector index loaded {loaded} vectors from {store.path}")
+        return loaded
+
+    async def _fetch_page(
+        self,
+        client: Any,
+        user_id: Optional[str],
+        after: Optional[str],
+        batch_size: int,
+        quantized_source: bool = False
+    ) -> List[Dict[str, Any]]:
+        vector_field = "embedding_quantized, embedding_quant_scale" if quantized_source else "embedding"
+        conditions = [f"{vector_field.split(',')[0]} != NONE", "is_archived = false"]
+        params: Dict[str, Any] = {"limit": batch_size}
+        if user_id is not None:
+            conditions.append("user_id = $user_id")
+            params["user_id"] = user_id
+        if after is not None:
+            conditions.append("id > type::thing('memory', $after)")
+            params["after"] = after
+
+        query = f"""
+        SELECT id, user_id, {vector_field}, embedding_model, embedding_version
+        FROM memory
+        WHERE {" AND ".join(conditions)}
+        ORDER BY id
+        LIMIT $limit;
+        """
+        async with client.get_connection() as conn:
+            response = await conn.query(query, params)
+            if response and isinstance(response, list):
+                if len(response) > 0 and isinstance(response[0], dict) and 'result' in response[0]:
+                    return response[0]['result'] or []
+                return response
+            return []
+
+    def on_memory_write(self, event: Any) -> None:
+        """``SurrealDBClient`` write hook: mirror the change into the index."""
+        memory = event.memory
+        if event.action == "promote":
+            # Tier changes leave the embedding and visibility unchanged
+            return
+        if memory is not None and not memory.is_archived and memory.embedding_pending:
+            # Written from a read that deferred the embedding: the stored vector is unchanged
+            return
+        if event.action == "delete" or memory is None or memory.is_archived or memory.embedding is None:
+            self.index.remove(event.memory_id)
+            if self.store is not None:
+                self.store.tombstone(event.memory_id)
+            return
+
+        self.index.upsert(
+            event.memory_id, memory.user_id, memory.embedding.to_numpy(),
+            model=memory.embedding.model, version=memory.embedding.version
+        )
+        if self.store is not None:
+            self.store.stage(
+                event.memory_id, memory.user_id, memory.embedding.to_numpy(),
+                model=memory.embedding.model, version=memory.embedding.version
+            )
+
+    def flush(self) -> None:
+        """Persist staged writes to the segment store (call periodically and at shutdown).
+
+        Writes staged since the last flush are not on disk, so a worker that
+        crashes before flushing should rebuild rather than trust the store.
+        """
+        if self.store is not None:
+            self.store.flush()
+
+    def has_partition(self, user_id: str, model: Optional[str] = None, version: Optional[str] = None) -> bool:
+        """Whether the user's vectors for this model and version are in the index."""
+        return self.index.has_partition(user_id, model, version)
+
+    def search(
+        self,
+        user_id: str,
+        query: List[float],
+        top_k: int = 10,
+        model: Optional[str] = None,
+        version: Optional[str] = None
+    ) -> List[Tuple[str, float]]:
+        """Top-k ``(memory_id, cosine)`` candidates for the user."""
+        return self.index.search(user_id, query, top_k, model=model, version=version)
+
+    @staticmethod
+    def _record_key(record_id: Any) -> str:
+        key = str(record_id)
+        return key.split(":", 1)[1] if key.startswith("memory:") else key
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = dict(self.index.get_stats())
+        stats["covered_users"] = "all" if self._covers_all else len(self._covered_users)
+        if self.store is not None:
+            stats["store"] = self.store.get_stats()
+        return stats
@@ -0,0 +1,113 @@
+"""
+MinHash signatures for near-duplicate text detection.
+
+``content_hash`` only matches byte-identical content, so a changed space or
+comma defeats it, and semantic deduplication has to wait for an embedding.
+``text_signature`` instead normalizes the text (case, punctuation,
+whitespace), takes its character shingles and summarizes them in a
+fixed-size MinHash signature. The share of equal slots between two
+signatures estimates the Jaccard similarity of their shingle sets.
+
+The signature is split into ``BANDS`` bands of ``ROWS_PER_BAND`` slots and
+each band is hashed into a key. Two texts at Jaccard similarity ``s`` share
+at least one band key with probability ``1 - (1 - s ** ROWS_PER_BAND) ** BANDS``:
+~0.9998 at 0.8 and ~0.12 at 0.3. Looking up the band keys in an index
+therefore finds near-duplicates without comparing against every memory.
+
+Signatures use one-permutation hashing: each shingle is hashed once and the
+hash picks both its slot and its value, with empty slots filled from the
+next non-empty one (densification). This keeps computing a signature linear
+in the text length, cheap enough to do on every write.
+"""
+
+import hashlib
+import re
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+SHINGLE_SIZE = 5
+NUM_SLOTS = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_SLOTS // BANDS
+
+_SLOT_BITS = 6  # log2(NUM_SLOTS)
+_VALUE_BITS = 64 - _SLOT_BITS
+# Offset added per slot hop when densifying, so borrowed values stay distinct from own values
+_DENSIFY_STEP = 1 << _VALUE_BITS
+_EMPTY = 1 << 63
+_NON_WORD = re.compile(r"[\W_]+", re.UNICODE)
+
+
+@dataclass(frozen=True)
+class TextSignature:
+    """MinHash slots of a text and the LSH band keys derived from them."""
+    slots: List[int]
+    bands: List[str]
+
+    def similarity(self, other_slots: Sequence[int]) -> float:
+        """Estimated Jaccard similarity with another signature's slots."""
+        if len(other_slots) != len(self.slots):
+            return 0.0
+        return sum(a == b for a, b in zip(self.slots, other_slots)) / len(self.slots)
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase and reduce every run of punctuation and whitespace to one space."""
+    return _NON_WORD.sub(" ", text.lower()).strip()
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> set:
+    """Character shingles of the normalized text; short texts are one shingle."""
+    normalized = normalize_text(text)
+    if len(normalized) <= size:
+        return {normalized} if normalized else set()
+    return {normalized[i:i + size] for i in range(len(normalized) - size + 1)}
+
+
+def _hash64(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "little")
+
+
+def minhash_slots(text: str) -> Optional[List[int]]:
+    """One-permutation MinHash of ``text``; None when it has no word characters."""
+    grams = shingles(text)
+    if not grams:
+        return None
+    slots = [_EMPTY] * NUM_SLOTS
+    for gram in grams:
+        h = _hash64(gram)
+        slot = h & (NUM_SLOTS - 1)
+        value = h >> _SLOT_BITS
+        if value < slots[slot]:
+            slots[slot] = value
+    # Densify: an empty slot takes the value of the next filled slot to its right
+    if _EMPTY in slots:
+        dense = list(slots)
+        for i in range(NUM_SLOTS):
+            if slots[i] != _EMPTY:
+                continue
+            hop = 1
+            while slots[(i + hop) % NUM_SLOTS] == _EMPTY:
+                hop += 1
+            dense[i] = slots[(i + hop) % NUM_SLOTS] + hop * _DENSIFY_STEP
+        slots = dense
+    # Stored as signed 64-bit integers
+    return [value - (1 << 64) if value >= _EMPTY else value for value in slots]
+
+
+def band_keys(slots: Sequence[int], scope: str = "") -> List[str]:
+    """One key per band; ``scope`` (e.g. the user id) keeps buckets of different owners apart."""
+    keys = []
+    for band in range(BANDS):
+        rows = slots[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        digest = hashlib.blake2b(f"{scope}|{band}|{','.join(map(str, rows))}".encode(), digest_size=8).hexdigest()
+        keys.append(f"{band:02d}{digest}")
+    return keys
+
+
+def text_signature(text: str, scope: str = "") -> Optional[TextSignature]:
+    """MinHash signature and band keys of ``text``; None for text without word characters."""
+    slots = minhash_slots(text or "")
+    if slots is None:
+        return None
+    return TextSignature(slots=slots, bands=band_keys(slots, scope))
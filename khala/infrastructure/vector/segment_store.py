@@ -0,0 +1,515 @@
+"""
+Memory-mapped on-disk vector segments.
+
+Rebuilding a vector index from SurrealDB means pulling every ``embedding``
+as a JSON float list. ``VectorSegmentStore`` keeps the same vectors in a
+directory of immutable binary segments that ``numpy.memmap`` can open
+without parsing. A restarted worker maps the files and serves searches
+right away, and processes on the same host share the page cache.
+
+Layout of a store directory::
+
+    manifest.json         format version, segment list, provenance, next segment number
+    seg-000001.vec        row-major matrix (float32, or int8 codes)
+    seg-000001.scale      float32 per-row scales (int8 segments only)
+    seg-000001.ids.json   [[memory_id, user_id], ...] in row order
+    tombstones.log        "<segment> <row>" lines for deleted or archived rows
+    open.lock             shared-locked by every process holding the store open
+    write.lock            exclusive-locked around flushes and compaction
+
+Each segment has a single embedding model and version. Segments are written
+once and never modified. An update appends a new row that supersedes the
+older one, and a delete or archive appends a tombstone. Compaction rewrites
+the live rows into fresh segments and drops the tombstones.
+
+Several processes may hold a store open and flush to it: each flush re-reads
+the manifest under ``write.lock``, so segment numbers are never reused.
+Compaction renumbers and deletes segments, so it needs the store to itself
+and raises ``StoreLockedError`` while another process holds it open. Locks
+use ``fcntl.flock`` and are skipped where it is unavailable.
+"""
+
+import json
+import logging
+import os
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+from khala.infrastructure.vector.ann_index import normalize_rows
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+SUPPORTED_DTYPES = ("float32", "int8")
+
+ProvenanceKey = Tuple[Optional[str], Optional[str]]
+
+
+class StoreLockedError(OSError):
+    """Raised when compaction finds the store held open by another process."""
+
+
+@dataclass
+class SegmentInfo:
+    """Manifest entry for one segment file."""
+    segment: int
+    rows: int
+    dims: int
+    dtype: str
+    model: Optional[str] = None
+    version: Optional[str] = None
+
+
+@dataclass
+class _Segment:
+    info: SegmentInfo
+    vectors: np.ndarray
+    scales: Optional[np.ndarray]
+    ids: List[str]
+    users: List[str]
+    live: np.ndarray
+    user_masks: Dict[str, np.ndarray] = field(default_factory=dict)
+
+    def user_mask(self, user_id: str) -> np.ndarray:
+        mask = self.user_masks.get(user_id)
+        if mask is None:
+            mask = np.fromiter((u == user_id for u in self.users), dtype=bool, count=len(self.users))
+            self.user_masks[user_id] = mask
+        return mask
+
+    def rows_as_float(self, rows: np.ndarray) -> np.ndarray:
+        block = np.asarray(self.vectors[rows], dtype=np.float32)
+        if self.scales is not None:
+            block *= self.scales[rows, None]
+        return block
+
+
+class VectorSegmentStore:
+    """Append-only store of memory-mapped vector segments.
+
+    Args:
+        path: Store directory (created if missing).
+        dtype: Storage type for new segments, ``"float32"`` or ``"int8"``.
+        segment_rows: Staged rows that trigger an automatic flush.
+    """
+
+    def __init__(self, path: str, dtype: str = "float32", segment_rows: int = 65536):
+        if dtype not in SUPPORTED_DTYPES:
+            raise ValueError(f"Unsupported dtype {dtype}; expected one of {SUPPORTED_DTYPES}")
+        self.path = Path(path)
+        self.dtype = dtype
+        self.segment_rows = segment_rows
+
+        self.complete = False
+        self._next_segment = 1
+        self._segments: Dict[int, _Segment] = {}
+        self._locations: Dict[str, Tuple[int, int]] = {}
+        # Staged rows grouped by provenance: {(model, version): {memory_id: (user_id, vector)}}
+        self._staged: Dict[ProvenanceKey, Dict[str, Tuple[str, np.ndarray]]] = {}
+        self._staged_owner: Dict[str, ProvenanceKey] = {}
+        self.tombstone_count = 0
+        self._open_lock: Optional[Any] = None
+
+    # ------------------------------------------------------------------
+    # Opening
+    # ------------------------------------------------------------------
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.path / "manifest.json"
+
+    @property
+    def tombstone_path(self) -> Path:
+        return self.path / "tombstones.log"
+
+    def _segment_path(self, segment: int, suffix: str) -> Path:
+        return self.path / f"seg-{segment:06d}.{suffix}"
+
+    def open(self) -> "VectorSegmentStore":
+        """Map every segment listed in the manifest and apply tombstones.
+
+        The store stays registered as open (shared ``open.lock``) until
+        ``close``, which keeps other processes from compacting it.
+        """
+        self.path.mkdir(parents=True, exist_ok=True)
+        if self._open_lock is None:
+            self._open_lock = open(self.path / "open.lock", "a")
+            if fcntl is not None:
+                fcntl.flock(self._open_lock, fcntl.LOCK_SH)
+        self._load()
+        return self
+
+    def close(self) -> None:
+        """Release the open registration; staged rows are not flushed."""
+        if self._open_lock is not None:
+            self._open_lock.close()
+            self._open_lock = None
+
+    @contextmanager
+    def _write_lock(self) -> Iterator[None]:
+        """Serialize manifest changes across processes."""
+        self.path.mkdir(parents=True, exist_ok=True)
+        with open(self.path / "write.lock", "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+    @contextmanager
+    def _sole_owner(self) -> Iterator[None]:
+        """Hold ``open.lock`` exclusively; raises ``StoreLockedError`` if another process has the store open."""
+        if fcntl is None:
+            yield
+            return
+        if self._open_lock is None:
+            self.open()
+        try:
+            fcntl.flock(self._open_lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError as e:
+            raise StoreLockedError(f"Vector store {self.path} is open in another process") from e
+        try:
+            yield
+        finally:
+            fcntl.flock(self._open_lock, fcntl.LOCK_SH)
+
+    def _read_manifest(self) -> Optional[Dict[str, Any]]:
+        if not self.manifest_path.exists():
+            return None
+        manifest = json.loads(self.manifest_path.read_text())
+        if manifest.get("format") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported vector store format: {manifest.get('format')}")
+        return manifest
+
+    def _load(self) -> None:
+        self._segments.clear()
+        self._locations.clear()
+        self.tombstone_count = 0
+
+        manifest = self._read_manifest()
+        if manifest is None:
+            return
+        self.complete = bool(manifest.get("complete", False))
+        self._next_segment = int(manifest["next_segment"])
+
+        for entry in manifest["segments"]:
+            self._map_segment(SegmentInfo(**entry))
+
+        if self.tombstone_path.exists():
+            for line in self.tombstone_path.read_text().splitlines():
+                parts = line.split()
+                if len(parts) == 2:
+                    self._apply_tombstone(int(parts[0]), int(parts[1]))
+
+    def _map_segment(self, info: SegmentInfo) -> None:
+        vectors = np.memmap(
+            self._segment_path(info.segment, "vec"), dtype=info.dtype, mode="r",
+            shape=(info.rows, info.dims)
+        )
+        scales = None
+        if info.dtype == "int8":
+            scales = np.memmap(self._segment_path(info.segment, "scale"), dtype=np.float32, mode="r",
+                               shape=(info.rows,))
+        pairs = json.loads(self._segment_path(info.segment, "ids.json").read_text())
+        segment = _Segment(
+            info=info, vectors=vectors, scales=scales,
+            ids=[p[0] for p in pairs], users=[p[1] for p in pairs],
+            live=np.ones(info.rows, dtype=bool)
+        )
+        self._segments[info.segment] = segment
+        for row, memory_id in enumerate(segment.ids):
+            # Later segments supersede earlier ones
+            previous = self._locations.get(memory_id)
+            if previous is not None:
+                self._segments[previous[0]].live[previous[1]] = False
+            self._locations[memory_id] = (info.segment, row)
+
+    def _apply_tombstone(self, segment_no: int, row: int) -> None:
+        segment = self._segments.get(segment_no)
+        # Tombstones for compacted-away segments are ignored
+        if segment is None or row >= segment.info.rows or not segment.live[row]:
+            return
+        segment.live[row] = False
+        self.tombstone_count += 1
+        memory_id = segment.ids[row]
+        if self._locations.get(memory_id) == (segment_no, row):
+            del self._locations[memory_id]
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def stage(
+        self,
+        memory_id: str,
+        user_id: str,
+        vector: Any,
+        model: Optional[str] = None,
+        version: Optional[str] = None
+    ) -> None:
+        """Queue a row for the next segment; flushes once ``segment_rows`` rows are staged."""
+        self._unstage(memory_id)
+        key = (model, version)
+        self._staged.setdefault(key, {})[memory_id] = (user_id, np.asarray(vector, dtype=np.float32))
+        self._staged_owner[memory_id] = key
+        if len(self._staged_owner) >= self.segment_rows:
+            self.flush()
+
+    def _unstage(self, memory_id: str) -> bool:
+        key = self._staged_owner.pop(memory_id, None)
+        if key is None:
+            return False
+        del self._staged[key][memory_id]
+        if not self._staged[key]:
+            del self._staged[key]
+        return True
+
+    def flush(self) -> List[SegmentInfo]:
+        """Write staged rows as new segments (one per provenance) and update the manifest."""
+        if not self._staged:
+            return []
+        with self._write_lock():
+            return self._flush_locked()
+
+    def _flush_locked(self) -> List[SegmentInfo]:
+        if not self._staged:
+            return []
+        # Another process may have flushed or compacted since this one last read the manifest
+        self._sync_with_manifest()
+
+        written = []
+        for (model, version), rows in self._staged.items():
+            ids = list(rows)
+            users = [rows[mid][0] for mid in ids]
+            matrix = np.stack([rows[mid][1] for mid in ids])
+            written.append(self._write_segment(ids, users, matrix, model, version, self.dtype))
+        self._staged.clear()
+        self._staged_owner.clear()
+
+        # Rewritten ids are superseded by their newer segment, no tombstone needed
+        self._write_manifest([s.info for s in self._segments.values()] + written)
+        for info in written:
+            self._map_segment(info)
+        return written
+
+    def _sync_with_manifest(self) -> None:
+        """Adopt the on-disk manifest's segment list and counter; call under ``write.lock``."""
+        manifest = self._read_manifest()
+        if manifest is None:
+            return
+        self._next_segment = max(self._next_segment, int(manifest["next_segment"]))
+        listed = [SegmentInfo(**entry) for entry in manifest["segments"]]
+        if {info.segment for info in listed} - set(self._segments) or set(self._segments) - {i.segment for i in listed}:
+            # Segments were added or retired elsewhere: remap from disk, keeping staged rows
+            self._load()
+
+    def append(
+        self,
+        ids: List[str],
+        user_ids: List[str],
+        vectors: np.ndarray,
+        model: Optional[str] = None,
+        version: Optional[str] = None
+    ) -> SegmentInfo:
+        """Write one segment directly from a matrix (bulk loads)."""
+        for memory_id, user_id, vector in zip(ids, user_ids, vectors):
+            self.stage(memory_id, user_id, vector, model, version)
+        written = self.flush()
+        return written[-1] if written else None
+
+    def _write_segment(
+        self,
+        ids: List[str],
+        users: List[str],
+        matrix: np.ndarray,
+        model: Optional[str],
+        version: Optional[str],
+        dtype: str
+    ) -> SegmentInfo:
+        segment_no = self._next_segment
+        self._next_segment += 1
+        matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+
+        if dtype == "int8":
+            scales = np.abs(matrix).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            codes = np.clip(np.rint(matrix / scales[:, None]), -127, 127).astype(np.int8)
+            codes.tofile(self._segment_path(segment_no, "vec"))
+            scales.astype(np.float32).tofile(self._segment_path(segment_no, "scale"))
+        else:
+            matrix.tofile(self._segment_path(segment_no, "vec"))
+
+        self._segment_path(segment_no, "ids.json").write_text(json.dumps([[m, u] for m, u in zip(ids, users)]))
+        return SegmentInfo(
+            segment=segment_no, rows=len(ids), dims=matrix.shape[1], dtype=dtype,
+            model=model, version=version
+        )
+
+    def _write_manifest(self, segments: Optional[List[SegmentInfo]] = None) -> None:
+        if segments is None:
+            segments = [s.info for s in self._segments.values()]
+        manifest = {
+            "format": FORMAT_VERSION,
+            "complete": self.complete,
+            "next_segment": self._next_segment,
+            "segments": [asdict(info) for info in sorted(segments, key=lambda i: i.segment)],
+        }
+        tmp = self.manifest_path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(manifest, indent=1))
+        os.replace(tmp, self.manifest_path)
+
+    def tombstone(self, memory_id: str) -> bool:
+        """Mark ``memory_id`` deleted (archived memories, deletes)."""
+        unstaged = self._unstage(memory_id)
+        location = self._locations.get(memory_id)
+        if location is None:
+            return unstaged
+        self._write_tombstones([location])
+        self._apply_tombstone(*location)
+        return True
+
+    def _write_tombstones(self, locations: List[Tuple[int, int]]) -> None:
+        with open(self.tombstone_path, "a") as f:
+            f.write("".join(f"{seg} {row}\n" for seg, row in locations))
+
+    def mark_complete(self, complete: bool = True) -> None:
+        """Record that the store mirrors every user's memories."""
+        with self._write_lock():
+            self._sync_with_manifest()
+            self.complete = complete
+            self._write_manifest()
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self._locations)
+
+    def __contains__(self, memory_id: str) -> bool:
+        return memory_id in self._locations
+
+    def iter_live(self) -> Iterator[Tuple[SegmentInfo, List[str], List[str], np.ndarray]]:
+        """Yield ``(info, ids, user_ids, float32 matrix)`` of live rows, one segment at a time."""
+        for segment in self._segments.values():
+            rows = np.flatnonzero(segment.live)
+            if rows.size == 0:
+                continue
+            yield (
+                segment.info,
+                [segment.ids[r] for r in rows.tolist()],
+                [segment.users[r] for r in rows.tolist()],
+                segment.rows_as_float(rows)
+            )
+
+    def search(
+        self,
+        user_id: str,
+        query: Any,
+        top_k: int = 10,
+        model: Optional[str] = None,
+        version: Optional[str] = None
+    ) -> List[Tuple[str, float]]:
+        """Exact cosine top-k over the user's live rows, read straight from the mapped files."""
+        unit = normalize_rows(np.asarray(query, dtype=np.float32))
+        candidates: List[Tuple[str, float]] = []
+        for segment in self._segments.values():
+            info = segment.info
+            if (info.model, info.version) != (model, version) or info.dims != unit.shape[0]:
+                continue
+            rows = np.flatnonzero(segment.live & segment.user_mask(user_id))
+            if rows.size == 0:
+                continue
+            scores = normalize_rows(segment.rows_as_float(rows)) @ unit
+            k = min(top_k, rows.size)
+            best = np.argpartition(-scores, k - 1)[:k]
+            candidates.extend((segment.ids[rows[i]], float(scores[i])) for i in best.tolist())
+        candidates.sort(key=lambda c: c[1], reverse=True)
+        return candidates[:top_k]
+
+    # ------------------------------------------------------------------
+    # Compaction
+    # ------------------------------------------------------------------
+
+    def compact(self, segment_rows: Optional[int] = None) -> Dict[str, int]:
+        """Rewrite live rows into fresh segments and delete the old files and tombstones.
+
+        Raises:
+            StoreLockedError: Another process has the store open.
+        """
+        with self._sole_owner(), self._write_lock():
+            # Pick up other processes' flushes and tombstones before rewriting
+            self._load()
+            self._flush_locked()
+            return self._compact_locked(segment_rows)
+
+    def _compact_locked(self, segment_rows: Optional[int]) -> Dict[str, int]:
+        segment_rows = segment_rows or self.segment_rows
+        before_segments = len(self._segments)
+        before_rows = sum(s.info.rows for s in self._segments.values())
+
+        grouped: Dict[Tuple[ProvenanceKey, str], List[Tuple[List[str], List[str], np.ndarray]]] = {}
+        for info, ids, users, matrix in self.iter_live():
+            grouped.setdefault(((info.model, info.version), info.dtype), []).append((ids, users, matrix))
+
+        new_infos: List[SegmentInfo] = []
+        for ((model, version), dtype), parts in grouped.items():
+            ids = [m for p in parts for m in p[0]]
+            users = [u for p in parts for u in p[1]]
+            matrix = np.concatenate([p[2] for p in parts], axis=0)
+            for start in range(0, len(ids), segment_rows):
+                end = start + segment_rows
+                new_infos.append(self._write_segment(
+                    ids[start:end], users[start:end], matrix[start:end], model, version, dtype
+                ))
+
+        old_segments = list(self._segments)
+        # The new manifest is the commit point; stale tombstones reference retired segment numbers
+        self._write_manifest(new_infos)
+        if self.tombstone_path.exists():
+            self.tombstone_path.unlink()
+
+        self._segments.clear()
+        for segment_no in old_segments:
+            for suffix in ("vec", "scale", "ids.json"):
+                path = self._segment_path(segment_no, suffix)
+                if path.exists():
+                    path.unlink()
+        self._load()
+
+        after_rows = sum(s.info.rows for s in self._segments.values())
+        stats = {
+            "segments_before": before_segments,
+            "segments_after": len(self._segments),
+            "rows_before": before_rows,
+            "rows_after": after_rows,
+            "reclaimed_rows": before_rows - after_rows,
+        }
+        logger.info(f"Compacted vector store {self.path}: {stats}")
+        return stats
+
+    def get_stats(self) -> Dict[str, Any]:
+        total_rows = sum(s.info.rows for s in self._segments.values())
+        total_bytes = 0
+        for segment_no in self._segments:
+            for suffix in ("vec", "scale"):
+                path = self._segment_path(segment_no, suffix)
+                if path.exists():
+                    total_bytes += path.stat().st_size
+        return {
+            "segments": len(self._segments),
+            "live_rows": len(self._locations),
+            "total_rows": total_rows,
+            "tombstones": self.tombstone_count,
+            "dead_rows": total_rows - len(self._locations),
+            "staged_rows": len(self._staged_owner),
+            "vector_bytes": total_bytes,
+            "complete": self.complete,
+        }
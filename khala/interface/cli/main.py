@@ -20,6 +20,7 @@ from ...domain.memory.services import MemoryService
 from ...domain.memory.value_objects import ImportanceScore, MemoryTier
 from ...infrastructure.cache.cache_manager import create_cache_manager
 from ...infrastructure.surrealdb.client import SurrealDBClient, SurrealConfig
+from ...infrastructure.vector.segment_store import VectorSegmentStore
 
 console = Console()
 T = TypeVar("T")
@@ -268,6 +269,36 @@ def cache_metrics(redis_url: str) -> None:
     console.print(level_table)
 
 
+@cli.command("vector-compact")
+@click.option(
+    "--path",
+    "store_path",
+    required=True,
+    type=click.Path(path_type=Path, file_okay=False, exists=True),
+    envvar="KHALA_VECTOR_STORE",
+    help="Vector segment store directory.",
+)
+@click.option(
+    "--segment-rows",
+    type=click.IntRange(1),
+    default=None,
+    help="Maximum rows per rewritten segment.",
+)
+def vector_compact(store_path: Path, segment_rows: int | None) -> None:
+    """Rewrite vector segments without tombstoned rows."""
+
+    store = VectorSegmentStore(str(store_path))
+    try:
+        # Refuses (StoreLockedError) while a worker has the store open
+        stats = store.open().compact(segment_rows=segment_rows)
+    except (OSError, ValueError) as exc:
+        raise click.ClickException(str(exc)) from exc
+    finally:
+        store.close()
+
+    console.print(_format_dict_table("Vector Store Compaction", stats))
+
+
 async def _surreal_health_check(
     url: str,
     namespace: str,
@@ -105,6 +105,8 @@ async def get_metrics() -> Dict[str, Any]:
 
     try:
         status = await state.tools.get_system_status()
+        if state.db_client:
+            status["database_pool"] = state.db_client.pool_stats()
         return status
     except Exception as e:
         logger.error(f"Metrics collection failed: {e}")
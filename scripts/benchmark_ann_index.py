@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+ANN index benchmark for Khala.
+
+Measures recall@k and query latency of the in-process IVF ``ANNIndex``
+against an exact brute-force cosine scan over the same float32 matrix (the
+work ``search_memories_by_vector`` asks SurrealDB to do for every query).
+Data is drawn from Gaussian clusters on the unit sphere so that neighbours
+are meaningful, and queries are perturbed copies of stored vectors.
+
+Memory: the index holds ``n * dims * 4`` bytes of vectors (about 2.9 GB for
+1M x 768); use ``--dims`` to scale down on small machines.
+
+Usage:
+    python scripts/benchmark_ann_index.py --sizes 10000 100000 1000000 --dims 768 --queries 200
+"""
+
+import argparse
+import os
+import sys
+import time
+from typing import List, Tuple
+
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from khala.infrastructure.vector.ann_index import ANNIndex, normalize_rows
+
+
+def make_dataset(n: int, dims: int, clusters: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = normalize_rows(rng.standard_normal((clusters, dims)))
+    data = np.empty((n, dims), dtype=np.float32)
+    chunk = 100_000
+    for start in range(0, n, chunk):
+        size = min(chunk, n - start)
+        assign = rng.integers(0, clusters, size=size)
+        noise = rng.standard_normal((size, dims)).astype(np.float32) * (0.6 / np.sqrt(dims))
+        data[start:start + size] = normalize_rows(centers[assign] + noise)
+    return data
+
+
+def exact_top_k(data: np.ndarray, query: np.ndarray, k: int) -> np.ndarray:
+    scores = data @ query
+    best = np.argpartition(-scores, k - 1)[:k]
+    return best[np.argsort(-scores[best])]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    return float(np.percentile(np.asarray(values), pct))
+
+
+def run(n: int, dims: int, queries: int, k: int, nprobes: List[int], seed: int) -> List[Tuple]:
+    data = make_dataset(n, dims, clusters=max(16, n // 500), seed=seed)
+    ids = [str(i) for i in range(n)]
+
+    index = ANNIndex(train_threshold=min(4096, n))
+    start = time.perf_counter()
+    for i in range(n):
+        index.upsert(ids[i], "bench_user", data[i])
+    build_s = time.perf_counter() - start
+
+    rng = np.random.default_rng(seed + 1)
+    picks = rng.choice(n, size=queries, replace=False)
+    noise = rng.standard_normal((queries, dims)).astype(np.float32) * (0.3 / np.sqrt(dims))
+    query_matrix = normalize_rows(data[picks] + noise)
+
+    exact_ms, truth = [], []
+    for q in query_matrix:
+        t0 = time.perf_counter()
+        truth.append(set(exact_top_k(data, q, k).tolist()))
+        exact_ms.append((time.perf_counter() - t0) * 1000)
+
+    rows = [(n, "exact", "-", 1.0, percentile(exact_ms, 50), percentile(exact_ms, 95), 0.0)]
+    for nprobe in nprobes:
+        latencies, hits = [], 0
+        for q, expected in zip(query_matrix, truth):
+            t0 = time.perf_counter()
+            found = index.search("bench_user", q, top_k=k, nprobe=nprobe)
+            latencies.append((time.perf_counter() - t0) * 1000)
+            hits += len(expected & {int(mid) for mid, _ in found})
+        recall = hits / (queries * k)
+        rows.append((n, "ivf", nprobe, recall, percentile(latencies, 50), percentile(latencies, 95), build_s))
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark ANN index recall and latency")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--dims", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 8, 16, 32])
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"{'vectors':>10} {'method':>7} {'nprobe':>7} {'recall@k':>9} {'p50_ms':>9} {'p95_ms':>9} {'build_s':>9}")
+    for n in args.sizes:
+        for n_, method, nprobe, recall, p50, p95, build_s in run(
+            n, args.dims, args.queries, args.k, args.nprobe, args.seed
+        ):
+            print(f"{n_:>10} {method:>7} {nprobe!s:>7} {recall:>9.3f} {p50:>9.3f} {p95:>9.3f} {build_s:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
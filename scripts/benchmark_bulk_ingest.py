@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Bulk ingest throughput benchmark for Khala.
+
+Writes N memories through ``SurrealDBMemoryRepository`` twice: once with
+per-memory ``create`` (a memory round trip plus an audit round trip per
+item), and once with ``create_bulk`` (a hash lookup, one memory ``INSERT``
+and one audit ``INSERT`` per batch). By default it runs against an
+in-memory stand-in that charges ``--rtt-ms`` per round trip plus
+``--row-us`` per row. Pass ``--surreal`` to use the database configured by
+the SURREAL_* environment variables instead.
+
+The per-memory path is timed on at most ``--sequential-sample`` memories
+and reported as items/s.
+
+Usage:
+    python scripts/benchmark_bulk_ingest.py --sizes 1000 100000 --batch-size 500 --rtt-ms 1.0
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from khala.domain.memory.entities import Memory, MemoryTier
+from khala.domain.memory.value_objects import ImportanceScore
+from khala.infrastructure.persistence.surrealdb_repository import SurrealDBMemoryRepository
+from khala.infrastructure.surrealdb.client import SurrealConfig, SurrealDBClient
+
+
+class InMemorySurreal:
+    """Stand-in connection for the statements used by create / create_bulk."""
+
+    def __init__(self, rtt_ms: float, row_us: float):
+        self.rtt = rtt_ms / 1000.0
+        self.row_cost = row_us / 1_000_000.0
+        self.memories: Dict[str, Dict[str, Any]] = {}
+        self.hashes: Dict[str, str] = {}
+        self.audit = 0
+        self.round_trips = 0
+
+    async def query(self, sql: str, params: Optional[Dict[str, Any]] = None):
+        params = params or {}
+        self.round_trips += 1
+        rows = 1
+        result: Any = []
+        if "content_hash INSIDE" in sql:
+            result = [{"id": f"memory:{self.hashes[h]}", "content_hash": h}
+                      for h in params["hashes"] if h in self.hashes]
+        elif sql.startswith("INSERT INTO memory"):
+            rows = len(params["rows"])
+            for row in params["rows"]:
+                self._put(row["id"], row)
+            result = params["rows"]
+        elif sql.startswith("INSERT INTO audit_log"):
+            rows = len(params["rows"])
+            self.audit += rows
+        elif "CREATE type::thing('memory'" in sql:
+            if params["content_data"]["content_hash"] in self.hashes:
+                raise RuntimeError("Database index `content_hash_index` already contains this value; already exists")
+            self._put(params["id"], params["content_data"])
+        elif "CREATE type::thing('audit_log'" in sql:
+            self.audit += 1
+        elif "WHERE content_hash = $hash" in sql:
+            found = self.hashes.get(params["hash"])
+            result = [{"id": f"memory:{found}"}] if found else []
+        elif sql.lstrip().startswith("UPDATE"):
+            for key in params:
+                if key.startswith("id_"):
+                    self.memories[params[key]].update(params[f"data_{key[3:]}"])
+                    rows += 1
+            if "content_data" in params:
+                self.memories[params["id"]].update(params["content_data"])
+        await asyncio.sleep(self.rtt + rows * self.row_cost)
+        return [{"status": "OK", "result": result}]
+
+    def _put(self, memory_id: str, data: Dict[str, Any]) -> None:
+        self.memories[memory_id] = data
+        self.hashes[data["content_hash"]] = memory_id
+
+
+def make_client(args) -> SurrealDBClient:
+    if args.surreal:
+        return SurrealDBClient(SurrealConfig.from_env())
+    client = SurrealDBClient(SurrealConfig(url="ws://stand-in", namespace="bench", database="bench", token="t"))
+    conn = InMemorySurreal(args.rtt_ms, args.row_us)
+
+    @asynccontextmanager
+    async def connection():
+        yield conn
+
+    client.get_connection = connection
+    client.stand_in = conn
+    return client
+
+
+def make_memories(n: int, duplicate_every: int) -> List[Memory]:
+    memories = []
+    for i in range(n):
+        key = i - 1 if duplicate_every and i % duplicate_every == 0 and i else i
+        memories.append(Memory(
+            user_id="bench",
+            content=f"transcript line {key}: the agent called a tool and recorded the outcome",
+            tier=MemoryTier.WORKING,
+            importance=ImportanceScore(0.5),
+        ))
+    return memories
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark bulk memory ingest")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000])
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--rtt-ms", type=float, default=1.0, help="Stand-in round trip latency")
+    parser.add_argument("--row-us", type=float, default=5.0, help="Stand-in per-row write cost")
+    parser.add_argument("--duplicate-every", type=int, default=50, help="Every Nth memory repeats the previous one")
+    parser.add_argument("--sequential-sample", type=int, default=1000)
+    parser.add_argument("--surreal", action="store_true", help="Use SURREAL_* env config instead of the stand-in")
+    args = parser.parse_args()
+
+    print(f"{'memories':>10} {'path':>10} {'items/s':>10} {'seconds':>9} {'round_trips':>12} {'failed':>7}")
+    for size in args.sizes:
+        sample = min(size, args.sequential_sample)
+        client = make_client(args)
+        repo = SurrealDBMemoryRepository(client)
+        memories = make_memories(sample, args.duplicate_every)
+        start = time.perf_counter()
+        failed = 0
+        for memory in memories:
+            try:
+                await repo.create(memory)
+            except Exception:
+                failed += 1
+        elapsed = time.perf_counter() - start
+        trips = 0 if args.surreal else client.stand_in.round_trips
+        print(f"{size:>10} {'per-item':>10} {sample / elapsed:>10.0f} {elapsed:>9.2f} {trips:>12} {failed:>7}"
+              + ("" if sample == size else f"   (sampled {sample})"))
+
+        client = make_client(args)
+        repo = SurrealDBMemoryRepository(client)
+        memories = make_memories(size, args.duplicate_every)
+        start = time.perf_counter()
+        results = await repo.create_bulk(memories, batch_size=args.batch_size)
+        elapsed = time.perf_counter() - start
+        trips = 0 if args.surreal else client.stand_in.round_trips
+        failed = sum(1 for r in results if not r.ok)
+        print(f"{size:>10} {'bulk':>10} {size / elapsed:>10.0f} {elapsed:>9.2f} {trips:>12} {failed:>7}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
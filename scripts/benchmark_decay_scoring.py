@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Decay scoring benchmark for Khala.
+
+Times the per-memory lifecycle checks (``DecayScore.calculate``,
+``TemporalAnalysisService.calculate_decay_score`` / ``should_promote`` /
+``should_archive``) on a sample of ``Memory`` objects against the columnar
+scorers (``LifecycleRules.score_batch`` and ``TemporalDecayPolicy.score_batch``)
+over ``MemoryColumns`` chunks, and reports memories scored per minute on one
+core. Building columns from stored rows is timed separately, since it is
+bounded by the driver rather than the scorer.
+
+Usage:
+    python scripts/benchmark_decay_scoring.py --memories 5000000 --chunk 50000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from khala.application.services.temporal_analyzer import TemporalAnalysisService, TemporalDecayPolicy
+from khala.domain.memory.entities import Memory, MemoryTier
+from khala.domain.memory.lifecycle import TIER_CODES, LifecycleRules, MemoryColumns
+from khala.domain.memory.value_objects import ImportanceScore
+from khala.infrastructure.surrealdb.client import SurrealConfig, SurrealDBClient
+
+
+def make_columns(n: int, now: datetime, rng: np.random.Generator) -> MemoryColumns:
+    created = now.timestamp() - rng.exponential(30 * 86400.0, n)
+    tiers = np.array([TIER_CODES[t] for t in (MemoryTier.WORKING, MemoryTier.SHORT_TERM, MemoryTier.LONG_TERM)],
+                     dtype=np.int8)
+    return MemoryColumns(
+        ids=[""] * n,
+        user_ids=[""] * n,
+        tier=rng.choice(tiers, n),
+        importance=rng.uniform(0.0, 1.0, n),
+        created_at=created,
+        accessed_at=created + rng.uniform(0, 86400.0, n),
+        access_count=rng.poisson(2.0, n).astype(np.int64),
+        verification_score=rng.uniform(0.0, 1.0, n),
+        is_archived=np.zeros(n, dtype=bool),
+    )
+
+
+def make_memories(n: int, now: datetime, seed: int):
+    rng = random.Random(seed)
+    tiers = [MemoryTier.WORKING, MemoryTier.SHORT_TERM, MemoryTier.LONG_TERM]
+    memories = []
+    for _ in range(n):
+        created = now - timedelta(seconds=rng.expovariate(1 / (30 * 86400.0)))
+        memories.append(Memory(
+            user_id="bench", content="x", tier=rng.choice(tiers), importance=ImportanceScore(rng.random()),
+            created_at=created, accessed_at=created, access_count=rng.randint(0, 6),
+            verification_score=rng.random(),
+        ))
+    return memories
+
+
+def per_minute(count: int, seconds: float) -> str:
+    return f"{count / seconds * 60 / 1e6:.1f}M"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark per-memory vs columnar decay scoring")
+    parser.add_argument("--memories", type=int, default=5_000_000, help="Memories scored by the columnar scorers")
+    parser.add_argument("--chunk", type=int, default=50_000, help="Memories per scored chunk")
+    parser.add_argument("--sample", type=int, default=20_000, help="Memories scored by the per-memory checks")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    now = datetime.now(timezone.utc)
+    rng = np.random.default_rng(args.seed)
+    client = SurrealDBClient(SurrealConfig(url="ws://stand-in", namespace="bench", database="bench", token="t"))
+    temporal = TemporalAnalysisService(db_client=client)
+    rules = LifecycleRules()
+    policy = TemporalDecayPolicy()
+
+    memories = make_memories(args.sample, now, args.seed)
+    start = time.perf_counter()
+    for memory in memories:
+        memory.calculate_decay_score()
+        memory.should_promote_to_next_tier()
+        memory.should_archive()
+    entity_lifecycle = time.perf_counter() - start
+    start = time.perf_counter()
+    for memory in memories:
+        temporal.calculate_decay_score(memory)
+        temporal.should_promote(memory)
+        temporal.should_archive(memory)
+    entity_temporal = time.perf_counter() - start
+
+    chunks = [make_columns(args.chunk, now, rng) for _ in range(max(1, args.memories // args.chunk))]
+    scored = sum(len(c) for c in chunks)
+    start = time.perf_counter()
+    for columns in chunks:
+        rules.score_batch(columns, now)
+    batch_lifecycle = time.perf_counter() - start
+    start = time.perf_counter()
+    for columns in chunks:
+        policy.score_batch(columns, now)
+    batch_temporal = time.perf_counter() - start
+
+    rows = []
+    for memory in memories:
+        row = {k: v for k, v in client._serialize_memory(memory).items() if k in MemoryColumns.FIELDS}
+        row["id"] = f"memory:{memory.id}"
+        rows.append(row)
+    start = time.perf_counter()
+    MemoryColumns.from_rows(rows, parse_time=client._parse_dt)
+    from_rows = time.perf_counter() - start
+
+    print(f"per-memory sample={args.sample} columnar memories={scored} chunk={args.chunk}")
+    print(f"{'rules':>10} {'per-memory/min':>15} {'columnar/min':>13} {'speedup':>8}")
+    for label, entity, batch in (("lifecycle", entity_lifecycle, batch_lifecycle),
+                                 ("temporal", entity_temporal, batch_temporal)):
+        speedup = (batch and (entity / args.sample) / (batch / scored)) or float("inf")
+        print(f"{label:>10} {per_minute(args.sample, entity):>15} {per_minute(scored, batch):>13} {speedup:>7.0f}x")
+    print(f"MemoryColumns.from_rows: {per_minute(len(rows), from_rows)} rows/min")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Memory deserialization benchmark for Khala.
+
+Builds N stored memory rows (as ``_serialize_memory`` writes them) and times
+``SurrealDBClient._deserialize_memories`` with validated reads
+(``trusted_reads=False``: every embedding element is type- and
+range-checked, values stay a list of Python floats) and with trusted reads
+(read-only float32 buffers, cached ISO timestamp parsing). It also times a
+follow-up pass that needs the vectors as arrays (``to_numpy`` plus a dot
+product per memory), which copies each list in the validated mode, and
+reports the bytes the embeddings hold once the driver's rows are dropped.
+
+Usage:
+    python scripts/benchmark_deserialize.py --rows 100000 --dims 768
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from khala.domain.memory.entities import Memory, MemoryTier
+from khala.domain.memory.value_objects import EmbeddingVector, ImportanceScore
+from khala.infrastructure.surrealdb.client import SurrealConfig, SurrealDBClient, parse_iso_utc
+
+
+def make_rows(client: SurrealDBClient, n: int, dims: int, seed: int):
+    rng = random.Random(seed)
+    np_rng = np.random.default_rng(seed)
+    base = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    template = Memory(user_id="bench", content="x", tier=MemoryTier.WORKING, importance=ImportanceScore(0.5),
+                      embedding=EmbeddingVector([0.0] * dims, model="bench", version="1"))
+    row = client._serialize_memory(template)
+    vectors = np_rng.uniform(-1, 1, size=(n, dims))
+    rows = []
+    for i in range(n):
+        # Ingest batches share timestamps, as bulk writes do
+        stamp = (base + timedelta(seconds=rng.randint(0, n // 50))).isoformat()
+        rows.append(dict(
+            row, id=f"memory:m{i}", content=f"memory {i} recorded by the agent",
+            embedding=vectors[i].tolist(), created_at=stamp, updated_at=stamp, accessed_at=stamp,
+        ))
+    return rows
+
+
+def embedding_bytes(memory: Memory) -> int:
+    """Bytes the embedding keeps alive once the driver's rows are dropped."""
+    values = memory.embedding.values
+    if isinstance(values, np.ndarray):
+        return values.nbytes
+    # List slots plus one float object per element
+    return sys.getsizeof(values) + len(values) * sys.getsizeof(0.5)
+
+
+def run(client: SurrealDBClient, rows, query: np.ndarray):
+    parse_iso_utc.cache_clear()
+    start = time.perf_counter()
+    memories = client._deserialize_memories(rows)
+    decode = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for memory in memories:
+        float(memory.embedding.to_numpy() @ query)
+    math = time.perf_counter() - start
+    return decode, math, sum(embedding_bytes(m) for m in memories)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark memory row deserialization")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--dims", type=int, default=768)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    config = dict(url="ws://stand-in", namespace="bench", database="bench", token="t")
+    validated = SurrealDBClient(SurrealConfig(trusted_reads=False, **config))
+    trusted = SurrealDBClient(SurrealConfig(trusted_reads=True, **config))
+    rows = make_rows(trusted, args.rows, args.dims, args.seed)
+    query = np.random.default_rng(args.seed).uniform(-1, 1, args.dims).astype(np.float32)
+
+    print(f"rows={args.rows} dims={args.dims}")
+    print(f"{'mode':>10} {'decode_s':>9} {'rows/s':>10} {'to_numpy+dot_s':>15} {'embeddings_MB':>14}")
+    for label, client in (("validated", validated), ("trusted", trusted)):
+        decode, math, held = run(client, rows, query)
+        print(f"{label:>10} {decode:>9.2f} {args.rows / decode:>10.0f} {math:>15.2f} {held / 2 ** 20:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
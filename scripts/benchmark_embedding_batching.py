@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Embedding micro-batching benchmark for Khala.
+
+Drives ``LocalEmbedding`` with a stub model whose ``encode`` costs a fixed
+per-call overhead plus a small per-text cost (the shape of a GPU forward
+pass or an embeddings API round trip). The same workload of concurrent
+single-text requests runs against the per-call path and against
+``BatchingEmbeddingService``; throughput and p50/p99 latency are reported.
+
+Usage:
+    python scripts/benchmark_embedding_batching.py --concurrency 64 --requests 2000 --overhead-ms 8 --per-item-ms 0.2
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from typing import List
+
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from khala.infrastructure.embeddings.batching_embedding import BatchingEmbeddingService
+from khala.infrastructure.embeddings.local_embedding import LocalEmbedding
+
+
+class StubModel:
+    """Stands in for SentenceTransformer.encode with a fixed cost model."""
+
+    def __init__(self, dims: int, overhead_ms: float, per_item_ms: float):
+        self.dims = dims
+        self.overhead_ms = overhead_ms
+        self.per_item_ms = per_item_ms
+        self.calls = 0
+
+    def encode(self, texts):
+        single = isinstance(texts, str)
+        batch = [texts] if single else list(texts)
+        self.calls += 1
+        time.sleep((self.overhead_ms + self.per_item_ms * len(batch)) / 1000.0)
+        vectors = np.full((len(batch), self.dims), 0.01, dtype=np.float32)
+        return vectors[0] if single else vectors
+
+
+def make_local_embedding(model: StubModel) -> LocalEmbedding:
+    # Bypass __init__ so no real sentence-transformers model is loaded
+    service = LocalEmbedding.__new__(LocalEmbedding)
+    service.model_name = "stub"
+    service.model = model
+    return service
+
+
+async def run(service, concurrency: int, requests: int, vocabulary: List[str], seed: int):
+    rng = random.Random(seed)
+    latencies: List[float] = []
+    per_worker = requests // concurrency
+
+    async def worker() -> None:
+        for _ in range(per_worker):
+            text = rng.choice(vocabulary)
+            t0 = time.perf_counter()
+            await service.get_embedding(text)
+            latencies.append((time.perf_counter() - t0) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return len(latencies) / elapsed, np.percentile(latencies, 50), np.percentile(latencies, 99)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark embedding micro-batching")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--vocabulary", type=int, default=5000, help="Distinct texts (smaller = more duplicates)")
+    parser.add_argument("--dims", type=int, default=384)
+    parser.add_argument("--overhead-ms", type=float, default=8.0)
+    parser.add_argument("--per-item-ms", type=float, default=0.2)
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    vocabulary = [f"query text {i}" for i in range(args.vocabulary)]
+
+    direct_model = StubModel(args.dims, args.overhead_ms, args.per_item_ms)
+    direct = make_local_embedding(direct_model)
+
+    batched_model = StubModel(args.dims, args.overhead_ms, args.per_item_ms)
+    batched = BatchingEmbeddingService(
+        make_local_embedding(batched_model), max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms
+    )
+
+    print(f"{'path':>10} {'req/s':>10} {'p50_ms':>10} {'p99_ms':>10} {'model_calls':>12}")
+    for name, service, model in (("per-call", direct, direct_model), ("batched", batched, batched_model)):
+        throughput, p50, p99 = await run(service, args.concurrency, args.requests, vocabulary, args.seed)
+        print(f"{name:>10} {throughput:>10.0f} {p50:>10.2f} {p99:>10.2f} {model.calls:>12}")
+
+    stats = batched.get_stats()
+    print(f"\nbatched: avg batch {stats['avg_batch_size']:.1f}, deduplicated {stats['deduplicated']}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
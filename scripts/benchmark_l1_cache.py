@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+L1 cache micro-benchmark for Khala.
+
+Compares the O(1) OrderedDict/heap ``L1MemoryCache`` against the previous
+list-based LRU (reproduced below as ``ListLRUCache``) at several cache sizes.
+For each size the cache is filled, then timed on a mix of hits and inserts
+that force evictions.
+
+Usage:
+    python scripts/benchmark_l1_cache.py --sizes 1000 10000 100000 --ops 20000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from khala.infrastructure.cache.cache_manager import CacheableItem, L1MemoryCache
+
+
+class ListLRUCache:
+    """Previous L1 algorithm: recency kept in a Python list (O(n) per access)."""
+
+    def __init__(self, max_items: int, ttl_seconds: int = 300):
+        self.max_items = max_items
+        self.ttl_seconds = ttl_seconds
+        self.cache: Dict[str, CacheableItem] = {}
+        self.access_order: List[str] = []
+
+    async def get(self, key: str) -> Optional[Any]:
+        item = self.cache.get(key)
+        if item is None:
+            return None
+        self._record_access(key)
+        return item.value
+
+    async def put(self, key: str, value: Any, ttl_seconds: Optional[int] = None) -> bool:
+        if key in self.cache:
+            self.access_order.remove(key)
+            del self.cache[key]
+        if len(self.cache) >= self.max_items:
+            oldest = self.access_order.pop(0)
+            del self.cache[oldest]
+        self.cache[key] = CacheableItem(key, value)
+        self._record_access(key)
+        return True
+
+    def _record_access(self, key: str) -> None:
+        self.cache[key].touch()
+        if key in self.access_order:
+            self.access_order.remove(key)
+        self.access_order.append(key)
+
+
+async def run_workload(cache: Any, size: int, ops: int, seed: int) -> float:
+    """Fill ``cache`` with ``size`` keys, then time ``ops`` mixed operations (80% hits)."""
+    rng = random.Random(seed)
+    for i in range(size):
+        await cache.put(f"key:{i}", i)
+
+    next_key = size
+    start = time.perf_counter()
+    for _ in range(ops):
+        if rng.random() < 0.8:
+            await cache.get(f"key:{rng.randrange(next_key - size, next_key)}")
+        else:
+            await cache.put(f"key:{next_key}", next_key)
+            next_key += 1
+    return time.perf_counter() - start
+
+
+def make_l1(size: int) -> L1MemoryCache:
+    """Build an L1 cache whose byte budget holds roughly ``size`` small items."""
+    probe = CacheableItem(f"key:{size * 10}", size * 10)
+    budget_mb = max(1, (probe.size_bytes * size) // (1024 * 1024) + 1)
+    cache = L1MemoryCache(max_memory_mb=budget_mb, ttl_seconds=300)
+    cache.max_memory_bytes = probe.size_bytes * size
+    return cache
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark L1 cache implementations")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--ops", type=int, default=20_000, help="Timed operations per size")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"{'entries':>10} {'impl':>10} {'total_s':>10} {'us/op':>10}")
+    for size in args.sizes:
+        for name, cache in (("list", ListLRUCache(size)), ("ordered", make_l1(size))):
+            elapsed = await run_workload(cache, size, args.ops, args.seed)
+            print(f"{size:>10} {name:>10} {elapsed:>10.3f} {elapsed / args.ops * 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Quantized embedding benchmark for Khala.
+
+Reports storage size and recall@k of int8 and product-quantized (PQ) codes
+against exact float32 cosine search on a synthetic clustered corpus. As in
+the IVF partitions of ``ANNIndex``, codes hold each vector's residual from a
+coarse spherical k-means centroid; every list is scanned so the numbers
+isolate quantization loss from IVF probing loss. Each codec is measured
+twice: ranking directly on code scores, and shortlisting ``rerank`` x k
+candidates on codes and then re-ranking them on the exact float vectors
+(what ``SurrealDBClient`` does with a quantized ANN index).
+
+Usage:
+    python scripts/benchmark_quantization.py --vectors 100000 --dims 768 --queries 200
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from khala.infrastructure.vector.ann_index import normalize_rows, spherical_kmeans
+from khala.infrastructure.vector.quantization import make_codec
+
+
+def make_corpus(n: int, dims: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = normalize_rows(rng.standard_normal((max(16, n // 500), dims)))
+    assign = rng.integers(0, centers.shape[0], size=n)
+    noise = rng.standard_normal((n, dims)).astype(np.float32) * (0.6 / np.sqrt(dims))
+    return normalize_rows(centers[assign] + noise)
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    best = np.argpartition(-scores, k - 1)[:k]
+    return best[np.argsort(-scores[best])]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark quantized embedding recall")
+    parser.add_argument("--vectors", type=int, default=100_000)
+    parser.add_argument("--dims", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--rerank", type=int, default=4, help="Shortlist size as a multiple of k")
+    parser.add_argument("--coarse", type=int, default=256, help="Coarse centroids for residual encoding")
+    parser.add_argument("--pq-subvector-dims", type=int, nargs="+", default=[4, 8])
+    parser.add_argument("--train-sample", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    data = make_corpus(args.vectors, args.dims, args.seed)
+    rng = np.random.default_rng(args.seed + 1)
+    picks = rng.choice(args.vectors, size=args.queries, replace=False)
+    queries = normalize_rows(data[picks] + rng.standard_normal((args.queries, args.dims)).astype(np.float32)
+                             * (0.3 / np.sqrt(args.dims)))
+    truth = [set(top_k(data @ q, args.k).tolist()) for q in queries]
+    centroids = spherical_kmeans(data, args.coarse, seed=args.seed)
+    assign = np.argmax(data @ centroids.T, axis=1)
+    residuals = data - centroids[assign]
+    sample = residuals[rng.choice(args.vectors, size=min(args.train_sample, args.vectors), replace=False)]
+
+    configs = [("float32", {}), ("int8", {})] + [("pq", {"subvector_dims": d}) for d in args.pq_subvector_dims]
+    float_bytes = data.nbytes
+
+    print(f"{'codec':>12} {'bytes/vec':>10} {'ratio':>7} {'fit_s':>7} {'recall':>8} {'rerank':>8} {'ms/q':>8}")
+    for name, options in configs:
+        codec = make_codec(name, args.dims, **options)
+        t0 = time.perf_counter()
+        codec.fit(sample)
+        codes = codec.encode(data if name == "float32" else residuals)
+        fit_s = time.perf_counter() - t0
+
+        direct_hits = rerank_hits = 0
+        t0 = time.perf_counter()
+        for q, expected in zip(queries, truth):
+            scores = codec.score(codes, q)
+            if name != "float32":
+                scores = scores + (centroids @ q)[assign]
+            direct_hits += len(expected & set(top_k(scores, args.k).tolist()))
+            shortlist = top_k(scores, args.k * args.rerank)
+            exact = data[shortlist] @ q
+            rerank_hits += len(expected & set(shortlist[top_k(exact, args.k)].tolist()))
+        ms_per_query = (time.perf_counter() - t0) * 1000 / args.queries
+
+        label = name if name != "pq" else f"pq/{options['subvector_dims']}"
+        total = args.queries * args.k
+        print(
+            f"{label:>12} {codes.nbytes // args.vectors:>10} {float_bytes / codes.nbytes:>6.1f}x "
+            f"{fit_s:>7.1f} {direct_hits / total:>8.3f} {rerank_hits / total:>8.3f} {ms_per_query:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Hybrid search fusion benchmark for Khala.
+
+Builds the candidate lists that ``HybridSearchService.search`` sees with
+``expand_query=True``: one vector list and one BM25 list of ``2 * top_k``
+results per expanded query. It then times, per query:
+
+- the previous dict/loop RRF and reranking, with all-pairs proximity;
+- ``RankFusion`` on plain lists (the small-candidate path);
+- ``RankFusion`` on NumPy arrays.
+
+For the vectorized path, it also times the full rerank (RRF fuse, boosts
+with term proximity, and ordering), plus the RRF fuse, the boosts without
+proximity and the batched proximity pass on their own. It then compares
+the full rerank's p50 with TARGET_MS. Proximity has to read each
+candidate's content, so it scales with total text length rather than
+candidate count.
+
+Usage:
+    python scripts/benchmark_rank_fusion.py --top-k 150 --expansions 4 --queries 50
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from khala.application.services.rank_fusion import ProximityScorer, RankFusion
+from khala.domain.memory.entities import Memory, MemoryTier
+from khala.domain.memory.value_objects import ImportanceScore
+
+NOW = datetime(2025, 1, 1, tzinfo=timezone.utc)
+VOCABULARY = [f"word{i}" for i in range(2000)]
+# Latency goal for reranking 1,000+ candidates, proximity included
+TARGET_MS = 1.0
+
+
+def make_pool(size: int, words: int, rng: random.Random) -> List[Memory]:
+    return [
+        Memory(
+            id=f"memory:m{i}",
+            user_id="bench",
+            content=" ".join(rng.choice(VOCABULARY) for _ in range(words)),
+            tier=MemoryTier.WORKING,
+            importance=ImportanceScore(0.5),
+            created_at=NOW - timedelta(seconds=rng.randint(0, 200000)),
+            episode_id=f"ep{rng.randint(0, 20)}",
+        )
+        for i in range(size)
+    ]
+
+
+def legacy_proximity(content: str, query_terms: List[str], window_size: int = 10) -> float:
+    text = content.lower()
+    terms = [t.lower() for t in query_terms if len(t) > 2]
+    positions = [p for p in ([m.start() for m in re.finditer(re.escape(t), text)] for t in terms) if p]
+    if len(positions) < 2:
+        return 0.0
+    min_dist = min(abs(a - b) for i in range(len(positions)) for j in range(i + 1, len(positions))
+                   for a in positions[i] for b in positions[j])
+    word_dist = min_dist / 6.0
+    return 0.3 * (1.0 - word_dist / window_size) if word_dist <= window_size else 0.0
+
+
+def legacy_fusion(vector_results, bm25_results, query_terms, context, connected, rrf_k=60):
+    scores: Dict[str, float] = {}
+    memories: Dict[str, Memory] = {}
+    for results in (vector_results, bm25_results):
+        seen = set()
+        unique = [m for m in results if not (m.id in seen or seen.add(m.id))]
+        for rank, m in enumerate(unique):
+            memories[m.id] = m
+            scores[m.id] = scores.get(m.id, 0.0) + 1.0 / (rrf_k + rank + 1)
+    final = [memories[i] for i in sorted(scores, key=lambda x: scores[x], reverse=True)]
+    boosts = [0.0] * len(final)
+    for i, m in enumerate(final):
+        age = (context["current_time"] - m.created_at).total_seconds()
+        boosts[i] += 0.2 if age < 3600 else 0.1 if age < 86400 else 0.0
+        if m.episode_id == context["episode_id"]:
+            boosts[i] += 0.15
+        boosts[i] += legacy_proximity(m.content, query_terms)
+    anchor_episode = final[0].episode_id
+    for i, m in enumerate(final):
+        if m.episode_id == anchor_episode:
+            boosts[i] += 0.15
+        if m.id.split(":")[1] in connected:
+            boosts[i] += 0.10
+    return [m for m, _ in sorted(zip(final, boosts), key=lambda x: x[1], reverse=True)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark hybrid search rank fusion")
+    parser.add_argument("--top-k", type=int, default=150)
+    parser.add_argument("--expansions", type=int, default=4, help="Expanded queries per search")
+    parser.add_argument("--pool", type=int, default=20000, help="Distinct memories to draw candidates from")
+    parser.add_argument("--words", type=int, default=30, help="Words of content per memory")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    pool = make_pool(args.pool, args.words, rng)
+    candidate_k = args.top_k * 2
+    workloads = []
+    for _ in range(args.queries):
+        vector_results, bm25_results = [], []
+        for _ in range(args.expansions):
+            vector_results.extend(rng.sample(pool, candidate_k))
+            bm25_results.extend(rng.sample(pool, candidate_k))
+        workloads.append((vector_results, bm25_results, [rng.choice(VOCABULARY) for _ in range(3)]))
+    context = {"current_time": NOW, "episode_id": "ep3"}
+    connected = {f"m{i}" for i in rng.sample(range(args.pool), 50)}
+
+    timings: Dict[str, List[float]] = {
+        key: [] for key in ("legacy", "scalar", "full", "fuse", "rerank", "proximity")
+    }
+    candidate_counts = []
+    scalar = RankFusion(vectorize_min_candidates=10 ** 9)
+    vectorized = RankFusion()
+
+    def run_all(fusion: RankFusion, vector_results, bm25_results, terms) -> None:
+        fused = fusion.fuse([(vector_results, 1.0), (bm25_results, 1.0)])
+        boosts = fusion.context_boosts(fused, context, ProximityScorer(terms))
+        fusion.rerank(fused, fusion.graph_boosts(fused, boosts, connected))
+
+    for vector_results, bm25_results, terms in workloads:
+        t0 = time.perf_counter()
+        legacy_fusion(vector_results, bm25_results, terms, context, connected)
+        timings["legacy"].append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        run_all(scalar, vector_results, bm25_results, terms)
+        timings["scalar"].append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        run_all(vectorized, vector_results, bm25_results, terms)
+        timings["full"].append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        fused = vectorized.fuse([(vector_results, 1.0), (bm25_results, 1.0)])
+        t1 = time.perf_counter()
+        boosts = vectorized.context_boosts(fused, context)
+        vectorized.rerank(fused, vectorized.graph_boosts(fused, boosts, connected))
+        t2 = time.perf_counter()
+        ProximityScorer(terms).score_many(fused.column("content"))
+        t3 = time.perf_counter()
+        timings["fuse"].append(t1 - t0)
+        timings["rerank"].append(t2 - t1)
+        timings["proximity"].append(t3 - t2)
+        candidate_counts.append(len(fused))
+
+    print(f"inputs per query: {2 * args.expansions * candidate_k}, "
+          f"fused candidates: {int(np.mean(candidate_counts))} "
+          f"(top_k={args.top_k}, expansions={args.expansions})")
+    print(f"{'stage':>26} {'p50_ms':>10} {'p95_ms':>10}")
+    labels = {
+        "legacy": "legacy loops (all stages)",
+        "scalar": "lists (all stages)",
+        "full": "numpy full rerank",
+        "fuse": "numpy RRF fuse",
+        "rerank": "boosts w/o proximity",
+        "proximity": "batched proximity",
+    }
+    for key, label in labels.items():
+        ms = np.array(timings[key]) * 1000
+        print(f"{label:>26} {np.percentile(ms, 50):>10.3f} {np.percentile(ms, 95):>10.3f}")
+
+    full_p50 = np.percentile(np.array(timings["full"]) * 1000, 50)
+    verdict = "met" if full_p50 < TARGET_MS else f"NOT met, {full_p50 / TARGET_MS:.1f}x over"
+    print(f"target: full rerank under {TARGET_MS:.1f} ms at p50 -> {verdict}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Semantic deduplication benchmark for Khala.
+
+Builds a synthetic corpus of N memories (topic-clustered embeddings with
+planted near-duplicates spread across the whole corpus) and compares:
+
+* windowed: the previous pass, which compared memories only within windows
+  of 50 consecutive rows using ``DeduplicationService.find_semantic_duplicates``;
+* lsh: ``MemoryLifecycleService.find_semantic_duplicates``, LSH-blocked over
+  the whole corpus;
+* lsh incremental: the same with ``since`` set so only the newest 5% are checked;
+* exact: all pairs by blocked matrix products, as ground truth.
+
+Usage:
+    python scripts/benchmark_semantic_dedup.py --memories 20000 --dims 768
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from khala.application.services.memory_lifecycle import SEMANTIC_DEDUP_THRESHOLD, MemoryLifecycleService
+from khala.domain.memory.entities import Memory, MemoryTier
+from khala.domain.memory.repository import MemoryRepository
+from khala.domain.memory.services import DeduplicationService
+from khala.domain.memory.value_objects import EmbeddingVector, ImportanceScore
+from khala.infrastructure.vector.ann_index import normalize_rows
+
+BASE = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def make_corpus(n: int, dims: int, duplicates: int, seed: int):
+    rng = np.random.default_rng(seed)
+    topics = normalize_rows(rng.standard_normal((max(1, n // 200), dims)))
+    vectors = normalize_rows(topics[rng.integers(0, len(topics), n)] + rng.standard_normal((n, dims)) * 0.08)
+    rows = rng.permutation(n)[:2 * duplicates]
+    sources, targets = np.sort(rows[:duplicates]), rows[duplicates:]
+    noise = normalize_rows(rng.standard_normal((duplicates, dims)))
+    vectors[targets] = normalize_rows(vectors[sources] + noise * 0.2)
+    memories = [
+        Memory(
+            id=f"m{i:07d}", user_id="bench", content=f"memory {i}", tier=MemoryTier.WORKING,
+            importance=ImportanceScore(0.5), created_at=BASE + timedelta(seconds=i),
+            embedding=EmbeddingVector.trusted(vectors[i], model="bench", version="1"),
+        )
+        for i in range(n)
+    ]
+    return memories, vectors
+
+
+def exact_pairs(vectors: np.ndarray, threshold: float, block: int = 2048) -> int:
+    found = 0
+    for start in range(0, len(vectors), block):
+        sims = vectors[start:start + block] @ vectors.T
+        rows, cols = np.nonzero(sims >= threshold)
+        found += int(np.sum(cols > rows + start))
+    return found
+
+
+def windowed(memories, window: int = 50) -> int:
+    service = DeduplicationService()
+    found = 0
+    for start in range(0, len(memories), window):
+        chunk = memories[start:start + window]
+        resolved = set()
+        for i, memory in enumerate(chunk):
+            if memory.id in resolved:
+                continue
+            for dupe in service.find_semantic_duplicates(memory, chunk[i + 1:], threshold=SEMANTIC_DEDUP_THRESHOLD):
+                if dupe.id not in resolved:
+                    resolved.add(dupe.id)
+                    found += 1
+    return found
+
+
+def lifecycle_service(memories) -> MemoryLifecycleService:
+    repository = MagicMock(spec=MemoryRepository)
+
+    async def iter_memories(user_id, tier=None, fields=None, batch_size=500, projection=None):
+        for memory in memories:
+            yield memory
+
+    repository.iter_memories = iter_memories
+    return MemoryLifecycleService(repository=repository, gemini_client=MagicMock(),
+                                  verification_gate=MagicMock(), job_repository=MagicMock())
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark windowed vs LSH-blocked semantic deduplication")
+    parser.add_argument("--memories", type=int, default=20000)
+    parser.add_argument("--dims", type=int, default=768)
+    parser.add_argument("--duplicates", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    memories, vectors = make_corpus(args.memories, args.dims, args.duplicates, args.seed)
+    service = lifecycle_service(memories)
+    since = BASE + timedelta(seconds=int(args.memories * 0.95))
+
+    print(f"memories={args.memories} dims={args.dims} planted={args.duplicates} "
+          f"threshold={SEMANTIC_DEDUP_THRESHOLD}")
+    print(f"{'method':>16} {'pairs':>7} {'compared':>12} {'seconds':>9}")
+
+    start = time.perf_counter()
+    truth = exact_pairs(vectors, SEMANTIC_DEDUP_THRESHOLD)
+    print(f"{'exact':>16} {truth:>7} {args.memories * (args.memories - 1) // 2:>12} {time.perf_counter() - start:>9.2f}")
+
+    start = time.perf_counter()
+    found = windowed(memories)
+    sizes = [min(50, args.memories - s) for s in range(0, args.memories, 50)]
+    compared = sum(k * (k - 1) // 2 for k in sizes)
+    print(f"{'windowed':>16} {found:>7} {compared:>12} {time.perf_counter() - start:>9.2f}")
+
+    for label, kwargs in (("lsh", {}), ("lsh incremental", {"since": since})):
+        report = await service.find_semantic_duplicates("bench", **kwargs)
+        print(f"{label:>16} {len(report.duplicates):>7} {report.candidate_pairs:>12} {report.seconds:>9.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
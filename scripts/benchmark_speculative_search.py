@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Speculative search pipeline benchmark for Khala.
+
+Runs ``HybridSearchService.search`` with ``expand_query=True`` against a stub
+LLM that answers intent, translation and expansion prompts after a fixed
+latency plus random jitter, and a stub repository with a fixed retrieval
+latency. Alternating English and French queries exercise translation.
+
+Reports p50 and p95 search latency for the sequential pipeline (three
+chained LLM round trips before retrieval) and the speculative one (LLM
+stages run alongside retrieval for the raw query, under ``StageBudgets``).
+
+Usage:
+    python scripts/benchmark_speculative_search.py --llm-ms 30 --jitter-ms 20 --searches 100
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, List
+
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from khala.application.services.hybrid_search_service import HybridSearchService
+from khala.application.services.intent_classifier import IntentClassifier
+from khala.application.services.query_expansion_service import QueryExpansionService
+from khala.application.services.translation_service import TranslationService
+from khala.domain.memory.entities import Memory, MemoryTier
+from khala.domain.memory.value_objects import ImportanceScore
+
+NOW = datetime(2025, 1, 1, tzinfo=timezone.utc)
+CONTENTS = [
+    "paris is the capital of france",
+    "the eiffel tower stands in paris",
+    "berlin is the capital of germany",
+    "french cuisine uses butter",
+    "la capitale de la france",
+]
+QUERIES = ["capital of germany", "la capitale de la france"]
+
+
+class StubGeminiClient:
+    """Answers classification, translation and expansion prompts after ``latency`` (+ jitter) seconds."""
+
+    def __init__(self, latency: float, jitter: float, seed: int):
+        self.latency = latency
+        self.jitter = jitter
+        self.rng = random.Random(seed)
+
+    async def generate_text(self, prompt, task_type="generation", temperature=0.7, model_id=None, **kwargs):
+        await asyncio.sleep(self.latency + self.rng.uniform(0, self.jitter))
+        if "classify its intent" in prompt:
+            content = json.dumps({"intent": "FACTUAL", "confidence": 0.9, "reasoning": "stub"})
+        elif "Detect the language" in prompt:
+            foreign = "capitale" in prompt
+            content = json.dumps({
+                "detected_language": "French" if foreign else "English",
+                "translated_text": "capital of france" if foreign else prompt.split('"')[1],
+            })
+        else:
+            content = "eiffel tower\nfrench cuisine"
+        return {"content": content}
+
+
+class StubEmbeddings:
+    async def get_embedding(self, text):
+        await asyncio.sleep(0)
+        return text  # The repository below matches on the text itself
+
+
+class StubRepository:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.memories = [
+            Memory(id=f"memory:m{i}", user_id="bench", content=content, tier=MemoryTier.WORKING,
+                   importance=ImportanceScore(0.5), created_at=NOW)
+            for i, content in enumerate(CONTENTS)
+        ]
+
+    def _matching(self, text, top_k):
+        words = set(text.lower().split()) - {"the", "of", "is", "la", "de"}
+        return [m for m in self.memories if words & set(m.content.split())][:top_k]
+
+    async def search_by_vector(self, embedding, user_id, top_k, filters=None, projection=None):
+        await asyncio.sleep(self.latency)
+        return self._matching(embedding, top_k)
+
+    async def search_by_text(self, query_text, user_id, top_k, filters=None, projection=None):
+        await asyncio.sleep(self.latency)
+        return self._matching(query_text, top_k)
+
+
+async def run(args: argparse.Namespace) -> Dict[str, List[float]]:
+    latencies: Dict[str, List[float]] = {}
+    for label, speculative in (("sequential", False), ("speculative", True)):
+        gemini = StubGeminiClient(args.llm_ms / 1000, args.jitter_ms / 1000, args.seed)
+        service = HybridSearchService(
+            memory_repository=StubRepository(args.db_ms / 1000),
+            embedding_service=StubEmbeddings(),
+            query_expansion_service=QueryExpansionService(gemini),
+            intent_classifier=IntentClassifier(gemini),
+            translation_service=TranslationService(gemini),
+            speculative=speculative,
+        )
+        samples = []
+        for i in range(args.searches):
+            start = time.perf_counter()
+            await service.search(QUERIES[i % 2], "bench", expand_query=True)
+            samples.append(time.perf_counter() - start)
+        latencies[label] = samples
+    return latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark sequential vs speculative hybrid search")
+    parser.add_argument("--llm-ms", type=float, default=30.0, help="Stub LLM latency per call")
+    parser.add_argument("--jitter-ms", type=float, default=20.0, help="Uniform jitter added per LLM call")
+    parser.add_argument("--db-ms", type=float, default=5.0, help="Stub retrieval latency per query")
+    parser.add_argument("--searches", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    latencies = asyncio.run(run(args))
+
+    print(f"searches: {args.searches}, llm: {args.llm_ms:.0f} ms + up to {args.jitter_ms:.0f} ms, "
+          f"retrieval: {args.db_ms:.0f} ms")
+    print(f"{'pipeline':>12} {'p50_ms':>10} {'p95_ms':>10}")
+    for label, samples in latencies.items():
+        ms = np.array(samples) * 1000
+        print(f"{label:>12} {np.percentile(ms, 50):>10.1f} {np.percentile(ms, 95):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Cache size-estimator accuracy report for Khala.
+
+Builds representative cache values (Memory lists, embeddings, raw search
+rows, nested dicts), measures the bytes actually allocated for each with
+``tracemalloc``, and prints them next to the ``SizeEstimator`` figure and
+the estimator's own runtime.
+
+Usage:
+    python scripts/cache_sizing_report.py --count 200 --dims 768
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, List, Tuple
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+
+from khala.domain.memory.entities import Memory, MemoryTier
+from khala.domain.memory.value_objects import EmbeddingVector, ImportanceScore
+from khala.infrastructure.cache.sizing import SizeEstimator
+
+
+def build_cases(count: int, dims: int, seed: int) -> List[Tuple[str, Callable[[], Any]]]:
+    """Return (label, builder) pairs; builders allocate a fresh value each call."""
+    rng = random.Random(seed)
+
+    def vector() -> List[float]:
+        return [rng.uniform(-1.0, 1.0) for _ in range(dims)]
+
+    def memory(i: int) -> Memory:
+        return Memory(
+            user_id="report_user",
+            content=f"memory {i} " + "lorem ipsum " * rng.randint(5, 80),
+            tier=MemoryTier.SHORT_TERM,
+            importance=ImportanceScore(0.5),
+            embedding=EmbeddingVector(vector(), model="report", version="1"),
+            tags=[f"tag{j}" for j in range(rng.randint(0, 6))],
+            metadata={"source": "report", "n": i},
+        )
+
+    def row(i: int) -> dict:
+        return {
+            "id": f"memory:{i}",
+            "content": "search result " * rng.randint(5, 40),
+            "similarity": rng.random(),
+            "tags": ["a", "b"],
+            "embedding": vector(),
+        }
+
+    return [
+        ("str (10 KB)", lambda: "x" * 10_000),
+        ("EmbeddingVector", lambda: EmbeddingVector(vector())),
+        ("float32 ndarray", lambda: np.ones(dims, dtype=np.float32)),
+        (f"List[Memory] x{count}", lambda: [memory(i) for i in range(count)]),
+        (f"search rows x{count}", lambda: [row(i) for i in range(count)]),
+        ("nested dict", lambda: {f"k{i}": {"score": rng.random(), "ids": list(range(20))} for i in range(count)}),
+    ]
+
+
+def measure(builder: Callable[[], Any]) -> Tuple[Any, int]:
+    """Build a value under tracemalloc and return it with its allocated bytes."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    value = builder()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return value, after - before
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare cache size estimates with tracemalloc")
+    parser.add_argument("--count", type=int, default=200, help="Items per container case")
+    parser.add_argument("--dims", type=int, default=768, help="Embedding dimensions")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    estimator = SizeEstimator()
+    print(f"{'case':<22} {'actual_B':>12} {'estimate_B':>12} {'error':>8} {'est_us':>9}")
+    for label, builder in build_cases(args.count, args.dims, args.seed):
+        value, actual = measure(builder)
+        start = time.perf_counter()
+        estimate = estimator.estimate(value)
+        elapsed_us = (time.perf_counter() - start) * 1e6
+        error = (estimate - actual) / actual if actual else 0.0
+        print(f"{label:<22} {actual:>12,} {estimate:>12,} {error:>+8.1%} {elapsed_us:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -73,10 +73,9 @@ def main():
     # Initialize tracker
     tracker = CostTracker(budget_usd_per_month=Decimal(str(args.budget)))
     
-    # Load data (it loads automatically in __init__ now, but let's be sure)
-    # The persistence path is relative to the module, so it should work if the file exists
+    # Rollups are loaded from the cost ledger in __init__
     
-    if not tracker.cost_records:
+    if tracker.ledger.total_calls == 0:
         print("No cost records found. Run some LLM operations first.")
         return
 
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Offline evaluation of the local query intent and language classifier.
+
+Uses a JSONL dataset of LLM-labelled queries (``{query, intent, language}``,
+as written by ``train_query_classifier.py --export-dataset``). It reports,
+for each confidence threshold, how many queries the local models would
+answer without an LLM call and how often they agree with the LLM label.
+Without ``--model`` the models are cross-validated on the dataset. With
+``--model`` a trained model file is scored on the whole dataset.
+
+Usage:
+    python scripts/evaluate_query_classifier.py --dataset sessions.jsonl --folds 5
+    python scripts/evaluate_query_classifier.py --dataset holdout.jsonl --model query_classifier.json
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+from typing import Any, List, Tuple
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from khala.application.services.local_query_classifier import (
+    IntentCentroidModel,
+    LanguageDetector,
+    load_models,
+)
+from train_query_classifier import embed_queries, read_dataset
+
+
+def folds(n: int, k: int, seed: int) -> List[List[int]]:
+    order = list(range(n))
+    random.Random(seed).shuffle(order)
+    return [order[i::k] for i in range(k)]
+
+
+def threshold_table(title: str, predictions: List[Tuple[Any, float, Any]], thresholds: List[float]) -> None:
+    """Coverage/agreement of (predicted, confidence, llm_label) triples per threshold."""
+    total = len(predictions)
+    if not total:
+        print(f"\n{title}: no labelled examples")
+        return
+    agreement = sum(p == t for p, _, t in predictions) / total
+    print(f"\n{title}: {total} examples, {agreement:.1%} agree with the LLM at any confidence")
+    print(f"{'threshold':>10} {'local':>8} {'agree':>8} {'overall':>8} {'LLM calls / 1k':>15}")
+    for threshold in thresholds:
+        local = [(p, t) for p, c, t in predictions if c >= threshold]
+        agree = sum(p == t for p, t in local)
+        # Below the threshold the LLM answers, which agrees with itself
+        overall = (agree + total - len(local)) / total
+        print(f"{threshold:>10.2f} {len(local) / total:>8.1%} {(agree / len(local) if local else 1.0):>8.1%} "
+              f"{overall:>8.1%} {1000 * (total - len(local)) / total:>15.0f}")
+
+
+def language_table(predictions: List[Tuple[Any, float, Any]], target: str, thresholds: List[float]) -> None:
+    """Translation skips: queries judged to be ``target`` language without an LLM call."""
+    targets = sum(t == target for _, _, t in predictions)
+    print(f"\nTranslation skips for '{target}' ({targets} of {len(predictions)} queries are '{target}')")
+    print(f"{'threshold':>10} {'skipped':>8} {'wrong skips':>12}")
+    for threshold in thresholds:
+        skipped = [(p, t) for p, c, t in predictions if p == target and c >= threshold]
+        wrong = sum(t != target for _, t in skipped)
+        print(f"{threshold:>10.2f} {len(skipped) / max(1, len(predictions)):>8.1%} {wrong:>12}")
+
+
+async def run(args) -> None:
+    examples = read_dataset(args.dataset)
+    intent_examples = [e for e in examples if e.get("intent")]
+    language_examples = [e for e in examples if e.get("language")]
+    intent_predictions: List[Tuple[Any, float, Any]] = []
+    language_predictions: List[Tuple[Any, float, Any]] = []
+
+    vectors: List[Any] = []
+    if intent_examples:
+        vectors, _ = await embed_queries([e["query"] for e in intent_examples], args.embedding, args.embedding_model)
+
+    if args.model:
+        intent_model, detector = load_models(args.model)
+        if intent_model is not None and vectors:
+            labels, confidences = intent_model.predict_many(vectors)
+            intent_predictions = [(p, float(c), e["intent"]) for p, c, e in zip(labels, confidences, intent_examples)]
+        if detector is not None:
+            language_predictions = [(*detector.detect(e["query"]), e["language"]) for e in language_examples]
+    else:
+        for fold in folds(len(intent_examples), args.folds, args.seed) if intent_examples else []:
+            held = set(fold)
+            train = [i for i in range(len(intent_examples)) if i not in held]
+            model = IntentCentroidModel.fit([vectors[i] for i in train], [intent_examples[i]["intent"] for i in train])
+            labels, confidences = model.predict_many([vectors[i] for i in fold])
+            intent_predictions.extend(
+                (p, float(c), intent_examples[i]["intent"]) for p, c, i in zip(labels, confidences, fold)
+            )
+        for fold in folds(len(language_examples), args.folds, args.seed) if language_examples else []:
+            held = set(fold)
+            detector = LanguageDetector() if args.no_seed else LanguageDetector.default()
+            detector.train((e["query"], e["language"]) for i, e in enumerate(language_examples) if i not in held)
+            language_predictions.extend(
+                (*detector.detect(language_examples[i]["query"]), language_examples[i]["language"]) for i in fold
+            )
+
+    threshold_table("Intent", intent_predictions, args.thresholds)
+    threshold_table("Language", language_predictions, args.thresholds)
+    if language_predictions:
+        language_table(language_predictions, args.target_language, args.thresholds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate the local query intent/language classifier")
+    parser.add_argument("--dataset", required=True, help="JSONL of {query, intent, language}")
+    parser.add_argument("--model", help="Trained model JSON; default cross-validates on the dataset")
+    parser.add_argument("--folds", type=int, default=5, help="Cross-validation folds")
+    parser.add_argument("--seed", type=int, default=0, help="Shuffle seed for the folds")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.5, 0.6, 0.7, 0.8, 0.9])
+    parser.add_argument("--target-language", default="en", help="Language translation skips for")
+    parser.add_argument("--embedding", choices=["local", "gemini"], default="local", help="Embedding provider")
+    parser.add_argument("--embedding-model", help="Embedding model name (must match the one search uses)")
+    parser.add_argument("--no-seed", action="store_true", help="Train the language detector on logged data only")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
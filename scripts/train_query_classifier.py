@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Train the local query intent and language classifier.
+
+Reads logged ``search_session`` records (or a JSONL dataset exported
+earlier). It keeps the intents and languages the LLM assigned, embeds the
+queries with the same embedding model search uses, and writes the
+nearest-centroid intent model plus the n-gram language detector to one JSON
+file. Load that file with ``local_query_classifier.load_models`` and pass
+the models to ``IntentClassifier`` / ``TranslationService``.
+
+Usage:
+    python scripts/train_query_classifier.py --output query_classifier.json --since-days 90 \\
+        --export-dataset sessions.jsonl
+    python scripts/train_query_classifier.py --dataset sessions.jsonl --output query_classifier.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from khala.application.services.local_query_classifier import (
+    IntentCentroidModel,
+    LanguageDetector,
+    save_models,
+    session_examples,
+)
+
+
+def read_dataset(path: str) -> List[Dict[str, Any]]:
+    with open(path, "r") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def write_dataset(path: str, examples: List[Dict[str, Any]]) -> None:
+    with open(path, "w") as f:
+        for example in examples:
+            f.write(json.dumps(example) + "\n")
+
+
+async def sessions_from_db(since_days: int, limit: int) -> List[Dict[str, Any]]:
+    from khala.infrastructure.surrealdb.client import SurrealConfig, SurrealDBClient
+
+    client = SurrealDBClient(SurrealConfig.from_env())
+    await client.initialize()
+    try:
+        since = datetime.now(timezone.utc) - timedelta(days=since_days) if since_days else None
+        return await client.get_search_sessions(since=since, limit=limit)
+    finally:
+        await client.close()
+
+
+async def embed_queries(queries: List[str], provider: str, model_name: Optional[str]) -> tuple:
+    """Embeddings of ``queries`` and the embedding model name to record in the intent model."""
+    if provider == "gemini":
+        from khala.infrastructure.gemini.client import GeminiClient
+
+        client = GeminiClient()
+        vectors = []
+        for start in range(0, len(queries), 100):
+            vectors.extend(await client.generate_embeddings(queries[start:start + 100], model_id=model_name))
+        return vectors, model_name
+
+    from khala.infrastructure.embeddings.local_embedding import LocalEmbedding
+
+    service = LocalEmbedding(model_name or "all-MiniLM-L6-v2")
+    vectors = await service.get_embeddings(queries)
+    return vectors, service.model_name
+
+
+async def run(args) -> None:
+    if args.dataset:
+        examples = read_dataset(args.dataset)
+    else:
+        examples = session_examples(await sessions_from_db(args.since_days, args.limit))
+    if args.export_dataset:
+        write_dataset(args.export_dataset, examples)
+        print(f"Wrote {len(examples)} examples to {args.export_dataset}")
+
+    intent_examples = [e for e in examples if e.get("intent")]
+    intent_model = None
+    if intent_examples:
+        vectors, embedding_model = await embed_queries(
+            [e["query"] for e in intent_examples], args.embedding, args.embedding_model
+        )
+        intent_model = IntentCentroidModel.fit(
+            vectors, [e["intent"] for e in intent_examples], embedding_model=embedding_model
+        )
+
+    detector = LanguageDetector() if args.no_seed else LanguageDetector.default()
+    detector.train((e["query"], e["language"]) for e in examples if e.get("language"))
+
+    save_models(args.output, intent_model, detector)
+
+    print(f"\n{'intent':<14} {'examples':>9}")
+    for intent, count in sorted(Counter(e["intent"] for e in intent_examples).items()):
+        print(f"{intent:<14} {count:>9}")
+    print(f"\n{'language':<14} {'examples':>9}")
+    for language, count in sorted(Counter(e["language"] for e in examples if e.get("language")).items()):
+        print(f"{language:<14} {count:>9}")
+    if intent_model is not None:
+        print(f"\nIntent model: {len(intent_model.labels)} classes, {intent_model.dimensions} dims, "
+              f"temperature {intent_model.temperature}")
+    else:
+        print("\nNo LLM-labelled intents found; wrote the language detector only")
+    print(f"Saved to {args.output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the local query intent/language classifier")
+    parser.add_argument("--output", required=True, help="Model JSON file to write")
+    parser.add_argument("--dataset", help="JSONL of {query, intent, language}; default reads search_session")
+    parser.add_argument("--export-dataset", help="Also write the training examples as JSONL")
+    parser.add_argument("--since-days", type=int, default=90, help="Sessions from the last N days (0 = all)")
+    parser.add_argument("--limit", type=int, default=50000, help="Maximum sessions to read")
+    parser.add_argument("--embedding", choices=["local", "gemini"], default="local", help="Embedding provider")
+    parser.add_argument("--embedding-model", help="Embedding model name (must match the one search uses)")
+    parser.add_argument("--no-seed", action="store_true", help="Train the language detector on logged data only")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+import random
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+from unittest.mock import AsyncMock, MagicMock
+
+import numpy as np
+import pytest
+
+from khala.application.services.memory_lifecycle import MemoryLifecycleService
+from khala.application.services.temporal_analyzer import TemporalAnalysisService
+from khala.domain.memory.entities import Memory, MemoryTier
+from khala.domain.memory.lifecycle import TIERS, LifecycleRules, MemoryColumns
+from khala.domain.memory.repository import MemoryRepository
+from khala.domain.memory.value_objects import ImportanceScore
+from khala.infrastructure.surrealdb.client import SurrealConfig, SurrealDBClient
+
+
+def _memories(n: int, seed: int = 3) -> List[Memory]:
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    tiers = [MemoryTier.WORKING, MemoryTier.SHORT_TERM, MemoryTier.LONG_TERM, MemoryTier.SCRATCHPAD]
+    memories = []
+    for _ in range(n):
+        created = now - timedelta(hours=rng.choice([0.1, 2, 30, 24 * 20, 24 * 45, 24 * 120, 24 * 400]) * rng.uniform(0.9, 1.1))
+        memories.append(Memory(
+            user_id=rng.choice(["u1", "u2"]), content="x", tier=rng.choice(tiers),
+            importance=ImportanceScore(round(rng.uniform(0.0, 1.0), 3)),
+            created_at=created, accessed_at=created + timedelta(minutes=5),
+            access_count=rng.choice([0, 0, 2, 6, 25]),
+            verification_score=rng.choice([0.0, 0.5, 0.9]),
+        ))
+    return memories
+
+
+def test_lifecycle_batch_matches_per_memory_rules():
+    rules = LifecycleRules()
+    memories = _memories(2000)
+    now = datetime.now(timezone.utc)
+
+    scores = rules.score_batch(MemoryColumns.from_memories(memories), now)
+
+    for i, memory in enumerate(memories):
+        decay = rules.decay_score(memory.importance.value, memory.created_at, now)
+        assert scores.decay[i] == pytest.approx(decay, rel=1e-9)
+        rule = next((r for r in rules.promotions if r.from_tier == memory.tier), None)
+        promote = rule is not None and rule.matches(memory, now)
+        assert bool(scores.promote[i]) == promote
+        assert TIERS[scores.next_tier[i]] == (rule.to_tier if promote else memory.tier)
+        assert bool(scores.archive[i]) == rules.should_archive(memory, decay, now)
+    assert scores.promote.any() and scores.archive.any() and not scores.archive.all()
+
+
+def test_temporal_batch_matches_per_memory_checks(monkeypatch):
+    service = TemporalAnalysisService(db_client=SurrealDBClient(
+        SurrealConfig(url="ws://mock", namespace="n", database="d", token="t")
+    ))
+    memories = _memories(2000, seed=11)
+    now = datetime.now(timezone.utc)
+
+    class _FrozenDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return now
+
+    # The per-memory checks read the clock themselves; pin it to the batch's instant
+    monkeypatch.setattr("khala.application.services.temporal_analyzer.datetime", _FrozenDatetime)
+
+    scores = service.policy.score_batch(MemoryColumns.from_memories(memories), now)
+
+    for i, memory in enumerate(memories):
+        assert scores.decay[i] == pytest.approx(service.calculate_decay_score(memory).value, rel=1e-6)
+        assert bool(scores.promote[i]) == service.should_promote(memory)
+        assert bool(scores.archive[i]) == service.should_archive(memory)
+        next_tier = memory.tier.next_tier() if scores.promote[i] else memory.tier
+        assert TIERS[scores.next_tier[i]] == next_tier
+    assert scores.promote.any() and scores.archive.any()
+
+
+def test_columns_from_stored_rows():
+    memory = _memories(1)[0]
+    client = SurrealDBClient(SurrealConfig(url="ws://mock", namespace="n", database="d", token="t"))
+    row = client._serialize_memory(memory)
+    row["id"] = f"memory:{memory.id}"
+
+    columns = MemoryColumns.from_rows([row], parse_time=client._parse_dt)
+
+    assert columns.ids == [memory.id] and columns.user_ids == [memory.user_id]
+    expected = MemoryColumns.from_memories([memory])
+    for name in ("tier", "importance", "created_at", "accessed_at", "access_count", "verification_score", "is_archived"):
+        assert np.array_equal(getattr(columns, name), getattr(expected, name)), name
+
+
+class _ColumnTable:
+    """Serves keyset pages of scoring columns and records batched UPDATE scripts."""
+
+    def __init__(self, rows: List[Dict[str, Any]]):
+        self.rows = {row["id"]: row for row in rows}
+        self.writes: List[Dict[str, Any]] = []
+
+    async def query(self, sql: str, params: Optional[Dict[str, Any]] = None):
+        params = params or {}
+        if sql.startswith("UPDATE"):
+            self.writes.append(params)
+            return [{"status": "OK", "result": []} for _ in range(sql.count("UPDATE"))]
+        keys = sorted(k for k in self.rows if "after" not in params or k > f"memory:{params['after']}")
+        return [{"status": "OK", "result": [self.rows[k] for k in keys][:params["limit"]]}]
+
+
+@pytest.mark.asyncio
+async def test_stream_scores_and_writes_one_round_trip_per_chunk():
+    client = SurrealDBClient(SurrealConfig(url="ws://mock", namespace="n", database="d", token="t"))
+    memories = _memories(1250, seed=5)
+    rows = []
+    for i, memory in enumerate(memories):
+        row = {name: value for name, value in client._serialize_memory(memory).items()
+               if name in MemoryColumns.FIELDS}
+        row["id"] = f"memory:{i:06d}"
+        rows.append(row)
+    table = _ColumnTable(rows)
+
+    @asynccontextmanager
+    async def connection():
+        yield table
+
+    client.get_connection = connection
+    events = []
+    client.register_memory_write_hook(events.append)
+    service = TemporalAnalysisService(db_client=client)
+
+    results = await service.process_decay_stream(batch_size=500)
+
+    assert len(table.writes) == 3
+    assert results["processed"] == 1250 and results["errors"] == 0
+    archived = [w[f"id_{j}"] for w in table.writes for j in range(len(w) // 4) if w[f"archived_{j}"]]
+    assert results["archived"] == len(archived) > 0
+    assert sorted(e.memory_id for e in events if e.action == "archive") == sorted(archived)
+    promoted = [w[f"id_{j}"] for w in table.writes for j in range(len(w) // 4)
+                if w[f"tier_{j}"] != table.rows[f"memory:{w[f'id_{j}']}"]["tier"]]
+    assert results["promoted"] == len(promoted) > 0
+
+
+def _lifecycle_service(memories: List[Memory]) -> MemoryLifecycleService:
+    """A lifecycle service whose repository runs the streaming defaults over ``memories``."""
+    repository = MagicMock(spec=MemoryRepository)
+    repository.update = AsyncMock()
+
+    async def iter_memories(user_id, tier=None, fields=None, batch_size=500, projection=None):
+        for memory in list(memories):
+            if memory.user_id == user_id and not memory.is_archived and (tier is None or memory.tier.value == tier):
+                yield memory
+
+    repository.iter_memories = iter_memories
+    for name in ("_lifecycle_chunks", "promote_matching", "refresh_decay_scores", "archive_matching"):
+        setattr(repository, name, getattr(MemoryRepository, name).__get__(repository))
+    return MemoryLifecycleService(repository=repository, gemini_client=MagicMock())
+
+
+@pytest.mark.asyncio
+async def test_repository_defaults_promote_real_memories():
+    now = datetime.now(timezone.utc)
+    promotable = Memory(
+        user_id="u1", content="promotable", tier=MemoryTier.WORKING, importance=ImportanceScore(0.9),
+        created_at=now - timedelta(hours=1), access_count=10
+    )
+    fresh = Memory(
+        user_id="u1", content="fresh", tier=MemoryTier.SHORT_TERM, importance=ImportanceScore(0.2),
+        created_at=now - timedelta(minutes=5)
+    )
+    service = _lifecycle_service([promotable, fresh])
+
+    count = await service.promote_memories("u1")
+
+    assert count == 1
+    assert promotable.tier == MemoryTier.SHORT_TERM
+    assert fresh.tier == MemoryTier.SHORT_TERM
+    service.repository.update.assert_awaited_once_with(promotable)
+
+
+@pytest.mark.asyncio
+async def test_high_importance_working_memory_advances_one_tier_per_run():
+    now = datetime.now(timezone.utc)
+    # Also clears the short-term bar (importance > 0.9) once it is short-term
+    memory = Memory(
+        user_id="u1", content="critical", tier=MemoryTier.WORKING, importance=ImportanceScore(0.95),
+        created_at=now - timedelta(hours=1), access_count=10
+    )
+    service = _lifecycle_service([memory])
+
+    assert await service.promote_memories("u1") == 1
+    assert memory.tier == MemoryTier.SHORT_TERM
+
+    assert await service.promote_memories("u1") == 1
+    assert memory.tier == MemoryTier.LONG_TERM
+
+
+@pytest.mark.asyncio
+async def test_repository_defaults_decay_and_archive_real_memories():
+    now = datetime.now(timezone.utc)
+    stale = Memory(
+        user_id="u1", content="decayable", tier=MemoryTier.WORKING, importance=ImportanceScore(0.1),
+        access_count=0, created_at=now - timedelta(days=100)
+    )
+    kept = Memory(
+        user_id="u1", content="recent", tier=MemoryTier.SHORT_TERM, importance=ImportanceScore(0.6),
+        access_count=0, created_at=now - timedelta(days=1)
+    )
+    service = _lifecycle_service([stale, kept])
+
+    stats = await service.decay_and_archive_memories("u1")
+
+    assert stats == {"decayed": 2, "archived": 1}
+    assert stale.is_archived and not kept.is_archived
+    assert stale.decay_score.value < kept.decay_score.value
+    rules = service.lifecycle_rules
+    assert kept.decay_score.value == pytest.approx(rules.decay_score(0.6, kept.created_at, now), rel=1e-3)
@@ -0,0 +1,155 @@
+import json
+from unittest.mock import AsyncMock
+
+import numpy as np
+import pytest
+
+from khala.application.services.hybrid_search_service import HybridSearchService
+from khala.application.services.intent_classifier import IntentClassifier
+from khala.application.services.local_query_classifier import (
+    INTENT_LABELS,
+    IntentCentroidModel,
+    LanguageDetector,
+    load_models,
+    save_models,
+    session_examples,
+)
+from khala.application.services.translation_service import TranslationService
+from khala.domain.memory.value_objects import EmbeddingVector
+
+DIMS = 32
+
+
+def _intent_data(n_per_class: int, noise: float, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    directions = {label: rng.standard_normal(DIMS) / np.sqrt(DIMS) for label in INTENT_LABELS}
+    embeddings, labels = [], []
+    for label in INTENT_LABELS:
+        for _ in range(n_per_class):
+            embeddings.append(directions[label] + rng.standard_normal(DIMS) * noise / np.sqrt(DIMS))
+            labels.append(label)
+    return embeddings, labels, directions
+
+
+def _gemini(content):
+    client = AsyncMock()
+    client.generate_text.return_value = {"content": content}
+    return client
+
+
+def test_centroid_model_classifies_and_reports_ambiguity(tmp_path):
+    embeddings, labels, directions = _intent_data(60, noise=1.0)
+    model = IntentCentroidModel.fit(embeddings[::3] + embeddings[1::3], labels[::3] + labels[1::3],
+                                    embedding_model="test-embed")
+    predicted, confidences = model.predict_many(embeddings[2::3])
+
+    assert np.mean([p == t for p, t in zip(predicted, labels[2::3])]) > 0.9
+    # Halfway between two intents the model is unsure
+    _, ambiguous = model.predict((directions["factual"] + directions["analysis"]) / 2)
+    assert ambiguous < np.median(confidences)
+
+    with pytest.raises(ValueError):
+        model.predict(EmbeddingVector(list(directions["factual"]), model="other-embed"))
+
+    path = str(tmp_path / "model.json")
+    save_models(path, model, LanguageDetector.default())
+    loaded, detector = load_models(path)
+    assert loaded.predict(directions["summary"]) == pytest.approx(model.predict(directions["summary"]))
+    assert detector.detect("où sont mes notes sur le projet")[0] == "fr"
+
+
+def test_language_detector_on_short_queries():
+    detector = LanguageDetector.default()
+    cases = {
+        "what is the status of the api redesign": "en",
+        "meeting with john about pricing": "en",
+        "où sont mes notes sur le projet": "fr",
+        "cuándo es la próxima reunión": "es",
+        "wo sind meine notizen zum projekt": "de",
+        "quando è la prossima riunione": "it",
+        "onde estão minhas notas do projeto": "pt",
+        "wanneer is de volgende vergadering": "nl",
+    }
+    for text, language in cases.items():
+        assert detector.detect(text)[0] == language, text
+    assert detector.detect("東京の天気") == (None, 0.0)
+
+    # Logged queries extend the seed corpus
+    before = detector.detect("kubernetes helm chart rollout")[1]
+    detector.train([("helm chart rollout for the kubernetes staging cluster", "en")] * 3)
+    assert detector.detect("kubernetes helm chart rollout")[0] == "en"
+    assert detector.detect("kubernetes helm chart rollout")[1] > before
+
+
+@pytest.mark.asyncio
+async def test_llm_is_only_called_below_the_confidence_threshold():
+    embeddings, labels, directions = _intent_data(40, noise=1.0)
+    model = IntentCentroidModel.fit(embeddings, labels)
+    gemini = _gemini(json.dumps({"intent": "CREATIVE", "confidence": 0.8, "reasoning": "llm"}))
+    classifier = IntentClassifier(gemini, local_model=model, min_confidence=0.6)
+
+    local = await classifier.classify_intent("when is the launch", embedding=directions["factual"])
+    # Equally close to every intent
+    fallback = await classifier.classify_intent("hmm", embedding=sum(directions.values()) / len(directions))
+    no_embedding = await classifier.classify_intent("write me a story")
+
+    assert local["intent"] == "factual" and local["source"] == "local"
+    assert fallback == {"intent": "creative", "confidence": 0.8, "reasoning": "llm", "source": "llm"}
+    assert no_embedding["source"] == "llm"
+    assert classifier.stats == {"local": 1, "llm": 2}
+    assert gemini.generate_text.await_count == 2
+
+    translation = TranslationService(
+        _gemini(json.dumps({"detected_language": "French", "translated_text": "where are my notes"})),
+        language_detector=LanguageDetector.default()
+    )
+    english = await translation.detect_and_translate("what is the status of the api redesign")
+    french = await translation.detect_and_translate("où sont mes notes sur le projet")
+    assert english["source"] == "local" and not english["was_translated"]
+    assert french["source"] == "llm" and french["translated_text"] == "where are my notes"
+    assert translation.gemini_client.generate_text.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_search_classifies_locally_and_logs_training_labels():
+    embeddings, labels, directions = _intent_data(40, noise=0.5)
+    gemini = _gemini("{}")
+    embedding_service = AsyncMock()
+    embedding_service.get_embedding.return_value = EmbeddingVector(list(directions["analysis"]))
+    repo = AsyncMock()
+    repo.search_by_vector.return_value = []
+    repo.search_by_text.return_value = []
+    db = AsyncMock()
+    service = HybridSearchService(
+        memory_repository=repo,
+        embedding_service=embedding_service,
+        intent_classifier=IntentClassifier(gemini, local_model=IntentCentroidModel.fit(embeddings, labels)),
+        translation_service=TranslationService(gemini, language_detector=LanguageDetector.default()),
+        db_client=db,
+    )
+    repo.search_by_vector.return_value = [AsyncMock(id="memory:m1", content="x")]
+
+    await service.search("how does caching relate to latency in our services", "u1")
+
+    gemini.generate_text.assert_not_awaited()
+    # One embedding serves the intent model and vector search
+    embedding_service.get_embedding.assert_awaited_once()
+    metadata = db.create_search_session.await_args.args[0]["metadata"]
+    assert metadata["intent"] == "analysis" and metadata["intent_source"] == "local"
+    assert metadata["detected_language"] == "English" and metadata["language_source"] == "local"
+
+
+def test_training_examples_come_from_llm_labels_only():
+    sessions = [
+        {"query": "q1", "metadata": {"intent": "factual", "intent_source": "llm",
+                                     "detected_language": "French", "language_source": "llm"}},
+        {"query": "q2", "metadata": {"intent": "summary", "intent_source": "local",
+                                     "detected_language": "English", "language_source": "local"}},
+        {"query": "q3", "metadata": {"intent": "unknown", "intent_source": "llm",
+                                     "detected_language": "English", "language_source": "llm"}},
+        {"query": "q4", "metadata": {"rrf_k": 60}},
+    ]
+    assert session_examples(sessions) == [
+        {"query": "q1", "intent": "factual", "language": "fr"},
+        {"query": "q3", "intent": None, "language": "en"},
+    ]
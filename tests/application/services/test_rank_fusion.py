@@ -0,0 +1,136 @@
+import random
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock
+
+import numpy as np
+import pytest
+
+from khala.application.services.hybrid_search_service import HybridSearchService
+from khala.application.services.rank_fusion import ProximityScorer, RankFusion, minimal_window
+from khala.domain.memory.entities import Memory, MemoryTier
+from khala.domain.memory.value_objects import EmbeddingVector, ImportanceScore
+
+NOW = datetime(2025, 1, 1, tzinfo=timezone.utc)
+WORDS = ["alpha", "beta", "gamma", "delta", "omega", "sigma", "tau", "zeta"]
+
+
+def _memory(i: int, rng: random.Random) -> Memory:
+    return Memory(
+        id=f"memory:m{i}",
+        user_id="u1",
+        content=" ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 40))),
+        tier=MemoryTier.WORKING,
+        importance=ImportanceScore(0.5),
+        created_at=NOW - timedelta(seconds=rng.choice([60, 7200, 200000])),
+        episode_id=rng.choice(["ep1", "ep2", None]),
+    )
+
+
+def _pairwise_proximity(content: str, terms) -> float:
+    """The original all-pairs proximity score, kept as a reference."""
+    text = content.lower()
+    positions = []
+    for term in dict.fromkeys(t.lower() for t in terms if len(t) > 2):
+        found = [i for i in range(len(text)) if text.startswith(term, i)]
+        if found:
+            positions.append(found)
+    best = None
+    for i in range(len(positions)):
+        for j in range(i + 1, len(positions)):
+            for a in positions[i]:
+                for b in positions[j]:
+                    if best is None or abs(a - b) < best:
+                        best = abs(a - b)
+    if best is None or best / 6.0 > 10:
+        return 0.0
+    return 0.3 * (1.0 - (best / 6.0) / 10)
+
+
+def test_minimal_window_matches_brute_force():
+    rng = random.Random(3)
+    for _ in range(200):
+        lists = [sorted(rng.sample(range(200), rng.randint(0, 6))) for _ in range(rng.randint(1, 4))]
+        points = [(p, t) for t, ps in enumerate(lists) for p in ps]
+        for need in (2, 3):
+            spans = [
+                max(p for p, _ in window) - min(p for p, _ in window)
+                for a in points for b in points
+                for window in [[x for x in points if a[0] <= x[0] <= b[0]]]
+                if len({t for _, t in window}) >= need
+            ]
+            assert minimal_window(lists, need) == (min(spans) if spans else None)
+
+
+def test_proximity_matches_pairwise_reference():
+    rng = random.Random(5)
+    for _ in range(200):
+        memory = _memory(0, rng)
+        terms = rng.sample(WORDS, 3)
+        assert ProximityScorer(terms).score(memory.content) == pytest.approx(
+            _pairwise_proximity(memory.content, terms)
+        )
+    assert ProximityScorer(["alpha", "alpha"]).score("alpha beta") == 0.0
+
+
+def test_batch_proximity_matches_per_candidate_score():
+    rng = random.Random(9)
+    contents = [_memory(i, rng).content for i in range(300)]
+    # Empty text, case, repeated terms and matches at the edges of neighbouring texts
+    contents += [None, "", "ALPHA Beta", "alphaalpha beta", "beta", "alpha", "tau gamma"]
+    for need in (2, 3):
+        scorer = ProximityScorer(["alpha", "Beta", "tau", "gamma"], need=need)
+        assert scorer.score_many(contents) == pytest.approx([scorer.score(c) for c in contents])
+
+    # Lowercasing "İ" adds a character, so offsets cannot come from the joined text
+    shifted = ["İİ alpha", "x beta", "alpha İ beta"]
+    scorer = ProximityScorer(["alpha", "beta"])
+    assert scorer.score_many(shifted) == pytest.approx([scorer.score(c) for c in shifted])
+    assert scorer.score_many([]) == []
+
+
+def test_vectorized_and_scalar_paths_agree():
+    rng = random.Random(11)
+    pool = [_memory(i, rng) for i in range(400)]
+    lists = [(rng.sample(pool, 150), 1.5), (rng.sample(pool, 150), 0.5), (rng.sample(pool, 80), 1.0)]
+    context = {"current_time": NOW, "episode_id": "ep2"}
+    proximity = ProximityScorer(["alpha", "beta", "tau"])
+
+    def favourite(candidates, ctx):
+        return [0.05 if m.id.endswith("7") else 0.0 for m in candidates.memories]
+
+    orders = []
+    for threshold in (1, 10 ** 9):
+        fusion = RankFusion(vectorize_min_candidates=threshold, signals=[favourite])
+        fused = fusion.fuse(lists)
+        boosts = fusion.context_boosts(fused, context, proximity)
+        boosts = fusion.graph_boosts(fused, boosts, {"m3", "m42"})
+        orders.append(([m.id for m in fused.memories], [m.id for m in fusion.rerank(fused, boosts)],
+                       np.asarray(fused.scores), np.asarray(boosts)))
+
+    (vec_rrf, vec_final, vec_scores, vec_boosts), (py_rrf, py_final, py_scores, py_boosts) = orders
+    assert vec_rrf == py_rrf
+    assert vec_final == py_final
+    np.testing.assert_allclose(vec_scores, py_scores)
+    np.testing.assert_allclose(vec_boosts, py_boosts)
+
+
+@pytest.mark.asyncio
+async def test_search_applies_plugged_signal_over_many_candidates():
+    rng = random.Random(2)
+    pool = [_memory(i, rng) for i in range(300)]
+    repo = MagicMock()
+    repo.search_by_vector = AsyncMock(return_value=pool[:150])
+    repo.search_by_text = AsyncMock(return_value=pool[100:])
+    embedding = MagicMock()
+    embedding.get_embedding = AsyncMock(return_value=EmbeddingVector([0.1, 0.2]))
+
+    service = HybridSearchService(memory_repository=repo, embedding_service=embedding)
+    service.register_boost_signal(
+        lambda candidates, ctx: np.array([m.id == "memory:m299" for m in candidates.memories], dtype=float)
+    )
+
+    results = await service.search("zz", user_id="u1", top_k=200, auto_detect_intent=False)
+
+    assert len(results) == 200
+    assert results[0].id == "memory:m299"
+    assert results[1].id == "memory:m100"
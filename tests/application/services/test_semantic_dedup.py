@@ -0,0 +1,108 @@
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+from unittest.mock import AsyncMock, MagicMock
+
+import numpy as np
+import pytest
+
+from khala.application.services.memory_lifecycle import MemoryLifecycleService
+from khala.domain.memory.entities import Memory, MemoryTier
+from khala.domain.memory.repository import MemoryRepository
+from khala.domain.memory.value_objects import EmbeddingVector, ImportanceScore
+
+BASE = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def _unit(rng: np.random.Generator, dims: int) -> np.ndarray:
+    vector = rng.standard_normal(dims)
+    return vector / np.linalg.norm(vector)
+
+
+def _near(rng: np.random.Generator, vector: np.ndarray, cosine: float) -> np.ndarray:
+    noise = _unit(rng, len(vector))
+    noise -= (noise @ vector) * vector
+    return cosine * vector + np.sqrt(1 - cosine ** 2) * noise / np.linalg.norm(noise)
+
+
+def _memory(i: int, vector: np.ndarray, tier: MemoryTier = MemoryTier.WORKING, model: str = "m") -> Memory:
+    return Memory(
+        id=f"m{i:04d}", user_id="u1", content=f"note {i}", tier=tier, importance=ImportanceScore(0.5),
+        created_at=BASE + timedelta(minutes=i),
+        embedding=EmbeddingVector((vector / np.abs(vector).max()).tolist(), model=model, version="1"),
+    )
+
+
+def _service(memories: List[Memory]):
+    by_id: Dict[str, Memory] = {m.id: m for m in memories}
+    repository = MagicMock(spec=MemoryRepository)
+
+    async def iter_memories(user_id, tier=None, fields=None, batch_size=500, projection=None):
+        for memory in sorted(by_id.values(), key=lambda m: m.id):
+            if not memory.is_archived:
+                yield memory
+
+    repository.iter_memories = iter_memories
+    repository.get_by_id = AsyncMock(side_effect=lambda memory_id, projection=None: by_id.get(memory_id))
+    repository.find_duplicate_groups = AsyncMock(return_value=[])
+    repository.update = AsyncMock()
+    service = MemoryLifecycleService(repository=repository, gemini_client=MagicMock(),
+                                     verification_gate=MagicMock(), job_repository=MagicMock())
+    return service, by_id
+
+
+@pytest.mark.asyncio
+async def test_duplicates_far_apart_in_the_stream_are_found():
+    rng = np.random.default_rng(0)
+    vectors = [_unit(rng, 48) for _ in range(600)]
+    # The old windowed pass compared only memories within the same 50-row window
+    vectors[530] = _near(rng, vectors[12], 0.99)
+    vectors[401] = _near(rng, vectors[77], 0.97)
+    memories = [_memory(i, v) for i, v in enumerate(vectors)]
+    service, by_id = _service(memories)
+
+    removed = await service.deduplicate_memories("u1")
+
+    assert removed == 2
+    assert by_id["m0530"].is_archived and by_id["m0530"].metadata["duplicate_of"] == "m0012"
+    assert by_id["m0401"].is_archived and by_id["m0401"].metadata["duplicate_of"] == "m0077"
+    assert by_id["m0401"].metadata["deduplication_type"] == "semantic"
+    assert sum(m.is_archived for m in memories) == 2
+
+
+@pytest.mark.asyncio
+async def test_long_term_original_is_kept_and_models_are_not_mixed():
+    rng = np.random.default_rng(1)
+    base = _unit(rng, 32)
+    kept = _unit(rng, 32)
+    memories = [
+        _memory(0, _near(rng, base, 0.99)),
+        _memory(1, base, tier=MemoryTier.LONG_TERM),
+        _memory(2, _near(rng, base, 0.99), model="other"),
+        _memory(3, _unit(rng, 32), tier=MemoryTier.LONG_TERM),
+        _memory(4, _near(rng, kept, 0.99), tier=MemoryTier.LONG_TERM),
+        _memory(5, kept, tier=MemoryTier.LONG_TERM),
+    ]
+    service, _ = _service(memories)
+
+    report = await service.find_semantic_duplicates("u1")
+
+    # The older working memory duplicates a newer long-term one; long-term pairs are never archived
+    assert [(d, o) for d, o, _ in report.duplicates] == [("m0000", "m0001")]
+    assert report.scanned == 6
+
+
+@pytest.mark.asyncio
+async def test_incremental_run_checks_only_new_memories():
+    rng = np.random.default_rng(2)
+    vectors = [_unit(rng, 32) for _ in range(300)]
+    vectors[40] = _near(rng, vectors[10], 0.99)     # old pair: skipped incrementally
+    vectors[250] = _near(rng, vectors[20], 0.99)    # new duplicate of an old memory
+    vectors[290] = _near(rng, vectors[260], 0.99)   # pair among new memories
+    service, _ = _service([_memory(i, v) for i, v in enumerate(vectors)])
+
+    full = await service.find_semantic_duplicates("u1")
+    incremental = await service.find_semantic_duplicates("u1", since=BASE + timedelta(minutes=200))
+
+    assert {d for d, _, _ in full.duplicates} == {"m0040", "m0250", "m0290"}
+    assert [(d, o) for d, o, _ in incremental.duplicates] == [("m0250", "m0020"), ("m0290", "m0260")]
+    assert incremental.checked == 100 and incremental.candidate_pairs < full.candidate_pairs
@@ -0,0 +1,135 @@
+import asyncio
+import json
+from datetime import datetime, timezone
+from typing import Optional
+
+import pytest
+
+from khala.application.services.hybrid_search_service import HybridSearchService
+from khala.application.services.intent_classifier import IntentClassifier
+from khala.application.services.query_expansion_service import QueryExpansionService
+from khala.application.services.search_pipeline import StageBudgets
+from khala.application.services.translation_service import TranslationService
+from khala.domain.memory.entities import Memory, MemoryTier
+from khala.domain.memory.value_objects import ImportanceScore
+
+NOW = datetime(2025, 1, 1, tzinfo=timezone.utc)
+# Deadlines no stage of the ungated stubs can miss
+GENEROUS = StageBudgets(intent=60, translation=60, expansion=60, retrieval=60)
+
+CONTENTS = [
+    "paris is the capital of france",
+    "the eiffel tower stands in paris",
+    "berlin is the capital of germany",
+    "french cuisine uses butter",
+    "la capitale de la france",
+]
+
+
+class StubGeminiClient:
+    """Answers classification, translation and expansion prompts, once ``gate`` is set if one is given."""
+
+    def __init__(self, gate: Optional[asyncio.Event] = None):
+        self.gate = gate
+        self.calls = 0
+
+    async def generate_text(self, prompt, task_type="generation", temperature=0.7, model_id=None, **kwargs):
+        self.calls += 1
+        if self.gate is not None:
+            await self.gate.wait()
+        await asyncio.sleep(0)
+        if "classify its intent" in prompt:
+            content = json.dumps({"intent": "FACTUAL", "confidence": 0.9, "reasoning": "stub"})
+        elif "Detect the language" in prompt:
+            foreign = "capitale" in prompt
+            content = json.dumps({
+                "detected_language": "French" if foreign else "English",
+                "translated_text": "capital of france" if foreign else prompt.split('"')[1],
+            })
+        else:
+            content = "eiffel tower\nfrench cuisine"
+        return {"content": content}
+
+
+class _Embeddings:
+    async def get_embedding(self, text):
+        await asyncio.sleep(0)
+        return text  # The repository below matches on the text itself
+
+
+class _Repository:
+    def __init__(self):
+        self.memories = [
+            Memory(id=f"memory:m{i}", user_id="u1", content=content, tier=MemoryTier.WORKING,
+                   importance=ImportanceScore(0.5), created_at=NOW)
+            for i, content in enumerate(CONTENTS)
+        ]
+
+    def _matching(self, text, top_k):
+        words = set(text.lower().split()) - {"the", "of", "is", "la", "de"}
+        return [m for m in self.memories if words & set(m.content.split())][:top_k]
+
+    async def search_by_vector(self, embedding, user_id, top_k, filters=None, projection=None):
+        await asyncio.sleep(0)
+        return self._matching(embedding, top_k)
+
+    async def search_by_text(self, query_text, user_id, top_k, filters=None, projection=None):
+        await asyncio.sleep(0)
+        return self._matching(query_text, top_k)
+
+
+def _service(gemini, speculative, budgets=None):
+    return HybridSearchService(
+        memory_repository=_Repository(),
+        embedding_service=_Embeddings(),
+        query_expansion_service=QueryExpansionService(gemini),
+        intent_classifier=IntentClassifier(gemini),
+        translation_service=TranslationService(gemini),
+        speculative=speculative,
+        stage_budgets=budgets,
+    )
+
+
+@pytest.mark.asyncio
+async def test_speculative_search_merges_stage_results():
+    query = "la capitale de la france"
+    sequential = await _service(StubGeminiClient(), speculative=False).search(query, "u1", expand_query=True)
+    service = _service(StubGeminiClient(), speculative=True, budgets=GENEROUS)
+    speculative = await service.search(query, "u1", expand_query=True)
+
+    # Translation and expansion hits are merged with the raw-query hits
+    assert {m.content for m in sequential} <= {m.content for m in speculative}
+    assert "paris is the capital of france" in {m.content for m in speculative}
+    assert "the eiffel tower stands in paris" in {m.content for m in speculative}
+    assert all(service.stage_timer.stats[stage]["used"] == 1 for stage in ("intent", "translation", "expansion"))
+
+    # English queries are not re-retrieved after translation
+    await service.search("capital of germany", "u1")
+    assert service.stage_timer.stats["translation"]["skipped"] == 1
+
+
+@pytest.mark.asyncio
+async def test_stages_missing_their_deadline_are_dropped():
+    # LLM answers are held back until the gate opens, so every stage misses its deadline
+    gate = asyncio.Event()
+    gemini = StubGeminiClient(gate)
+    service = _service(gemini, speculative=True,
+                       budgets=StageBudgets(intent=0.01, translation=0.01, expansion=0.01))
+
+    results = await service.search("capital of france", "u1", expand_query=True)
+
+    assert [m.content for m in results][:1] == ["paris is the capital of france"]
+    assert all(service.stage_timer.stats[stage]["timed_out"] == 1 for stage in ("intent", "translation", "expansion"))
+    assert all(service.stage_timer.stats[stage]["used"] == 0 for stage in ("intent", "translation", "expansion"))
+
+    # Per-call override back to the sequential pipeline waits for every stage
+    calls = gemini.calls
+    search = asyncio.ensure_future(service.search("capital of france", "u1", expand_query=True, speculative=False))
+    for _ in range(20):
+        await asyncio.sleep(0)
+    assert not search.done() and gemini.calls == calls + 1
+
+    gate.set()
+    assert await search
+    assert gemini.calls == calls + 3
+    assert all(service.stage_timer.stats[stage]["timed_out"] == 1 for stage in ("intent", "translation", "expansion"))
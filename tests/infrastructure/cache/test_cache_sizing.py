@@ -0,0 +1,64 @@
+import sys
+
+import pytest
+
+from khala.domain.memory.entities import Memory, MemoryTier
+from khala.domain.memory.value_objects import EmbeddingVector, ImportanceScore
+from khala.infrastructure.cache.cache_manager import L1MemoryCache
+from khala.infrastructure.cache.sizing import FLOAT_OBJECT_BYTES, SizeEstimator
+
+
+def _memory(content: str, dims: int = 8) -> Memory:
+    return Memory(
+        user_id="u1",
+        content=content,
+        tier=MemoryTier.WORKING,
+        importance=ImportanceScore(0.5),
+        embedding=EmbeddingVector([0.1] * dims),
+    )
+
+
+def test_embedding_estimate_counts_float_objects():
+    estimator = SizeEstimator()
+    small = estimator.estimate(EmbeddingVector([0.1] * 10))
+    large = estimator.estimate(EmbeddingVector([0.1] * 110))
+
+    assert large - small >= 100 * FLOAT_OBJECT_BYTES
+
+
+def test_memory_estimate_grows_with_content_and_embedding():
+    estimator = SizeEstimator()
+    base = estimator.estimate(_memory("short"))
+
+    assert estimator.estimate(_memory("x" * 10_005)) - base >= 10_000
+    assert estimator.estimate(_memory("short", dims=768)) > base + 700 * FLOAT_OBJECT_BYTES
+
+
+def test_large_lists_are_sampled_and_extrapolated():
+    estimator = SizeEstimator(sample_size=4)
+    values = ["a" * 100] * 1000
+    estimate = estimator.estimate(values)
+
+    assert estimate == sys.getsizeof(values) + 1000 * sys.getsizeof("a" * 100)
+
+
+def test_register_custom_estimator_applies_to_subclasses():
+    class Blob:
+        pass
+
+    class BigBlob(Blob):
+        pass
+
+    estimator = SizeEstimator()
+    estimator.register(Blob, lambda value, depth: 4096)
+
+    assert estimator.estimate(BigBlob()) == 4096
+    assert estimator.estimate([BigBlob(), BigBlob()]) == sys.getsizeof([1, 2]) + 8192
+
+
+@pytest.mark.asyncio
+async def test_l1_uses_pluggable_sizer():
+    cache = L1MemoryCache(max_memory_mb=1, ttl_seconds=60, sizer=lambda value: 1000)
+    await cache.put("a", object())
+
+    assert cache.total_size_bytes == sys.getsizeof("a") + 1000
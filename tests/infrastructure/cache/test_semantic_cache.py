@@ -0,0 +1,129 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from khala.application.services.hybrid_search_service import HybridSearchService
+from khala.domain.memory.entities import Memory, MemoryTier
+from khala.domain.memory.value_objects import EmbeddingVector, ImportanceScore
+from khala.infrastructure.cache.cache_manager import CacheManager
+from khala.infrastructure.cache.semantic_cache import SemanticResultCache
+
+
+def _vec(*values: float) -> EmbeddingVector:
+    return EmbeddingVector(list(values))
+
+
+def test_exact_and_near_hits_within_radius():
+    cache = SemanticResultCache(similarity_threshold=0.95)
+    scope = cache.make_scope({"tier": "working"}, top_k=5)
+
+    assert cache.store("u1", scope, _vec(0.6, 0.8, 0.0), ["r1"], compute_ms=40.0, generation=0)
+
+    assert cache.lookup("u1", scope, _vec(0.6, 0.8, 0.0)) == ["r1"]
+    assert cache.lookup("u1", scope, _vec(0.61, 0.79, 0.01)) == ["r1"]
+    assert cache.lookup("u1", scope, _vec(0.0, 0.0, 1.0)) is None
+
+    stats = cache.get_stats()
+    assert stats["exact_hits"] == 1
+    assert stats["near_hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["saved_latency_ms"] == pytest.approx(80.0)
+
+
+def test_scopes_and_users_are_isolated():
+    cache = SemanticResultCache()
+    scope_a = cache.make_scope({"tier": "working"}, top_k=5)
+    scope_b = cache.make_scope({"tier": "working"}, top_k=10)
+    cache.store("u1", scope_a, _vec(1.0, 0.0), ["r1"], compute_ms=1.0, generation=0)
+
+    assert cache.lookup("u1", scope_b, _vec(1.0, 0.0)) is None
+    assert cache.lookup("u2", scope_a, _vec(1.0, 0.0)) is None
+
+
+def test_invalidation_drops_entries_and_rejects_stale_stores():
+    cache = SemanticResultCache()
+    scope = cache.make_scope(None)
+    generation = cache.generation("u1")
+    cache.store("u1", scope, _vec(1.0, 0.0), ["old"], compute_ms=1.0, generation=generation)
+
+    cache.invalidate_user("u1")
+
+    assert cache.lookup("u1", scope, _vec(1.0, 0.0)) is None
+    # A search that started before the write must not repopulate the cache
+    assert not cache.store("u1", scope, _vec(1.0, 0.0), ["old"], compute_ms=1.0, generation=generation)
+    assert cache.get_stats()["stale_stores_skipped"] == 1
+
+
+def test_entries_expire_after_ttl():
+    cache = SemanticResultCache(ttl_seconds=10)
+    scope = cache.make_scope(None)
+    cache.store("u1", scope, _vec(1.0, 0.0), ["r"], compute_ms=1.0, generation=0)
+    for bucket in cache._scopes.values():
+        for entry in bucket.entries.values():
+            entry.created_at -= 11
+
+    assert cache.lookup("u1", scope, _vec(1.0, 0.0)) is None
+
+
+@pytest.mark.asyncio
+async def test_hybrid_search_reuses_ranking_until_user_writes():
+    memory = Memory(user_id="u1", content="deploy steps", tier=MemoryTier.WORKING,
+                    importance=ImportanceScore(0.5))
+    repo = MagicMock()
+    repo.search_by_vector = AsyncMock(return_value=[memory])
+    repo.search_by_text = AsyncMock(return_value=[memory])
+    embeddings = MagicMock()
+    embeddings.get_embedding = AsyncMock(return_value=_vec(0.6, 0.8))
+
+    cache = SemanticResultCache()
+    service = HybridSearchService(repo, embeddings, result_cache=cache)
+
+    first = await service.search("how do I deploy", "u1", auto_detect_intent=False)
+    second = await service.search("how do i deploy?", "u1", auto_detect_intent=False)
+
+    assert first == second == [memory]
+    assert repo.search_by_vector.await_count == 1
+    assert repo.search_by_text.await_count == 1
+    # The query embedding is computed once per search and reused for retrieval
+    assert embeddings.get_embedding.await_count == 2
+
+    cache.invalidate_user("u1")
+    await service.search("how do I deploy", "u1", auto_detect_intent=False)
+    assert repo.search_by_vector.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_cache_manager_semantic_cache_serves_search_and_reports_stats():
+    memory = Memory(user_id="u1", content="deploy steps", tier=MemoryTier.WORKING,
+                    importance=ImportanceScore(0.5))
+    repo = MagicMock()
+    repo.search_by_vector = AsyncMock(return_value=[memory])
+    repo.search_by_text = AsyncMock(return_value=[memory])
+    embeddings = MagicMock()
+    embeddings.get_embedding = AsyncMock(return_value=_vec(0.6, 0.8))
+    manager = CacheManager()
+    service = HybridSearchService(repo, embeddings, cache_manager=manager)
+
+    await service.search("how do I deploy", "u1", auto_detect_intent=False)
+    await service.search("how do I deploy", "u1", auto_detect_intent=False)
+
+    stats = manager.get_metrics()["semantic"]
+    assert stats["misses"] == 1 and stats["exact_hits"] + stats["near_hits"] == 1
+    assert stats["stores"] == 1
+    await manager.clear_all()
+    assert manager.get_metrics()["semantic"]["entries"] == 0
+
+
+@pytest.mark.asyncio
+async def test_client_write_hook_invalidates_user():
+    from khala.infrastructure.surrealdb.client import SurrealConfig, SurrealDBClient
+
+    client = SurrealDBClient(SurrealConfig(url="ws://mock", namespace="n", database="d", token="t"))
+    cache = SemanticResultCache()
+    HybridSearchService(MagicMock(), MagicMock(), db_client=client, result_cache=cache)
+    HybridSearchService(MagicMock(), MagicMock(), db_client=client, result_cache=cache)
+    assert len(client._memory_write_hooks) == 1
+
+    memory = Memory(user_id="u1", content="x", tier=MemoryTier.WORKING, importance=ImportanceScore(0.5))
+    await client.update_memory(memory, connection=AsyncMock())
+
+    assert cache.generation("u1") == 1
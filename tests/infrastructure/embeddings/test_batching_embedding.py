@@ -0,0 +1,75 @@
+import asyncio
+import unittest
+from typing import List
+
+from khala.domain.memory.value_objects import EmbeddingVector
+from khala.domain.ports.embedding_service import EmbeddingService
+from khala.infrastructure.embeddings.batching_embedding import BatchingEmbeddingService
+
+
+class _RecordingEmbedding(EmbeddingService):
+    def __init__(self, fail: bool = False):
+        self.batches: List[List[str]] = []
+        self.fail = fail
+
+    async def get_embedding(self, text: str) -> EmbeddingVector:
+        return (await self.get_embeddings([text]))[0]
+
+    async def get_embeddings(self, texts: List[str]) -> List[EmbeddingVector]:
+        self.batches.append(list(texts))
+        await asyncio.sleep(0)
+        if self.fail:
+            raise RuntimeError("model down")
+        return [EmbeddingVector([len(t) / 10, 1.0]) for t in texts]
+
+
+class TestBatchingEmbeddingService(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrent_requests_share_one_batch_and_dedupe(self):
+        inner = _RecordingEmbedding()
+        service = BatchingEmbeddingService(inner, max_batch_size=64, max_wait_ms=5)
+
+        results = await asyncio.gather(*(service.get_embedding(t) for t in ["a", "bb", "a", "ccc"]))
+
+        self.assertEqual(inner.batches, [["a", "bb", "ccc"]])
+        self.assertEqual([r.values[0] for r in results], [0.1, 0.2, 0.1, 0.3])
+        stats = service.get_stats()
+        self.assertEqual(stats["deduplicated"], 1)
+        self.assertEqual(stats["batches"], 1)
+
+    async def test_full_batch_dispatches_without_waiting(self):
+        inner = _RecordingEmbedding()
+        service = BatchingEmbeddingService(inner, max_batch_size=2, max_wait_ms=10_000)
+
+        results = await asyncio.wait_for(
+            asyncio.gather(*(service.get_embedding(t) for t in ["a", "b", "c", "d"])), timeout=1
+        )
+
+        self.assertEqual(len(results), 4)
+        self.assertEqual(inner.batches, [["a", "b"], ["c", "d"]])
+
+    async def test_batch_failure_reaches_every_caller(self):
+        service = BatchingEmbeddingService(_RecordingEmbedding(fail=True), max_wait_ms=1)
+
+        results = await asyncio.gather(service.get_embedding("a"), service.get_embedding("b"),
+                                       return_exceptions=True)
+
+        self.assertTrue(all(isinstance(r, RuntimeError) for r in results))
+        self.assertEqual(service.get_stats()["failures"], 1)
+
+    async def test_cancelled_caller_does_not_cancel_shared_result(self):
+        service = BatchingEmbeddingService(_RecordingEmbedding(), max_wait_ms=5)
+        first = asyncio.ensure_future(service.get_embedding("same"))
+        second = asyncio.ensure_future(service.get_embedding("same"))
+        await asyncio.sleep(0)
+        first.cancel()
+
+        self.assertEqual((await second).values, [0.4, 1.0])
+
+    async def test_explicit_batches_are_deduplicated(self):
+        inner = _RecordingEmbedding()
+        service = BatchingEmbeddingService(inner)
+
+        results = await service.get_embeddings(["x", "y", "x"])
+
+        self.assertEqual(inner.batches, [["x", "y"]])
+        self.assertEqual(len(results), 3)
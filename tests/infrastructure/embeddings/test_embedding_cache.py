@@ -0,0 +1,125 @@
+import os
+import tempfile
+import unittest
+from typing import List
+
+from khala.domain.memory.value_objects import EmbeddingVector
+from khala.domain.ports.embedding_service import EmbeddingService
+from khala.infrastructure.embeddings.batching_embedding import BatchingEmbeddingService
+from khala.infrastructure.embeddings.embedding_cache import (
+    CachedEmbeddingService,
+    SQLiteEmbeddingStore,
+    text_digest,
+)
+
+
+class _CountingEmbedding(EmbeddingService):
+    model_name = "stub-model"
+
+    def __init__(self):
+        self.computed: List[str] = []
+
+    async def get_embedding(self, text: str) -> EmbeddingVector:
+        return (await self.get_embeddings([text]))[0]
+
+    async def get_embeddings(self, texts: List[str]) -> List[EmbeddingVector]:
+        self.computed.extend(texts)
+        return [EmbeddingVector([len(t) / 10, 0.5], model=self.model_name, version="v1") for t in texts]
+
+
+class _UnnamedEmbedding(_CountingEmbedding):
+    """Exposes no model attribute; only its vectors carry provenance."""
+
+    model_name = None
+
+    async def get_embeddings(self, texts: List[str]) -> List[EmbeddingVector]:
+        self.computed.extend(texts)
+        return [EmbeddingVector([len(t) / 10, 0.5], model="hidden-model", version="v3") for t in texts]
+
+
+class TestCachedEmbeddingService(unittest.IsolatedAsyncioTestCase):
+    async def test_front_cache_hits_and_batch_dedupe(self):
+        inner = _CountingEmbedding()
+        service = CachedEmbeddingService(inner)
+
+        first = await service.get_embeddings(["a", "bb", "a"])
+        second = await service.get_embedding("bb")
+
+        self.assertEqual(inner.computed, ["a", "bb"])
+        self.assertEqual([v.values[0] for v in first], [0.1, 0.2, 0.1])
+        self.assertEqual(second.values, [0.2, 0.5])
+        stats = service.get_stats()
+        self.assertEqual(service.model, "stub-model")
+        self.assertEqual(stats["misses"], 2)
+        self.assertEqual(stats["front_hits"], 1)
+
+    async def test_back_store_survives_restart_as_float32_bytes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "emb.sqlite")
+            store = SQLiteEmbeddingStore(path)
+            await CachedEmbeddingService(_CountingEmbedding(), store=store).get_embedding("hello")
+            store.close()
+
+            inner = _CountingEmbedding()
+            reopened = SQLiteEmbeddingStore(path)
+            service = CachedEmbeddingService(inner, store=reopened)
+            vector = await service.get_embedding("hello")
+
+            self.assertEqual(inner.computed, [])
+            self.assertAlmostEqual(vector.values[0], 0.5, places=6)
+            self.assertEqual(vector.model, "stub-model")
+            self.assertEqual(service.get_stats()["back_hits"], 1)
+            blob = reopened._conn.execute("SELECT vector FROM embedding_cache").fetchone()[0]
+            self.assertEqual(len(blob), 2 * 4)
+            reopened.close()
+
+    async def test_invalidation_is_scoped_to_one_model(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = SQLiteEmbeddingStore(os.path.join(tmp, "emb.sqlite"))
+            old = CachedEmbeddingService(_CountingEmbedding(), model="old", store=store)
+            new = CachedEmbeddingService(_CountingEmbedding(), model="new", store=store)
+            await old.get_embedding("x")
+            await new.get_embedding("x")
+
+            await old.invalidate_model()
+
+            self.assertEqual(store.count(), 1)
+            await new.get_embedding("x")
+            self.assertEqual(new.inner.computed, ["x"])
+            await old.get_embedding("x")
+            self.assertEqual(old.inner.computed, ["x", "x"])
+            store.close()
+
+    async def test_lru_front_is_bounded(self):
+        service = CachedEmbeddingService(_CountingEmbedding(), max_entries=2)
+        for text in ["a", "b", "c"]:
+            await service.get_embedding(text)
+
+        self.assertEqual(service.get_stats()["entries"], 2)
+        await service.get_embedding("a")
+        self.assertEqual(service.inner.computed, ["a", "b", "c", "a"])
+
+    async def test_hits_keep_the_provenance_of_the_computed_vectors(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "emb.sqlite")
+            for inner in (BatchingEmbeddingService(_CountingEmbedding()), _UnnamedEmbedding()):
+                expected = ("stub-model", "v1") if isinstance(inner, BatchingEmbeddingService) else ("hidden-model", "v3")
+                store = SQLiteEmbeddingStore(path)
+                await CachedEmbeddingService(inner, store=store).get_embeddings(["hello", "world"])
+                store.close()
+
+                reopened = SQLiteEmbeddingStore(path)
+                service = CachedEmbeddingService(inner, store=reopened)
+                await service.get_embedding("warm")
+                self.assertEqual((service.model, service.version), expected)
+                vector = await service.get_embedding("hello")
+                self.assertEqual((vector.model, vector.version), expected)
+                self.assertEqual(service.get_stats()["back_hits"], 1)
+                reopened.close()
+
+            # A pinned key keeps its name; hits still report the vector's own model
+            store = SQLiteEmbeddingStore(path)
+            await CachedEmbeddingService(_CountingEmbedding(), model="pinned", store=store).get_embedding("x")
+            stored = store.get_many([("pinned", "v1", text_digest("x"))])
+            self.assertEqual([(v.model, v.version) for v in stored.values()], [("stub-model", "v1")])
+            store.close()
@@ -0,0 +1,89 @@
+import asyncio
+import os
+
+import numpy as np
+import pytest
+
+from khala.infrastructure.executors.execution_lanes import (
+    ExecutionLane,
+    ExecutionLanes,
+    LaneConfig,
+    LaneKind,
+)
+from khala.infrastructure.vector.clustering import assign_to_centroids, embedding_moments, fit_centroids
+
+
+def _segments():
+    return {name for name in os.listdir("/dev/shm") if name.startswith("psm_")} if os.path.isdir("/dev/shm") else set()
+
+
+@pytest.fixture(scope="module")
+def process_lane():
+    lane = ExecutionLane("analytics", LaneConfig(LaneKind.PROCESS, 1), min_shared_bytes=1024)
+    yield lane
+    lane.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_process_lane_moves_arrays_through_shared_memory(process_lane):
+    rng = np.random.default_rng(0)
+    page = rng.standard_normal((600, 16))
+    centroids = rng.standard_normal((4, 16))
+    before = _segments()
+
+    labels, distances = await process_lane.run(assign_to_centroids, page, centroids=centroids)
+    expected_labels, expected_distances = assign_to_centroids(page, centroids)
+    np.testing.assert_array_equal(labels, expected_labels)
+    np.testing.assert_allclose(distances, expected_distances)
+    # The page and both result arrays were shared; the 512-byte centroids were pickled
+    assert process_lane.stats["shared_bytes"] == page.nbytes + labels.nbytes + distances.nbytes
+
+    column_sums, squared = await process_lane.run(embedding_moments, page)
+    np.testing.assert_allclose(column_sums, page.sum(axis=0))
+    assert squared == pytest.approx(float((page ** 2).sum()))
+
+    # Kernel errors propagate and the input segment is still released
+    with pytest.raises(ValueError):
+        await process_lane.run(fit_centroids, page[:3], 8)
+    assert _segments() == before
+
+
+@pytest.mark.asyncio
+async def test_thread_and_asyncio_lanes_match_and_limit_jobs():
+    page = np.random.default_rng(1).standard_normal((200, 8))
+    for kind in (LaneKind.ASYNCIO, LaneKind.THREAD):
+        lane = ExecutionLane(kind.value, LaneConfig(kind, 1))
+        labels, _ = await lane.run(assign_to_centroids, page, page[:3])
+        assert labels[:3].tolist() == [0, 1, 2]
+        assert lane.stats["calls"] == 1 and lane.stats["shared_bytes"] == 0
+
+        running, peak = 0, 0
+
+        async def job():
+            nonlocal running, peak
+            async with lane.slot():
+                running += 1
+                peak = max(peak, running)
+                await asyncio.sleep(0.01)
+                running -= 1
+
+        await asyncio.gather(*(job() for _ in range(3)))
+        assert peak == 1 and lane.stats["jobs"] == 3
+        lane.shutdown()
+
+
+def test_job_types_map_to_configured_lanes():
+    lanes = ExecutionLanes(
+        lanes={"regex": LaneConfig(LaneKind.THREAD, 2)},
+        job_lanes={"vector_clustering": "analytics", "entity_extraction": "regex"},
+        default_size=3,
+    )
+    assert lanes.for_job("vector_clustering").kind == LaneKind.PROCESS
+    assert lanes.for_job("entity_extraction").size == 2
+    assert lanes.for_job("consolidation").kind == LaneKind.ASYNCIO
+    assert lanes.get_stats()["default"]["size"] == 3
+
+    with pytest.raises(ValueError):
+        ExecutionLanes(job_lanes={"graph_analytics": "gpu"})
+    with pytest.raises(ValueError):
+        ExecutionLane("empty", LaneConfig(LaneKind.THREAD, 0))
@@ -0,0 +1,139 @@
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from khala.application.services.memory_lifecycle import MemoryLifecycleService
+from khala.domain.memory.entities import Memory, MemoryTier
+from khala.domain.memory.value_objects import ImportanceScore
+from khala.infrastructure.persistence.surrealdb_repository import SurrealDBMemoryRepository
+from khala.infrastructure.surrealdb.client import SurrealConfig, SurrealDBClient
+
+
+class _MemoryTable:
+    """Just enough of SurrealDB for the bulk create statements."""
+
+    def __init__(self, fail_inserts: bool = False):
+        self.rows: Dict[str, Dict[str, Any]] = {}
+        self.audit: List[Dict[str, Any]] = []
+        self.queries: List[str] = []
+        self.fail_inserts = fail_inserts
+
+    async def query(self, sql: str, params: Optional[Dict[str, Any]] = None):
+        params = params or {}
+        self.queries.append(sql.split()[0])
+        if "content_hash INSIDE" in sql:
+            wanted = set(params["hashes"])
+            return [{"id": f"memory:{k}", "content_hash": r["content_hash"]}
+                    for k, r in self.rows.items() if r["content_hash"] in wanted]
+        if sql.startswith("INSERT INTO memory"):
+            if self.fail_inserts:
+                raise RuntimeError("index content_hash_index already contains a value")
+            for row in params["rows"]:
+                self.rows[row["id"]] = row
+            return params["rows"]
+        if sql.startswith("INSERT INTO audit_log"):
+            self.audit.extend(params["rows"])
+            return params["rows"]
+        if sql.startswith("CREATE type::thing('memory'"):
+            data = params["content_data"]
+            if data["content"] == "poison":
+                raise RuntimeError("field content rejected")
+            self.rows[params["id"]] = dict(data, id=params["id"])
+            return [data]
+        if sql.startswith("UPDATE"):
+            for key in params:
+                if key.startswith("id_"):
+                    self.rows[params[key]].update(params[f"data_{key[3:]}"])
+            return []
+        raise AssertionError(f"unexpected query: {sql}")
+
+
+def _client(table: _MemoryTable) -> SurrealDBClient:
+    client = SurrealDBClient(SurrealConfig(url="ws://mock", namespace="n", database="d", token="t"))
+
+    @asynccontextmanager
+    async def connection():
+        yield table
+
+    client.get_connection = connection
+    return client
+
+
+def _memory(content: str, user_id: str = "u1") -> Memory:
+    return Memory(user_id=user_id, content=content, tier=MemoryTier.WORKING, importance=ImportanceScore(0.5))
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_dedupes_in_batch_and_merges_existing_hashes():
+    table = _MemoryTable()
+    client = _client(table)
+    existing = _memory("already stored")
+    await client.create_memory(existing)
+    events = []
+    client.register_memory_write_hook(events.append)
+    table.queries.clear()
+
+    batch = [_memory(f"note {i}") for i in range(5)] + [_memory("note 1"), _memory("already stored")]
+    results = await client.create_memories_bulk(batch, batch_size=3)
+
+    assert [r.status for r in results] == ["created"] * 5 + ["duplicate", "merged"]
+    assert results[5].memory_id == batch[1].id
+    assert results[6].memory_id == existing.id
+    assert [r.index for r in results] == list(range(7))
+    assert len(table.rows) == 6
+    # 6 distinct hashes in batches of 3: lookup + insert each, plus one merge statement
+    assert table.queries == ["SELECT", "INSERT", "SELECT", "INSERT", "UPDATE"]
+    assert sorted(e.action for e in events) == ["create"] * 5 + ["update"]
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_falls_back_to_per_item_errors():
+    table = _MemoryTable(fail_inserts=True)
+    client = _client(table)
+
+    results = await client.create_memories_bulk([_memory("fine"), _memory("poison"), _memory("also fine")])
+
+    assert [r.status for r in results] == ["created", "failed", "created"]
+    assert "rejected" in results[1].error and results[1].memory_id is None
+    assert len(table.rows) == 2
+
+
+@pytest.mark.asyncio
+async def test_repository_bulk_writes_one_audit_insert_per_batch():
+    table = _MemoryTable()
+    repo = SurrealDBMemoryRepository(_client(table))
+
+    results = await repo.create_bulk([_memory(f"m{i}") for i in range(5)] + [_memory("m0")], batch_size=4)
+
+    assert [r.index for r in results] == list(range(6))
+    assert [r.status for r in results] == ["created"] * 5 + ["merged"]
+    assert table.queries.count("INSERT") == 2 + 2  # memory + audit_log per batch
+    assert len(table.audit) == 6
+    assert table.audit[-1]["action"] == "update"
+
+
+@pytest.mark.asyncio
+async def test_lifecycle_bulk_ingest_reports_check_failures_per_item():
+    repo = MagicMock()
+    repo.create_bulk = AsyncMock(side_effect=lambda memories, batch_size: [
+        MagicMock(index=i, memory_id=m.id, status="created", ok=True) for i, m in enumerate(memories)
+    ])
+    service = MemoryLifecycleService(repository=repo, gemini_client=MagicMock(), verification_gate=MagicMock(),
+                                     job_repository=MagicMock())
+
+    async def prepare(memory, check_privacy, check_quality):
+        if memory.content == "bad":
+            raise ValueError("privacy service unavailable")
+
+    service._prepare_for_ingest = prepare
+    memories = [_memory("a"), _memory("bad"), _memory("c")]
+
+    results = await service.ingest_memories_bulk(memories, batch_size=10)
+
+    assert [r.status for r in results] == ["created", "failed", "created"]
+    assert [r.index for r in results] == [0, 1, 2]
+    assert results[1].error == "privacy service unavailable"
+    written = repo.create_bulk.call_args.args[0]
+    assert [m.content for m in written] == ["a", "c"]
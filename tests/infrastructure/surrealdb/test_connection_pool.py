@@ -0,0 +1,114 @@
+import asyncio
+
+import pytest
+
+from khala.infrastructure.surrealdb.pool import ConnectionPool, LatencyHistogram, PoolTimeoutError
+
+
+class _FakeConnection:
+    def __init__(self, number: int):
+        self.number = number
+        self.alive = True
+        self.closed = False
+
+    async def query(self, sql, params=None):
+        if not self.alive:
+            raise ConnectionError("socket closed")
+        await asyncio.sleep(0)
+        return [{"status": "OK", "result": True}]
+
+    async def close(self):
+        self.closed = True
+
+
+class _Factory:
+    def __init__(self):
+        self.opened = []
+
+    async def __call__(self):
+        await asyncio.sleep(0)
+        connection = _FakeConnection(len(self.opened))
+        self.opened.append(connection)
+        return connection
+
+
+@pytest.mark.asyncio
+async def test_prewarm_and_bounded_checkouts():
+    factory = _Factory()
+    pool = ConnectionPool(factory, min_size=3, max_size=5, ping_interval=0)
+    await pool.start()
+    assert len(factory.opened) == 3 and pool.size == 3
+
+    peak = 0
+
+    async def use():
+        nonlocal peak
+        async with pool.connection() as conn:
+            peak = max(peak, pool.size)
+            await conn.query("RETURN 1;")
+            await asyncio.sleep(0.001)
+
+    await asyncio.gather(*(use() for _ in range(50)))
+
+    assert peak == 5 and len(factory.opened) == 5
+    stats = pool.stats()
+    assert stats["size"] == 5 and stats["idle"] == 5 and stats["in_use"] == 0
+    assert stats["wait_time"]["count"] == 50 and stats["checkout_duration"]["count"] == 50
+    assert stats["wait_time"]["buckets"]["+Inf"] == 50
+    await pool.close()
+    assert all(c.closed for c in factory.opened)
+
+
+@pytest.mark.asyncio
+async def test_maintenance_evicts_idle_and_replaces_dead_connections():
+    factory = _Factory()
+    pool = ConnectionPool(factory, min_size=2, max_size=4, idle_timeout=0.01, ping_interval=0)
+    await pool.start()
+    async with pool.connection(), pool.connection(), pool.connection(), pool.connection():
+        pass
+    assert pool.size == 4
+
+    await asyncio.sleep(0.02)
+    factory.opened[0].alive = False
+    await pool.run_maintenance()
+
+    # Two long-idle connections closed down to min_size; a dead one replaced
+    stats = pool.stats()
+    assert stats["idle_evicted"] == 2 and pool.size == 2
+    assert all(c.alive for c in factory.opened if not c.closed)
+    assert sum(not c.closed for c in factory.opened) == 2
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_connection_errors_discard_and_timeouts_raise():
+    factory = _Factory()
+    pool = ConnectionPool(factory, min_size=1, max_size=1, ping_interval=0, acquire_timeout=0.01)
+    await pool.start()
+
+    with pytest.raises(ConnectionError):
+        async with pool.connection():
+            raise ConnectionError("reset by peer")
+    assert factory.opened[0].closed and pool.size == 0 and pool.stats()["discarded"] == 1
+
+    async with pool.connection():
+        with pytest.raises(PoolTimeoutError):
+            async with pool.connection():
+                pass
+    assert pool.stats()["acquire_timeouts"] == 1
+    # Ordinary errors leave the connection pooled
+    with pytest.raises(ValueError):
+        async with pool.connection():
+            raise ValueError("bad query")
+    assert pool.size == 1
+
+
+def test_histogram_quantiles():
+    histogram = LatencyHistogram()
+    for ms in range(1, 101):
+        histogram.observe(ms / 1000)
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == 100 and snapshot["max_ms"] == pytest.approx(100)
+    assert 25 <= snapshot["p50_ms"] <= 50
+    assert 90 <= snapshot["p95_ms"] <= 100
+    assert LatencyHistogram().snapshot()["p99_ms"] == 0.0
@@ -0,0 +1,124 @@
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from unittest.mock import AsyncMock
+
+import pytest
+
+from khala.domain.memory.entities import Memory, MemoryTier
+from khala.domain.memory.lifecycle import LifecycleRules
+from khala.domain.memory.repository import MemoryRepository
+from khala.domain.memory.value_objects import ImportanceScore
+from khala.infrastructure.persistence.surrealdb_repository import SurrealDBMemoryRepository
+from khala.infrastructure.surrealdb.client import SurrealConfig, SurrealDBClient
+
+
+class _PagedTable:
+    """Answers keyset page queries over an in-memory memory table."""
+
+    def __init__(self, rows: List[Dict[str, Any]]):
+        self.rows = {row["id"]: row for row in rows}
+        self.pages: List[Dict[str, Any]] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def query(self, sql: str, params: Optional[Dict[str, Any]] = None):
+        params = params or {}
+        assert "ORDER BY id LIMIT $limit" in sql and "OFFSET" not in sql
+        self.pages.append(dict(params))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            matched = []
+            for key in sorted(self.rows):
+                row = self.rows[key]
+                if "after" in params and key <= f"memory:{params['after']}":
+                    continue
+                if "user_id" in params and row["user_id"] != params["user_id"]:
+                    continue
+                if "tier" in params and row["tier"] != params["tier"]:
+                    continue
+                if "is_archived = false" in sql and row.get("is_archived"):
+                    continue
+                matched.append(row)
+            page = matched[:params["limit"]]
+            if not sql.startswith("SELECT * "):
+                wanted = sql[len("SELECT "):sql.index(" FROM")].split(", ")
+                page = [{name: row.get(name) for name in wanted} for row in page]
+            return [{"status": "OK", "result": page}]
+        finally:
+            self.in_flight -= 1
+
+
+def _row(client: SurrealDBClient, i: int, **overrides) -> Dict[str, Any]:
+    memory = Memory(
+        user_id="u1", content=f"note {i}", tier=MemoryTier.WORKING,
+        importance=ImportanceScore(0.5), embedding=None
+    )
+    row = client._serialize_memory(memory)
+    row["id"] = f"memory:{i:06d}"
+    row.update(overrides)
+    return row
+
+
+def _client(rows_for) -> SurrealDBClient:
+    client = SurrealDBClient(SurrealConfig(url="ws://mock", namespace="n", database="d", token="t"))
+    table = _PagedTable(rows_for(client))
+
+    @asynccontextmanager
+    async def connection():
+        yield table
+
+    client.get_connection = connection
+    client.table = table
+    return client
+
+
+@pytest.mark.asyncio
+async def test_keyset_cursor_walks_every_page_once():
+    client = _client(lambda c: [_row(c, i) for i in range(25)] + [_row(c, 99, is_archived=True)])
+
+    ids = [m.id async for m in client.iter_memories("u1", batch_size=10)]
+
+    assert ids == [f"{i:06d}" for i in range(25)]
+    # Three pages; each later page resumes after the last id of the previous one
+    assert [p.get("after") for p in client.table.pages] == [None, "000009", "000019"]
+    assert client.table.max_in_flight == 1
+
+
+@pytest.mark.asyncio
+async def test_field_projection_yields_rows_with_only_requested_columns():
+    client = _client(lambda c: [_row(c, i, tier="long_term" if i % 2 else "working") for i in range(6)])
+
+    rows = [r async for r in client.iter_memories("u1", tier="long_term", fields=["importance"], batch_size=2)]
+
+    assert [r["id"] for r in rows] == ["memory:000001", "memory:000003", "memory:000005"]
+    assert all(set(r) == {"id", "importance"} for r in rows)
+
+    with pytest.raises(ValueError):
+        [r async for r in client.iter_memories("u1", fields=["id; DELETE memory"])]
+
+
+@pytest.mark.asyncio
+async def test_abandoned_stream_cancels_prefetch():
+    client = _client(lambda c: [_row(c, i) for i in range(50)])
+
+    stream = client.iter_memories("u1", batch_size=10)
+    first = [await stream.__anext__() for _ in range(3)]
+    await stream.aclose()
+
+    assert [m.id for m in first] == ["000000", "000001", "000002"]
+    assert len(client.table.pages) <= 2
+
+
+@pytest.mark.asyncio
+async def test_streaming_decay_fallback_covers_more_than_one_thousand_memories():
+    # get_by_tier capped each tier at 1000 rows; the stream has no cap
+    client = _client(lambda c: [_row(c, i) for i in range(1203)])
+    repo = SurrealDBMemoryRepository(client)
+    repo.update = AsyncMock()
+
+    refreshed = await MemoryRepository.refresh_decay_scores(repo, "u1", LifecycleRules(), datetime.now(timezone.utc))
+
+    assert refreshed == 1203
+    assert repo.update.call_count == 1203
@@ -0,0 +1,118 @@
+import itertools
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from unittest.mock import MagicMock
+
+import pytest
+
+from khala.application.services.memory_lifecycle import MemoryLifecycleService
+from khala.domain.memory.entities import Memory, MemoryTier
+from khala.domain.memory.lifecycle import LifecycleRules
+from khala.domain.memory.services import DecayService
+from khala.domain.memory.value_objects import ImportanceScore
+from khala.infrastructure.persistence.surrealdb_repository import SurrealDBMemoryRepository
+from khala.infrastructure.surrealdb.client import SurrealConfig, SurrealDBClient
+
+
+class _RecordingConnection:
+    """Records statements and answers lifecycle UPDATEs with canned ids."""
+
+    def __init__(self, matched: int):
+        self.matched = matched
+        self.statements: List[Tuple[str, Dict[str, Any]]] = []
+
+    async def query(self, sql: str, params: Optional[Dict[str, Any]] = None):
+        sql = " ".join(sql.split())
+        self.statements.append((sql, params or {}))
+        if sql.startswith("RETURN array::len"):
+            return [{"status": "OK", "result": self.matched}]
+        if sql.startswith("UPDATE memory"):
+            return [{"status": "OK", "result": [f"memory:m{i}" for i in range(self.matched)]}]
+        return [{"status": "OK", "result": []}]
+
+
+def _service(matched: int):
+    client = SurrealDBClient(SurrealConfig(url="ws://mock", namespace="n", database="d", token="t"))
+    conn = _RecordingConnection(matched)
+
+    @asynccontextmanager
+    async def connection():
+        yield conn
+
+    client.get_connection = connection
+    events = []
+    client.register_memory_write_hook(events.append)
+    service = MemoryLifecycleService(
+        repository=SurrealDBMemoryRepository(client), gemini_client=MagicMock(),
+        verification_gate=MagicMock(), job_repository=MagicMock()
+    )
+    return service, conn, events
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("matched", [3, 5000])
+async def test_statement_count_does_not_grow_with_matched_rows(matched):
+    service, conn, events = _service(matched)
+
+    promoted = await service.promote_memories("u1")
+    stats = await service.decay_and_archive_memories("u1")
+
+    assert promoted == 2 * matched
+    assert stats == {"decayed": matched, "archived": matched}
+    # Two promotion UPDATEs, one decay UPDATE, one archive UPDATE, one audit INSERT after each id-returning UPDATE
+    kinds = [sql.split(" ")[0] for sql, _ in conn.statements]
+    assert kinds == ["UPDATE", "INSERT", "UPDATE", "INSERT", "RETURN", "UPDATE", "INSERT"]
+    assert len(conn.statements[1][1]["rows"]) == matched
+    assert {e.action for e in events} == {"promote", "archive"} and all(e.user_id == "u1" for e in events)
+
+
+@pytest.mark.asyncio
+async def test_update_parameters_come_from_the_memory_constants():
+    service, conn, _ = _service(1)
+
+    await service.promote_memories("u1")
+    await service.decay_and_archive_memories("u1")
+
+    # Short-term promotion runs first, so a memory advances at most one tier per run
+    (short_sql, short), _, (_, working), _, (_, decay), (archive_sql, archive), _ = conn.statements
+    assert (working["from_tier"], working["to_tier"]) == ("working", "short_term")
+    assert working["min_importance"] == Memory.PROMOTION_WORKING_IMPORTANCE
+    assert working["min_access_count"] == Memory.PROMOTION_WORKING_ACCESS_COUNT
+    age = datetime.fromisoformat(working["now"]) - datetime.fromisoformat(working["created_before"])
+    assert age == timedelta(hours=Memory.PROMOTION_WORKING_AGE_HOURS)
+
+    # Short-term promotion has no age or access bound
+    assert (short["from_tier"], short["to_tier"]) == ("short_term", "long_term")
+    assert short["min_importance"] == Memory.PROMOTION_SHORT_TERM_IMPORTANCE
+    assert "created_at" not in short_sql and "access_count" not in short_sql
+
+    assert decay["half_life_days"] == Memory.DECAY_HALF_LIFE_DAYS
+    assert archive["archive_importance"] == Memory.ARCHIVE_IMPORTANCE
+    assert archive["decay_archive_score"] == Memory.DECAY_ARCHIVE_SCORE
+    age = datetime.fromisoformat(archive["now"]) - datetime.fromisoformat(archive["archive_before"])
+    assert age == timedelta(days=Memory.ARCHIVE_AGE_DAYS)
+    assert "user_id = $user_id" in archive_sql and "is_archived = false" in archive_sql
+
+
+def test_rules_agree_with_entity_checks():
+    rules = LifecycleRules()
+    decay = DecayService()
+    now = datetime.now(timezone.utc)
+    grid = itertools.product(
+        [MemoryTier.WORKING, MemoryTier.SHORT_TERM, MemoryTier.LONG_TERM],
+        [0.05, 0.29, 0.5, 0.85, 0.95],
+        [timedelta(minutes=5), timedelta(hours=2), timedelta(days=20), timedelta(days=80), timedelta(days=120)],
+        [0, 3, 10],
+    )
+    for tier, importance, age, access_count in grid:
+        memory = Memory(user_id="u1", content="x", tier=tier, importance=ImportanceScore(importance),
+                        created_at=now - age, access_count=access_count)
+
+        promotion = next((r for r in rules.promotions if r.from_tier == tier), None)
+        assert (promotion is not None and promotion.matches(memory, now)) == memory.should_promote_to_next_tier()
+
+        score = rules.decay_score(importance, memory.created_at, now)
+        assert score == pytest.approx(memory.calculate_decay_score().value, rel=1e-6)
+        expected = memory.should_archive() or decay.should_archive_based_on_decay(memory)
+        assert rules.should_archive(memory, score, now) == expected
@@ -0,0 +1,134 @@
+import json
+import random
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+
+import pytest
+
+from khala.domain.memory.entities import Memory, MemoryTier
+from khala.domain.memory.repository import MemoryProjection
+from khala.domain.memory.value_objects import EmbeddingVector, ImportanceScore
+from khala.infrastructure.persistence.surrealdb_repository import SurrealDBMemoryRepository
+from khala.infrastructure.surrealdb.client import SurrealConfig, SurrealDBClient
+
+
+class _ProjectingTable:
+    """Applies SELECT column lists (including ``* OMIT``) and records payload bytes."""
+
+    def __init__(self):
+        self.rows: Dict[str, Dict[str, Any]] = {}
+        self.payload_bytes: List[int] = []
+        self.updates: List[Dict[str, Any]] = []
+
+    async def query(self, sql: str, params: Optional[Dict[str, Any]] = None):
+        params = params or {}
+        sql = " ".join(sql.split())
+        if sql.startswith("UPDATE"):
+            self.updates.append(params["updates"])
+            self.rows[f"memory:{params['id']}"].update(params["updates"])
+            return [{"status": "OK", "result": []}]
+
+        select, source = sql[len("SELECT "):].split(" FROM ", 1)
+        if source.startswith("memory "):
+            matched = [r for r in self.rows.values()
+                       if r["user_id"] == params["user_id"] and params["query_text"] in r["content"]]
+        else:
+            keys = [v for k, v in params.items() if k.startswith("id_")]
+            matched = [self.rows[f"memory:{k}"] for k in keys]
+
+        select, _, omit = select.partition(" OMIT ")
+        columns = [c.strip() for c in select.split(",")]
+        omitted = {c.strip() for c in omit.split(",")} if omit else set()
+        result = []
+        for row in matched:
+            if columns == ["*"]:
+                out = {k: v for k, v in row.items() if k not in omitted}
+            else:
+                out = {c: row[c] for c in columns if c in row}
+            result.append(out)
+        self.payload_bytes.append(len(json.dumps(result, default=str)))
+        return [{"status": "OK", "result": result}]
+
+
+def _repository(n: int = 40, dims: int = 768):
+    client = SurrealDBClient(SurrealConfig(url="ws://mock", namespace="n", database="d", token="t"))
+    table = _ProjectingTable()
+    rng = random.Random(7)
+    for i in range(n):
+        memory = Memory(
+            user_id="u1",
+            content=f"deploy note {i}: " + " ".join(rng.choice(["build", "ship", "rollback", "canary"]) for _ in range(60)),
+            tier=MemoryTier.WORKING,
+            importance=ImportanceScore(0.5),
+            embedding=EmbeddingVector([rng.uniform(-1, 1) for _ in range(dims)], model="m", version="1"),
+            versions=[{"content": f"older text {j}", "at": "2025-01-01T00:00:00"} for j in range(3)],
+            events=[{"type": "accessed", "at": "2025-01-01T00:00:00"} for _ in range(5)],
+        )
+        row = client._serialize_memory(memory)
+        row["id"] = f"memory:{memory.id}"
+        table.rows[row["id"]] = row
+
+    @asynccontextmanager
+    async def connection():
+        yield table
+
+    client.get_connection = connection
+    return SurrealDBMemoryRepository(client), table
+
+
+@pytest.mark.asyncio
+async def test_payload_bytes_per_projection():
+    repo, table = _repository()
+
+    sizes = {}
+    for projection in MemoryProjection:
+        table.payload_bytes.clear()
+        rows = await repo.client.search_memories_by_bm25("deploy", "u1", top_k=40, projection=projection)
+        assert len(rows) == 40
+        sizes[projection] = table.payload_bytes[-1]
+
+    assert sizes[MemoryProjection.WITH_EMBEDDING] > sizes[MemoryProjection.FULL] \
+        > sizes[MemoryProjection.SUMMARY] > sizes[MemoryProjection.ID_ONLY]
+    # A 768-d embedding dominates each row; ranking reads should be several times lighter
+    assert sizes[MemoryProjection.WITH_EMBEDDING] / sizes[MemoryProjection.SUMMARY] > 4
+    assert sizes[MemoryProjection.WITH_EMBEDDING] / sizes[MemoryProjection.FULL] > 3
+
+
+@pytest.mark.asyncio
+async def test_deferred_embeddings_load_in_one_batched_fetch():
+    repo, table = _repository(n=12, dims=16)
+
+    memories = await repo.search_by_text("deploy", "u1", top_k=12, projection=MemoryProjection.SUMMARY)
+    assert all(m.embedding is None and m.embedding_pending for m in memories)
+    queries_before = len(table.payload_bytes)
+
+    first = await memories[3].load_embedding()
+    assert len(table.payload_bytes) == queries_before + 1
+    for memory in memories:
+        stored = table.rows[f"memory:{memory.id}"]["embedding"]
+        assert memory.embedding.to_list() == pytest.approx(stored, abs=1e-6) and not memory.embedding_pending
+    assert first is memories[3].embedding
+
+    await memories[5].load_embedding()
+    assert len(table.payload_bytes) == queries_before + 1
+
+    full = await repo.search_by_text("deploy", "u1", top_k=12)
+    assert all(m.embedding is not None and not m.embedding_pending for m in full)
+
+
+@pytest.mark.asyncio
+async def test_update_after_summary_read_keeps_unread_columns():
+    repo, table = _repository(n=3, dims=8)
+    memory = (await repo.search_by_text("deploy", "u1", top_k=1, projection=MemoryProjection.SUMMARY))[0]
+
+    memory.tags = ["reviewed"]
+    await repo.client.update_memory(memory)
+
+    written = table.updates[-1]
+    assert written["tags"] == ["reviewed"]
+    assert not {"versions", "events", "embedding", "llm_cost"} & set(written)
+    stored = table.rows[f"memory:{memory.id}"]
+    assert len(stored["versions"]) == 3 and len(stored["embedding"]) == 8
+
+    with pytest.raises(ValueError):
+        await repo.search_by_text("deploy", "u1", projection=MemoryProjection.ID_ONLY)
@@ -0,0 +1,186 @@
+import asyncio
+import re
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+import pytest
+
+from khala.application.services.graph_cache_service import GraphCacheService
+from khala.domain.audit.entities import AuditLog
+from khala.infrastructure.persistence.audit_repository import AuditRepository
+from khala.infrastructure.surrealdb.client import SurrealConfig, SurrealDBClient
+from khala.infrastructure.surrealdb.pipeline import QueryPipeline
+
+ROUND_TRIP = 0.002
+
+
+class _RemoteStore:
+    """Answers multi-statement requests after one simulated round trip, like ``query_raw``."""
+
+    def __init__(self):
+        self.tables: Dict[str, Dict[str, Dict[str, Any]]] = {"memory": {}, "audit_log": {}, "cache_storage": {}}
+        self.requests: List[int] = []
+
+    def run(self, statement: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        if "BROKEN" in statement:
+            return {"status": "ERR", "result": "Parse error"}
+        table, param = re.search(r"type::thing\('(\w+)', \$(\w+)\)", statement).groups()
+        key = params[param]
+        if statement.startswith("SELECT"):
+            row = self.tables[table].get(key)
+            return {"status": "OK", "result": [dict(row, id=f"{table}:{key}")] if row else []}
+        if statement.startswith("DELETE"):
+            self.tables[table].pop(key, None)
+            return {"status": "OK", "result": []}
+        names = re.findall(r"(\w+): (?:type::datetime\()?\$(\w+)", statement)
+        row = {field: params[name] for field, name in names}
+        merge = re.search(r"MERGE \$(\w+)", statement)
+        if merge:
+            row = dict(self.tables[table].get(key, {}), **params[merge.group(1)])
+        self.tables[table][key] = row
+        return {"status": "OK", "result": [row]}
+
+
+class _Connection:
+    def __init__(self, store: _RemoteStore):
+        self.store = store
+
+    async def query_raw(self, query: str, params: Optional[Dict[str, Any]] = None):
+        await asyncio.sleep(ROUND_TRIP)
+        statements = [s.strip() for s in query.split(";") if s.strip()]
+        self.store.requests.append(len(statements))
+        if any("UNPARSEABLE" in s for s in statements):
+            return {"error": {"code": -32000, "message": "Parse error"}}
+        return {"result": [self.store.run(" ".join(s.split()), params or {}) for s in statements]}
+
+    async def query(self, query: str, params: Optional[Dict[str, Any]] = None):
+        # Like the SDK: only the first statement's result
+        item = (await self.query_raw(query, params))["result"][0]
+        if item["status"] == "ERR":
+            raise RuntimeError(item["result"])
+        return item["result"]
+
+    async def close(self):
+        pass
+
+
+def _client(store: _RemoteStore, pipelined: bool, connections: int = 4) -> SurrealDBClient:
+    client = SurrealDBClient(SurrealConfig(
+        url="ws://mock", namespace="n", database="d", token="t", max_connections=connections,
+        min_connections=connections, pool_ping_interval_seconds=0, pipeline_point_queries=pipelined,
+    ))
+    for _ in range(connections):
+        client.pool.adopt(_Connection(store))
+    client._initialized = True
+    return client
+
+
+def _store_with_memories(n: int) -> _RemoteStore:
+    store = _RemoteStore()
+    for i in range(n):
+        store.tables["memory"][f"m{i}"] = {
+            "user_id": "u1", "content": f"memory {i}", "tier": "working", "importance": 0.5,
+            "created_at": "2025-01-01T00:00:00Z", "updated_at": "2025-01-01T00:00:00Z",
+            "accessed_at": "2025-01-01T00:00:00Z",
+        }
+    return store
+
+
+def test_pack_renames_only_statement_parameters():
+    query, params = QueryPipeline.pack([
+        ("SELECT * FROM type::thing('memory', $id) WHERE $id_0 = 1;", {"id": "a", "id_0": 1}),
+        ("UPDATE x SET v = $value WHERE id = $id", {"id": "b"}),
+    ])
+    assert query == ("SELECT * FROM type::thing('memory', $s0_id) WHERE $s0_id_0 = 1;\n"
+                     "UPDATE x SET v = $value WHERE id = $s1_id;")
+    assert params == {"s0_id": "a", "s0_id_0": 1, "s1_id": "b"}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_point_reads_share_requests():
+    store = _store_with_memories(300)
+    client = _client(store, pipelined=True)
+
+    memories = await asyncio.gather(*(client.get_memory(f"m{i}") for i in range(300)), client.get_memory("missing"))
+
+    assert [m.content for m in memories[:300]] == [f"memory {i}" for i in range(300)]
+    assert memories[300] is None
+    assert sum(store.requests) == 301 and len(store.requests) <= 6
+    assert client.pool_stats()["opened"] == 0
+
+
+@pytest.mark.asyncio
+async def test_failing_statement_only_fails_its_caller():
+    store = _store_with_memories(3)
+    client = _client(store, pipelined=True)
+
+    results = await asyncio.gather(
+        client.get_memory("m0"),
+        client.point_query("SELECT * FROM BROKEN;"),
+        client.point_query("UNPARSEABLE;"),
+        client.get_memory("m2"),
+        return_exceptions=True,
+    )
+
+    assert results[0].content == "memory 0" and results[3].content == "memory 2"
+    assert isinstance(results[1], RuntimeError) and isinstance(results[2], RuntimeError)
+    # The unparseable request was split and retried statement by statement
+    assert client.pipeline.stats["fallbacks"] == 1
+
+
+@pytest.mark.asyncio
+async def test_request_that_already_ran_is_not_resent():
+    store = _RemoteStore()
+    client = _client(store, pipelined=True)
+    entries = [AuditLog(user_id="u1", action="read", target_id=f"m{i}", target_type="memory") for i in range(3)]
+
+    async def short_response(conn, query, params):
+        # The statements run, but one result goes missing on the way back
+        return (await QueryPipeline._run(conn, query, params))[:-1]
+
+    client.pipeline._run = short_response
+    results = await asyncio.gather(*(AuditRepository(client).log(e) for e in entries), return_exceptions=True)
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert store.requests == [3] and len(store.tables["audit_log"]) == 3
+    assert client.pipeline.stats["fallbacks"] == 0
+
+
+@pytest.mark.asyncio
+async def test_audit_and_graph_cache_go_through_the_pipeline():
+    store = _RemoteStore()
+    client = _client(store, pipelined=True)
+    audit = AuditRepository(client)
+    cache = GraphCacheService(client)
+    entries = [AuditLog(user_id="u1", action="read", target_id=f"m{i}", target_type="memory") for i in range(20)]
+
+    await asyncio.gather(*(audit.log(e) for e in entries), cache.cache_path("A", "B", [{"id": "A"}, {"id": "B"}]))
+    path = await cache.get_cached_path("A", "B")
+
+    assert len(store.tables["audit_log"]) == 20
+    assert path == [{"id": "A"}, {"id": "B"}]
+    assert store.tables["cache_storage"]["graph_path:A:B"]["access_count"] == 1
+    assert store.requests[0] == 21
+
+    now = datetime.now(timezone.utc)
+    await client.create_cache_entry("graph_path:A:C", {"path": []}, created_at=now - timedelta(hours=2),
+                                    expires_at=now - timedelta(hours=1))
+    assert (await client.get_cache_entry("graph_path:A:C"))["expires_at"] < now
+    assert await cache.get_cached_path("A", "C") is None
+
+
+@pytest.mark.asyncio
+async def test_pipelining_multiplies_point_read_throughput():
+    reads = 400
+    timings = {}
+    for pipelined in (False, True):
+        client = _client(_store_with_memories(reads), pipelined=pipelined)
+        start = time.perf_counter()
+        memories = await asyncio.gather(*(client.get_memory(f"m{i}") for i in range(reads)))
+        timings[pipelined] = time.perf_counter() - start
+        assert all(memories)
+        assert client.pool_stats()["size"] == 4
+
+    # 4 connections: 100 sequential round trips each without pipelining, a handful with it
+    assert timings[False] > 3 * timings[True]
@@ -0,0 +1,120 @@
+import re
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from unittest.mock import AsyncMock
+
+import pytest
+
+from khala.application.services.deduplication_service import DeduplicationService
+from khala.domain.memory.entities import Memory, MemoryTier
+from khala.domain.memory.value_objects import EmbeddingVector, ImportanceScore
+from khala.infrastructure.background.jobs.job_processor import JobProcessor
+from khala.infrastructure.surrealdb.client import SurrealConfig, SurrealDBClient
+
+
+class _MemoryTable:
+    """Answers the backfill page, its UPDATEs and band lookups from a dict of rows."""
+
+    def __init__(self, rows: Dict[str, Dict[str, Any]]):
+        self.rows = rows
+        self.queries: List[str] = []
+
+    async def query(self, sql: str, params: Optional[Dict[str, Any]] = None):
+        sql = " ".join(sql.split())
+        params = params or {}
+        self.queries.append(sql)
+        if "content_minhash_bands = NONE" in sql:
+            keys = sorted(k for k, r in self.rows.items()
+                          if r.get("content_minhash_bands") is None and k > params.get("after", ""))
+            page = [{"id": f"memory:{k}", "user_id": self.rows[k]["user_id"], "content": self.rows[k]["content"]}
+                    for k in keys[:params["limit"]]]
+            return [{"status": "OK", "result": page}]
+        if sql.startswith("UPDATE type::thing"):
+            for i in range(len(re.findall(r"\$id_\d+", sql))):
+                row = self.rows[params[f"id_{i}"]]
+                row["content_minhash"], row["content_minhash_bands"] = params[f"slots_{i}"], params[f"bands_{i}"]
+            return [{"status": "OK", "result": []}]
+        if "CONTAINSANY $bands" in sql:
+            found = [{"id": f"memory:{k}", "content_minhash": r.get("content_minhash")}
+                     for k, r in self.rows.items()
+                     if r["user_id"] == params["user_id"] and set(r.get("content_minhash_bands") or ())
+                     & set(params["bands"])]
+            return [{"status": "OK", "result": found[:params["limit"]]}]
+        return [{"status": "OK", "result": []}]
+
+
+def _client(table: _MemoryTable) -> SurrealDBClient:
+    client = SurrealDBClient(SurrealConfig(url="ws://mock", namespace="n", database="d", token="t"))
+
+    @asynccontextmanager
+    async def connection():
+        yield table
+
+    client.get_connection = connection
+    return client
+
+
+def _memory(memory_id: str, content: str, user_id: str = "u1") -> Memory:
+    now = datetime.now(timezone.utc)
+    return Memory(id=memory_id, user_id=user_id, content=content, tier=MemoryTier.WORKING,
+                  importance=ImportanceScore(0.5), created_at=now, updated_at=now, accessed_at=now,
+                  embedding=EmbeddingVector([0.1, 0.2, 0.3]))
+
+
+@pytest.mark.asyncio
+async def test_backfill_signs_legacy_rows_in_pages():
+    rows = {f"m{i:03d}": {"user_id": "u1", "content": f"legacy note number {i} about the project"} for i in range(7)}
+    rows["m005"]["content"] = "..."
+    table = _MemoryTable(rows)
+    client = _client(table)
+
+    result = await client.backfill_text_signatures(batch_size=3)
+
+    assert result == {"scanned": 7, "updated": 6}
+    assert sum(q.startswith("SELECT") for q in table.queries) == 3
+    assert rows["m005"]["content_minhash_bands"] == [] and rows["m005"]["content_minhash"] is None
+    assert all(len(r["content_minhash"]) == 64 for k, r in rows.items() if k != "m005")
+    # Nothing left to do on a second run
+    assert await client.backfill_text_signatures(batch_size=3) == {"scanned": 0, "updated": 0}
+
+
+@pytest.mark.asyncio
+async def test_backfill_job_is_accepted_by_submit_job():
+    rows = {f"m{i}": {"user_id": "u1", "content": f"legacy note number {i} about the project"} for i in range(3)}
+    processor = JobProcessor(redis_url=None)
+    processor.db_client = _client(_MemoryTable(rows))
+
+    job_id = await processor.submit_job("text_signature_backfill", {"batch_size": 2})
+    jobs = await processor._claim_jobs()
+    await processor._process_job(jobs[0], "w1")
+
+    result = await processor.get_job_result(job_id)
+    assert [job.job_id for job in jobs] == [job_id]
+    assert result.success and result.result == {"scanned": 3, "updated": 3}
+
+
+@pytest.mark.asyncio
+async def test_restatement_is_flagged_before_the_vector_search():
+    content = "Standup moved to 9:30 on Tuesdays; Alice will run it while Bob is away."
+    stored = _memory("old", content)
+    rows = {"old": {"user_id": "u1", "content": content}, "other": {"user_id": "u2", "content": content}}
+    table = _MemoryTable(rows)
+    client = _client(table)
+    await client.backfill_text_signatures()
+    # Writes and the backfill compute the same signature
+    assert client._serialize_memory(stored)["content_minhash_bands"] == rows["old"]["content_minhash_bands"]
+
+    service = DeduplicationService(client)
+    client.search_memories_by_vector = AsyncMock(return_value=[])
+    restated = _memory("new", "standup moved to 9.30 on tuesdays -- Alice will run it, while Bob is away")
+
+    result = await service.check_duplicate(restated)
+
+    assert result.is_duplicate and result.duplicate_type == "near"
+    assert result.duplicate_of_id == "old" and result.similarity_score >= 0.8
+    client.search_memories_by_vector.assert_not_awaited()
+
+    unrelated = await service.check_duplicate(_memory("x", "Renew the parking permit before the end of March."))
+    assert not unrelated.is_duplicate
+    client.search_memories_by_vector.assert_awaited_once()
@@ -0,0 +1,84 @@
+from contextlib import asynccontextmanager
+from datetime import timezone
+
+import numpy as np
+import pytest
+
+from khala.domain.memory.entities import Entity, EntityType, Memory, MemoryTier
+from khala.domain.memory.value_objects import EmbeddingVector, ImportanceScore
+from khala.infrastructure.surrealdb.client import SurrealConfig, SurrealDBClient, parse_iso_utc
+
+
+def _client(**config) -> SurrealDBClient:
+    return SurrealDBClient(SurrealConfig(url="ws://mock", namespace="n", database="d", token="t", **config))
+
+
+def _row(client: SurrealDBClient, values):
+    memory = Memory(user_id="u1", content="note", tier=MemoryTier.WORKING, importance=ImportanceScore(0.5),
+                    embedding=EmbeddingVector([0.0] * len(values), model="m", version="2"))
+    row = client._serialize_memory(memory)
+    row.update(id=f"memory:{memory.id}", embedding=list(values), created_at=row["created_at"].replace("+00:00", "Z"))
+    return row
+
+
+def test_trusted_read_holds_read_only_float32_buffer():
+    client = _client()
+    memory = client._deserialize_memory(_row(client, [0.25, -0.5, 0.75]))
+
+    array = memory.embedding.to_numpy()
+    assert array.dtype == np.float32 and not array.flags.writeable
+    assert array is memory.embedding.to_numpy()
+    assert memory.embedding.to_list() == [0.25, -0.5, 0.75]
+    assert (memory.embedding.model, memory.embedding.version) == ("m", "2")
+    assert memory.embedding == EmbeddingVector([0.25, -0.5, 0.75], model="m", version="2")
+    with pytest.raises(ValueError):
+        array[0] = 1.0
+
+    # Round-trips as plain floats
+    assert client._serialize_memory(memory)["embedding"] == [0.25, -0.5, 0.75]
+    assert memory.created_at.tzinfo == timezone.utc
+
+
+def test_validation_stays_at_ingest_and_can_be_enabled_for_reads():
+    with pytest.raises(ValueError):
+        EmbeddingVector([0.1, 3.0])
+
+    trusted = _client()
+    assert trusted._deserialize_memory(_row(trusted, [0.1, 3.0])).embedding.to_list()[1] == 3.0
+
+    checked = _client(trusted_reads=False)
+    with pytest.raises(ValueError):
+        checked._deserialize_memory(_row(checked, [0.1, 3.0]))
+
+
+def test_iso_parser_is_cached_and_utc():
+    parse_iso_utc.cache_clear()
+    first = parse_iso_utc("2025-03-01T12:00:00.123456Z")
+    assert parse_iso_utc("2025-03-01T12:00:00.123456Z") is first
+    assert parse_iso_utc.cache_info().hits == 1
+    assert first.tzinfo == timezone.utc and first.microsecond == 123456
+    assert parse_iso_utc("2025-03-01T12:00:00+00:00") == first.replace(microsecond=0)
+
+
+@pytest.mark.asyncio
+async def test_trusted_vectors_are_sent_to_the_database_as_lists():
+    client = _client()
+    sent = []
+
+    class _Connection:
+        async def query(self, sql, params=None):
+            sent.append(params)
+            return [{"status": "OK", "result": [{"id": "x"}]}]
+
+    @asynccontextmanager
+    async def connection():
+        yield _Connection()
+
+    client.get_connection = connection
+    query = client._deserialize_memory(_row(client, [0.25, -0.5, 0.75])).embedding
+    assert isinstance(query.values, np.ndarray)
+
+    await client.search_memories_by_vector(query, "u1")
+    await client.create_entity(Entity(text="Ada", entity_type=EntityType.PERSON, confidence=0.9, embedding=query))
+    assert [params["embedding"] for params in sent] == [[0.25, -0.5, 0.75]] * 2
+    assert all(type(params["embedding"]) is list for params in sent)
@@ -0,0 +1,152 @@
+import numpy as np
+import pytest
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock
+
+from khala.domain.memory.entities import Memory, MemoryTier
+from khala.domain.memory.value_objects import EmbeddingVector, ImportanceScore
+from khala.infrastructure.surrealdb.client import MemoryWriteEvent, SurrealConfig, SurrealDBClient
+from khala.infrastructure.vector.ann_index import ANNIndex, VectorPartition, normalize_rows
+from khala.infrastructure.vector.memory_index import MemoryVectorIndex
+
+
+def _clustered(n: int, dims: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = normalize_rows(rng.standard_normal((20, dims)))
+    noise = rng.standard_normal((n, dims)) * (0.5 / np.sqrt(dims))
+    return normalize_rows(centers[rng.integers(0, 20, size=n)] + noise)
+
+
+def test_flat_partition_is_exact():
+    data = _clustered(200, 16)
+    partition = VectorPartition(dims=16, train_threshold=10_000)
+    for i, vector in enumerate(data):
+        partition.upsert(str(i), vector)
+
+    found = partition.search(data[7], top_k=5)
+    expected = np.argsort(-(data @ data[7]))[:5]
+    assert [mid for mid, _ in found] == [str(i) for i in expected]
+    assert found[0][1] == pytest.approx(1.0, abs=1e-5)
+
+
+def test_ivf_partition_recall_and_removal():
+    data = _clustered(3000, 32)
+    partition = VectorPartition(dims=32, train_threshold=1000, nprobe=8)
+    for i, vector in enumerate(data):
+        partition.upsert(str(i), vector)
+    assert partition.is_trained
+    assert len(partition) == 3000
+
+    hits = 0
+    for q in range(0, 3000, 100):
+        truth = set(np.argsort(-(data @ data[q]))[:10].tolist())
+        hits += len(truth & {int(mid) for mid, _ in partition.search(data[q], top_k=10)})
+    assert hits / (30 * 10) > 0.9
+
+    assert partition.remove("42")
+    assert not partition.remove("42")
+    assert "42" not in {mid for mid, _ in partition.search(data[42], top_k=10)}
+    # Swap-with-last bookkeeping keeps every remaining id addressable
+    ids, matrix = partition.export()
+    assert len(ids) == 2999 and matrix.shape == (2999, 32)
+    for memory_id, (list_no, slot) in partition.locations.items():
+        assert partition.lists[list_no].ids[slot] == memory_id
+
+
+def test_index_partitions_by_user_and_model():
+    index = ANNIndex()
+    index.upsert("a", "u1", [1.0, 0.0], model="m1")
+    index.upsert("b", "u2", [1.0, 0.0], model="m1")
+    index.upsert("c", "u1", [1.0, 0.0], model="m2")
+
+    assert [mid for mid, _ in index.search("u1", [1.0, 0.0], model="m1")] == ["a"]
+
+    # Re-embedding with another model moves the vector
+    index.upsert("a", "u1", [0.0, 1.0], model="m2")
+    assert index.search("u1", [1.0, 0.0], model="m1") == []
+    assert len(index) == 3
+
+    with pytest.raises(ValueError):
+        index.upsert("d", "u1", [1.0, 0.0, 0.0], model="m2")
+
+
+def _memory(user_id: str, values, archived: bool = False) -> Memory:
+    memory = Memory(user_id=user_id, content="x", tier=MemoryTier.WORKING, importance=ImportanceScore(0.5),
+                    embedding=EmbeddingVector(list(values)))
+    memory.is_archived = archived
+    return memory
+
+
+def test_write_events_keep_mirror_in_sync():
+    mirror = MemoryVectorIndex()
+    memory = _memory("u1", [1.0, 0.0])
+
+    mirror.on_memory_write(MemoryWriteEvent("create", memory.id, "u1", memory))
+    assert memory.id in mirror.index
+
+    memory.is_archived = True
+    mirror.on_memory_write(MemoryWriteEvent("update", memory.id, "u1", memory))
+    assert memory.id not in mirror.index
+
+    mirror.on_memory_write(MemoryWriteEvent("create", memory.id, "u1", _memory("u1", [0.0, 1.0])))
+    mirror.on_memory_write(MemoryWriteEvent("delete", memory.id))
+    assert len(mirror.index) == 0
+
+
+def _client_with(responses):
+    client = SurrealDBClient(SurrealConfig(url="ws://mock", namespace="n", database="d", token="t"))
+    conn = MagicMock()
+    conn.query = AsyncMock(side_effect=responses)
+
+    @asynccontextmanager
+    async def connection():
+        yield conn
+
+    client.get_connection = connection
+    return client, conn
+
+
+@pytest.mark.asyncio
+async def test_build_pages_by_id_and_search_hydrates_in_one_query():
+    page = [
+        {"id": "memory:a", "user_id": "u1", "embedding": [1.0, 0.0]},
+        {"id": "memory:b", "user_id": "u1", "embedding": [0.8, 0.6]},
+    ]
+    hydrated = [
+        {"id": "memory:b", "content": "b"},
+        {"id": "memory:a", "content": "a"},
+    ]
+    client, conn = _client_with([page, [], hydrated])
+    mirror = MemoryVectorIndex()
+    mirror.attach(client)
+
+    assert not mirror.covers("u1")
+    assert await mirror.build(client, user_id="u1", batch_size=2) == 2
+    assert mirror.covers("u1")
+    # Second page starts after the last id of the first
+    assert conn.query.await_args_list[1].args[1]["after"] == "b"
+
+    rows = await client.search_memories_by_vector(EmbeddingVector([1.0, 0.0]), "u1", top_k=2, min_similarity=0.5)
+
+    assert [r["content"] for r in rows] == ["a", "b"]
+    assert rows[0]["similarity"] == pytest.approx(1.0)
+    query, params = conn.query.await_args_list[2].args
+    assert "type::thing('memory', $id_0)" in query and "type::thing('memory', $id_1)" in query
+    assert {params["id_0"], params["id_1"]} == {"a", "b"}
+
+
+@pytest.mark.asyncio
+async def test_partition_miss_falls_back_to_scan():
+    page = [{"id": "memory:a", "user_id": "u1", "embedding": [1.0, 0.0],
+             "embedding_model": "m1", "embedding_version": "1"}]
+    scanned = [{"id": "memory:z", "content": "z", "similarity": 0.9}]
+    client, conn = _client_with([page, [], scanned, scanned])
+    mirror = MemoryVectorIndex()
+    mirror.attach(client)
+    await mirror.build(client, user_id="u1", batch_size=1)
+    assert mirror.covers("u1") and mirror.has_partition("u1", "m1", "1")
+
+    # No provenance on the query, then an unindexed model: both scan instead of returning nothing
+    for query in (EmbeddingVector([1.0, 0.0]), EmbeddingVector([1.0, 0.0], model="m2", version="1")):
+        assert await client.search_memories_by_vector(query, "u1", top_k=2, min_similarity=0.5) == scanned
+    assert all("embedding != NONE" in call.args[0] for call in conn.query.await_args_list[2:])
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from khala.infrastructure.vector.ann_index import normalize_rows
+from khala.infrastructure.vector.lsh import HyperplaneLSH, near_duplicate_pairs
+
+
+def _corpus_with_duplicates(n: int, dims: int, pairs: int, cosine: float, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    data = normalize_rows(rng.standard_normal((n, dims)))
+    rows = rng.permutation(n)[:2 * pairs]
+    sources, targets = rows[:pairs], rows[pairs:]
+    noise = rng.standard_normal((pairs, dims))
+    noise -= (noise * data[sources]).sum(axis=1, keepdims=True) * data[sources]
+    data[targets] = cosine * data[sources] + np.sqrt(1 - cosine ** 2) * normalize_rows(noise)
+    planted = {(min(s, t), max(s, t)) for s, t in zip(sources.tolist(), targets.tolist())}
+    return data, planted
+
+
+def test_finds_planted_duplicates_with_few_candidates():
+    n = 4000
+    data, planted = _corpus_with_duplicates(n, dims=64, pairs=200, cosine=0.97)
+
+    result = near_duplicate_pairs(data, threshold=0.95)
+
+    found = set(zip(result.left.tolist(), result.right.tolist()))
+    # Exact verification: nothing below the threshold is reported
+    assert found <= planted
+    assert len(found) / len(planted) >= 0.9
+    assert np.all(result.similarity >= 0.95)
+    assert result.candidates < n * (n - 1) / 2 / 100
+
+
+def test_active_rows_limit_compared_pairs():
+    data, planted = _corpus_with_duplicates(2000, dims=32, pairs=100, cosine=0.99, seed=1)
+    active = np.zeros(len(data), dtype=bool)
+    active[1000:] = True
+
+    full = near_duplicate_pairs(data, threshold=0.95)
+    incremental = near_duplicate_pairs(data, threshold=0.95, active=active)
+
+    touching = {(a, b) for a, b in zip(full.left.tolist(), full.right.tolist()) if a >= 1000 or b >= 1000}
+    assert set(zip(incremental.left.tolist(), incremental.right.tolist())) == touching
+    assert incremental.candidates < full.candidates
+
+
+def test_collision_probability_and_bucket_cap():
+    lsh = HyperplaneLSH(dim=8, bits=20, tables=24)
+    assert lsh.collision_probability(0.95) == pytest.approx(0.952, abs=0.002)
+    assert lsh.collision_probability(0.0) < 1e-4
+
+    # Identical vectors share every bucket; the cap bounds the pairs compared
+    data = np.ones((50, 8))
+    capped = near_duplicate_pairs(data, threshold=0.99, lsh=lsh, max_bucket=10)
+    assert len(capped.left) == capped.candidates == 45
+    assert len(near_duplicate_pairs(data[:1], threshold=0.99).left) == 0
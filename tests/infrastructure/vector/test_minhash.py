@@ -0,0 +1,34 @@
+from khala.infrastructure.vector.minhash import BANDS, NUM_SLOTS, normalize_text, text_signature
+
+NOTE = ("The user prefers dark mode in every editor and terminal, uses vim keybindings "
+        "and wants weekly summaries sent on Monday mornings.")
+
+
+def test_formatting_changes_give_identical_signatures():
+    restated = "the user prefers  dark-mode in every editor & terminal; uses Vim keybindings\n" \
+               "and wants weekly summaries sent on Monday mornings!!"
+    assert normalize_text("Dark-mode,  please!") == "dark mode please"
+
+    original, copy = text_signature(NOTE, scope="u1"), text_signature(NOTE.upper() + "  ", scope="u1")
+    assert original.slots == copy.slots and original.bands == copy.bands
+    assert len(original.slots) == NUM_SLOTS and len(original.bands) == BANDS
+    assert original.similarity(text_signature(restated, scope="u1").slots) >= 0.8
+
+
+def test_small_edits_share_bands_and_unrelated_text_does_not():
+    original = text_signature(NOTE, scope="u1")
+    edited = text_signature(NOTE.replace("Monday", "Tuesday"), scope="u1")
+    unrelated = text_signature("Quarterly budget review with the finance team moved to room 4.", scope="u1")
+
+    assert original.similarity(edited.slots) >= 0.8
+    assert set(original.bands) & set(edited.bands)
+    assert original.similarity(unrelated.slots) < 0.2
+    assert not set(original.bands) & set(unrelated.bands)
+
+
+def test_band_keys_are_scoped_and_wordless_text_has_no_signature():
+    mine, theirs = text_signature(NOTE, scope="u1"), text_signature(NOTE, scope="u2")
+    assert mine.slots == theirs.slots
+    assert not set(mine.bands) & set(theirs.bands)
+    assert text_signature("?! ...") is None
+    assert text_signature("ok").similarity(text_signature("OK.").slots) == 1.0
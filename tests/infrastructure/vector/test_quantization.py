@@ -0,0 +1,166 @@
+import numpy as np
+import pytest
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock
+
+from khala.domain.memory.entities import Memory, MemoryTier
+from khala.domain.memory.repository import MemoryProjection
+from khala.domain.memory.value_objects import EmbeddingVector, ImportanceScore
+from khala.infrastructure.surrealdb.client import SurrealConfig, SurrealDBClient
+from khala.infrastructure.vector.ann_index import VectorPartition, normalize_rows
+from khala.infrastructure.vector.memory_index import MemoryVectorIndex
+from khala.infrastructure.vector.quantization import Int8Codec, PQCodec, quantize_row_int8
+
+
+def _data(n: int, dims: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = normalize_rows(rng.standard_normal((10, dims)))
+    return normalize_rows(centers[rng.integers(0, 10, size=n)] + rng.standard_normal((n, dims)) * 0.05)
+
+
+def test_int8_codec_calibrates_per_dimension():
+    data = _data(500, 16) * np.linspace(0.1, 4.0, 16)
+    codec = Int8Codec(16).fit(data)
+    codes = codec.encode(data)
+
+    assert codes.dtype == np.int8 and codes.nbytes == data.size
+    # Wide and narrow dimensions get their own step size
+    error = np.abs(codec.decode(codes) - data).mean(axis=0)
+    assert np.all(error < np.abs(data).mean(axis=0) / 50)
+    query = data[0]
+    np.testing.assert_allclose(codec.score(codes, query), data @ query, rtol=0.05, atol=0.05)
+
+
+def test_pq_codec_scores_with_lookup_tables():
+    data = _data(2000, 32)
+    codec = PQCodec(32, subvector_dims=4).fit(data)
+    codes = codec.encode(data)
+
+    assert codes.shape == (2000, 8) and codes.dtype == np.uint8
+    # Table scoring is the inner product with the decoded vectors
+    np.testing.assert_allclose(codec.score(codes, data[3]), codec.decode(codes) @ data[3], rtol=1e-4, atol=1e-4)
+    with pytest.raises(ValueError):
+        PQCodec(30, subvector_dims=4)
+
+
+@pytest.mark.parametrize("codec,options,max_bytes", [("int8", {}, 32), ("pq", {"subvector_dims": 2}, 16)])
+def test_quantized_partition_stores_codes_and_finds_neighbours(codec, options, max_bytes):
+    data = _data(3000, 32)
+    partition = VectorPartition(dims=32, train_threshold=1000, nprobe=16, codec=codec, codec_options=options)
+    for i, vector in enumerate(data):
+        partition.upsert(str(i), vector)
+
+    assert partition.is_residual
+    assert partition.code_bytes <= 3000 * max_bytes
+    hits = 0
+    for q in range(0, 3000, 150):
+        truth = set(np.argsort(-(data @ data[q]))[:10].tolist())
+        shortlist = partition.search(data[q], top_k=40)
+        hits += len(truth & {int(mid) for mid, _ in shortlist})
+    assert hits / (20 * 10) > 0.9
+    # Decoded export is close to the original vectors
+    ids, matrix = partition.export()
+    order = np.array([int(i) for i in ids])
+    assert np.mean(np.sum(matrix * data[order], axis=1)) > 0.95
+
+
+def _client(storage: str = "float"):
+    return SurrealDBClient(SurrealConfig(url="ws://mock", namespace="n", database="d", token="t",
+                                         embedding_storage=storage))
+
+
+def test_int8_storage_mode_persists_codes_instead_of_floats():
+    client = _client("int8")
+    memory = Memory(user_id="u1", content="x", tier=MemoryTier.WORKING, importance=ImportanceScore(0.5),
+                    embedding=EmbeddingVector([0.5, -0.25, 1.0], model="m"))
+
+    row = client._serialize_memory(memory)
+    assert "embedding" not in row
+    assert row["embedding_quantized"] == [64, -32, 127]
+
+    row["id"] = "memory:abc"
+    restored = client._deserialize_memory(row)
+    assert restored.embedding.model == "m"
+    np.testing.assert_allclose(restored.embedding.values, [0.5, -0.25, 1.0], atol=0.01)
+
+    both = _client("float+int8")._serialize_memory(memory)
+    assert both["embedding"] == [0.5, -0.25, 1.0] and "embedding_quantized" in both
+
+
+def test_row_quantization_handles_zero_vector():
+    codes, scale = quantize_row_int8([0.0, 0.0])
+    assert codes.tolist() == [0, 0] and scale == 1.0
+
+
+@pytest.mark.asyncio
+async def test_quantized_index_results_are_reranked_on_exact_floats():
+    client = _client()
+    mirror = MemoryVectorIndex(codec="int8")
+    mirror.attach(client)
+    mirror._covers_all = True
+    mirror.search = MagicMock(return_value=[("a", 0.95), ("b", 0.9)])
+    mirror.has_partition = MagicMock(return_value=True)
+
+    conn = MagicMock()
+    conn.query = AsyncMock(return_value=[
+        {"id": "memory:a", "embedding": [0.0, 1.0]},
+        {"id": "memory:b", "embedding": [1.0, 0.0]},
+    ])
+
+    @asynccontextmanager
+    async def connection():
+        yield conn
+
+    client.get_connection = connection
+    rows = await client.search_memories_by_vector(EmbeddingVector([1.0, 0.0]), "u1", top_k=1, min_similarity=0.5)
+
+    assert [r["id"] for r in rows] == ["memory:b"]
+    assert rows[0]["similarity"] == pytest.approx(1.0)
+    # The shortlist is widened by the re-rank factor
+    assert mirror.search.call_args.args[2] == 1 * mirror.rerank_factor
+
+
+@pytest.mark.asyncio
+async def test_int8_rows_rerank_on_codes_and_keep_the_projection():
+    client = _client("int8")
+    mirror = MemoryVectorIndex(codec="int8")
+    mirror.attach(client)
+    mirror._covers_all = True
+    mirror.search = MagicMock(return_value=[("a", 0.95), ("b", 0.9)])
+    mirror.has_partition = MagicMock(return_value=True)
+
+    conn = MagicMock()
+    conn.query = AsyncMock(return_value=[
+        {"id": "memory:a", "content": "a", "embedding_quantized": [0, 127], "embedding_quant_scale": 0.01},
+        {"id": "memory:b", "content": "b", "embedding_quantized": [127, 0], "embedding_quant_scale": 0.02},
+    ])
+
+    @asynccontextmanager
+    async def connection():
+        yield conn
+
+    client.get_connection = connection
+    rows = await client.search_memories_by_vector(
+        EmbeddingVector([1.0, 0.0]), "u1", top_k=1, min_similarity=0.5, projection=MemoryProjection.SUMMARY
+    )
+
+    assert rows == [{"id": "memory:b", "content": "b", "similarity": pytest.approx(1.0)}]
+
+
+@pytest.mark.asyncio
+async def test_scan_without_index_scores_int8_codes():
+    client = _client("int8")
+    conn = MagicMock()
+    conn.query = AsyncMock(return_value=[{"status": "OK", "result": [{"id": "memory:a", "similarity": 0.9}]}])
+
+    @asynccontextmanager
+    async def connection():
+        yield conn
+
+    client.get_connection = connection
+    rows = await client.search_memories_by_vector(EmbeddingVector([1.0, 0.0]), "u1", top_k=1)
+
+    assert rows == [{"id": "memory:a", "similarity": 0.9}]
+    query = " ".join(conn.query.await_args.args[0].split())
+    assert "vector::similarity::cosine(embedding ?? embedding_quantized, $embedding)" in query
+    assert "(embedding != NONE OR embedding_quantized != NONE)" in query
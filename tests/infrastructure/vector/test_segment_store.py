@@ -0,0 +1,136 @@
+import numpy as np
+import pytest
+from click.testing import CliRunner
+
+from khala.domain.memory.entities import Memory, MemoryTier
+from khala.domain.memory.value_objects import EmbeddingVector, ImportanceScore
+from khala.infrastructure.surrealdb.client import MemoryWriteEvent
+from khala.infrastructure.vector.memory_index import MemoryVectorIndex
+from khala.infrastructure.vector.segment_store import StoreLockedError, VectorSegmentStore
+
+
+def _rows(n: int, dims: int = 8, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal((n, dims)).astype(np.float32)
+
+
+@pytest.mark.parametrize("dtype", ["float32", "int8"])
+def test_reopen_maps_segments_and_searches(tmp_path, dtype):
+    data = _rows(50)
+    store = VectorSegmentStore(str(tmp_path), dtype=dtype).open()
+    store.append([f"m{i}" for i in range(50)], ["u1"] * 25 + ["u2"] * 25, data, model="emb", version="1")
+
+    reopened = VectorSegmentStore(str(tmp_path)).open()
+    assert len(reopened) == 50
+    assert isinstance(next(iter(reopened._segments.values())).vectors, np.memmap)
+
+    found = reopened.search("u1", data[3], top_k=3, model="emb", version="1")
+    assert found[0][0] == "m3"
+    assert found[0][1] == pytest.approx(1.0, abs=0.01 if dtype == "int8" else 1e-5)
+    assert all(int(mid[1:]) < 25 for mid, _ in found)
+    # Provenance is part of the lookup
+    assert reopened.search("u1", data[3], model="other", version="1") == []
+
+
+def test_tombstones_updates_and_compaction(tmp_path):
+    data = _rows(20)
+    store = VectorSegmentStore(str(tmp_path)).open()
+    store.append([f"m{i}" for i in range(20)], ["u1"] * 20, data)
+
+    assert store.tombstone("m0")
+    store.stage("m1", "u1", -data[1])
+    store.flush()
+    store.close()
+
+    reopened = VectorSegmentStore(str(tmp_path)).open()
+    assert "m0" not in reopened and len(reopened) == 19
+    assert reopened.search("u1", data[1], top_k=1)[0][0] != "m1"
+    assert reopened.get_stats()["dead_rows"] == 2
+
+    stats = reopened.compact(segment_rows=8)
+    assert stats["rows_before"] == 21 and stats["rows_after"] == 19
+    assert stats["segments_after"] == 3
+    assert not reopened.tombstone_path.exists()
+
+    final = VectorSegmentStore(str(tmp_path)).open()
+    assert len(final) == 19 and final.get_stats()["dead_rows"] == 0
+    assert final.search("u1", -data[1], top_k=1)[0][0] == "m1"
+    assert sorted(p.name for p in tmp_path.glob("seg-*.vec")) == [
+        "seg-000003.vec", "seg-000004.vec", "seg-000005.vec"
+    ]
+
+
+def test_mirror_persists_writes_and_cold_starts(tmp_path):
+    store = VectorSegmentStore(str(tmp_path)).open()
+    mirror = MemoryVectorIndex(store=store)
+    memory = Memory(user_id="u1", content="x", tier=MemoryTier.WORKING, importance=ImportanceScore(0.5),
+                    embedding=EmbeddingVector([1.0, 0.0, 0.0]))
+    other = Memory(user_id="u1", content="y", tier=MemoryTier.WORKING, importance=ImportanceScore(0.5),
+                   embedding=EmbeddingVector([0.0, 1.0, 0.0]))
+    mirror.on_memory_write(MemoryWriteEvent("create", memory.id, "u1", memory))
+    mirror.on_memory_write(MemoryWriteEvent("create", other.id, "u1", other))
+    mirror.flush()
+    mirror.on_memory_write(MemoryWriteEvent("delete", other.id))
+    store.mark_complete()
+
+    restarted = MemoryVectorIndex(store=VectorSegmentStore(str(tmp_path)).open())
+    assert restarted.load_from_store() == 1
+    assert restarted.covers("anyone")
+    assert [mid for mid, _ in restarted.search("u1", [1.0, 0.0, 0.0])] == [memory.id]
+
+
+def test_cli_compaction_command(tmp_path):
+    from khala.interface.cli.main import cli
+
+    store = VectorSegmentStore(str(tmp_path)).open()
+    store.append(["a", "b"], ["u1", "u1"], _rows(2))
+    store.tombstone("a")
+    store.close()
+
+    result = CliRunner().invoke(cli, ["vector-compact", "--path", str(tmp_path)])
+
+    assert result.exit_code == 0, result.output
+    assert "Reclaimed Rows" in result.output
+    assert len(VectorSegmentStore(str(tmp_path)).open()) == 1
+
+
+def test_compaction_refuses_while_another_handle_is_open(tmp_path):
+    from khala.interface.cli.main import cli
+
+    worker = VectorSegmentStore(str(tmp_path)).open()
+    worker.append(["a", "b"], ["u1", "u1"], _rows(2))
+    worker.tombstone("a")
+
+    with pytest.raises(StoreLockedError):
+        VectorSegmentStore(str(tmp_path)).open().compact()
+    result = CliRunner().invoke(cli, ["vector-compact", "--path", str(tmp_path)])
+    assert result.exit_code != 0 and "open in another process" in result.output
+
+    # The refused compaction left the worker's view intact
+    worker.stage("c", "u1", _rows(1, seed=2)[0])
+    worker.flush()
+    worker.close()
+    reopened = VectorSegmentStore(str(tmp_path)).open()
+    assert sorted(reopened._locations) == ["b", "c"]
+
+
+def test_flushes_from_two_writers_do_not_reuse_segment_numbers(tmp_path):
+    first = VectorSegmentStore(str(tmp_path)).open()
+    second = VectorSegmentStore(str(tmp_path)).open()
+    data = _rows(4)
+
+    first.append(["a", "b"], ["u1", "u1"], data[:2])
+    # second still holds the manifest it read at open
+    second.append(["c", "d"], ["u1", "u1"], data[2:])
+    first.stage("e", "u1", data[0])
+    first.flush()
+    first.close()
+    second.close()
+
+    reopened = VectorSegmentStore(str(tmp_path)).open()
+    assert sorted(reopened._locations) == ["a", "b", "c", "d", "e"]
+    assert sorted(p.name for p in tmp_path.glob("seg-*.vec")) == [
+        "seg-000001.vec", "seg-000002.vec", "seg-000003.vec"
+    ]
+    stats = reopened.compact()
+    assert stats["rows_after"] == 5
+    assert len(VectorSegmentStore(str(tmp_path)).open()) == 5
@@ -4,9 +4,10 @@ from typing import List
 
 from khala.application.services.hybrid_search_service import HybridSearchService
 from khala.domain.memory.entities import Memory, MemoryTier, ImportanceScore, EmbeddingVector
+from khala.domain.memory.lifecycle import LifecycleRules
 from khala.domain.memory.repository import MemoryRepository
 from khala.domain.ports.embedding_service import EmbeddingService
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 
 # Mock implementations
 class MockEmbeddingService(EmbeddingService):
@@ -34,13 +35,13 @@ class MockMemoryRepository(MemoryRepository):
         if memory_id in self.memories:
             del self.memories[memory_id]
 
-    async def search_by_vector(self, embedding, user_id, top_k=10, min_similarity=0.6, filters=None):
+    async def search_by_vector(self, embedding, user_id, top_k=10, min_similarity=0.6, filters=None, projection=None):
         # Return dummy results: mem-1, mem-0, mem-2
         mems = list(self.memories.values())
         # Assuming created in order 0, 1, 2. mems[1] is mem-1
         return [mems[1], mems[0], mems[2]][:top_k]
 
-    async def search_by_text(self, query_text, user_id, top_k=10, filters=None):
+    async def search_by_text(self, query_text, user_id, top_k=10, filters=None, projection=None):
          # Return dummy results: mem-1, mem-2, mem-0
         mems = list(self.memories.values())
         return [mems[1], mems[2], mems[0]][:top_k]
@@ -48,6 +49,14 @@ class MockMemoryRepository(MemoryRepository):
     async def get_by_tier(self, user_id, tier, limit=100):
         return []
 
+    async def iter_memories(self, user_id, tier=None, fields=None, batch_size=500, projection=None):
+        for memory in list(self.memories.values()):
+            if memory.user_id == user_id and not memory.is_archived and (tier is None or memory.tier.value == tier):
+                yield memory
+
+    async def find_duplicate_groups(self, user_id):
+        return []
+
 @pytest.mark.asyncio
 async def test_hybrid_search_logic():
     # Setup
@@ -86,3 +95,19 @@ async def test_hybrid_search_logic():
 
     # mem-1 should be first
     assert results[0].id == "mem-1"
+
+
+@pytest.mark.asyncio
+async def test_lifecycle_defaults_stream_through_iter_memories():
+    repo = MockMemoryRepository()
+    now = datetime.now(timezone.utc)
+    stale = Memory(
+        id="old", user_id="user-1", content="stale note", tier=MemoryTier.WORKING,
+        importance=ImportanceScore(0.1), created_at=now - timedelta(days=100)
+    )
+    await repo.create(stale)
+
+    rules = LifecycleRules()
+    assert await repo.refresh_decay_scores("user-1", rules, now) == 1
+    assert await repo.archive_matching("user-1", rules, now) == ["old"]
+    assert stale.is_archived
@@ -0,0 +1,204 @@
+import asyncio
+import gc
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from khala.infrastructure.background.jobs.job_processor import (
+    QUEUE_KEY,
+    JobPriority,
+    JobProcessor,
+    JobResult,
+)
+
+WORKERS = 4
+BURST = 400
+
+
+def _percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class CountingRedis(fakeredis.FakeAsyncRedis):
+    """Fake Redis that counts round trips (single commands and pipelines)."""
+
+    commands = 0
+
+    async def execute_command(self, *args, **options):
+        CountingRedis.commands += 1
+        return await super().execute_command(*args, **options)
+
+    def pipeline(self, *args, **kwargs):
+        CountingRedis.commands += 1
+        return super().pipeline(*args, **kwargs)
+
+
+def _processor(use_redis=True, **kwargs):
+    processor = JobProcessor(redis_url=None, max_workers=WORKERS, **kwargs)
+    if use_redis:
+        processor.redis_client = CountingRedis(decode_responses=True)
+    processor.started = {}
+
+    async def execute(job):
+        processor.started[job.job_id] = time.perf_counter()
+        return JobResult(job.job_id, True, None, 0.0)
+
+    processor._execute_job = execute
+    return processor
+
+
+async def _start(processor):
+    processor.is_running = True
+    if processor.redis_client is not None:
+        await processor._load_claim_script()
+    processor.worker_tasks = [
+        asyncio.create_task(processor._worker_loop(f"worker_{i}")) for i in range(processor.max_workers)
+    ]
+
+
+async def _stop(processor):
+    processor.is_running = False
+    for task in processor.worker_tasks:
+        task.cancel()
+    await asyncio.gather(*processor.worker_tasks, return_exceptions=True)
+
+
+async def _polling_worker(processor):
+    """The previous worker loop: ZPOPMIN, HGETALL, one call per write, 100 ms sleep when empty."""
+    while processor.is_running:
+        popped = await processor.redis_client.zpopmin(QUEUE_KEY)
+        if popped:
+            job = processor._deserialize_job(await processor.redis_client.hgetall(popped[0][0]))
+            job.started_at = datetime.now(timezone.utc)
+            await processor.redis_client.hset(f"job:{job.job_id}", mapping={"status": "running"})
+            result = await processor._execute_job(job)
+            await processor.redis_client.hset(f"result:{job.job_id}", mapping=processor._serialize_result(result))
+            await processor.redis_client.expire(f"result:{job.job_id}", processor.redis_ttl)
+        else:
+            await asyncio.sleep(0.1)
+
+
+async def _measure(processor, polling=False):
+    # Garbage left by earlier tests would otherwise be collected mid-measurement
+    gc.collect()
+    # Throughput: workers drain a backlog of BURST jobs
+    backlog = [await processor.submit_job("consistency_check", {}) for _ in range(BURST)]
+    CountingRedis.commands = 0
+    start = time.perf_counter()
+    if polling:
+        processor.is_running = True
+        processor.worker_tasks = [asyncio.create_task(_polling_worker(processor)) for _ in range(WORKERS)]
+    else:
+        await _start(processor)
+    while not all(job_id in processor.started for job_id in backlog):
+        await asyncio.sleep(0.002)
+    jobs_per_second = BURST / (time.perf_counter() - start)
+    # Claims plus the per-job status/result writes
+    round_trips = CountingRedis.commands / BURST
+    await asyncio.sleep(0.05)
+
+    # Idle cost: Redis commands issued by idle workers
+    CountingRedis.commands = 0
+    await asyncio.sleep(0.5)
+    idle_commands = CountingRedis.commands
+
+    # Enqueue-to-start latency for jobs arriving one at a time
+    submitted = {}
+    for _ in range(20):
+        start = time.perf_counter()
+        job_id = await processor.submit_job("consistency_check", {})
+        submitted[job_id] = start
+        await asyncio.sleep(0.02)
+    await asyncio.sleep(0.15)
+    latencies = [processor.started[job_id] - start for job_id, start in submitted.items()]
+
+    await _stop(processor)
+    return idle_commands, latencies, jobs_per_second, round_trips
+
+
+@pytest.mark.asyncio
+async def test_claims_follow_priority_then_submission_order():
+    for use_redis in (True, False):
+        processor = _processor(use_redis=use_redis, claim_batch_size=3, dispatch="blocking")
+        low_1 = await processor.submit_job("consistency_check", {"n": 1}, priority=JobPriority.LOW)
+        high = await processor.submit_job("consistency_check", {"n": 2}, priority=JobPriority.HIGH)
+        low_2 = await processor.submit_job("consistency_check", {"n": 3}, priority=JobPriority.LOW)
+        critical = await processor.submit_job("consistency_check", {"n": 4}, priority=JobPriority.CRITICAL)
+
+        first = await processor._claim_jobs()
+        second = await processor._claim_jobs()
+        assert [job.job_id for job in first] == [critical, high, low_1]
+        assert [job.job_id for job in second] == [low_2]
+        assert second[0].payload == {"n": 3}
+
+        # An empty queue blocks for block_timeout, then returns nothing
+        processor.block_timeout = 0.05
+        start = time.perf_counter()
+        assert await processor._claim_jobs() == []
+        assert time.perf_counter() - start >= 0.04
+
+
+@pytest.mark.asyncio
+async def test_stopping_mid_batch_requeues_unstarted_jobs():
+    processor = _processor(claim_batch_size=5, dispatch="blocking")
+    gate = asyncio.Event()
+
+    async def execute(job):
+        processor.started[job.job_id] = time.perf_counter()
+        await gate.wait()
+        return JobResult(job.job_id, True, None, 0.0)
+
+    processor._execute_job = execute
+    processor.max_workers = 1
+    for _ in range(5):
+        await processor.submit_job("consistency_check", {})
+    await _start(processor)
+    while not processor.started:
+        await asyncio.sleep(0.005)
+    await _stop(processor)
+
+    # One job was running when the worker stopped; the other four are back on the queue
+    assert len(processor.started) == 1
+    assert await processor.redis_client.zcard(QUEUE_KEY) == 4
+
+
+@pytest.mark.asyncio
+async def test_lua_claim_pops_and_reads_atomically():
+    pytest.importorskip("lupa")
+    processor = _processor(claim_batch_size=2)
+    await processor._load_claim_script()
+    assert processor.dispatch == "lua"
+    ids = [await processor.submit_job("consistency_check", {"n": n}) for n in range(3)]
+    assert [job.job_id for job in await processor._claim_jobs()] == ids[:2]
+    assert [job.job_id for job in await processor._claim_jobs()] == ids[2:]
+
+
+@pytest.mark.asyncio
+async def test_blocking_dispatch_beats_polling():
+    results = {
+        "polling": await _measure(_processor(dispatch="blocking"), polling=True),
+        "bzpopmin": await _measure(_processor(dispatch="blocking")),
+        "bzpopmin x8": await _measure(_processor(dispatch="blocking", claim_batch_size=8)),
+        "memory": await _measure(_processor(use_redis=False)),
+    }
+
+    print(f"\n{'dispatch':>12} {'idle cmds/s':>12} {'start p50 ms':>13} {'start p95 ms':>13} "
+          f"{'jobs/s':>8} {'trips/job':>10}")
+    for label, (idle, latencies, jobs_per_second, round_trips) in results.items():
+        print(f"{label:>12} {idle / 0.5:>12.0f} {_percentile(latencies, 0.5) * 1000:>13.1f} "
+              f"{_percentile(latencies, 0.95) * 1000:>13.1f} {jobs_per_second:>8.0f} {round_trips:>10.2f}")
+
+    polling_idle, polling_latencies, _, polling_trips = results["polling"]
+    for label in ("bzpopmin", "bzpopmin x8"):
+        idle, latencies, _, _ = results[label]
+        # One outstanding BZPOPMIN per worker instead of ten ZPOPMINs per worker per second
+        assert idle <= WORKERS < polling_idle
+        assert _percentile(latencies, 0.95) < _percentile(polling_latencies, 0.5)
+    # Batch claims: one BZPOPMIN + ZPOPMIN + pipelined HGETALL per batch instead of two calls per job
+    assert results["bzpopmin x8"][3] < results["bzpopmin"][3] < polling_trips
+    assert results["memory"][0] == 0
+    assert _percentile(results["memory"][1], 0.95) < 0.01
@@ -0,0 +1,94 @@
+import asyncio
+import time
+
+import pytest
+
+from khala.domain.memory.value_objects import EmbeddingVector
+from khala.infrastructure.surrealdb.client import SurrealConfig, SurrealDBClient
+
+CONCURRENCY = 500
+POOL_SIZE = 20
+SIGNIN_SECONDS = 0.02
+QUERY_SECONDS = 0.002
+
+
+class SlowSigninSurreal:
+    """Connection whose connect+signin costs SIGNIN_SECONDS and each query QUERY_SECONDS."""
+
+    opened = 0
+
+    def __init__(self, url):
+        self.url = url
+
+    async def connect(self):
+        SlowSigninSurreal.opened += 1
+        await asyncio.sleep(SIGNIN_SECONDS)
+
+    async def authenticate(self, token):
+        pass
+
+    async def use(self, namespace, database):
+        pass
+
+    async def query(self, query, params=None):
+        await asyncio.sleep(QUERY_SECONDS)
+        return [{"status": "OK", "result": [{"id": "memory:m1", "similarity": 0.9}]}]
+
+    async def close(self):
+        pass
+
+
+def _percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def _search_burst(min_connections: int):
+    SlowSigninSurreal.opened = 0
+    client = SurrealDBClient(SurrealConfig(
+        url="ws://mock", namespace="n", database="d", token="t",
+        min_connections=min_connections, max_connections=POOL_SIZE, pool_ping_interval_seconds=0,
+    ))
+    await client.initialize()
+    opened_at_start = SlowSigninSurreal.opened
+    embedding = EmbeddingVector([0.1, 0.2, 0.3])
+
+    async def search():
+        start = time.perf_counter()
+        rows = await client.search_memories_by_vector(embedding, user_id="u1", top_k=5)
+        assert rows and rows[0]["id"] == "memory:m1"
+        return time.perf_counter() - start
+
+    latencies = await asyncio.gather(*(search() for _ in range(CONCURRENCY)))
+    stats = client.pool_stats()
+    await client.close()
+    return latencies, stats, opened_at_start
+
+
+@pytest.mark.asyncio
+async def test_search_tail_latency_with_prewarmed_pool(monkeypatch):
+    monkeypatch.setattr("khala.infrastructure.surrealdb.client.AsyncSurreal", SlowSigninSurreal)
+    monkeypatch.setattr(
+        "khala.infrastructure.surrealdb.schema.DatabaseSchema.create_schema", lambda self: asyncio.sleep(0)
+    )
+
+    cold, cold_stats, _ = await _search_burst(min_connections=1)
+    warm, warm_stats, warm_opened = await _search_burst(min_connections=POOL_SIZE)
+
+    print(f"\n{'pool':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'wait p99 ms':>12} {'opened':>7}")
+    for label, latencies, stats in (("cold", cold, cold_stats), ("warm", warm, warm_stats)):
+        print(f"{label:>6} {_percentile(latencies, 0.5) * 1000:>8.1f} {_percentile(latencies, 0.95) * 1000:>8.1f} "
+              f"{_percentile(latencies, 0.99) * 1000:>8.1f} {stats['wait_time']['p99_ms']:>12.1f} "
+              f"{stats['opened']:>7}")
+
+    for stats in (cold_stats, warm_stats):
+        assert stats["wait_time"]["count"] >= CONCURRENCY
+        assert stats["checkout_duration"]["count"] >= CONCURRENCY
+        assert stats["size"] <= POOL_SIZE and stats["acquire_timeouts"] == 0
+
+    # The prewarmed pool opened every connection before the burst and none during it
+    assert warm_opened == POOL_SIZE and warm_stats["opened"] == POOL_SIZE
+    # 500 queries over 20 connections: ~25 rounds of QUERY_SECONDS, with no signin on the request path
+    rounds = CONCURRENCY / POOL_SIZE
+    assert _percentile(warm, 0.99) < rounds * QUERY_SECONDS * 10
+    assert _percentile(warm, 0.99) <= _percentile(cold, 0.99)
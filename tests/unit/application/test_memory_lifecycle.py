@@ -1,6 +1,5 @@
 import unittest
 from unittest.mock import MagicMock, AsyncMock, patch
-from datetime import datetime, timezone, timedelta
 
 from khala.domain.memory.entities import Memory, MemoryTier, ImportanceScore
 from khala.domain.memory.repository import MemoryRepository
@@ -12,11 +11,15 @@ class TestMemoryLifecycleService(unittest.IsolatedAsyncioTestCase):
         self.repository = MagicMock(spec=MemoryRepository)
         # Mock async methods of the repository
         self.repository.get_by_tier = AsyncMock(return_value=[])
+        self.repository.iter_memories = self._stream({})
         self.repository.find_duplicate_groups = AsyncMock(return_value=[])
         self.repository.update = AsyncMock()
         self.repository.create = AsyncMock()
         self.repository.delete = AsyncMock()
         self.repository.client = MagicMock()
+        self.repository.promote_matching = AsyncMock(return_value=[])
+        self.repository.refresh_decay_scores = AsyncMock(return_value=0)
+        self.repository.archive_matching = AsyncMock(return_value=[])
 
         self.memory_service = MagicMock(spec=MemoryService)
         self.decay_service = MagicMock(spec=DecayService)
@@ -33,42 +36,40 @@ class TestMemoryLifecycleService(unittest.IsolatedAsyncioTestCase):
             consolidation_service=self.consolidation_service
         )
 
-    async def test_promote_memories(self):
-        # Create a memory that is ready for promotion
-        memory = Memory(
-            user_id="u1", content="promotable", tier=MemoryTier.WORKING, importance=ImportanceScore(0.9),
-            created_at=datetime.now(timezone.utc) - timedelta(hours=1),
-            access_count=10
-        )
+    @staticmethod
+    def _stream(by_tier):
+        async def iter_memories(user_id, tier=None, fields=None, batch_size=500, projection=None):
+            tiers = [tier] if tier else list(by_tier)
+            for name in tiers:
+                for memory in by_tier.get(name, []):
+                    yield memory
+        return iter_memories
 
-        # Mock repo to return this memory for WORKING tier
-        self.repository.get_by_tier.side_effect = lambda uid, tier, limit: [memory] if tier == "working" else []
+    async def test_promote_memories(self):
+        self.repository.promote_matching = AsyncMock(side_effect=[["m3"], ["m1", "m2"]])
 
         count = await self.service.promote_memories("u1")
 
-        self.assertEqual(count, 1)
-        self.assertEqual(memory.tier, MemoryTier.SHORT_TERM)
-        self.repository.update.assert_called_with(memory)
+        self.assertEqual(count, 3)
+        # Short-term rule runs first, so a memory advances at most one tier per run
+        calls = self.repository.promote_matching.await_args_list
+        self.assertEqual([c.args[1].from_tier for c in calls], [MemoryTier.SHORT_TERM, MemoryTier.WORKING])
+        self.assertEqual([c.args[1].to_tier for c in calls], [MemoryTier.LONG_TERM, MemoryTier.SHORT_TERM])
+        self.assertEqual(calls[1].args[1].min_importance, Memory.PROMOTION_WORKING_IMPORTANCE)
+        self.assertIs(calls[0].args[2], calls[1].args[2])
 
     async def test_decay_and_archive_memories(self):
-        memory = Memory(
-            user_id="u1", content="decayable", tier=MemoryTier.WORKING, importance=ImportanceScore(0.1),
-            access_count=0,
-            created_at=datetime.now(timezone.utc) - timedelta(days=100)
-        )
-
-        # Mock repo
-        self.repository.get_by_tier.side_effect = lambda uid, tier, limit: [memory] if tier == "working" else []
-
-        # Mock decay service to actually mark it as archival candidate
-        self.decay_service.should_archive_based_on_decay.return_value = True
+        self.repository.refresh_decay_scores = AsyncMock(return_value=2)
+        self.repository.archive_matching = AsyncMock(return_value=["m1"])
 
         stats = await self.service.decay_and_archive_memories("u1")
 
-        self.assertEqual(stats["decayed"], 1)
-        self.assertEqual(stats["archived"], 1)
-        self.assertTrue(memory.is_archived)
-        self.repository.update.assert_called()
+        self.assertEqual(stats, {"decayed": 2, "archived": 1})
+        decay_args = self.repository.refresh_decay_scores.await_args.args
+        archive_args = self.repository.archive_matching.await_args.args
+        self.assertEqual(decay_args[:2], ("u1", self.service.lifecycle_rules))
+        # Archival reads the decay scores just written, at the same instant
+        self.assertEqual(archive_args, decay_args)
 
     async def test_deduplicate_memories_exact(self):
         m1 = Memory(id="1", user_id="u1", content="same", tier=MemoryTier.WORKING, importance=ImportanceScore(0.5))
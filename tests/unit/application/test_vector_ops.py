@@ -11,6 +11,12 @@ def mock_db_client():
     client.get_connection.return_value.__aexit__.return_value = None
     return client
 
+def _stream(rows):
+    async def iter_memories(user_id, fields=None, batch_size=500, has_fields=(), include_archived=False, **kwargs):
+        for row in rows:
+            yield row
+    return iter_memories
+
 @pytest.fixture
 def vector_service(mock_db_client):
     return AdvancedVectorService(mock_db_client)
@@ -76,8 +82,8 @@ async def test_compute_clusters(vector_service, mock_db_client):
         {"id": "mem:4", "embedding": [0.2, 0.8]},
     ]
 
+    mock_db_client.iter_memories = _stream(memories)
     conn = mock_db_client.get_connection.return_value.__aenter__.return_value
-    conn.query.return_value = memories
     # create returns a list of created records usually, or a single record dict
     # adjusting side_effect to return list of single record as per SurrealDBClient.create behavior which might return a list
     # But checking the code, code expects created[0]["id"]
@@ -91,16 +97,17 @@ async def test_compute_clusters(vector_service, mock_db_client):
 
     # Check calls
     assert conn.create.call_count == 2
-    assert conn.query.call_count >= 2 # Select + Delete + Updates
+    assert conn.query.call_count >= 3 # Delete + assignments + cluster stats
 
 @pytest.mark.asyncio
 async def test_detect_drift(vector_service, mock_db_client):
     """Test Strategy 80: Drift Detection"""
     vectors = [{"embedding": [1.0, 0.0]}, {"embedding": [0.9, 0.1]}]
+    mock_db_client.iter_memories = _stream(vectors)
     conn = mock_db_client.get_connection.return_value.__aenter__.return_value
 
-    # First call returns memories, second call returns NO previous stats
-    conn.query.side_effect = [vectors, []]
+    # Memories are streamed; the only query returns NO previous stats
+    conn.query.side_effect = [[]]
 
     result = await vector_service.detect_drift()
 
@@ -109,7 +116,6 @@ async def test_detect_drift(vector_service, mock_db_client):
 
     # Test with history
     conn.query.side_effect = [
-        vectors,
         [{"mean_embedding": [0.0, 1.0]}] # Previous mean far away
     ]
 
@@ -0,0 +1,147 @@
+import asyncio
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+
+from khala.infrastructure.gemini.cost_ledger import ROLLUPS_FILE, CostLedger
+from khala.infrastructure.gemini.cost_tracker import CostRecord, CostTracker
+from khala.infrastructure.gemini.models import ModelRegistry, ModelTier
+
+
+def _segment_lines(directory):
+    lines = []
+    for name in sorted(os.listdir(directory)):
+        if name.startswith("segment-"):
+            with open(os.path.join(directory, name)) as f:
+                lines.extend(f.read().splitlines())
+    return lines
+
+
+def _record(days_ago: int, model_id="gemini-2.0-flash", tier=ModelTier.FAST, tokens=1000) -> CostRecord:
+    return CostRecord(
+        timestamp=datetime.now(timezone.utc) - timedelta(days=days_ago),
+        model_id=model_id,
+        model_tier=tier,
+        input_tokens=tokens,
+        output_tokens=0,
+        total_tokens=tokens,
+        cost_usd=Decimal("0.01"),
+        response_time_ms=10.0,
+    )
+
+
+@pytest.mark.asyncio
+async def test_calls_are_written_in_background_batches(tmp_path):
+    directory = str(tmp_path / "ledger")
+    tracker = CostTracker(persistence_path=directory, flush_interval=0.05)
+    smart = ModelRegistry.get_model("gemini-3-pro-preview")
+    fast = ModelRegistry.get_model("gemini-2.0-flash")
+
+    for i in range(20):
+        tracker.record_call(smart if i % 2 else fast, 100, 50, 10.0, success=i != 3)
+
+    # Summaries come from the rollups before anything reaches the disk
+    assert not os.path.exists(directory)
+    summary = tracker.get_daily_summary()
+    assert summary.total_calls == 20 and summary.failed_calls == 1
+    assert set(summary.cost_by_tier) == {ModelTier.SMART, ModelTier.FAST}
+
+    await asyncio.sleep(0.2)
+    assert len(_segment_lines(directory)) == 20
+    assert tracker.ledger.stats["batches"] == 1
+    with open(os.path.join(directory, ROLLUPS_FILE)) as f:
+        state = json.load(f)
+    assert sum(b["calls"] for b in state["days"][summary.start_time.date().isoformat()].values()) == 20
+    tracker.close()
+
+
+def test_startup_reads_rollups_instead_of_records(tmp_path, monkeypatch):
+    directory = str(tmp_path / "ledger")
+    tracker = CostTracker(persistence_path=directory, max_batch=64)
+    for i in range(300):
+        tracker.add_record(_record(days_ago=i % 3))
+    tracker.close()
+
+    read = []
+    original = CostLedger._read_rows
+    monkeypatch.setattr(CostLedger, "_read_rows", staticmethod(
+        lambda path, start, truncate: read.append(path) or original(path, start, truncate)
+    ))
+    reloaded = CostTracker(persistence_path=directory)
+
+    assert read == [os.path.join(directory, "segment-000001.jsonl")]
+    assert reloaded.ledger.stats["replayed"] == 0
+    assert reloaded.ledger.total_calls == 300
+    assert reloaded.get_daily_summary().total_calls == 100
+    assert reloaded.get_daily_summary().total_cost == Decimal("1.00")
+    assert reloaded.cost_records == []
+    reloaded.close()
+
+
+def test_rows_after_the_watermark_are_replayed(tmp_path):
+    directory = str(tmp_path / "ledger")
+    tracker = CostTracker(persistence_path=directory)
+    tracker.add_record(_record(days_ago=0))
+    tracker.close()
+
+    # A batch appended without its rollups, followed by a torn write
+    segment = os.path.join(directory, "segment-000001.jsonl")
+    row = json.loads(_segment_lines(directory)[0])
+    with open(segment, "a") as f:
+        f.write(json.dumps(row) + "\n" + json.dumps(row) + "\n" + '{"timestamp": "20')
+
+    reloaded = CostTracker(persistence_path=directory)
+    assert reloaded.ledger.stats["replayed"] == 2
+    assert reloaded.get_daily_summary().total_calls == 3
+    assert len(_segment_lines(directory)) == 3
+
+    reloaded.add_record(_record(days_ago=0))
+    reloaded.close()
+    again = CostTracker(persistence_path=directory)
+    assert again.ledger.stats["replayed"] == 0
+    assert again.get_daily_summary().total_calls == 4
+    again.close()
+
+
+def test_legacy_json_file_is_imported(tmp_path):
+    legacy = tmp_path / "costs.json"
+    legacy.write_text(json.dumps([
+        {
+            "timestamp": datetime.now(timezone.utc).isoformat(), "model_id": "gemini-3-pro-preview",
+            "model_tier": "smart", "input_tokens": 10, "output_tokens": 5, "total_tokens": 15,
+            "cost_usd": "0.00150000", "response_time_ms": 12.0, "task_type": "generation",
+            "success": True, "error_message": None,
+        },
+        {"timestamp": "not a record"},
+    ]))
+    directory = str(tmp_path / "ledger")
+    tracker = CostTracker(persistence_path=directory)
+    tracker.load_from_file(str(legacy))
+
+    assert tracker.get_monthly_summary().cost_by_tier == {ModelTier.SMART: Decimal("0.00150000")}
+    assert len(_segment_lines(directory)) == 1
+    tracker.close()
+
+
+def test_retention_drops_rollups_and_old_segments(tmp_path):
+    directory = str(tmp_path / "ledger")
+    tracker = CostTracker(persistence_path=directory, max_batch=1)
+    tracker.ledger.segment_max_bytes = 1  # One segment per batch
+    for days_ago in (40, 35, 1, 0):
+        tracker.add_record(_record(days_ago))
+    tracker.save_to_file()
+    assert len([n for n in os.listdir(directory) if n.startswith("segment-")]) == 4
+
+    removed = tracker.clear_old_records(days_to_keep=30)
+    tracker.save_to_file()
+
+    assert removed == 2
+    assert len(tracker.cost_records) == 2
+    assert len(_segment_lines(directory)) == 2
+    tracker.close()
+    reloaded = CostTracker(persistence_path=directory)
+    assert reloaded.ledger.total_calls == 2
+    reloaded.close()
@@ -0,0 +1,70 @@
+import pytest
+from unittest.mock import patch
+
+from khala.infrastructure.cache.cache_manager import L1MemoryCache
+
+
+@pytest.mark.asyncio
+async def test_lru_evicts_least_recently_used():
+    cache = L1MemoryCache(max_memory_mb=1, ttl_seconds=300)
+    await cache.put("a", "1")
+    await cache.put("b", "2")
+    await cache.put("c", "3")
+    per_item = cache.cache["a"].size_bytes
+    cache.max_memory_bytes = per_item * 3
+
+    # Touch "a" so "b" becomes the LRU entry
+    assert await cache.get("a") == "1"
+    await cache.put("d", "4")
+
+    assert await cache.get("b") is None
+    assert await cache.get("a") == "1"
+    assert await cache.get("d") == "4"
+    assert cache.evictions == 1
+    assert cache.total_size_bytes == per_item * 3
+
+
+@pytest.mark.asyncio
+async def test_overwrite_keeps_size_accounting():
+    cache = L1MemoryCache(max_memory_mb=1, ttl_seconds=300)
+    await cache.put("k", "v1")
+    size = cache.total_size_bytes
+    await cache.put("k", "v2")
+
+    assert cache.total_size_bytes == size
+    assert len(cache.cache) == 1
+    assert await cache.get("k") == "v2"
+
+
+@pytest.mark.asyncio
+async def test_ttl_expiry_via_heap():
+    cache = L1MemoryCache(max_memory_mb=1, ttl_seconds=10)
+    with patch("khala.infrastructure.cache.cache_manager.time.monotonic", return_value=100.0):
+        await cache.put("short", "x", ttl_seconds=1)
+        await cache.put("long", "y")
+
+    with patch("khala.infrastructure.cache.cache_manager.time.monotonic", return_value=105.0):
+        removed = cache._purge_expired()
+        assert removed == 1
+        assert "short" not in cache.cache
+        assert await cache.get("long") == "y"
+
+    with patch("khala.infrastructure.cache.cache_manager.time.monotonic", return_value=111.0):
+        assert await cache.get("long") is None
+    assert cache.total_size_bytes == 0
+    assert cache.expirations == 2
+
+
+@pytest.mark.asyncio
+async def test_stale_heap_entries_are_skipped_and_compacted():
+    cache = L1MemoryCache(max_memory_mb=1, ttl_seconds=300)
+    for _ in range(500):
+        await cache.put("same", "v")
+
+    assert len(cache.cache) == 1
+    assert len(cache._expiry_heap) <= cache.HEAP_COMPACTION_FACTOR + 64 + 1
+    assert cache._purge_expired() == 0
+
+    assert await cache.delete("same") is True
+    assert await cache.delete("same") is False
+    assert cache.total_size_bytes == 0
@@ -0,0 +1,113 @@
+import asyncio
+import pytest
+
+from khala.infrastructure.cache.cache_manager import CacheLevel, CacheManager
+from khala.infrastructure.cache.single_flight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_load():
+    flight = SingleFlight()
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "value"
+
+    results = await asyncio.gather(*(flight.do("k", loader) for _ in range(50)))
+
+    assert results == ["value"] * 50
+    assert calls == 1
+    assert flight.get_stats()["coalesced"] == 49
+    assert not flight.in_flight("k")
+
+
+@pytest.mark.asyncio
+async def test_errors_propagate_to_every_waiter_and_are_not_cached():
+    flight = SingleFlight()
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    results = await asyncio.gather(*(flight.do("k", failing) for _ in range(3)), return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+    async def ok():
+        return 1
+
+    assert await flight.do("k", ok) == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelling_one_caller_does_not_abort_the_load():
+    flight = SingleFlight()
+
+    async def loader():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    first = asyncio.create_task(flight.do("k", loader))
+    second = asyncio.create_task(flight.do("k", loader))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    assert await second == "done"
+
+
+@pytest.mark.asyncio
+async def test_get_or_compute_coalesces_misses():
+    manager = CacheManager()
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"rows": [1, 2, 3]}
+
+    results = await asyncio.gather(*(
+        manager.get_or_compute("search:q", loader, levels=[CacheLevel.L1]) for _ in range(20)
+    ))
+
+    assert calls == 1
+    assert all(r == {"rows": [1, 2, 3]} for r in results)
+    # Subsequent call is a plain L1 hit
+    assert await manager.get_or_compute("search:q", loader, levels=[CacheLevel.L1]) == {"rows": [1, 2, 3]}
+    assert calls == 1
+    assert manager.get_metrics()["single_flight"]["loader_calls"] == 1
+
+
+@pytest.mark.asyncio
+async def test_stale_while_revalidate_serves_old_value_and_refreshes_once():
+    manager = CacheManager()
+    version = 0
+
+    async def loader():
+        nonlocal version
+        version += 1
+        await asyncio.sleep(0.01)
+        return f"v{version}"
+
+    assert await manager.get_or_compute("k", loader, ttl_seconds=10, stale_ttl_seconds=60,
+                                        levels=[CacheLevel.L1]) == "v1"
+
+    # Age the entry past its TTL but keep it inside the stale window
+    item = manager.l1_cache.cache["k"]
+    item.fresh_until -= 15
+    item.expires_at -= 15
+
+    stale = await asyncio.gather(*(
+        manager.get_or_compute("k", loader, ttl_seconds=10, stale_ttl_seconds=60, levels=[CacheLevel.L1])
+        for _ in range(5)
+    ))
+    assert stale == ["v1"] * 5
+    await asyncio.gather(*manager._refresh_tasks)
+    assert await manager.l1_cache.get("k") == "v2"
+
+    metrics = manager.get_metrics()["single_flight"]
+    assert version == 2
+    assert metrics["stale_served"] == 5
+    assert metrics["background_refreshes"] == 1
@@ -75,11 +75,9 @@ class TestCostTracker:
     @pytest.fixture
     def tracker(self, tmp_path):
         """Create a cost tracker with a test budget."""
-        persistence_path = tmp_path / "costs.json"
-        tracker = CostTracker(budget_usd_per_month=Decimal("100.00"))
-        tracker.persistence_path = str(persistence_path)
-        tracker.cost_records = [] # Ensure empty start
-        return tracker
+        tracker = CostTracker(budget_usd_per_month=Decimal("100.00"), persistence_path=str(tmp_path / "cost_ledger"))
+        yield tracker
+        tracker.close()
     
     def test_cost_record_creation(self, tracker):
         """Test creating a valid cost record."""
@@ -225,7 +223,7 @@ class TestCostTracker:
         )
         
         # Simulate having these old records
-        tracker.cost_records.append(old_record_1)
+        tracker.add_record(old_record_1)
         
         # Clear old records
         records_removed = tracker.clear_old_records(days_to_keep=29)
@@ -1,7 +1,7 @@
 
 import pytest
 import asyncio
-from unittest.mock import AsyncMock, Mock, patch, MagicMock
+from unittest.mock import AsyncMock, patch, MagicMock
 from khala.infrastructure.background.jobs.job_processor import JobProcessor, JobDefinition, JobPriority, JobResult, JobStatus
 from khala.infrastructure.background.scheduler import BackgroundScheduler
 
@@ -93,23 +93,13 @@ async def test_job_execution_deduplication(job_processor):
 
 @pytest.mark.asyncio
 async def test_job_execution_decay_scan_all(job_processor):
-    # Prepare the mock connection and context manager for THIS specific test
-    mock_conn = AsyncMock()
-    mock_conn.query.return_value = [{"result": [{"id": "memory:1"}, {"id": "memory:2"}]}]
-
-    class AsyncContextManager:
-        async def __aenter__(self):
-            return mock_conn
-        async def __aexit__(self, *args):
-            pass
-
-    # Override the fixture's setup
-    job_processor.db_client.get_connection = Mock(return_value=AsyncContextManager())
-
     # Mock TemporalAnalysisService
     with patch('khala.infrastructure.background.jobs.job_processor.TemporalAnalysisService') as MockTemporal:
         mock_temporal_instance = MockTemporal.return_value
-        mock_temporal_instance.batch_process_decay = AsyncMock(return_value={"processed": 2})
+        mock_temporal_instance.process_decay_stream = AsyncMock(
+            return_value={"processed": 7000, "promoted": 3, "archived": 40, "errors": 0}
+        )
+        mock_temporal_instance.batch_process_decay = AsyncMock()
 
         job = JobDefinition(
             job_id="test_decay",
@@ -123,7 +113,7 @@ async def test_job_execution_decay_scan_all(job_processor):
         result = await job_processor._execute_decay_scoring(job)
 
         assert result.success is True
-        assert result.result["processed"] == 2
-        mock_temporal_instance.batch_process_decay.assert_awaited_once()
-        # Check that DB was queried for IDs
-        mock_conn.query.assert_awaited()
+        # The scan streams every memory instead of stopping at the old 5000-id cap
+        assert result.result["processed"] == 7000
+        mock_temporal_instance.process_decay_stream.assert_awaited_once_with(user_id=None)
+        mock_temporal_instance.batch_process_decay.assert_not_awaited()
@@ -54,7 +54,7 @@ class TestSurrealDBClient:
             await client.initialize()
             
             assert client._initialized
-            assert len(client._connection_pool) == 1
+            assert client.pool.size == 1
             mock_conn.connect.assert_called_once()
             mock_conn.signin.assert_called_once_with({
                 "username": "test_user", 
@@ -74,7 +74,7 @@ class TestSurrealDBClient:
                 assert conn == mock_conn
             
             # Connection should be returned to pool
-            assert len(client._connection_pool) == 1
+            assert client.pool.size == 1
     
     @pytest.mark.asyncio
     async def test_create_memory(self, client):
@@ -97,7 +97,7 @@ class TestSurrealDBClient:
             # Mock initialize to avoid real connection attempt
             client.initialize = AsyncMock()
             client._initialized = True
-            client._connection_pool = [mock_conn]
+            client.pool.adopt(mock_conn)
 
             mock_conn.query.side_effect = [[], [{"id": memory.id}]]
             mock_surreal.return_value = mock_conn
@@ -338,12 +338,13 @@ class TestSurrealDBClient:
         # Add some mock connections to pool
         mock_conn1 = AsyncMock()
         mock_conn2 = AsyncMock()
-        client._connection_pool = [mock_conn1, mock_conn2]
+        client.pool.adopt(mock_conn1)
+        client.pool.adopt(mock_conn2)
         client._initialized = True
         
         await client.close()
         
-        assert len(client._connection_pool) == 0
+        assert client.pool.size == 0
         assert not client._initialized
         mock_conn1.close.assert_called_once()
         mock_conn2.close.assert_called_once()
@@ -49,7 +49,7 @@ class TestTraceability:
 
             client.initialize = AsyncMock()
             client._initialized = True
-            client._connection_pool = [mock_conn]
+            client.pool.adopt(mock_conn)
 
             mock_conn.query.side_effect = [[], [{"id": memory.id}]]
             mock_surreal.return_value = mock_conn
@@ -96,7 +96,7 @@ class TestTraceability:
 
             client.initialize = AsyncMock()
             client._initialized = True
-            client._connection_pool = [mock_conn]
+            client.pool.adopt(mock_conn)
 
             mock_conn.query.side_effect = [[], [{"id": memory.id}]]
             mock_surreal.return_value = mock_conn
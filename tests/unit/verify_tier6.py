@@ -93,17 +93,17 @@ async def verify_tier6_features():
             task_type="generation"
         )
         
-        # Verify file was created
-        costs_file = os.path.join(os.path.dirname(tracker.persistence_path), "costs.json")
-        assert os.path.exists(costs_file)
-        print(f"✅ Costs file created at {costs_file}")
+        # Verify ledger was written
+        tracker.save_to_file()
+        assert os.path.exists(os.path.join(tracker.persistence_path, "rollups.json"))
+        print(f"✅ Cost ledger written at {tracker.persistence_path}")
         
         # Verify loading
         new_tracker = CostTracker()
-        assert len(new_tracker.cost_records) > 0
-        last_record = new_tracker.cost_records[-1]
-        assert last_record.model_id == "gemini-3-flash-preview"
-        print("✅ Costs loaded successfully from file")
+        summary = new_tracker.get_daily_summary()
+        assert summary.total_calls > 0
+        assert "gemini-3-flash-preview" in summary.cost_by_model
+        print("✅ Cost rollups loaded successfully from ledger")
         
     except Exception as e:
         print(f"❌ Cost persistence verification failed: {e}")